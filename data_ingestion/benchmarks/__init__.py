@@ -0,0 +1,4 @@
+"""
+Benchmarks for the data ingestion and feature engineering system
+"""
+__version__ = '1.0.0'
@@ -0,0 +1,207 @@
+"""
+Import-time benchmark for every entry point
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter for
+each entry point, records the cumulative import time and the heaviest
+dependencies, and stores the results as JSON so regressions show up between
+versions.
+
+Usage:
+    python benchmarks/import_time.py [--runs N] [--compare]
+"""
+import argparse
+import json
+import logging
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+
+# Entry point module -> directory it is run from
+ENTRY_POINTS = {
+    'ingestion_pipeline': BASE_DIR,
+    'view_data': BASE_DIR,
+    'validate_system': BASE_DIR,
+    'generate_sample_data': BASE_DIR,
+    'quick_sample_data': BASE_DIR,
+    'feature_pipeline': BASE_DIR / 'feature_engineering',
+    'quick_feature_pipeline': BASE_DIR / 'feature_engineering',
+    'create_labels': BASE_DIR / 'feature_engineering',
+    'train_models': BASE_DIR / 'feature_engineering',
+    'validate_training_data': BASE_DIR / 'feature_engineering',
+    'decision_engine': BASE_DIR / 'models',
+}
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """
+    Parse `-X importtime` output
+
+    Args:
+        stderr: Raw stderr of the interpreter
+
+    Returns:
+        List of {'module', 'self_us', 'cumulative_us', 'depth'} dicts
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3:
+            continue
+
+        name = parts[2].rstrip()
+        stripped = name.lstrip()
+        rows.append({
+            'module': stripped,
+            'self_us': int(parts[0]),
+            'cumulative_us': int(parts[1]),
+            'depth': (len(name) - len(stripped)) // 2
+        })
+
+    return rows
+
+
+def measure_entry_point(module: str, cwd: Path, runs: int = 3, top: int = 10) -> Dict:
+    """
+    Measure import time of a single entry point
+
+    Args:
+        module: Module name to import
+        cwd: Directory the module is imported from
+        runs: Number of fresh interpreters to average over
+        top: Number of heaviest top-level dependencies to record
+
+    Returns:
+        Dictionary with timing results
+    """
+    totals = []
+    heaviest = {}
+    error = None
+
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+            cwd=str(cwd), capture_output=True, text=True
+        )
+
+        if proc.returncode != 0:
+            error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'import failed'
+            break
+
+        rows = parse_importtime(proc.stderr)
+        target_idx = [i for i, r in enumerate(rows) if r['module'] == module and r['depth'] == 0]
+        if not target_idx:
+            error = f"{module} not found in importtime output"
+            break
+
+        totals.append(rows[target_idx[-1]]['cumulative_us'])
+
+        # Direct dependencies are the depth-1 rows printed just before the target
+        for row in reversed(rows[:target_idx[-1]]):
+            if row['depth'] == 0:
+                break
+            if row['depth'] == 1:
+                heaviest[row['module']] = max(heaviest.get(row['module'], 0), row['cumulative_us'])
+
+    if error:
+        return {'module': module, 'status': 'FAILED', 'error': error}
+
+    top_deps = sorted(heaviest.items(), key=lambda x: x[1], reverse=True)[:top]
+
+    return {
+        'module': module,
+        'status': 'SUCCESS',
+        'runs': runs,
+        'median_ms': round(statistics.median(totals) / 1000, 2),
+        'min_ms': round(min(totals) / 1000, 2),
+        'heaviest_imports_ms': {name: round(us / 1000, 2) for name, us in top_deps}
+    }
+
+
+def load_previous_results() -> Dict:
+    """Load the most recent saved results, if any"""
+    files = sorted(RESULTS_DIR.glob('import_times_*.json'))
+    if not files:
+        return {}
+
+    with open(files[-1]) as f:
+        return json.load(f)
+
+
+def run_benchmark(runs: int = 3, compare: bool = False) -> Dict:
+    """
+    Run the import-time benchmark for all entry points
+
+    Args:
+        runs: Number of runs per entry point
+        compare: Print deltas against the previous saved results
+
+    Returns:
+        Results dictionary (also saved to benchmarks/results/)
+    """
+    logger.info("="*80)
+    logger.info("IMPORT TIME BENCHMARK")
+    logger.info("="*80)
+
+    previous = load_previous_results() if compare else {}
+    previous_times = {r['module']: r.get('median_ms') for r in previous.get('entry_points', [])}
+
+    results = {
+        'timestamp': datetime.now().isoformat(),
+        'python': sys.version.split()[0],
+        'entry_points': []
+    }
+
+    logger.info(f"\n{'Entry Point':<26} {'Median (ms)':>12} {'Min (ms)':>10} {'Delta':>10}")
+    logger.info("-" * 80)
+
+    for module, cwd in ENTRY_POINTS.items():
+        result = measure_entry_point(module, cwd, runs=runs)
+        results['entry_points'].append(result)
+
+        if result['status'] != 'SUCCESS':
+            logger.info(f"{module:<26} {'FAILED':>12}  {result['error']}")
+            continue
+
+        delta = ''
+        if previous_times.get(module):
+            delta = f"{result['median_ms'] - previous_times[module]:+.1f}"
+
+        logger.info(f"{module:<26} {result['median_ms']:>12.1f} {result['min_ms']:>10.1f} {delta:>10}")
+
+    # Save results
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    output_file = RESULTS_DIR / f"import_times_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output_file, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    logger.info(f"\n✓ Results saved to: {output_file}")
+    logger.info("="*80)
+
+    return results
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='Import-time benchmark for entry points')
+    parser.add_argument('--runs', type=int, default=3, help='Runs per entry point')
+    parser.add_argument('--compare', action='store_true',
+                        help='Show deltas against the previous results')
+    args = parser.parse_args()
+
+    run_benchmark(runs=args.runs, compare=args.compare)
+
+
+if __name__ == '__main__':
+    main()
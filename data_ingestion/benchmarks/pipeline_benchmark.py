@@ -0,0 +1,383 @@
+"""
+End-to-end benchmark for the data pipeline stages
+
+Builds synthetic datasets with the sample data generators and times every
+stage on them:
+
+    process_data        DataProcessor.process_data
+    features.<module>   each feature module's calculate()
+    create_all_labels   SmartLabeler.create_all_labels
+    train_models        ModelTrainer direction/volatility/no-trade models
+    process_features    TradingDecisionEngine.process_features
+
+Wall time and memory (tracemalloc peak and the RSS change across the stage)
+are recorded per stage and saved as JSON so regressions show up between versions.
+
+Usage:
+    python benchmarks/pipeline_benchmark.py [--sizes 10000 100000] [--compare]
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import logging
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+CACHE_DIR = Path(__file__).resolve().parent / 'cache'
+
+sys.path.insert(0, str(BASE_DIR))
+sys.path.append(str(BASE_DIR / 'feature_engineering'))
+sys.path.append(str(BASE_DIR / 'models'))
+
+from generate_sample_data import generate_realistic_ohlcv
+from instrumentation import current_rss_mb
+from processor import DataProcessor
+from trend_features import TrendFeatures
+from momentum_features import MomentumFeatures
+from volatility_features import VolatilityFeatures
+from market_structure_features import MarketStructureFeatures
+from candle_features import CandleFeatures
+from time_features import TimeFeatures
+from liquidity_features import LiquidityFeatures
+from create_labels import SmartLabeler
+
+# force=True: the imported modules configure logging on import
+logging.basicConfig(level=logging.INFO, format='%(message)s', force=True)
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+
+# Same order as FeatureEngineeringPipeline.engineer_features
+FEATURE_MODULES = [
+    ('trend', TrendFeatures),
+    ('momentum', MomentumFeatures),
+    ('volatility', VolatilityFeatures),
+    ('market_structure', MarketStructureFeatures),
+    ('candle', CandleFeatures),
+    ('time', TimeFeatures),
+    ('liquidity', LiquidityFeatures)
+]
+
+# Stages above these sizes are skipped unless --no-limits is given
+# (row-wise Python loops make them impractical on very large datasets)
+STAGE_ROW_LIMITS = {
+    'create_all_labels': 1_000_000,
+    'train_models': 1_000_000,
+    'process_features': 1_000_000
+}
+
+META_COLUMNS = ['timestamp', 'symbol', 'timeframe']
+RAW_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+
+def measure(fn: Callable, trace_memory: bool = True) -> Tuple[Any, Dict]:
+    """
+    Run a stage and measure it
+
+    Args:
+        fn: Zero-argument callable
+        trace_memory: Track peak Python allocations with tracemalloc
+            (adds overhead to allocation-heavy code)
+
+    Returns:
+        (result, measurement dict)
+    """
+    gc.collect()
+    if trace_memory:
+        tracemalloc.start()
+
+    rss_before = current_rss_mb()
+    started = time.perf_counter()
+    try:
+        # Training prints classification reports; deprecation and convergence
+        # warnings would drown the results table
+        with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            result = fn()
+        error = None
+    except Exception as e:
+        result = None
+        error = f"{type(e).__name__}: {e}"
+    elapsed = time.perf_counter() - started
+
+    measurement = {
+        'status': 'SUCCESS' if error is None else 'FAILED',
+        'wall_seconds': round(elapsed, 4),
+        'rss_delta_mb': round(current_rss_mb() - rss_before, 1)
+    }
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        measurement['peak_traced_mb'] = round(peak / 1024 / 1024, 1)
+    if error:
+        measurement['error'] = error
+
+    return result, measurement
+
+
+def build_dataset(rows: int, seed: int = 42, use_cache: bool = True) -> pd.DataFrame:
+    """
+    Build a raw 1-minute OHLCV dataset with the sample data generator
+
+    A small share of candles is dropped and duplicated so process_data has
+    gaps to fill and duplicates to remove. Datasets are cached as parquet.
+
+    Args:
+        rows: Number of candles
+        seed: Seed for the gap/duplicate injection
+        use_cache: Reuse benchmarks/cache/ohlcv_<rows>.parquet
+
+    Returns:
+        Raw DataFrame with timestamp and OHLCV columns
+    """
+    cache_file = CACHE_DIR / f'ohlcv_{rows}.parquet'
+    if use_cache and cache_file.exists():
+        return pd.read_parquet(cache_file)
+
+    logger.info(f"Generating {rows:,} candles...")
+    df = generate_realistic_ohlcv(40000.0, rows)
+    df.insert(0, 'timestamp', pd.date_range('2015-01-01', periods=rows, freq='1min'))
+
+    rng = np.random.default_rng(seed)
+    keep = rng.random(rows) >= 0.005
+    duplicates = df[rng.random(rows) < 0.001]
+    df = pd.concat([df[keep], duplicates]).sort_values('timestamp', kind='stable')
+    df = df.reset_index(drop=True)
+
+    if use_cache:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(cache_file, index=False)
+
+    return df
+
+
+def _train_models(trainer, df: pd.DataFrame, feature_cols: List[str]) -> Dict:
+    """Train all three models on an 80/20 time split"""
+    split = int(len(df) * 0.8)
+    X_train, X_test = df[feature_cols].iloc[:split], df[feature_cols].iloc[split:]
+
+    models = {}
+    for name, train, label in [
+        ('direction', trainer.train_direction_model, 'label_direction'),
+        ('volatility', trainer.train_volatility_model, 'label_volatility'),
+        ('notrade', trainer.train_notrade_model, 'label_no_trade')
+    ]:
+        model, _ = train(X_train, df[label].iloc[:split], X_test, df[label].iloc[split:],
+                         'Benchmark')
+        models[name] = model
+
+    return models
+
+
+def _build_engine(models: Dict, models_dir: Path):
+    """Save trained models and load them into a decision engine"""
+    import joblib
+    from decision_engine import TradingDecisionEngine
+
+    paths = {}
+    for name, model in models.items():
+        path = models_dir / f'{name}_model_benchmark.pkl'
+        joblib.dump(model, path)
+        paths[f'{name}_model_path'] = str(path)
+
+    return TradingDecisionEngine(**paths)
+
+
+def benchmark_size(rows: int, trace_memory: bool = True, use_limits: bool = True,
+                   use_cache: bool = True, work_dir: Optional[Path] = None) -> Dict:
+    """
+    Run every stage on a dataset of the given size
+
+    Args:
+        rows: Dataset size
+        trace_memory: Track peak Python allocations per stage
+        use_limits: Skip stages above STAGE_ROW_LIMITS
+        use_cache: Reuse cached generated datasets
+        work_dir: Directory for trained models and plots
+
+    Returns:
+        {stage: measurement} for this size
+    """
+    stages = {}
+
+    def skipped(stage: str) -> bool:
+        limit = STAGE_ROW_LIMITS.get(stage)
+        if use_limits and limit is not None and rows > limit:
+            stages[stage] = {'status': 'SKIPPED', 'reason': f'rows > {limit:,}'}
+            return True
+        return False
+
+    def failed(stage: str) -> bool:
+        return stages[stage]['status'] != 'SUCCESS'
+
+    raw = build_dataset(rows, use_cache=use_cache)
+
+    # 1. Processing
+    result, stages['process_data'] = measure(
+        lambda: DataProcessor().process_data(raw, 'BENCH', '1m', 1), trace_memory)
+    if failed('process_data'):
+        return stages
+    df = result[0]
+    del raw
+
+    # 2. Feature modules (sequential, each builds on the previous output)
+    for name, module in FEATURE_MODULES:
+        stage = f'features.{name}'
+        df, stages[stage] = measure(lambda: module().calculate(df), trace_memory)
+        if failed(stage):
+            return stages
+
+    df = df.replace([np.inf, -np.inf], np.nan).dropna()
+    df = df.drop(columns=RAW_COLUMNS).reset_index(drop=True)
+
+    # 3. Labels
+    if skipped('create_all_labels'):
+        return stages
+    df, stages['create_all_labels'] = measure(
+        lambda: SmartLabeler().create_all_labels(df), trace_memory)
+    if failed('create_all_labels'):
+        return stages
+    df = df.reset_index(drop=True)
+    feature_cols = [col for col in df.columns
+                    if not col.startswith('label_') and col not in META_COLUMNS]
+
+    # 4. Training
+    if skipped('train_models'):
+        return stages
+    from train_models import ModelTrainer
+    trainer = ModelTrainer(data_path=str(work_dir / 'unused.parquet'), models_dir=str(work_dir))
+    trainer.feature_cols = feature_cols
+    models, stages['train_models'] = measure(
+        lambda: _train_models(trainer, df, feature_cols), trace_memory)
+    if failed('train_models'):
+        return stages
+
+    # 5. Signals
+    if skipped('process_features'):
+        return stages
+    engine = _build_engine(models, work_dir)
+    _, stages['process_features'] = measure(
+        lambda: engine.process_features(df[feature_cols], timestamps=df['timestamp']),
+        trace_memory)
+
+    return stages
+
+
+def load_previous_results() -> Dict:
+    """Load the most recent saved results, if any"""
+    files = sorted(RESULTS_DIR.glob('pipeline_*.json'))
+    if not files:
+        return {}
+
+    with open(files[-1]) as f:
+        return json.load(f)
+
+
+def run_benchmark(sizes: List[int], trace_memory: bool = True, use_limits: bool = True,
+                  use_cache: bool = True, compare: bool = False) -> Dict:
+    """
+    Run the pipeline benchmark for all dataset sizes
+
+    Args:
+        sizes: Dataset sizes (rows)
+        trace_memory: Track peak Python allocations per stage
+        use_limits: Skip slow stages above STAGE_ROW_LIMITS
+        use_cache: Reuse cached generated datasets
+        compare: Print deltas against the previous saved results
+
+    Returns:
+        Results dictionary (also saved to benchmarks/results/)
+    """
+    logger.info("="*80)
+    logger.info("PIPELINE BENCHMARK")
+    logger.info("="*80)
+
+    previous = load_previous_results() if compare else {}
+
+    results = {
+        'timestamp': datetime.now().isoformat(),
+        'python': sys.version.split()[0],
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'trace_memory': trace_memory,
+        'sizes': {}
+    }
+
+    # Stage logging would drown the results table
+    logging.getLogger().setLevel(logging.WARNING)
+    logger.setLevel(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            logger.info(f"\n{rows:,} rows")
+            logger.info(f"{'Stage':<28} {'Wall (s)':>10} {'Rows/s':>12} {'Peak (MB)':>10} "
+                        f"{'RSS Δ (MB)':>11} {'Delta':>10}")
+            logger.info("-" * 80)
+
+            stages = benchmark_size(rows, trace_memory=trace_memory, use_limits=use_limits,
+                                    use_cache=use_cache, work_dir=Path(tmp))
+            results['sizes'][str(rows)] = stages
+            previous_stages = previous.get('sizes', {}).get(str(rows), {})
+
+            for stage, result in stages.items():
+                if result['status'] != 'SUCCESS':
+                    logger.info(f"{stage:<28} {result['status']:>10}  "
+                                f"{result.get('reason') or result.get('error')}")
+                    continue
+
+                rate = rows / result['wall_seconds'] if result['wall_seconds'] > 0 else 0
+                peak = result.get('peak_traced_mb')
+                peak = f"{peak:.1f}" if peak is not None else '-'
+                delta = ''
+                if previous_stages.get(stage, {}).get('status') == 'SUCCESS':
+                    delta = f"{result['wall_seconds'] - previous_stages[stage]['wall_seconds']:+.2f}"
+
+                logger.info(f"{stage:<28} {result['wall_seconds']:>10.3f} {rate:>12,.0f} "
+                            f"{peak:>10} {result['rss_delta_mb']:>+11.1f} {delta:>10}")
+
+    # Save results
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    output_file = RESULTS_DIR / f"pipeline_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output_file, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    logger.info(f"\n✓ Results saved to: {output_file}")
+    logger.info("="*80)
+
+    return results
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='End-to-end pipeline stage benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='Dataset sizes in rows')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='Skip tracemalloc (lower overhead, RSS delta only)')
+    parser.add_argument('--no-limits', action='store_true',
+                        help='Run slow stages on every size')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Regenerate datasets instead of reusing benchmarks/cache')
+    parser.add_argument('--compare', action='store_true',
+                        help='Show deltas against the previous results')
+    args = parser.parse_args()
+
+    run_benchmark(args.sizes, trace_memory=not args.no_memory, use_limits=not args.no_limits,
+                  use_cache=not args.no_cache, compare=args.compare)
+
+
+if __name__ == '__main__':
+    main()
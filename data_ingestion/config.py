@@ -1,6 +1,7 @@
 """
 Configuration for data ingestion system
 """
+import os
 from datetime import datetime, timedelta
 
 # Trading pairs to fetch
@@ -12,6 +13,20 @@ SYMBOLS = [
     'ETHUSD'
 ]
 
+# Trading calendar per symbol (see market_calendar.py): gaps are only filled
+# while the market is open. Unlisted symbols are treated as trading 24/7.
+SYMBOL_CALENDARS = {
+    'EURUSD': 'fx',
+    'GBPUSD': 'fx',
+    'USDJPY': 'fx',
+    'BTCUSD': 'crypto',
+    'ETHUSD': 'crypto',
+    'XAUUSD': 'futures',  # GC=F
+    'CRUDE': 'futures',   # CL=F
+    'GC=F': 'futures',
+    'CL=F': 'futures'
+}
+
 # Timeframes to fetch (in minutes)
 TIMEFRAMES = {
     '1m': 1,
@@ -28,15 +43,71 @@ START_DATE = END_DATE - timedelta(days=5*365)
 # Data source configuration
 DATA_SOURCE = 'yfinance'  # Using Yahoo Finance as reliable free source
 BACKUP_SOURCE = 'alpha_vantage'  # Backup if primary fails
+LOCAL_SOURCE_DIR = 'data/source'  # CSV/parquet files served by the 'local' source (offline runs)
+ALPHA_VANTAGE_API_KEY = os.environ.get('ALPHA_VANTAGE_API_KEY', '')
+FETCH_MAX_WORKERS = 4  # Concurrent request windows per symbol/timeframe
+
+# Response cache (response_cache.py): compressed Arrow files per request window
+FETCH_CACHE = True
+FETCH_CACHE_DIR = 'data/cache/responses'
+FETCH_CACHE_MAX_MB = 2048  # Least recently used files are evicted beyond this size
+FETCH_CACHE_SETTLE_HOURS = 24  # Windows ending earlier than this are final and never expire
+FETCH_CACHE_RECENT_TTL_SECONDS = 900  # TTL of more recent windows
+FETCH_CACHE_COMPRESSION = 'zstd'
+
+# Pipeline symbol -> Yahoo Finance ticker
+YFINANCE_SYMBOL_MAP = {
+    'EURUSD': 'EURUSD=X',
+    'GBPUSD': 'GBPUSD=X',
+    'USDJPY': 'USDJPY=X',
+    'BTCUSD': 'BTC-USD',
+    'ETHUSD': 'ETH-USD',
+    'XAUUSD': 'GC=F',  # Gold futures
+    'CRUDE': 'CL=F'     # Crude oil futures
+}
 
 # Output configuration
 OUTPUT_FORMAT = 'parquet'  # More efficient than CSV
 OUTPUT_DIR = 'data'
 LOG_DIR = 'logs'
+QUERY_ENGINE = 'arrow'  # query.py engine: 'arrow' (pyarrow.dataset) or 'duckdb' (pip install duckdb)
+
+# Data quality scanner (quality_scanner.py)
+QUALITY_GAP_FACTOR = 1.5  # A step longer than this many intervals is a gap
+QUALITY_STALE_RUN = 5  # Min identical closes in a row reported as a stale run
+QUALITY_OUTLIER_MAD = 10.0  # Outlier return: this many robust std devs from the median
+QUALITY_REPORT = 'logs/quality_report.json'
 
 # Data validation thresholds
 MAX_MISSING_CANDLES_PERCENT = 1.0  # Max 1% missing data allowed
 MAX_SPREAD_PERCENT = 5.0  # Max 5% spread allowed
+FLAG_FILLED_CANDLES = False  # Add a 'filled' column marking forward-filled candles
+
+# Tick aggregation (tick_aggregator.py)
+TICK_ALLOWED_LATENESS_SECONDS = 2.0  # Out-of-order ticks within this lag are still merged
+TICK_FLUSH_CANDLES = 500  # Finished candles buffered per symbol/timeframe before writing
+
+# Instrumentation (per-stage timing/memory report in LOG_DIR)
+INSTRUMENT = False
+INSTRUMENT_PROFILE = False  # cProfile hotspots per stage
+INSTRUMENT_TRACE_MEMORY = False  # tracemalloc peak per stage (slower)
 
 # Required columns
 REQUIRED_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume', 'symbol', 'timeframe']
+
+# Live trading configuration
+# Rolling window kept per symbol for live features. EMAs/MACD run on O(1) state;
+# the longest fixed lookback is ~64 candles (ATR 14 + 50-candle volatility regime),
+# the rest leaves room for the last swing point
+LIVE_WINDOW_CANDLES = 300
+LIVE_WARMUP_CANDLES = 250  # Min candles before the first live signal (EMA 200 + margin)
+LIVE_HISTORY_CANDLES = 5000  # Deriv history per symbol (max 5000): seeds the window and the 4h features
+DERIV_APP_ID = '1089'
+DERIV_WS_URL = 'wss://ws.derivws.com/websockets/v3'
+DERIV_SYMBOL_MAP = {
+    'EURUSD': 'frxEURUSD',
+    'GBPUSD': 'frxGBPUSD',
+    'USDJPY': 'frxUSDJPY',
+    'BTCUSD': 'cryBTCUSD',
+    'ETHUSD': 'cryETHUSD'
+}
@@ -3,69 +3,72 @@ Candle pattern feature engineering
 """
 import pandas as pd
 import numpy as np
+from typing import List
 
+from feature_spec import Feature, FeatureGroup
+from kernels import run_length
 
-class CandleFeatures:
+
+class CandleFeatures(FeatureGroup):
     """Calculate candle pattern features"""
     
     def __init__(self, pinbar_wick_ratio: float = 2.0, engulfing_min_ratio: float = 1.0):
         self.pinbar_wick_ratio = pinbar_wick_ratio
         self.engulfing_min_ratio = engulfing_min_ratio
     
-    def calculate(self, df: pd.DataFrame) -> pd.DataFrame:
-        """
-        Calculate all candle features
-        
-        Args:
-            df: DataFrame with OHLCV data
+    def define(self) -> List[Feature]:
+        """Candle feature definitions"""
+        return [
+            # Basic candle components
+            Feature('body_size', lambda df: np.abs(df['close'] - df['open'])),
+            Feature('upper_wick', lambda df: df['high'] - np.maximum(df['open'], df['close'])),
+            Feature('lower_wick', lambda df: np.minimum(df['open'], df['close']) - df['low']),
+            Feature('total_range', lambda df: df['high'] - df['low']),
             
-        Returns:
-            DataFrame with candle features added
-        """
-        df = df.copy()
-        
-        # Basic candle components
-        df['body_size'] = np.abs(df['close'] - df['open'])
-        df['upper_wick'] = df['high'] - np.maximum(df['open'], df['close'])
-        df['lower_wick'] = np.minimum(df['open'], df['close']) - df['low']
-        df['total_range'] = df['high'] - df['low']
-        
-        # Ratios
-        df['body_range_ratio'] = df['body_size'] / (df['total_range'] + 1e-10)
-        df['upper_wick_ratio'] = df['upper_wick'] / (df['total_range'] + 1e-10)
-        df['lower_wick_ratio'] = df['lower_wick'] / (df['total_range'] + 1e-10)
-        
-        # Candle direction
-        df['bullish_candle'] = (df['close'] > df['open']).astype(int)
-        df['bearish_candle'] = (df['close'] < df['open']).astype(int)
-        df['doji'] = (df['body_size'] < df['total_range'] * 0.1).astype(int)
-        
-        # Candle patterns
-        df['hammer'] = self._detect_hammer(df)
-        df['shooting_star'] = self._detect_shooting_star(df)
-        df['bullish_engulfing'] = self._detect_bullish_engulfing(df)
-        df['bearish_engulfing'] = self._detect_bearish_engulfing(df)
-        df['pinbar_bullish'] = self._detect_pinbar_bullish(df)
-        df['pinbar_bearish'] = self._detect_pinbar_bearish(df)
-        df['inside_bar'] = self._detect_inside_bar(df)
-        df['outside_bar'] = self._detect_outside_bar(df)
-        
-        # Candle strength
-        df['candle_strength'] = df['body_size'] / df['body_size'].rolling(20).mean()
-        
-        # Consecutive candles
-        df['consecutive_bullish'] = self._count_consecutive_bullish(df)
-        df['consecutive_bearish'] = self._count_consecutive_bearish(df)
-        
-        # Gap detection
-        df['gap_up'] = (df['low'] > df['high'].shift(1)).astype(int)
-        df['gap_down'] = (df['high'] < df['low'].shift(1)).astype(int)
-        
-        # Wick dominance
-        df['upper_wick_dominant'] = (df['upper_wick'] > df['body_size'] * 2).astype(int)
-        df['lower_wick_dominant'] = (df['lower_wick'] > df['body_size'] * 2).astype(int)
-        
-        return df
+            # Ratios
+            Feature('body_range_ratio', lambda df: df['body_size'] / (df['total_range'] + 1e-10),
+                    ('body_size', 'total_range')),
+            Feature('upper_wick_ratio', lambda df: df['upper_wick'] / (df['total_range'] + 1e-10),
+                    ('upper_wick', 'total_range')),
+            Feature('lower_wick_ratio', lambda df: df['lower_wick'] / (df['total_range'] + 1e-10),
+                    ('lower_wick', 'total_range')),
+            
+            # Candle direction
+            Feature('bullish_candle', lambda df: (df['close'] > df['open']).astype(int)),
+            Feature('bearish_candle', lambda df: (df['close'] < df['open']).astype(int)),
+            Feature('doji', lambda df: (df['body_size'] < df['total_range'] * 0.1).astype(int),
+                    ('body_size', 'total_range')),
+            
+            # Candle patterns
+            Feature('hammer', self._detect_hammer, ('lower_wick', 'upper_wick', 'body_size')),
+            Feature('shooting_star', self._detect_shooting_star, ('lower_wick', 'upper_wick', 'body_size')),
+            Feature('bullish_engulfing', self._detect_bullish_engulfing, ('body_size',)),
+            Feature('bearish_engulfing', self._detect_bearish_engulfing, ('body_size',)),
+            Feature('pinbar_bullish', self._detect_pinbar_bullish,
+                    ('lower_wick', 'upper_wick', 'body_size', 'body_range_ratio')),
+            Feature('pinbar_bearish', self._detect_pinbar_bearish,
+                    ('lower_wick', 'upper_wick', 'body_size', 'body_range_ratio')),
+            Feature('inside_bar', self._detect_inside_bar),
+            Feature('outside_bar', self._detect_outside_bar),
+            
+            # Candle strength
+            Feature('candle_strength', lambda df: df['body_size'] / df['body_size'].rolling(20).mean(),
+                    ('body_size',)),
+            
+            # Consecutive candles
+            Feature('consecutive_bullish', self._count_consecutive_bullish),
+            Feature('consecutive_bearish', self._count_consecutive_bearish),
+            
+            # Gap detection
+            Feature('gap_up', lambda df: (df['low'] > df['high'].shift(1)).astype(int)),
+            Feature('gap_down', lambda df: (df['high'] < df['low'].shift(1)).astype(int)),
+            
+            # Wick dominance
+            Feature('upper_wick_dominant', lambda df: (df['upper_wick'] > df['body_size'] * 2).astype(int),
+                    ('upper_wick', 'body_size')),
+            Feature('lower_wick_dominant', lambda df: (df['lower_wick'] > df['body_size'] * 2).astype(int),
+                    ('lower_wick', 'body_size'))
+        ]
     
     def _detect_hammer(self, df: pd.DataFrame) -> pd.Series:
         """Detect hammer pattern (bullish reversal)"""
@@ -139,12 +142,8 @@ class CandleFeatures:
     
     def _count_consecutive_bullish(self, df: pd.DataFrame) -> pd.Series:
         """Count consecutive bullish candles"""
-        bullish = (df['close'] > df['open']).astype(int)
-        consecutive = bullish * (bullish.groupby((bullish != bullish.shift()).cumsum()).cumcount() + 1)
-        return consecutive
+        return pd.Series(run_length((df['close'] > df['open']).to_numpy()), index=df.index)
     
     def _count_consecutive_bearish(self, df: pd.DataFrame) -> pd.Series:
         """Count consecutive bearish candles"""
-        bearish = (df['close'] < df['open']).astype(int)
-        consecutive = bearish * (bearish.groupby((bearish != bearish.shift()).cumsum()).cumcount() + 1)
-        return consecutive
+        return pd.Series(run_length((df['close'] < df['open']).to_numpy()), index=df.index)
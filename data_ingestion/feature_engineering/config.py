@@ -12,9 +12,38 @@ ATR_PERIOD = 14
 ROLLING_STD_PERIOD = 20
 ROC_PERIOD = 10
 
+# RSI/ATR averaging: 'sma' (rolling mean), 'wilder' (broker/TradingView values) or 'ema'
+RSI_SMOOTHING = 'sma'
+ATR_SMOOTHING = 'sma'
+
 # Market structure lookback
 STRUCTURE_LOOKBACK = 20
 
+# Timeframe intervals (minutes)
+TIMEFRAME_MINUTES = {
+    '1m': 1,
+    '5m': 5,
+    '15m': 15,
+    '1h': 60,
+    '4h': 240,
+    '1d': 1440
+}
+
+# Multi-timeframe features: HTF_FEATURE_COLUMNS of each HTF_TIMEFRAMES entry
+# are joined into every timeframe as htf_{tf}_{column}, from closed candles only.
+# Avoid market structure columns: swing points look ahead within their window.
+HTF_TIMEFRAMES = ['4h']
+HTF_FEATURE_COLUMNS = [
+    'trend_score',
+    'ema_alignment',
+    'ema_50_distance',
+    'ema_200_distance',
+    'rsi',
+    'macd_histogram',
+    'atr_pct',
+    'bb_position'
+]
+
 # Trading sessions (UTC hours)
 SESSIONS = {
     'ASIA': (0, 9),      # Tokyo: 00:00-09:00 UTC
@@ -26,8 +55,29 @@ SESSIONS = {
 PINBAR_WICK_RATIO = 2.0  # Wick must be 2x body
 ENGULFING_MIN_RATIO = 1.0  # Engulfing body must be >= previous body
 
+# Path-dependent feature kernels: 'auto' (numba if installed), 'numba' or 'numpy'
+KERNEL_BACKEND = 'auto'
+
+# Feature selection (feature_selection.py)
+FEATURE_SELECTION_THRESHOLD = 0.003  # Min share of aggregated importance to keep a feature
+FEATURE_SELECTION_MIN_FEATURES = 20  # Always keep at least the top N features
+FEATURE_SELECTION_PERMUTATION_REPEATS = 3
+FEATURE_SELECTION_PERMUTATION_ROWS = 5000  # Validation rows sampled per split for permutation importance
+FEATURE_SELECTION_VALIDATION_FRACTION = 0.2  # Latest share of training rows held out for importance
+
+# Training dataset validation (validate_training_data.py)
+VALIDATION_BATCH_ROWS = 100_000  # Rows per streamed validation batch
+VALIDATION_FEATURE_MAX_ABS = 100.0  # Features are normalized; larger values mean broken inputs
+VALIDATION_MIN_FEATURES = 100
+
 # Normalization method
 NORMALIZATION = 'standard'  # 'standard', 'minmax', or 'robust'
 
+# Instrumentation (per-stage timing/memory report in logs/)
+INSTRUMENT = False
+INSTRUMENT_PROFILE = False  # cProfile hotspots per stage
+INSTRUMENT_TRACE_MEMORY = False  # tracemalloc peak per stage (slower)
+
 # Output
 OUTPUT_FILE = 'data/features.parquet'
+SCALER_FILE = 'data/feature_scaler.pkl'  # Fitted normalization; live inference applies the same
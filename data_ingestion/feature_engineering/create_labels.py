@@ -7,9 +7,15 @@ from pathlib import Path
 import logging
 from typing import Tuple
 
+from kernels import triple_barrier
+
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 logger = logging.getLogger(__name__)
 
+# Parquet row group size of training_dataset.parquet; bounds the memory of
+# validate_training_data's streamed batches
+TRAINING_ROW_GROUP_ROWS = 100_000
+
 
 class SmartLabeler:
     """Create smart labels for trading model"""
@@ -60,44 +66,13 @@ class SmartLabeler:
         # Use close price approximation from features
         # Since we normalized, we need to work with the original data
         # For this, we'll use a proxy: look at returns/momentum
-        
-        for i in range(len(df) - self.lookforward):
-            # Get future price movements
-            # Use momentum features as proxy for price movement
-            future_window = df.iloc[i:i+self.lookforward+1]
-            
-            # Calculate cumulative returns over the window
-            # We'll use the momentum_5 feature as a proxy for price changes
-            if 'momentum_5_pct' in df.columns:
-                future_returns = future_window['momentum_5_pct'].values
-            else:
-                # Fallback: use any available return proxy
-                continue
-            
-            # Track cumulative movement
-            cumulative_return = 0
-            hit_profit = False
-            hit_loss = False
-            
-            for ret in future_returns[1:]:  # Skip current candle
-                cumulative_return += ret
-                
-                # Check if profit target hit
-                if cumulative_return >= self.profit_pips:
-                    hit_profit = True
-                    break
-                
-                # Check if loss target hit
-                if cumulative_return <= -self.loss_pips:
-                    hit_loss = True
-                    break
-            
-            # Assign label
-            if hit_profit and not hit_loss:
-                labels.iloc[i] = 1  # Profit first
-            elif hit_loss and not hit_profit:
-                labels.iloc[i] = 0  # Loss first
-            # else: remains -1 (no clear move)
+        # (momentum_5_pct of the next candles, summed until a barrier is hit)
+        if 'momentum_5_pct' in df.columns:
+            labels = pd.Series(
+                triple_barrier(df['momentum_5_pct'].to_numpy(), self.lookforward,
+                               self.profit_pips, self.loss_pips),
+                index=df.index
+            )
         
         # Count distribution
         counts = labels.value_counts().sort_index()
@@ -332,8 +307,13 @@ class SmartLabeler:
         print(df[available_cols].head().to_string(index=False))
 
 
-def main():
-    """Main entry point"""
+def main(row_group_size: int = TRAINING_ROW_GROUP_ROWS):
+    """
+    Main entry point
+
+    Args:
+        row_group_size: Rows per Parquet row group of the training dataset
+    """
     
     # Load features
     data_dir = Path(__file__).parent.parent / 'data'
@@ -376,7 +356,9 @@ def main():
     logger.info(f"{'='*80}")
     logger.info(f"\nSaving to: {output_file}")
     
-    df_labeled.to_parquet(output_file, index=False, compression='snappy')
+    # Bounded row groups let validate_training_data stream the file
+    df_labeled.to_parquet(output_file, index=False, compression='snappy',
+                          row_group_size=row_group_size)
     
     file_size = output_file.stat().st_size / (1024 * 1024)
     logger.info(f"✓ Saved: {len(df_labeled):,} rows ({file_size:.2f} MB)")
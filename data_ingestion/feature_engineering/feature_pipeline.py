@@ -1,12 +1,16 @@
 """
 Main feature engineering pipeline
 """
+import argparse
+import importlib.util
+import sys
 import pandas as pd
 import numpy as np
+import pyarrow.parquet as pq
 from pathlib import Path
 import logging
-from typing import List, Dict
-from sklearn.preprocessing import StandardScaler, MinMaxScaler, RobustScaler
+from functools import lru_cache
+from typing import List, Dict, Optional
 
 from config import *
 from trend_features import TrendFeatures
@@ -16,26 +20,65 @@ from market_structure_features import MarketStructureFeatures
 from candle_features import CandleFeatures
 from time_features import TimeFeatures
 from liquidity_features import LiquidityFeatures
+from mtf_alignment import MultiTimeframeAligner, resample_ohlcv
+from feature_spec import load_feature_list, join_features
+import kernels
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from instrumentation import PipelineInstrumentation
+from market_calendar import get_calendar
+from storage import table_to_frame
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=None)
+def load_symbol_calendars() -> Dict[str, str]:
+    """
+    SYMBOL_CALENDARS of data_ingestion/config.py
+    
+    `config` is this directory's config.py here, so the ingestion config is
+    loaded from its path under another module name.
+    """
+    path = Path(__file__).resolve().parent.parent / 'config.py'
+    spec = importlib.util.spec_from_file_location('ingestion_config', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return dict(module.SYMBOL_CALENDARS)
+
+
 class FeatureEngineeringPipeline:
     """Main pipeline for feature engineering"""
     
-    def __init__(self):
+    def __init__(self, instrument: bool = INSTRUMENT, profile: bool = INSTRUMENT_PROFILE,
+                 trace_memory: bool = INSTRUMENT_TRACE_MEMORY, kernel_backend: str = KERNEL_BACKEND,
+                 columns: Optional[List[str]] = None):
+        """
+        Args:
+            instrument: Record per-stage timing, throughput and memory
+            profile: Capture cProfile hotspots per stage (requires instrument)
+            trace_memory: Capture tracemalloc peaks per stage (requires instrument)
+            kernel_backend: Path-dependent feature kernels ('auto', 'numba', 'numpy')
+            columns: Features to compute (e.g. a model's feature names); None = all
+        """
+        kernels.set_backend(kernel_backend)
+        self.instrumentation = PipelineInstrumentation(
+            enabled=instrument, profile=profile, trace_memory=trace_memory
+        )
         self.trend_features = TrendFeatures(ema_periods=EMA_PERIODS)
         self.momentum_features = MomentumFeatures(
             rsi_period=RSI_PERIOD,
             macd_fast=MACD_FAST,
             macd_slow=MACD_SLOW,
             macd_signal=MACD_SIGNAL,
-            roc_period=ROC_PERIOD
+            roc_period=ROC_PERIOD,
+            rsi_smoothing=RSI_SMOOTHING
         )
         self.volatility_features = VolatilityFeatures(
             atr_period=ATR_PERIOD,
-            std_period=ROLLING_STD_PERIOD
+            std_period=ROLLING_STD_PERIOD,
+            atr_smoothing=ATR_SMOOTHING
         )
         self.market_structure_features = MarketStructureFeatures(
             lookback=STRUCTURE_LOOKBACK
@@ -48,9 +91,75 @@ class FeatureEngineeringPipeline:
         self.liquidity_features = LiquidityFeatures(
             lookback=STRUCTURE_LOOKBACK
         )
+        self.mtf_aligner = MultiTimeframeAligner(
+            timeframe_minutes=TIMEFRAME_MINUTES,
+            htf_timeframes=HTF_TIMEFRAMES,
+            columns=HTF_FEATURE_COLUMNS
+        )
+        self.symbol_calendars = load_symbol_calendars()
         
         self.scaler = None
         self.feature_columns = []
+        self.requested_columns: Optional[List[str]] = None
+        self.select_features(columns)
+    
+    def resample_offset(self, symbol: str) -> str:
+        """HTF bar alignment of a symbol (its trading calendar's session open)"""
+        return get_calendar(symbol, self.symbol_calendars).resample_offset
+    
+    def feature_groups(self) -> List[tuple]:
+        """(stage, calculator) in calculation order"""
+        return [
+            ('trend', self.trend_features),
+            ('momentum', self.momentum_features),
+            ('volatility', self.volatility_features),
+            ('market_structure', self.market_structure_features),
+            ('candle', self.candle_features),
+            ('time', self.time_features),
+            ('liquidity', self.liquidity_features)
+        ]
+    
+    def select_features(self, columns: Optional[List[str]]):
+        """
+        Compute only `columns` and what they depend on
+        
+        htf_{timeframe}_{column} entries select the HTF columns to join (and
+        require {column} on the higher timeframe). Modules with no requested
+        column are skipped.
+        
+        Args:
+            columns: Feature names (None = all features)
+        """
+        if columns is None:
+            self.requested_columns = None
+            self.mtf_aligner.columns = list(HTF_FEATURE_COLUMNS)
+            return
+        
+        columns = list(columns)
+        htf_columns = [col for col in HTF_FEATURE_COLUMNS
+                       if any(f'htf_{tf}_{col}' in columns for tf in self.mtf_aligner.htf_timeframes)]
+        self.mtf_aligner.columns = htf_columns
+        
+        htf_names = set(self.mtf_aligner.output_columns())
+        known = set().union(*(calc.output_columns() for _, calc in self.feature_groups()))
+        unknown = [c for c in columns
+                   if c not in known and not c.startswith('htf_') and c not in ('filled', 'spread')]
+        unknown += [c for c in columns if c.startswith('htf_') and c not in htf_names]
+        if unknown:
+            logger.warning(f"  ✗ Unknown features requested (ignored): {unknown}")
+        
+        self.requested_columns = [c for c in columns if c in known]
+        logger.info(f"Computing {len(self.requested_columns)} features "
+                    f"(+{len(htf_columns)} HTF columns) and their dependencies")
+    
+    def columns_for(self, timeframe: str) -> Optional[List[str]]:
+        """Features to compute for a timeframe (HTFs also need the joined columns)"""
+        if self.requested_columns is None:
+            return None
+        if timeframe in self.mtf_aligner.htf_timeframes:
+            return self.requested_columns + [c for c in self.mtf_aligner.columns
+                                             if c not in self.requested_columns]
+        return self.requested_columns
     
     def load_data(self, data_dir: str = 'data') -> Dict[str, pd.DataFrame]:
         """
@@ -80,7 +189,7 @@ class FeatureEngineeringPipeline:
         
         for file in parquet_files:
             try:
-                df = pd.read_parquet(file)
+                df = table_to_frame(pq.read_table(file, memory_map=True))
                 data_files[file.stem] = df
                 logger.info(f"  ✓ Loaded {file.name}: {len(df):,} rows")
             except Exception as e:
@@ -89,59 +198,48 @@ class FeatureEngineeringPipeline:
         return data_files
     
     def engineer_features(self, df: pd.DataFrame, symbol: str, 
-                         timeframe: str, htf_df: pd.DataFrame = None) -> pd.DataFrame:
+                         timeframe: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
         """
-        Apply all feature engineering to a DataFrame
+        Apply feature engineering to a DataFrame
+        
+        Only the selected features (see select_features) and their
+        dependencies are computed.
         
         Args:
             df: Input DataFrame with OHLCV data
             symbol: Trading symbol
             timeframe: Timeframe string
-            htf_df: Higher timeframe DataFrame for HTF features
+            columns: Features to compute (default: columns_for(timeframe))
             
         Returns:
-            DataFrame with all features
+            DataFrame with features
         """
         logger.info(f"Engineering features for {symbol} {timeframe}...")
         
-        df = df.copy()
         initial_rows = len(df)
         
-        # A. Trend Features
-        logger.info("  [1/7] Calculating trend features...")
-        df = self.trend_features.calculate(df)
-        
-        # Add HTF trend if available
-        if htf_df is not None:
-            df = self.trend_features.calculate_htf_trend(df, htf_df)
-        
-        # B. Momentum Features
-        logger.info("  [2/7] Calculating momentum features...")
-        df = self.momentum_features.calculate(df)
-        
-        # C. Volatility Features
-        logger.info("  [3/7] Calculating volatility features...")
-        df = self.volatility_features.calculate(df)
-        
-        # D. Market Structure Features
-        logger.info("  [4/7] Calculating market structure features...")
-        df = self.market_structure_features.calculate(df)
+        steps = self.feature_groups()
+        if columns is None:
+            columns = self.columns_for(timeframe)
         
-        # E. Candle Features
-        logger.info("  [5/7] Calculating candle features...")
-        df = self.candle_features.calculate(df)
+        # Every group reads the input frame; results are joined in one copy
+        parts = []
+        for i, (stage, calculator) in enumerate(steps, 1):
+            if columns is not None and not calculator.required(columns):
+                logger.info(f"  [{i}/{len(steps)}] Skipping {stage.replace('_', ' ')} features (not requested)")
+                continue
+            logger.info(f"  [{i}/{len(steps)}] Calculating {stage.replace('_', ' ')} features...")
+            with self.instrumentation.stage(f'features.{stage}', rows=len(df),
+                                            symbol=symbol, timeframe=timeframe):
+                parts.append(calculator.calculate_columns(df, columns))
         
-        # F. Time Features
-        logger.info("  [6/7] Calculating time features...")
-        df = self.time_features.calculate(df)
-        
-        # G. Liquidity Features
-        logger.info("  [7/7] Calculating liquidity features...")
-        df = self.liquidity_features.calculate(df)
+        df = join_features(df, parts)
         
         # Clean data
-        df = df.replace([np.inf, -np.inf], np.nan)
-        df = df.dropna()
+        with self.instrumentation.stage('features.clean', rows=len(df),
+                                        symbol=symbol, timeframe=timeframe):
+            df = df.replace([np.inf, -np.inf], np.nan)
+            df = df.dropna()
         
         final_rows = len(df)
         logger.info(f"  ✓ Features calculated: {initial_rows:,} → {final_rows:,} rows "
@@ -149,6 +247,57 @@ class FeatureEngineeringPipeline:
         
         return df
     
+    def add_htf_features(self, features: Dict[str, pd.DataFrame], raw: Dict[str, pd.DataFrame],
+                         symbol: str) -> Dict[str, pd.DataFrame]:
+        """
+        Join higher timeframe features into every timeframe of a symbol
+        
+        HTF features are computed once per HTF: taken from `features` when the
+        symbol has that timeframe, otherwise engineered from the finest raw
+        timeframe resampled up, aligned to the symbol's session open like
+        DataProcessor.resample_to_4h.
+        
+        Args:
+            features: {timeframe: engineered features} for the symbol
+            raw: {timeframe: raw OHLCV} for the symbol
+            symbol: Trading symbol
+            
+        Returns:
+            {timeframe: features with htf_* columns, incomplete rows dropped}
+        """
+        if not self.mtf_aligner.columns:
+            return features
+        
+        htf_frames = {}
+        for htf in self.mtf_aligner.htf_timeframes:
+            if htf in features:
+                htf_features = features[htf]
+            else:
+                htf_minutes = TIMEFRAME_MINUTES[htf]
+                sources = [tf for tf in raw if TIMEFRAME_MINUTES.get(tf, htf_minutes) < htf_minutes
+                           and htf_minutes % TIMEFRAME_MINUTES[tf] == 0]
+                if not sources:
+                    logger.warning(f"  ✗ No data to build {htf} features for {symbol}")
+                    return {}
+                source = min(sources, key=lambda tf: TIMEFRAME_MINUTES[tf])
+                logger.info(f"  Building {htf} from {source} for HTF features...")
+                htf_features = self.engineer_features(
+                    resample_ohlcv(raw[source], htf_minutes, self.resample_offset(symbol)), symbol, htf,
+                    columns=None if self.requested_columns is None else self.mtf_aligner.columns
+                )
+            htf_frames[htf] = self.mtf_aligner.prepare(htf_features, htf)
+        
+        joined = {}
+        for timeframe, df in features.items():
+            with self.instrumentation.stage('features.htf', rows=len(df),
+                                            symbol=symbol, timeframe=timeframe):
+                df = self.mtf_aligner.join(df, timeframe, htf_frames).dropna()
+            joined[timeframe] = df
+            logger.info(f"  ✓ {timeframe}: joined {len(self.mtf_aligner.output_columns())} "
+                        f"HTF features ({len(df):,} rows)")
+        
+        return joined
+    
     def normalize_features(self, df: pd.DataFrame, fit: bool = True) -> pd.DataFrame:
         """
         Normalize numeric features
@@ -165,12 +314,14 @@ class FeatureEngineeringPipeline:
         df = df.copy()
         
         # Identify numeric columns to normalize (exclude metadata and binary flags)
-        exclude_cols = ['timestamp', 'symbol', 'timeframe']
+        exclude_cols = ['timestamp', 'symbol', 'timeframe', 'filled']
         numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
         cols_to_normalize = [col for col in numeric_cols if col not in exclude_cols]
         
         # Initialize scaler
         if fit or self.scaler is None:
+            from sklearn.preprocessing import StandardScaler, MinMaxScaler, RobustScaler
+            
             if NORMALIZATION == 'standard':
                 self.scaler = StandardScaler()
             elif NORMALIZATION == 'minmax':
@@ -190,7 +341,7 @@ class FeatureEngineeringPipeline:
     
     def drop_raw_ohlcv(self, df: pd.DataFrame) -> pd.DataFrame:
         """
-        Drop raw OHLCV columns, keep only features
+        Drop raw OHLCV columns (and the 'filled' marker), keep only features
         
         Args:
             df: DataFrame with features
@@ -198,7 +349,7 @@ class FeatureEngineeringPipeline:
         Returns:
             DataFrame without raw OHLCV
         """
-        cols_to_drop = ['open', 'high', 'low', 'close', 'volume']
+        cols_to_drop = ['open', 'high', 'low', 'close', 'volume', 'filled']
         existing_cols = [col for col in cols_to_drop if col in df.columns]
         
         if existing_cols:
@@ -222,7 +373,10 @@ class FeatureEngineeringPipeline:
         logger.info("="*80)
         
         # Load all data
-        data_files = self.load_data(data_dir)
+        with self.instrumentation.stage('load') as record:
+            data_files = self.load_data(data_dir)
+            if record is not None:
+                record.rows = sum(len(df) for df in data_files.values())
         
         if not data_files:
             raise ValueError("No data files found!")
@@ -249,28 +403,27 @@ class FeatureEngineeringPipeline:
             logger.info(f"Processing {symbol}")
             logger.info(f"{'='*80}")
             
-            # Get HTF data if available (use 4h or 1h as HTF)
-            htf_df = None
-            if '4h' in timeframes:
-                htf_df = timeframes['4h']
-            elif '1h' in timeframes:
-                htf_df = timeframes['1h']
+            # Engineer features per timeframe
+            features = {
+                timeframe: self.engineer_features(df, symbol, timeframe)
+                for timeframe, df in timeframes.items()
+            }
             
-            for timeframe, df in timeframes.items():
-                # Engineer features
-                df_features = self.engineer_features(df, symbol, timeframe, htf_df)
-                
-                # Add to collection
-                all_features.append(df_features)
+            # Join higher timeframe features (closed HTF candles only)
+            features = self.add_htf_features(features, timeframes, symbol)
+            
+            all_features.extend(features.values())
         
         # Combine all data
         logger.info(f"\n{'='*80}")
         logger.info("Combining all features...")
-        combined_df = pd.concat(all_features, ignore_index=True)
+        with self.instrumentation.stage('combine', rows=sum(len(df) for df in all_features)):
+            combined_df = pd.concat(all_features, ignore_index=True)
         logger.info(f"  ✓ Combined dataset: {len(combined_df):,} rows, {len(combined_df.columns)} columns")
         
         # Normalize features
-        combined_df = self.normalize_features(combined_df, fit=True)
+        with self.instrumentation.stage('normalize', rows=len(combined_df)):
+            combined_df = self.normalize_features(combined_df, fit=True)
         
         # Drop raw OHLCV
         combined_df = self.drop_raw_ohlcv(combined_df)
@@ -296,11 +449,23 @@ class FeatureEngineeringPipeline:
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
         # Save to parquet
-        df.to_parquet(output_file, index=False, compression='snappy')
+        with self.instrumentation.stage('save', rows=len(df)):
+            df.to_parquet(output_file, index=False, compression='snappy')
         
         file_size = output_path.stat().st_size / (1024 * 1024)
         logger.info(f"  ✓ Saved {len(df):,} rows to {output_file} ({file_size:.2f} MB)")
     
+    def save_scaler(self, output_file: str = SCALER_FILE):
+        """
+        Save the scaler fitted by normalize_features
+        
+        Args:
+            output_file: Output file path
+        """
+        if self.scaler is None:
+            raise ValueError("No fitted scaler; run normalize_features(fit=True) first")
+        save_scaler(self.scaler, output_file)
+    
     def print_summary(self, df: pd.DataFrame):
         """
         Print feature summary
@@ -349,9 +514,98 @@ class FeatureEngineeringPipeline:
         logger.info(f"\n{'='*80}")
 
 
+def save_scaler(scaler, output_file: str = SCALER_FILE):
+    """
+    Save a fitted scaler next to the features
+    
+    Models are trained on normalized features, so live inference and replay
+    must apply the same scaler (see load_scaler).
+    
+    Args:
+        scaler: Fitted sklearn scaler
+        output_file: Output file path
+    """
+    import joblib
+    
+    output_path = Path(output_file)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(scaler, output_path)
+    logger.info(f"  ✓ Saved scaler ({scaler.n_features_in_} columns) to {output_file}")
+
+
+def load_scaler(path: str = SCALER_FILE):
+    """
+    Load a scaler saved by save_scaler
+    
+    Args:
+        path: Scaler file
+        
+    Returns:
+        Fitted sklearn scaler
+        
+    Raises:
+        FileNotFoundError: No scaler at path
+    """
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"Feature scaler not found: {path}. Models are trained on normalized "
+                                f"features; run feature_pipeline.py to fit and save it")
+    
+    import joblib
+    return joblib.load(path)
+
+
+def scale_columns(scaler, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Normalize some of the columns a scaler was fitted on
+    
+    The scaler is fitted on every numeric column while a model reads only
+    its own features. Standard, min-max and robust scalers work per column,
+    so df's columns are placed into a full-width matrix, transformed and
+    taken back out.
+    
+    Args:
+        scaler: Fitted sklearn scaler (with feature_names_in_)
+        df: DataFrame with a subset of the scaler's columns
+        
+    Returns:
+        Normalized DataFrame (same index and columns)
+        
+    Raises:
+        ValueError: df has columns the scaler was not fitted on
+    """
+    fitted = {name: i for i, name in enumerate(scaler.feature_names_in_)}
+    missing = [col for col in df.columns if col not in fitted]
+    if missing:
+        raise ValueError(f"Scaler was not fitted on columns: {missing}")
+    
+    positions = [fitted[col] for col in df.columns]
+    full = np.zeros((len(df), len(fitted)))
+    full[:, positions] = df.to_numpy(dtype=np.float64)
+    scaled = scaler.transform(pd.DataFrame(full, columns=list(fitted)))
+    
+    return pd.DataFrame(scaled[:, positions], index=df.index, columns=df.columns)
+
+
 def main():
     """Main entry point"""
-    pipeline = FeatureEngineeringPipeline()
+    parser = argparse.ArgumentParser(description='Feature engineering pipeline')
+    parser.add_argument('--instrument', action='store_true', default=INSTRUMENT,
+                        help='Report per-stage timing, throughput and memory')
+    parser.add_argument('--profile', action='store_true', default=INSTRUMENT_PROFILE,
+                        help='Capture cProfile hotspots per stage')
+    parser.add_argument('--trace-memory', action='store_true', default=INSTRUMENT_TRACE_MEMORY,
+                        help='Capture tracemalloc peaks per stage')
+    parser.add_argument('--features',
+                        help='Compute only these features: JSON/text list or a model .pkl')
+    args = parser.parse_args()
+    
+    pipeline = FeatureEngineeringPipeline(
+        instrument=args.instrument or args.profile or args.trace_memory,
+        profile=args.profile,
+        trace_memory=args.trace_memory,
+        columns=load_feature_list(args.features) if args.features else None
+    )
     
     # Process all data (use parent directory's data folder)
     data_dir = Path(__file__).parent.parent / 'data'
@@ -360,9 +614,17 @@ def main():
     # Save features
     output_file = data_dir / 'features.parquet'
     pipeline.save_features(features_df, output_file=str(output_file))
+    pipeline.save_scaler(str(data_dir / Path(SCALER_FILE).name))
     
     # Print summary
     pipeline.print_summary(features_df)
+    
+    # Stage timings
+    pipeline.instrumentation.log_summary(logger)
+    report_file = pipeline.instrumentation.save(Path(__file__).parent.parent / 'logs',
+                                                prefix='feature_pipeline_stages')
+    if report_file:
+        logger.info(f"Stage report saved to: {report_file}")
 
 
 if __name__ == '__main__':
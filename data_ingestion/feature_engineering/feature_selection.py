@@ -0,0 +1,392 @@
+"""
+Feature selection from walk-forward importance
+
+For every walk-forward split and model (direction, volatility, no-trade) a
+probe model is trained on all features, holding out the latest
+FEATURE_SELECTION_VALIDATION_FRACTION of the split's training rows, and two
+importances are measured:
+    native       - LightGBM gain, Random Forest impurity, |logistic coefficient|
+    permutation  - score drop on the held-out training tail when a feature is shuffled
+Each importance is normalized to sum to 1, the two are averaged, and the
+result is averaged over splits and models. Features whose share is below the
+threshold are pruned, the models are retrained on the reduced set and compared
+with the full models on accuracy, model inference latency and feature
+computation time. The test rows are never used for selection, only for this
+full vs reduced comparison (both trained on all training rows).
+
+Outputs (in --output-dir, default models/reduced):
+    selected_features.json       - feature list (usable with feature_pipeline.py --features)
+    feature_importance.csv       - aggregated importance per feature
+    {model}_Split_N.pkl          - models retrained on the selected features
+    feature_selection_report.json
+
+Usage:
+    python feature_selection.py
+    python feature_selection.py --threshold 0.005 --min-features 30
+"""
+import argparse
+import json
+import logging
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    FEATURE_SELECTION_THRESHOLD, FEATURE_SELECTION_MIN_FEATURES,
+    FEATURE_SELECTION_PERMUTATION_REPEATS, FEATURE_SELECTION_PERMUTATION_ROWS,
+    FEATURE_SELECTION_VALIDATION_FRACTION
+)
+from train_models import ModelTrainer, MODEL_TYPES
+
+logger = logging.getLogger(__name__)
+
+LATENCY_CALLS = 200
+FEATURE_WINDOW_CANDLES = 1000  # Candle window used to time feature computation (as in live)
+
+
+def native_importance(model) -> np.ndarray:
+    """Model-specific importance (LightGBM gain, impurity, |coefficient|)"""
+    if hasattr(model, 'booster_'):
+        return model.booster_.feature_importance(importance_type='gain').astype(float)
+    if hasattr(model, 'feature_importances_'):
+        return np.asarray(model.feature_importances_, dtype=float)
+    if hasattr(model, 'coef_'):
+        return np.abs(model.coef_).mean(axis=0)
+    raise ValueError(f"No importance available for {type(model).__name__}")
+
+
+def normalize(values: np.ndarray) -> np.ndarray:
+    """Clip negatives and scale to sum 1 (all zeros stays zeros)"""
+    values = np.clip(np.nan_to_num(values), 0, None)
+    total = values.sum()
+    return values / total if total > 0 else values
+
+
+def inference_latency_ms(model, X: pd.DataFrame, calls: int = LATENCY_CALLS) -> Dict:
+    """Median single-row predict_proba latency and batch throughput"""
+    row = X.iloc[[0]]
+    model.predict_proba(row)
+
+    samples = []
+    for i in range(calls):
+        row = X.iloc[[i % len(X)]]
+        start = time.perf_counter()
+        model.predict_proba(row)
+        samples.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    model.predict_proba(X)
+    batch_seconds = time.perf_counter() - start
+
+    return {
+        'single_row_ms': round(float(np.median(samples)), 4),
+        'batch_rows_per_sec': round(len(X) / batch_seconds, 1) if batch_seconds > 0 else None
+    }
+
+
+class FeatureSelector:
+    """Aggregate walk-forward importance, prune features and retrain"""
+
+    def __init__(self, trainer: ModelTrainer, threshold: float = FEATURE_SELECTION_THRESHOLD,
+                 min_features: int = FEATURE_SELECTION_MIN_FEATURES,
+                 permutation_repeats: int = FEATURE_SELECTION_PERMUTATION_REPEATS,
+                 permutation_rows: int = FEATURE_SELECTION_PERMUTATION_ROWS,
+                 validation_fraction: float = FEATURE_SELECTION_VALIDATION_FRACTION,
+                 model_types: Optional[List[str]] = None):
+        """
+        Args:
+            trainer: ModelTrainer (data, splits and model definitions)
+            threshold: Min aggregated importance share to keep a feature
+            min_features: Keep at least this many top features
+            permutation_repeats: Shuffles per feature for permutation importance
+            permutation_rows: Max validation rows used for permutation importance
+            validation_fraction: Latest share of each split's training rows
+                held out to measure importance
+            model_types: Models to include (default: all of MODEL_TYPES)
+        """
+        self.trainer = trainer
+        self.threshold = threshold
+        self.min_features = min_features
+        self.permutation_repeats = permutation_repeats
+        self.permutation_rows = permutation_rows
+        self.validation_fraction = validation_fraction
+        self.model_types = model_types or list(MODEL_TYPES)
+        self.splits = None
+
+    def _prepare(self):
+        if self.trainer.df is None:
+            self.trainer.load_data()
+        if self.splits is None:
+            self.splits = self.trainer.create_time_splits()
+
+    def _split_data(self, train_idx, test_idx, features: List[str], model_type: str):
+        label = MODEL_TYPES[model_type][0]
+        return (self.trainer.features(train_idx, features), self.trainer.labels(train_idx, label),
+                self.trainer.features(test_idx, features), self.trainer.labels(test_idx, label))
+
+    def _validation_tail(self, train_idx):
+        """Split training rows (in time order) into fit rows and the latest validation rows"""
+        n_val = max(1, int(len(train_idx) * self.validation_fraction))
+        return train_idx[:-n_val], train_idx[-n_val:]
+
+    def _importance(self, train_idx, features: List[str], model_type: str) -> Dict:
+        """Native and permutation importance of a probe model on the validation tail"""
+        from sklearn.inspection import permutation_importance
+
+        fit_idx, val_idx = self._validation_tail(train_idx)
+        X_fit, y_fit, X_val, y_val = self._split_data(fit_idx, val_idx, features, model_type)
+        model = self.trainer.build_model(model_type)
+        model.fit(X_fit, y_fit)
+
+        sample = X_val.sample(min(self.permutation_rows, len(X_val)), random_state=42)
+        perm = permutation_importance(
+            model, sample, y_val.loc[sample.index],
+            n_repeats=self.permutation_repeats, random_state=42,
+            scoring='roc_auc' if y_val.nunique() == 2 else 'accuracy'
+        )
+        return {'importance': normalize(native_importance(model)),
+                'permutation': normalize(perm.importances_mean)}
+
+    def _score(self, model, X: pd.DataFrame, y: pd.Series) -> Dict:
+        from sklearn.metrics import accuracy_score, roc_auc_score
+
+        proba = model.predict_proba(X)
+        metrics = {'accuracy': float(accuracy_score(y, model.classes_[proba.argmax(axis=1)]))}
+        if len(np.unique(y)) == 2:
+            metrics['roc_auc'] = float(roc_auc_score(y, proba[:, 1]))
+        return metrics
+
+    def evaluate(self, features: List[str], save_dir: Optional[Path] = None,
+                 importance: bool = False) -> Dict:
+        """
+        Train every model type on every split with the given features
+
+        Args:
+            features: Feature columns
+            save_dir: Save models (and metrics) here when set
+            importance: Also measure native and permutation importance (on
+                probe models and the validation tail of each split's training rows)
+
+        Returns:
+            {'metrics': {split: {model: metrics}}, 'latency': {model: latency},
+             'importance': DataFrame (when importance=True)}
+        """
+        self._prepare()
+        saver = ModelTrainer(self.trainer.data_path, save_dir) if save_dir is not None else None
+
+        metrics = {}
+        latency = {}
+        scores = []
+
+        for split_idx, (train_idx, test_idx) in enumerate(self.splits, 1):
+            split_name = f"Split_{split_idx}"
+            metrics[split_name] = {}
+
+            for model_type in self.model_types:
+                X_train, y_train, X_test, y_test = self._split_data(train_idx, test_idx,
+                                                                    features, model_type)
+                start = time.perf_counter()
+                model = self.trainer.build_model(model_type)
+                model.fit(X_train, y_train)
+                result = self._score(model, X_test, y_test)
+                result['train_seconds'] = round(time.perf_counter() - start, 2)
+                metrics[split_name][model_type] = result
+
+                # Latency of the last split's models (largest training set)
+                latency[model_type] = inference_latency_ms(model, X_test)
+
+                if importance:
+                    probe = self._importance(train_idx, features, model_type)
+                    scores.append(pd.DataFrame({
+                        'feature': features, 'split': split_name, 'model': model_type,
+                        **probe, 'score': (probe['importance'] + probe['permutation']) / 2
+                    }))
+
+                if saver is not None:
+                    saver.save_model(model, MODEL_TYPES[model_type][1], split_name, result)
+
+                logger.info(f"  {split_name} {model_type:<10} {len(features):3d} features  "
+                            f"acc {result['accuracy']:.4f}"
+                            + (f"  auc {result['roc_auc']:.4f}" if 'roc_auc' in result else ''))
+
+        evaluation = {'metrics': metrics, 'latency': latency}
+        if importance:
+            evaluation['importance'] = pd.concat(scores, ignore_index=True)
+        return evaluation
+
+    def aggregate(self, scores: pd.DataFrame) -> pd.DataFrame:
+        """Average importance over splits and models, sorted by score"""
+        importance = scores.groupby('feature')[['importance', 'permutation', 'score']].mean()
+        importance = importance.sort_values('score', ascending=False)
+        importance['keep'] = importance['score'] >= self.threshold
+        importance.iloc[:self.min_features, importance.columns.get_loc('keep')] = True
+        return importance
+
+    def feature_latency_ms(self, raw: pd.DataFrame, features: Optional[List[str]]) -> float:
+        """Median time to compute features over a live-sized candle window"""
+        from feature_pipeline import FeatureEngineeringPipeline
+
+        pipeline = FeatureEngineeringPipeline(columns=features)
+        window = raw.tail(FEATURE_WINDOW_CANDLES)
+        level = logging.getLogger('feature_pipeline').level
+        logging.getLogger('feature_pipeline').setLevel(logging.WARNING)
+        try:
+            samples = []
+            for _ in range(5):
+                start = time.perf_counter()
+                pipeline.engineer_features(window, 'raw', '1h')
+                samples.append((time.perf_counter() - start) * 1000)
+        finally:
+            logging.getLogger('feature_pipeline').setLevel(level)
+        return round(float(np.median(samples)), 2)
+
+    def run(self, output_dir: Path, raw_data: Optional[Path] = None) -> Dict:
+        """
+        Select features, retrain and export the reduced feature set and models
+
+        Args:
+            output_dir: Output directory for the reduced models and reports
+            raw_data: OHLCV parquet used to time feature computation (optional)
+
+        Returns:
+            Report dictionary (also saved as feature_selection_report.json)
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        self._prepare()
+        all_features = list(self.trainer.feature_cols)
+
+        logger.info("\n" + "="*80)
+        logger.info(f"FULL FEATURE SET ({len(all_features)} features)")
+        logger.info("="*80)
+        full = self.evaluate(all_features, importance=True)
+
+        importance = self.aggregate(full['importance'])
+        selected = [f for f in importance.index if importance.loc[f, 'keep']]
+        pruned = [f for f in importance.index if not importance.loc[f, 'keep']]
+        # Keep the original column order
+        selected = [f for f in all_features if f in set(selected)]
+
+        logger.info("\n" + "="*80)
+        logger.info(f"REDUCED FEATURE SET ({len(selected)} features, {len(pruned)} pruned)")
+        logger.info("="*80)
+        reduced = self.evaluate(selected, save_dir=output_dir)
+
+        report = {
+            'created': datetime.now().isoformat(),
+            'data': str(self.trainer.data_path),
+            'threshold': self.threshold,
+            'min_features': self.min_features,
+            'validation_fraction': self.validation_fraction,
+            'n_features_full': len(all_features),
+            'n_features_selected': len(selected),
+            'selected': selected,
+            'pruned': pruned,
+            'models': {}
+        }
+
+        for model_type in self.model_types:
+            splits = {split: {'full': full['metrics'][split][model_type],
+                              'reduced': reduced['metrics'][split][model_type]}
+                      for split in full['metrics']}
+            accuracy_delta = np.mean([s['reduced']['accuracy'] - s['full']['accuracy']
+                                      for s in splits.values()])
+            full_latency = full['latency'][model_type]
+            reduced_latency = reduced['latency'][model_type]
+            report['models'][model_type] = {
+                'splits': splits,
+                'mean_accuracy_delta': round(float(accuracy_delta), 4),
+                'latency_full': full_latency,
+                'latency_reduced': reduced_latency,
+                'latency_speedup': round(full_latency['single_row_ms'] / reduced_latency['single_row_ms'], 2)
+                if reduced_latency['single_row_ms'] > 0 else None
+            }
+
+        if raw_data is not None and Path(raw_data).exists():
+            raw = pd.read_parquet(raw_data)
+            full_ms = self.feature_latency_ms(raw, None)
+            reduced_ms = self.feature_latency_ms(raw, selected)
+            report['feature_computation'] = {
+                'window_candles': FEATURE_WINDOW_CANDLES,
+                'full_ms': full_ms,
+                'reduced_ms': reduced_ms,
+                'speedup': round(full_ms / reduced_ms, 2) if reduced_ms > 0 else None
+            }
+
+        # Exports
+        with open(output_dir / 'selected_features.json', 'w') as f:
+            json.dump({'features': selected, 'threshold': self.threshold,
+                       'created': report['created']}, f, indent=2)
+        importance.to_csv(output_dir / 'feature_importance.csv', index_label='feature')
+        with open(output_dir / 'feature_selection_report.json', 'w') as f:
+            json.dump(report, f, indent=2)
+
+        self._log_report(report, importance)
+        logger.info(f"\n✓ Reduced feature set and models saved to: {output_dir}")
+        return report
+
+    def _log_report(self, report: Dict, importance: pd.DataFrame):
+        logger.info("\n" + "="*80)
+        logger.info("FEATURE SELECTION SUMMARY")
+        logger.info("="*80)
+        logger.info(f"\nFeatures: {report['n_features_full']} → {report['n_features_selected']} "
+                    f"(threshold {report['threshold']})")
+
+        logger.info("\nTop 10 features:")
+        for i, (name, row) in enumerate(importance.head(10).iterrows(), 1):
+            logger.info(f"  {i:2d}. {name:<30} score {row['score']:.4f}  "
+                        f"(importance {row['importance']:.4f}, permutation {row['permutation']:.4f})")
+
+        logger.info(f"\n{'Model':<12}{'Δ accuracy':>12}{'Full ms':>10}{'Reduced ms':>12}{'Speedup':>9}")
+        for model_type, result in report['models'].items():
+            logger.info(f"{model_type:<12}{result['mean_accuracy_delta']:>+12.4f}"
+                        f"{result['latency_full']['single_row_ms']:>10.3f}"
+                        f"{result['latency_reduced']['single_row_ms']:>12.3f}"
+                        f"{(result['latency_speedup'] or 0):>8.2f}x")
+
+        if 'feature_computation' in report:
+            fc = report['feature_computation']
+            logger.info(f"\nFeature computation ({fc['window_candles']} candles): "
+                        f"{fc['full_ms']:.1f}ms → {fc['reduced_ms']:.1f}ms ({fc['speedup']}x)")
+
+
+def main():
+    """Main entry point"""
+    base_dir = Path(__file__).parent.parent
+    parser = argparse.ArgumentParser(description='Importance-based feature selection')
+    parser.add_argument('--data', default=str(base_dir / 'data' / 'training_dataset.parquet'),
+                        help='Labeled training dataset')
+    parser.add_argument('--output-dir', default=str(base_dir / 'models' / 'reduced'))
+    parser.add_argument('--raw-data', default=str(base_dir / 'data' / 'EURUSD_1h.parquet'),
+                        help='OHLCV file used to time feature computation')
+    parser.add_argument('--threshold', type=float, default=FEATURE_SELECTION_THRESHOLD,
+                        help='Min aggregated importance share to keep a feature')
+    parser.add_argument('--min-features', type=int, default=FEATURE_SELECTION_MIN_FEATURES)
+    parser.add_argument('--permutation-repeats', type=int, default=FEATURE_SELECTION_PERMUTATION_REPEATS)
+    parser.add_argument('--permutation-rows', type=int, default=FEATURE_SELECTION_PERMUTATION_ROWS)
+    parser.add_argument('--validation-fraction', type=float, default=FEATURE_SELECTION_VALIDATION_FRACTION,
+                        help='Latest share of training rows held out to measure importance')
+    parser.add_argument('--models', nargs='+', choices=list(MODEL_TYPES), default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    trainer = ModelTrainer(args.data, base_dir / 'models')
+    selector = FeatureSelector(
+        trainer,
+        threshold=args.threshold,
+        min_features=args.min_features,
+        permutation_repeats=args.permutation_repeats,
+        permutation_rows=args.permutation_rows,
+        validation_fraction=args.validation_fraction,
+        model_types=args.models
+    )
+    selector.run(Path(args.output_dir), raw_data=Path(args.raw_data))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""
+Column-level feature definitions
+
+Each feature calculator is a FeatureGroup: an ordered list of Feature
+definitions, each producing one column from the frame and naming the
+columns of the same group it reads. calculate(df, columns) computes only the
+requested columns and their transitive dependencies, so a model trained on a
+pruned feature set does not pay for the rest; a group with nothing requested
+can be skipped entirely (see required()).
+
+Groups never read each other's columns, so a pipeline computes every group
+from the same input with calculate_columns() and joins the results once
+(join_features) rather than copying the whole frame after each group.
+"""
+import json
+import pandas as pd
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Set, Tuple
+
+
+@dataclass(frozen=True)
+class Feature:
+    """One output column"""
+    name: str
+    compute: Callable[[pd.DataFrame], pd.Series]
+    depends: Tuple[str, ...] = ()
+
+
+class FeatureGroup:
+    """Base class for feature calculators built from Feature definitions"""
+
+    _feature_list: Optional[List[Feature]] = None
+
+    def define(self) -> List[Feature]:
+        """Feature definitions in calculation (and column) order"""
+        raise NotImplementedError
+
+    def features(self) -> List[Feature]:
+        """Validated feature definitions (built once per instance)"""
+        if self._feature_list is None:
+            features = self.define()
+            names = {f.name for f in features}
+            seen = set()
+            for feature in features:
+                late = [d for d in feature.depends if d in names and d not in seen]
+                if late:
+                    raise ValueError(f"{type(self).__name__}.{feature.name} depends on "
+                                     f"{late}, defined after it")
+                seen.add(feature.name)
+            self._feature_list = features
+        return self._feature_list
+
+    def output_columns(self) -> List[str]:
+        """All columns this group can produce"""
+        return [f.name for f in self.features()]
+
+    def required(self, columns: Optional[Iterable[str]] = None) -> Set[str]:
+        """
+        Columns of this group needed to produce `columns`
+
+        Args:
+            columns: Requested columns (any group; None = all)
+
+        Returns:
+            Requested columns of this group plus their dependencies
+            (empty = the group can be skipped)
+        """
+        features = self.features()
+        if columns is None:
+            return {f.name for f in features}
+
+        by_name = {f.name: f for f in features}
+        needed = set()
+        stack = [c for c in columns if c in by_name]
+        while stack:
+            name = stack.pop()
+            if name in needed:
+                continue
+            needed.add(name)
+            stack.extend(d for d in by_name[name].depends if d in by_name)
+        return needed
+
+    def calculate_columns(self, df: pd.DataFrame, columns: Optional[Iterable[str]] = None,
+                          precomputed: Iterable[str] = ()) -> pd.DataFrame:
+        """
+        Calculate features without copying the input frame
+
+        Args:
+            df: DataFrame with OHLCV data (not modified)
+            columns: Requested columns (None = all); columns of other groups are ignored
+            precomputed: Feature columns df already holds (e.g. from incremental
+                state); used as they are instead of being computed
+
+        Returns:
+            DataFrame with only the computed columns (same index as df)
+        """
+        needed = self.required(columns)
+        given = {name for name in precomputed if name in df.columns}
+
+        # Shallow copy: features read df's columns and earlier features of
+        # this group; the input data itself is shared, not copied
+        work = df.copy(deep=False)
+        added = []
+        for feature in self.features():
+            if feature.name in needed:
+                if feature.name not in given:
+                    work[feature.name] = feature.compute(work)
+                added.append(feature.name)
+
+        return work[added]
+
+    def calculate(self, df: pd.DataFrame, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """
+        Calculate features
+
+        Args:
+            df: DataFrame with OHLCV data
+            columns: Requested columns (None = all); columns of other groups are ignored
+
+        Returns:
+            DataFrame with the required features added
+        """
+        return join_features(df, [self.calculate_columns(df, columns)])
+
+
+def join_features(df: pd.DataFrame, parts: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Add computed feature columns to a frame in a single copy
+
+    Groups only read the input columns and their own features, so they can
+    all be computed from the same frame (calculate_columns) and joined once
+    instead of copying the growing frame after every group.
+
+    Args:
+        df: Input frame
+        parts: Outputs of calculate_columns
+
+    Returns:
+        df with the feature columns (recomputed columns replace df's)
+    """
+    new = [name for part in parts for name in part.columns]
+    if not new:
+        return df.copy()
+    replaced = [name for name in new if name in df.columns]
+    if replaced:
+        df = df.drop(columns=replaced)
+    return pd.concat([df] + parts, axis=1)
+
+
+def load_feature_list(path: str) -> List[str]:
+    """
+    Read a feature list
+
+    Args:
+        path: JSON list of names, JSON object with a 'features' list, text file
+            (one name per line) or a fitted model pickle (feature_names_in_)
+
+    Returns:
+        Feature names
+    """
+    path = Path(path)
+
+    if path.suffix in ('.pkl', '.joblib'):
+        import joblib
+        names = getattr(joblib.load(path), 'feature_names_in_', None)
+        if names is None:
+            raise ValueError(f"Model {path} does not record feature names")
+        return list(names)
+
+    if path.suffix == '.json':
+        data = json.loads(path.read_text())
+        return list(data['features'] if isinstance(data, dict) else data)
+
+    return [line.strip() for line in path.read_text().splitlines() if line.strip()]
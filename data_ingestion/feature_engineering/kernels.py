@@ -0,0 +1,296 @@
+"""
+Compiled kernels for path-dependent features
+
+Sequential computations (run lengths, forward fills of the last event,
+rolling level counts, barrier hits) are written once as plain loops and
+compiled with numba when it is installed. Without numba an equivalent
+vectorized numpy implementation is used. Both backends produce the same
+values as the original pandas code (see validate_kernels.py).
+
+numba is imported and each kernel compiled on first use only, with
+cache=True so compiled code is stored in __pycache__ and later processes
+skip the JIT.
+
+Backend selection (set_backend, config.KERNEL_BACKEND in feature_pipeline):
+    'auto'  - numba if installed, else numpy
+    'numba' - require numba
+    'numpy' - never use numba
+"""
+import warnings
+
+import numpy as np
+from typing import Callable, Dict, Optional
+
+from numpy.lib.stride_tricks import sliding_window_view
+
+_numba = None
+_compiled: Dict[str, Callable] = {}
+_backend: Optional[str] = None
+
+
+def backend() -> str:
+    """Active backend ('numba' or 'numpy')"""
+    if _backend is None:
+        set_backend('auto')
+    return _backend
+
+
+def set_backend(name: str):
+    """
+    Select the kernel backend
+
+    Args:
+        name: 'auto', 'numba' or 'numpy'
+    """
+    global _backend, _numba
+    if name not in ('auto', 'numba', 'numpy'):
+        raise ValueError(f"Unknown kernel backend: {name}")
+
+    if name == 'numpy':
+        _backend = 'numpy'
+        return
+
+    try:
+        import numba
+        _numba = numba
+        _backend = 'numba'
+    except ImportError:
+        if name == 'numba':
+            raise ImportError("numba not installed. Install with: pip install numba")
+        _backend = 'numpy'
+
+
+def _jit(name: str, loop: Callable) -> Callable:
+    """Compile a loop kernel once (cached on disk)"""
+    kernel = _compiled.get(name)
+    if kernel is None:
+        kernel = _compiled[name] = _numba.njit(cache=True, nogil=True)(loop)
+    return kernel
+
+
+# ---------------------------------------------------------------------------
+# Loop kernels (compiled by numba)
+# ---------------------------------------------------------------------------
+
+def _run_length_loop(mask):
+    out = np.zeros(len(mask), dtype=np.int64)
+    count = 0
+    for i in range(len(mask)):
+        if mask[i]:
+            count += 1
+        else:
+            count = 0
+        out[i] = count
+    return out
+
+
+def _ffill_last_loop(values, mask):
+    out = np.empty(len(values), dtype=np.float64)
+    last = np.nan
+    for i in range(len(values)):
+        if mask[i]:
+            last = values[i]
+        out[i] = last
+    return out
+
+
+def _swing_points_loop(values, window, highs):
+    n = len(values)
+    out = np.zeros(n, dtype=np.int64)
+    for i in range(window, n - window):
+        extreme = np.nan
+        for j in range(i - window, i + window + 1):
+            v = values[j]
+            if v == v and (extreme != extreme or (v > extreme if highs else v < extreme)):
+                extreme = v
+        if values[i] == extreme:
+            out[i] = 1
+    return out
+
+
+def _equal_levels_loop(values, lookback, threshold, highs):
+    n = len(values)
+    out = np.zeros(n, dtype=np.int64)
+    for i in range(lookback, n):
+        extreme = np.nan
+        for j in range(i - lookback, i):
+            v = values[j]
+            if v == v and (extreme != extreme or (v > extreme if highs else v < extreme)):
+                extreme = v
+        lower = extreme * (1 - threshold)
+        upper = extreme * (1 + threshold)
+        count = 0
+        for j in range(i - lookback, i):
+            if values[j] >= lower and values[j] <= upper:
+                count += 1
+        if count >= 2:
+            out[i] = 1
+    return out
+
+
+def _triple_barrier_loop(returns, lookforward, profit, loss):
+    n = len(returns)
+    out = np.full(n, -1, dtype=np.int64)
+    for i in range(n - lookforward):
+        cumulative = 0.0
+        for k in range(i + 1, i + lookforward + 1):
+            cumulative += returns[k]
+            if cumulative >= profit:
+                out[i] = 1
+                break
+            if cumulative <= -loss:
+                out[i] = 0
+                break
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Public kernels
+# ---------------------------------------------------------------------------
+
+def run_length(mask: np.ndarray) -> np.ndarray:
+    """
+    Length of the current run of True values at each position (0 where False)
+
+    Args:
+        mask: Boolean array
+
+    Returns:
+        int64 array
+    """
+    mask = np.ascontiguousarray(mask, dtype=np.bool_)
+    if backend() == 'numba':
+        return _jit('run_length', _run_length_loop)(mask)
+
+    idx = np.arange(len(mask))
+    last_reset = np.maximum.accumulate(np.where(mask, -1, idx))
+    return np.where(mask, idx - last_reset, 0).astype(np.int64)
+
+
+def ffill_last(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """
+    Value at the last position where mask was True (NaN before the first)
+
+    Args:
+        values: Float array
+        mask: Boolean array marking events
+
+    Returns:
+        float64 array
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    mask = np.ascontiguousarray(mask, dtype=np.bool_)
+    if backend() == 'numba':
+        return _jit('ffill_last', _ffill_last_loop)(values, mask)
+
+    last = np.maximum.accumulate(np.where(mask, np.arange(len(mask)), -1))
+    return np.where(last >= 0, values[np.maximum(last, 0)], np.nan)
+
+
+def swing_points(values: np.ndarray, window: int, highs: bool = True) -> np.ndarray:
+    """
+    Flag positions that are the extreme of the centered window [i-w, i+w]
+
+    The first and last `window` positions are never flagged. The window
+    includes future values, so flags are only final `window` candles later.
+
+    Args:
+        values: Highs (highs=True) or lows (highs=False)
+        window: Candles on each side
+        highs: Detect maxima (True) or minima (False)
+
+    Returns:
+        int64 array of 0/1
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    if backend() == 'numba':
+        return _jit('swing_points', _swing_points_loop)(values, window, highs)
+
+    out = np.zeros(len(values), dtype=np.int64)
+    n_windows = len(values) - 2 * window
+    if n_windows <= 0:
+        return out
+    windows = sliding_window_view(values, 2 * window + 1)
+    with warnings.catch_warnings():
+        # All-NaN windows
+        warnings.simplefilter('ignore', RuntimeWarning)
+        extreme = np.nanmax(windows, axis=1) if highs else np.nanmin(windows, axis=1)
+    out[window:window + n_windows] = values[window:window + n_windows] == extreme
+    return out
+
+
+def equal_levels(values: np.ndarray, lookback: int, threshold: float,
+                 highs: bool = True) -> np.ndarray:
+    """
+    Flag positions where at least two of the previous `lookback` values lie
+    within `threshold` (relative) of their extreme (equal highs/lows)
+
+    Args:
+        values: Highs (highs=True) or lows (highs=False)
+        lookback: Window of preceding candles (current candle excluded)
+        threshold: Relative tolerance around the extreme
+        highs: Compare against the window max (True) or min (False)
+
+    Returns:
+        int64 array of 0/1
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    if backend() == 'numba':
+        return _jit('equal_levels', _equal_levels_loop)(values, lookback, threshold, highs)
+
+    out = np.zeros(len(values), dtype=np.int64)
+    if len(values) <= lookback:
+        return out
+    # Row k holds values[k:k+lookback], the window for position k + lookback
+    windows = sliding_window_view(values, lookback)[:len(values) - lookback]
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        extreme = np.nanmax(windows, axis=1) if highs else np.nanmin(windows, axis=1)
+    lower = (extreme * (1 - threshold))[:, None]
+    upper = (extreme * (1 + threshold))[:, None]
+    count = ((windows >= lower) & (windows <= upper)).sum(axis=1)
+    out[lookback:] = count >= 2
+    return out
+
+
+def triple_barrier(returns: np.ndarray, lookforward: int, profit: float,
+                   loss: float) -> np.ndarray:
+    """
+    Which barrier the cumulative return of the next candles hits first
+
+    For each position i, returns[i+1:i+lookforward+1] are summed in order;
+    the label is 1 if the sum reaches +profit first, 0 if it reaches -loss
+    first and -1 otherwise (including the last `lookforward` positions).
+
+    Args:
+        returns: Per-candle return proxy
+        lookforward: Candles to look ahead
+        profit: Profit barrier (e.g. 0.015)
+        loss: Loss barrier (positive, e.g. 0.010)
+
+    Returns:
+        int64 array of 1/0/-1
+    """
+    returns = np.ascontiguousarray(returns, dtype=np.float64)
+    if backend() == 'numba':
+        return _jit('triple_barrier', _triple_barrier_loop)(returns, lookforward, profit, loss)
+
+    n = len(returns)
+    out = np.full(n, -1, dtype=np.int64)
+    n_windows = n - lookforward
+    if n_windows <= 0:
+        return out
+
+    # Sequential cumsum per window, same summation order as the loop
+    future = sliding_window_view(returns[1:], lookforward)[:n_windows]
+    cumulative = np.cumsum(future, axis=1)
+    hit_profit = cumulative >= profit
+    hit_loss = cumulative <= -loss
+    never = lookforward
+    first_profit = np.where(hit_profit.any(axis=1), hit_profit.argmax(axis=1), never)
+    first_loss = np.where(hit_loss.any(axis=1), hit_loss.argmax(axis=1), never)
+
+    labels = out[:n_windows]
+    labels[first_profit < first_loss] = 1
+    labels[first_loss < first_profit] = 0
+    return out
@@ -3,98 +3,71 @@ Liquidity and smart money feature engineering
 """
 import pandas as pd
 import numpy as np
+from typing import List
 
+from feature_spec import Feature, FeatureGroup
+from kernels import equal_levels
 
-class LiquidityFeatures:
+
+class LiquidityFeatures(FeatureGroup):
     """Calculate liquidity and smart money features"""
     
     def __init__(self, lookback: int = 20, threshold: float = 0.001):
         self.lookback = lookback
         self.threshold = threshold
     
-    def calculate(self, df: pd.DataFrame) -> pd.DataFrame:
-        """
-        Calculate all liquidity features
-        
-        Args:
-            df: DataFrame with OHLCV data
+    def define(self) -> List[Feature]:
+        """Liquidity feature definitions"""
+        return [
+            # Equal highs (liquidity pools)
+            Feature('equal_highs', self._detect_equal_highs),
             
-        Returns:
-            DataFrame with liquidity features added
-        """
-        df = df.copy()
-        
-        # Equal highs (liquidity pools)
-        df['equal_highs'] = self._detect_equal_highs(df)
-        
-        # Equal lows (liquidity pools)
-        df['equal_lows'] = self._detect_equal_lows(df)
-        
-        # Stop hunt detection
-        df['stop_hunt_above'] = self._detect_stop_hunt_above(df)
-        df['stop_hunt_below'] = self._detect_stop_hunt_below(df)
-        
-        # Liquidity sweep
-        df['sweep_high'] = self._detect_sweep_high(df)
-        df['sweep_low'] = self._detect_sweep_low(df)
-        
-        # Fair value gap (FVG)
-        df['fvg_bullish'] = self._detect_fvg_bullish(df)
-        df['fvg_bearish'] = self._detect_fvg_bearish(df)
-        
-        # Order block detection
-        df['order_block_bullish'] = self._detect_order_block_bullish(df)
-        df['order_block_bearish'] = self._detect_order_block_bearish(df)
-        
-        # Liquidity grab
-        df['liquidity_grab'] = (df['stop_hunt_above'] | df['stop_hunt_below']).astype(int)
-        
-        # Volume analysis
-        df['volume_spike'] = self._detect_volume_spike(df)
-        df['volume_dry_up'] = self._detect_volume_dry_up(df)
-        
-        # Price rejection
-        df['rejection_high'] = self._detect_rejection_high(df)
-        df['rejection_low'] = self._detect_rejection_low(df)
-        
-        # Imbalance detection
-        df['imbalance'] = self._detect_imbalance(df)
-        
-        return df
+            # Equal lows (liquidity pools)
+            Feature('equal_lows', self._detect_equal_lows),
+            
+            # Stop hunt detection
+            Feature('stop_hunt_above', self._detect_stop_hunt_above),
+            Feature('stop_hunt_below', self._detect_stop_hunt_below),
+            
+            # Liquidity sweep
+            Feature('sweep_high', self._detect_sweep_high),
+            Feature('sweep_low', self._detect_sweep_low),
+            
+            # Fair value gap (FVG)
+            Feature('fvg_bullish', self._detect_fvg_bullish),
+            Feature('fvg_bearish', self._detect_fvg_bearish),
+            
+            # Order block detection
+            Feature('order_block_bullish', self._detect_order_block_bullish),
+            Feature('order_block_bearish', self._detect_order_block_bearish),
+            
+            # Liquidity grab
+            Feature('liquidity_grab', lambda df: (df['stop_hunt_above'] | df['stop_hunt_below']).astype(int),
+                    ('stop_hunt_above', 'stop_hunt_below')),
+            
+            # Volume analysis
+            Feature('volume_spike', self._detect_volume_spike),
+            Feature('volume_dry_up', self._detect_volume_dry_up),
+            
+            # Price rejection
+            Feature('rejection_high', self._detect_rejection_high),
+            Feature('rejection_low', self._detect_rejection_low),
+            
+            # Imbalance detection
+            Feature('imbalance', self._detect_imbalance)
+        ]
     
     def _detect_equal_highs(self, df: pd.DataFrame) -> pd.Series:
         """Detect equal highs (liquidity pools)"""
-        equal_highs = pd.Series(0, index=df.index)
-        
-        for i in range(self.lookback, len(df)):
-            recent_highs = df['high'].iloc[i-self.lookback:i]
-            max_high = recent_highs.max()
-            
-            # Count how many highs are within threshold of max
-            equal_count = ((recent_highs >= max_high * (1 - self.threshold)) & 
-                          (recent_highs <= max_high * (1 + self.threshold))).sum()
-            
-            if equal_count >= 2:
-                equal_highs.iloc[i] = 1
-        
-        return equal_highs
+        # At least two of the previous `lookback` highs within threshold of their max
+        return pd.Series(equal_levels(df['high'].to_numpy(), self.lookback, self.threshold, highs=True),
+                         index=df.index)
     
     def _detect_equal_lows(self, df: pd.DataFrame) -> pd.Series:
         """Detect equal lows (liquidity pools)"""
-        equal_lows = pd.Series(0, index=df.index)
-        
-        for i in range(self.lookback, len(df)):
-            recent_lows = df['low'].iloc[i-self.lookback:i]
-            min_low = recent_lows.min()
-            
-            # Count how many lows are within threshold of min
-            equal_count = ((recent_lows >= min_low * (1 - self.threshold)) & 
-                          (recent_lows <= min_low * (1 + self.threshold))).sum()
-            
-            if equal_count >= 2:
-                equal_lows.iloc[i] = 1
-        
-        return equal_lows
+        # At least two of the previous `lookback` lows within threshold of their min
+        return pd.Series(equal_levels(df['low'].to_numpy(), self.lookback, self.threshold, highs=False),
+                         index=df.index)
     
     def _detect_stop_hunt_above(self, df: pd.DataFrame) -> pd.Series:
         """Detect stop hunt above recent highs"""
@@ -3,64 +3,61 @@ Market structure feature engineering
 """
 import pandas as pd
 import numpy as np
+from typing import List
 
+from feature_spec import Feature, FeatureGroup
+from kernels import swing_points, ffill_last
 
-class MarketStructureFeatures:
+
+class MarketStructureFeatures(FeatureGroup):
     """Calculate market structure features"""
     
     def __init__(self, lookback: int = 20):
         self.lookback = lookback
     
-    def calculate(self, df: pd.DataFrame) -> pd.DataFrame:
-        """
-        Calculate all market structure features
-        
-        Args:
-            df: DataFrame with OHLCV data
+    def define(self) -> List[Feature]:
+        """Market structure feature definitions"""
+        return [
+            # Higher highs and higher lows
+            Feature('higher_high', self._detect_higher_high),
+            Feature('higher_low', self._detect_higher_low),
             
-        Returns:
-            DataFrame with market structure features added
-        """
-        df = df.copy()
-        
-        # Higher highs and higher lows
-        df['higher_high'] = self._detect_higher_high(df)
-        df['higher_low'] = self._detect_higher_low(df)
-        
-        # Lower highs and lower lows
-        df['lower_high'] = self._detect_lower_high(df)
-        df['lower_low'] = self._detect_lower_low(df)
-        
-        # Uptrend (HH and HL)
-        df['uptrend_structure'] = (df['higher_high'] & df['higher_low']).astype(int)
-        
-        # Downtrend (LH and LL)
-        df['downtrend_structure'] = (df['lower_high'] & df['lower_low']).astype(int)
-        
-        # Break of structure
-        df['bos_bullish'] = self._detect_bos_bullish(df)
-        df['bos_bearish'] = self._detect_bos_bearish(df)
-        
-        # Swing highs and lows
-        df['swing_high'] = self._detect_swing_high(df, window=5)
-        df['swing_low'] = self._detect_swing_low(df, window=5)
-        
-        # Distance to recent swing points
-        df['distance_to_swing_high'] = self._distance_to_last_swing_high(df)
-        df['distance_to_swing_low'] = self._distance_to_last_swing_low(df)
-        
-        # Trend strength score
-        df['trend_strength'] = self._calculate_trend_strength(df)
-        
-        # Support and resistance levels
-        df['near_resistance'] = self._near_resistance(df)
-        df['near_support'] = self._near_support(df)
-        
-        # Price action patterns
-        df['consolidation'] = self._detect_consolidation(df)
-        df['breakout'] = self._detect_breakout(df)
-        
-        return df
+            # Lower highs and lower lows
+            Feature('lower_high', self._detect_lower_high),
+            Feature('lower_low', self._detect_lower_low),
+            
+            # Uptrend (HH and HL)
+            Feature('uptrend_structure', lambda df: (df['higher_high'] & df['higher_low']).astype(int),
+                    ('higher_high', 'higher_low')),
+            
+            # Downtrend (LH and LL)
+            Feature('downtrend_structure', lambda df: (df['lower_high'] & df['lower_low']).astype(int),
+                    ('lower_high', 'lower_low')),
+            
+            # Break of structure
+            Feature('bos_bullish', self._detect_bos_bullish),
+            Feature('bos_bearish', self._detect_bos_bearish),
+            
+            # Swing highs and lows
+            Feature('swing_high', lambda df: self._detect_swing_high(df, window=5)),
+            Feature('swing_low', lambda df: self._detect_swing_low(df, window=5)),
+            
+            # Distance to recent swing points
+            Feature('distance_to_swing_high', self._distance_to_last_swing_high, ('swing_high',)),
+            Feature('distance_to_swing_low', self._distance_to_last_swing_low, ('swing_low',)),
+            
+            # Trend strength score
+            Feature('trend_strength', self._calculate_trend_strength,
+                    ('higher_high', 'higher_low', 'lower_high', 'lower_low')),
+            
+            # Support and resistance levels
+            Feature('near_resistance', self._near_resistance),
+            Feature('near_support', self._near_support),
+            
+            # Price action patterns
+            Feature('consolidation', self._detect_consolidation),
+            Feature('breakout', self._detect_breakout)
+        ]
     
     def _detect_higher_high(self, df: pd.DataFrame) -> pd.Series:
         """Detect higher highs"""
@@ -94,30 +91,18 @@ class MarketStructureFeatures:
     
     def _detect_swing_high(self, df: pd.DataFrame, window: int = 5) -> pd.Series:
         """Detect swing highs"""
-        swing_high = pd.Series(0, index=df.index)
-        
-        for i in range(window, len(df) - window):
-            if df['high'].iloc[i] == df['high'].iloc[i-window:i+window+1].max():
-                swing_high.iloc[i] = 1
-        
-        return swing_high
+        return pd.Series(swing_points(df['high'].to_numpy(), window, highs=True), index=df.index)
     
     def _detect_swing_low(self, df: pd.DataFrame, window: int = 5) -> pd.Series:
         """Detect swing lows"""
-        swing_low = pd.Series(0, index=df.index)
-        
-        for i in range(window, len(df) - window):
-            if df['low'].iloc[i] == df['low'].iloc[i-window:i+window+1].min():
-                swing_low.iloc[i] = 1
-        
-        return swing_low
+        return pd.Series(swing_points(df['low'].to_numpy(), window, highs=False), index=df.index)
     
     def _distance_to_last_swing_high(self, df: pd.DataFrame) -> pd.Series:
         """Calculate distance to last swing high"""
         if 'swing_high' not in df.columns:
             return pd.Series(0, index=df.index)
         
-        last_swing_high = df[df['swing_high'] == 1]['high'].reindex(df.index).fillna(method='ffill')
+        last_swing_high = ffill_last(df['high'].to_numpy(), (df['swing_high'] == 1).to_numpy())
         return (df['close'] - last_swing_high) / df['close']
     
     def _distance_to_last_swing_low(self, df: pd.DataFrame) -> pd.Series:
@@ -125,7 +110,7 @@ class MarketStructureFeatures:
         if 'swing_low' not in df.columns:
             return pd.Series(0, index=df.index)
         
-        last_swing_low = df[df['swing_low'] == 1]['low'].reindex(df.index).fillna(method='ffill')
+        last_swing_low = ffill_last(df['low'].to_numpy(), (df['swing_low'] == 1).to_numpy())
         return (df['close'] - last_swing_low) / df['close']
     
     def _calculate_trend_strength(self, df: pd.DataFrame) -> pd.Series:
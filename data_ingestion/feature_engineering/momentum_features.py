@@ -3,111 +3,136 @@ Momentum feature engineering
 """
 import pandas as pd
 import numpy as np
+from typing import List
 
+from feature_spec import Feature, FeatureGroup
+from smoothing import smooth, smoothing_alpha, rsi_from_averages, RSIState, EMAState, MACDState
 
-class MomentumFeatures:
+
+class MomentumFeatures(FeatureGroup):
     """Calculate momentum-based features"""
     
     def __init__(self, rsi_period: int = 14, macd_fast: int = 12, 
-                 macd_slow: int = 26, macd_signal: int = 9, roc_period: int = 10):
+                 macd_slow: int = 26, macd_signal: int = 9, roc_period: int = 10,
+                 rsi_smoothing: str = 'sma'):  # 'sma', 'wilder' or 'ema' (see smoothing.py)
         self.rsi_period = rsi_period
         self.macd_fast = macd_fast
         self.macd_slow = macd_slow
         self.macd_signal = macd_signal
         self.roc_period = roc_period
+        self.rsi_smoothing = rsi_smoothing
     
-    def calculate(self, df: pd.DataFrame) -> pd.DataFrame:
-        """
-        Calculate all momentum features
-        
-        Args:
-            df: DataFrame with OHLCV data
+    def define(self) -> List[Feature]:
+        """Momentum feature definitions"""
+        return [
+            # RSI
+            Feature('rsi', lambda df: self._calculate_rsi(df['close'], self.rsi_period)),
             
-        Returns:
-            DataFrame with momentum features added
-        """
-        df = df.copy()
-        
-        # RSI
-        df['rsi'] = self._calculate_rsi(df['close'], self.rsi_period)
-        
-        # RSI slope
-        df['rsi_slope'] = df['rsi'].diff(5)
-        
-        # RSI zones
-        df['rsi_oversold'] = (df['rsi'] < 30).astype(int)
-        df['rsi_overbought'] = (df['rsi'] > 70).astype(int)
-        df['rsi_neutral'] = ((df['rsi'] >= 40) & (df['rsi'] <= 60)).astype(int)
-        
-        # MACD
-        macd_data = self._calculate_macd(df['close'])
-        df['macd'] = macd_data['macd']
-        df['macd_signal'] = macd_data['signal']
-        df['macd_histogram'] = macd_data['histogram']
-        
-        # MACD crossover
-        df['macd_cross_above'] = (
-            (df['macd'] > df['macd_signal']) & 
-            (df['macd'].shift(1) <= df['macd_signal'].shift(1))
-        ).astype(int)
-        
-        df['macd_cross_below'] = (
-            (df['macd'] < df['macd_signal']) & 
-            (df['macd'].shift(1) >= df['macd_signal'].shift(1))
-        ).astype(int)
-        
-        # Rate of Change
-        df['roc'] = df['close'].pct_change(self.roc_period)
-        
-        # Momentum (price change)
-        df['momentum_5'] = df['close'] - df['close'].shift(5)
-        df['momentum_10'] = df['close'] - df['close'].shift(10)
-        df['momentum_20'] = df['close'] - df['close'].shift(20)
-        
-        # Momentum percentage
-        df['momentum_5_pct'] = df['close'].pct_change(5)
-        df['momentum_10_pct'] = df['close'].pct_change(10)
-        df['momentum_20_pct'] = df['close'].pct_change(20)
-        
-        # Stochastic oscillator
-        stoch = self._calculate_stochastic(df, period=14)
-        df['stoch_k'] = stoch['k']
-        df['stoch_d'] = stoch['d']
-        
-        return df
+            # RSI slope
+            Feature('rsi_slope', lambda df: df['rsi'].diff(5), ('rsi',)),
+            
+            # RSI zones
+            Feature('rsi_oversold', lambda df: (df['rsi'] < 30).astype(int), ('rsi',)),
+            Feature('rsi_overbought', lambda df: (df['rsi'] > 70).astype(int), ('rsi',)),
+            Feature('rsi_neutral', lambda df: ((df['rsi'] >= 40) & (df['rsi'] <= 60)).astype(int), ('rsi',)),
+            
+            # MACD
+            Feature('macd', lambda df: self._calculate_macd(df['close'])),
+            Feature('macd_signal', lambda df: self._calculate_macd_signal(df['macd']), ('macd',)),
+            Feature('macd_histogram', lambda df: df['macd'] - df['macd_signal'], ('macd', 'macd_signal')),
+            
+            # MACD crossover
+            Feature('macd_cross_above', lambda df: (
+                (df['macd'] > df['macd_signal']) & 
+                (df['macd'].shift(1) <= df['macd_signal'].shift(1))
+            ).astype(int), ('macd', 'macd_signal')),
+            
+            Feature('macd_cross_below', lambda df: (
+                (df['macd'] < df['macd_signal']) & 
+                (df['macd'].shift(1) >= df['macd_signal'].shift(1))
+            ).astype(int), ('macd', 'macd_signal')),
+            
+            # Rate of Change
+            Feature('roc', lambda df: df['close'].pct_change(self.roc_period)),
+            
+            # Momentum (price change)
+            Feature('momentum_5', lambda df: df['close'] - df['close'].shift(5)),
+            Feature('momentum_10', lambda df: df['close'] - df['close'].shift(10)),
+            Feature('momentum_20', lambda df: df['close'] - df['close'].shift(20)),
+            
+            # Momentum percentage
+            Feature('momentum_5_pct', lambda df: df['close'].pct_change(5)),
+            Feature('momentum_10_pct', lambda df: df['close'].pct_change(10)),
+            Feature('momentum_20_pct', lambda df: df['close'].pct_change(20)),
+            
+            # Stochastic oscillator
+            Feature('stoch_k', lambda df: self._calculate_stochastic_k(df, period=14)),
+            Feature('stoch_d', lambda df: df['stoch_k'].rolling(window=3).mean(), ('stoch_k',))
+        ]
     
     def _calculate_rsi(self, prices: pd.Series, period: int = 14) -> pd.Series:
         """Calculate RSI indicator"""
+        gain, loss = self._rsi_averages(prices, period)
+        return rsi_from_averages(gain, loss)
+    
+    def _rsi_averages(self, prices: pd.Series, period: int) -> tuple:
+        """Smoothed average gain and loss"""
         delta = prices.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+        gain = delta.clip(lower=0)
+        loss = (-delta).clip(lower=0)
         
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
+        if self.rsi_smoothing == 'sma':
+            # The first (undefined) change counts as 0 in the rolling window
+            gain, loss = gain.fillna(0), loss.fillna(0)
         
-        return rsi
+        return smooth(gain, period, self.rsi_smoothing), smooth(loss, period, self.rsi_smoothing)
+    
+    def rsi_state(self, prices: pd.Series) -> RSIState:
+        """
+        RSI state after the last price, for O(1) incremental updates
+        
+        Args:
+            prices: Close prices (history)
+        
+        Returns:
+            RSIState (requires 'wilder' or 'ema' smoothing)
+        """
+        smoothing_alpha(self.rsi_period, self.rsi_smoothing)
+        gain, loss = self._rsi_averages(prices, self.rsi_period)
+        return RSIState(self.rsi_period, self.rsi_smoothing, float(gain.iloc[-1]),
+                        float(loss.iloc[-1]), float(prices.iloc[-1]))
     
-    def _calculate_macd(self, prices: pd.Series) -> dict:
-        """Calculate MACD indicator"""
+    def _calculate_macd(self, prices: pd.Series) -> pd.Series:
+        """Calculate MACD line"""
         ema_fast = prices.ewm(span=self.macd_fast, adjust=False).mean()
         ema_slow = prices.ewm(span=self.macd_slow, adjust=False).mean()
         
-        macd = ema_fast - ema_slow
-        signal = macd.ewm(span=self.macd_signal, adjust=False).mean()
-        histogram = macd - signal
+        return ema_fast - ema_slow
+    
+    def _calculate_macd_signal(self, macd: pd.Series) -> pd.Series:
+        """Calculate MACD signal line"""
+        return macd.ewm(span=self.macd_signal, adjust=False).mean()
+    
+    def macd_state(self, prices: pd.Series) -> MACDState:
+        """
+        MACD state after the last price, for O(1) incremental updates
+        
+        Args:
+            prices: Close prices (history)
         
-        return {
-            'macd': macd,
-            'signal': signal,
-            'histogram': histogram
-        }
+        Returns:
+            MACDState
+        """
+        ema_fast = prices.ewm(span=self.macd_fast, adjust=False).mean()
+        ema_slow = prices.ewm(span=self.macd_slow, adjust=False).mean()
+        signal = self._calculate_macd_signal(ema_fast - ema_slow)
+        return MACDState(EMAState(self.macd_fast, float(ema_fast.iloc[-1])),
+                         EMAState(self.macd_slow, float(ema_slow.iloc[-1])),
+                         EMAState(self.macd_signal, float(signal.iloc[-1])))
     
-    def _calculate_stochastic(self, df: pd.DataFrame, period: int = 14) -> dict:
-        """Calculate Stochastic oscillator"""
+    def _calculate_stochastic_k(self, df: pd.DataFrame, period: int = 14) -> pd.Series:
+        """Calculate Stochastic oscillator %K"""
         low_min = df['low'].rolling(window=period).min()
         high_max = df['high'].rolling(window=period).max()
         
-        k = 100 * (df['close'] - low_min) / (high_max - low_min)
-        d = k.rolling(window=3).mean()
-        
-        return {'k': k, 'd': d}
+        return 100 * (df['close'] - low_min) / (high_max - low_min)
@@ -0,0 +1,136 @@
+"""
+Multi-timeframe feature alignment
+
+Features are computed once per higher timeframe (HTF) and joined into lower
+timeframe (LTF) rows without lookahead: each LTF row only sees the last HTF
+candle that had closed by the time the LTF candle closed.
+
+    HTF candle opened at T closes at T + htf_interval
+    LTF row opened at t is known at t + ltf_interval
+    row -> last HTF candle with close <= t + ltf_interval
+
+The join is a single np.searchsorted over the sorted HTF close times plus a
+gather per column, instead of one merge_asof per column or timeframe.
+"""
+import pandas as pd
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+NS_PER_MINUTE = 60 * 1_000_000_000
+
+
+@dataclass
+class HTFFrame:
+    """Selected features of one higher timeframe, indexed by close time"""
+    timeframe: str
+    close_ns: np.ndarray
+    columns: Dict[str, np.ndarray]
+
+
+def closed_candle_index(ltf_close_ns: np.ndarray, htf_close_ns: np.ndarray) -> np.ndarray:
+    """
+    Index of the last HTF candle closed at each LTF close time
+
+    Args:
+        ltf_close_ns: LTF close times (epoch ns)
+        htf_close_ns: Sorted HTF close times (epoch ns)
+
+    Returns:
+        Index into htf_close_ns per LTF row (-1 = no HTF candle closed yet)
+    """
+    return np.searchsorted(htf_close_ns, ltf_close_ns, side='right') - 1
+
+
+def resample_ohlcv(df: pd.DataFrame, minutes: int, offset: Optional[str] = None) -> pd.DataFrame:
+    """
+    Build a higher timeframe from a lower one
+
+    Args:
+        df: OHLCV DataFrame with a timestamp column
+        minutes: Target interval in minutes
+        offset: Bar alignment, the symbol calendar's resample_offset (e.g.
+            22:00 UTC for FX, so no bar straddles the weekly close)
+
+    Returns:
+        Resampled OHLCV DataFrame (incomplete trailing buckets included)
+    """
+    agg = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+    if 'spread' in df.columns:
+        agg['spread'] = 'mean'
+    resampled = df.set_index('timestamp').resample(f'{minutes}min', offset=offset).agg(agg)
+    return resampled.dropna(subset=['close']).reset_index()
+
+
+class MultiTimeframeAligner:
+    """Joins higher timeframe features into lower timeframe rows"""
+
+    def __init__(self, timeframe_minutes: Dict[str, int], htf_timeframes: List[str],
+                 columns: List[str]):
+        """
+        Args:
+            timeframe_minutes: {timeframe: interval minutes}
+            htf_timeframes: Timeframes whose features are joined into every timeframe
+            columns: Feature columns taken from each HTF
+        """
+        self.timeframe_minutes = timeframe_minutes
+        self.htf_timeframes = htf_timeframes
+        self.columns = columns
+
+    def output_columns(self) -> List[str]:
+        """Names of the joined columns (htf_{timeframe}_{column})"""
+        return [f'htf_{tf}_{col}' for tf in self.htf_timeframes for col in self.columns]
+
+    def prepare(self, features: pd.DataFrame, timeframe: str) -> HTFFrame:
+        """
+        Index an HTF feature frame by candle close time
+        
+        Args:
+            features: Feature DataFrame of the higher timeframe
+            timeframe: Its timeframe
+        
+        Returns:
+            HTFFrame for join()
+        """
+        missing = [c for c in self.columns if c not in features.columns]
+        if missing:
+            raise ValueError(f"HTF {timeframe} features missing columns: {missing}")
+        
+        features = features.sort_values('timestamp')
+        open_ns = features['timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        close_ns = open_ns + self.timeframe_minutes[timeframe] * NS_PER_MINUTE
+        columns = {col: features[col].to_numpy(dtype=np.float64) for col in self.columns}
+        
+        return HTFFrame(timeframe, close_ns, columns)
+
+    def join(self, df: pd.DataFrame, timeframe: str,
+             htf_frames: Dict[str, HTFFrame]) -> pd.DataFrame:
+        """
+        Add htf_{timeframe}_{column} features from closed HTF candles
+        
+        Rows before the first closed HTF candle get NaN.
+        
+        Args:
+            df: LTF DataFrame with a timestamp column
+            timeframe: LTF timeframe
+            htf_frames: Prepared HTF frames by timeframe
+        
+        Returns:
+            DataFrame with HTF columns added
+        """
+        ltf_open_ns = df['timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        ltf_close_ns = ltf_open_ns + self.timeframe_minutes[timeframe] * NS_PER_MINUTE
+        
+        new_columns = {}
+        for htf in self.htf_timeframes:
+            frame = htf_frames[htf]
+            idx = closed_candle_index(ltf_close_ns, frame.close_ns)
+            available = idx >= 0
+            idx = np.where(available, idx, 0)
+            for col, values in frame.columns.items():
+                if len(values) == 0:
+                    new_columns[f'htf_{htf}_{col}'] = np.full(len(df), np.nan)
+                else:
+                    new_columns[f'htf_{htf}_{col}'] = np.where(available, values[idx], np.nan)
+        
+        return df.assign(**new_columns)
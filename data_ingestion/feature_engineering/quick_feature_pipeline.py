@@ -5,7 +5,6 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 import logging
-from sklearn.preprocessing import StandardScaler
 
 from config import *
 from trend_features import TrendFeatures
@@ -91,6 +90,8 @@ def quick_feature_engineering():
     logger.info(f"  ✓ Combined: {len(combined_df):,} rows, {len(combined_df.columns)} columns")
     
     # Normalize
+    from sklearn.preprocessing import StandardScaler
+    
     logger.info("\nNormalizing features...")
     exclude_cols = ['timestamp', 'symbol', 'timeframe']
     numeric_cols = combined_df.select_dtypes(include=[np.number]).columns.tolist()
@@ -115,6 +116,9 @@ def quick_feature_engineering():
     file_size = output_file.stat().st_size / (1024 * 1024)
     logger.info(f"  ✓ Saved: {len(combined_df):,} rows ({file_size:.2f} MB)")
     
+    from feature_pipeline import save_scaler
+    save_scaler(scaler, str(data_dir / Path(SCALER_FILE).name))
+    
     # Summary
     feature_cols = [col for col in combined_df.columns 
                    if col not in ['timestamp', 'symbol', 'timeframe']]
@@ -0,0 +1,184 @@
+"""
+Indicator smoothing and incremental indicator state
+
+RSI and ATR average their inputs with one of:
+    'sma'    - simple rolling mean over the period (original behaviour)
+    'wilder' - Wilder's smoothing, alpha = 1 / period (broker/TradingView values)
+    'ema'    - exponential smoothing, alpha = 2 / (period + 1)
+
+The recursive methods are seeded with the simple mean of the first `period`
+values, then run through pandas ewm(adjust=False), so batch computation stays
+vectorized. Because each value only depends on the previous average and the
+new input, RSIState/ATRState can continue a series one candle at a time in
+O(1) from the last batch values instead of recomputing a window. EMAState
+and MACDState do the same for ewm(span, adjust=False) EMAs and MACD.
+"""
+import pandas as pd
+import numpy as np
+from dataclasses import dataclass
+
+SMOOTHING_METHODS = ('sma', 'wilder', 'ema')
+
+
+def smoothing_alpha(period: int, method: str) -> float:
+    """Smoothing factor of a recursive method"""
+    if method == 'wilder':
+        return 1.0 / period
+    if method == 'ema':
+        return 2.0 / (period + 1)
+    raise ValueError(f"'{method}' smoothing has no recursive form; use 'wilder' or 'ema'")
+
+
+def smooth(values: pd.Series, period: int, method: str = 'sma') -> pd.Series:
+    """
+    Average a series with the given smoothing method
+
+    Args:
+        values: Input series (leading NaNs allowed)
+        period: Smoothing period
+        method: 'sma', 'wilder' or 'ema'
+
+    Returns:
+        Smoothed series (NaN until `period` values are available)
+    """
+    if method not in SMOOTHING_METHODS:
+        raise ValueError(f"Unknown smoothing method: {method}")
+    if method == 'sma':
+        return values.rolling(window=period).mean()
+
+    raw = values.to_numpy(dtype=np.float64)
+    valid = np.flatnonzero(~np.isnan(raw))
+    seeded = np.full(len(raw), np.nan)
+    if len(valid) >= period:
+        first = valid[0]
+        seed = first + period - 1
+        seeded[seed] = raw[first:seed + 1].mean()
+        seeded[seed + 1:] = raw[seed + 1:]
+
+    return pd.Series(seeded, index=values.index).ewm(
+        alpha=smoothing_alpha(period, method), adjust=False
+    ).mean()
+
+
+def rsi_from_averages(avg_gain, avg_loss):
+    """RSI from average gain and loss (scalars or arrays)"""
+    rs = avg_gain / avg_loss
+    return 100 - (100 / (1 + rs))
+
+
+@dataclass
+class EMAState:
+    """Last EMA (ewm(span, adjust=False)); update() advances one value in O(1)"""
+    span: int
+    ema: float
+
+    @property
+    def value(self) -> float:
+        """Current EMA"""
+        return self.ema
+
+    def update(self, value: float) -> float:
+        """
+        Add a value
+
+        Args:
+            value: New input (e.g. close price)
+
+        Returns:
+            EMA after the value
+        """
+        alpha = 2.0 / (self.span + 1)
+        self.ema = (1 - alpha) * self.ema + alpha * value
+        return self.ema
+
+
+@dataclass
+class MACDState:
+    """Fast/slow EMAs and the signal line; update() advances one candle in O(1)"""
+    fast: EMAState
+    slow: EMAState
+    signal: EMAState
+
+    @property
+    def value(self) -> float:
+        """Current MACD line"""
+        return self.fast.value - self.slow.value
+
+    def update(self, close: float) -> float:
+        """
+        Add a closed candle
+
+        Args:
+            close: Close price
+
+        Returns:
+            MACD line after the candle (signal line in self.signal.value)
+        """
+        macd = self.fast.update(close) - self.slow.update(close)
+        self.signal.update(macd)
+        return macd
+
+
+@dataclass
+class RSIState:
+    """Last smoothed RSI averages; update() advances one candle in O(1)"""
+    period: int
+    method: str
+    avg_gain: float
+    avg_loss: float
+    last_close: float
+
+    @property
+    def value(self) -> float:
+        """Current RSI"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return float(rsi_from_averages(np.float64(self.avg_gain), np.float64(self.avg_loss)))
+
+    def update(self, close: float) -> float:
+        """
+        Add a closed candle
+
+        Args:
+            close: Close price
+
+        Returns:
+            RSI after the candle
+        """
+        alpha = smoothing_alpha(self.period, self.method)
+        delta = close - self.last_close
+        self.avg_gain = (1 - alpha) * self.avg_gain + alpha * max(delta, 0.0)
+        self.avg_loss = (1 - alpha) * self.avg_loss + alpha * max(-delta, 0.0)
+        self.last_close = close
+        return self.value
+
+
+@dataclass
+class ATRState:
+    """Last smoothed ATR; update() advances one candle in O(1)"""
+    period: int
+    method: str
+    atr: float
+    last_close: float
+
+    @property
+    def value(self) -> float:
+        """Current ATR"""
+        return self.atr
+
+    def update(self, high: float, low: float, close: float) -> float:
+        """
+        Add a closed candle
+
+        Args:
+            high: High price
+            low: Low price
+            close: Close price
+
+        Returns:
+            ATR after the candle
+        """
+        alpha = smoothing_alpha(self.period, self.method)
+        true_range = max(high - low, abs(high - self.last_close), abs(low - self.last_close))
+        self.atr = (1 - alpha) * self.atr + alpha * true_range
+        self.last_close = close
+        return self.atr
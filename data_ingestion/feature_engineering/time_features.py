@@ -3,10 +3,12 @@ Time-based feature engineering
 """
 import pandas as pd
 import numpy as np
-from typing import Dict, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
+from feature_spec import Feature, FeatureGroup
 
-class TimeFeatures:
+
+class TimeFeatures(FeatureGroup):
     """Calculate time-based features"""
     
     def __init__(self, sessions: Dict[str, Tuple[int, int]] = None):
@@ -16,79 +18,88 @@ class TimeFeatures:
             'NY': (13, 22)
         }
     
-    def calculate(self, df: pd.DataFrame) -> pd.DataFrame:
+    def calculate_columns(self, df: pd.DataFrame,
+                          columns: Optional[Iterable[str]] = None,
+                          precomputed: Iterable[str] = ()) -> pd.DataFrame:
         """
-        Calculate all time features
+        Calculate time features
         
         Args:
             df: DataFrame with OHLCV data and timestamp
+            columns: Requested columns (None = all)
+            precomputed: Feature columns df already holds
             
         Returns:
-            DataFrame with time features added
+            DataFrame with the computed time features
         """
-        df = df.copy()
-        
         # Ensure timestamp is datetime
         if not pd.api.types.is_datetime64_any_dtype(df['timestamp']):
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-        
-        # Extract time components
-        df['hour'] = df['timestamp'].dt.hour
-        df['day_of_week'] = df['timestamp'].dt.dayofweek  # 0=Monday, 6=Sunday
-        df['day_of_month'] = df['timestamp'].dt.day
-        df['month'] = df['timestamp'].dt.month
-        df['quarter'] = df['timestamp'].dt.quarter
-        
-        # Cyclical encoding for hour (24-hour cycle)
-        df['hour_sin'] = np.sin(2 * np.pi * df['hour'] / 24)
-        df['hour_cos'] = np.cos(2 * np.pi * df['hour'] / 24)
-        
-        # Cyclical encoding for day of week (7-day cycle)
-        df['day_sin'] = np.sin(2 * np.pi * df['day_of_week'] / 7)
-        df['day_cos'] = np.cos(2 * np.pi * df['day_of_week'] / 7)
-        
-        # Cyclical encoding for month (12-month cycle)
-        df['month_sin'] = np.sin(2 * np.pi * df['month'] / 12)
-        df['month_cos'] = np.cos(2 * np.pi * df['month'] / 12)
-        
-        # Trading sessions
-        df['session_asia'] = self._in_session(df['hour'], *self.sessions['ASIA'])
-        df['session_london'] = self._in_session(df['hour'], *self.sessions['LONDON'])
-        df['session_ny'] = self._in_session(df['hour'], *self.sessions['NY'])
-        
-        # Session overlaps
-        df['overlap_london_ny'] = (df['session_london'] & df['session_ny']).astype(int)
-        df['overlap_asia_london'] = (df['session_asia'] & df['session_london']).astype(int)
-        
-        # Weekend flag
-        df['is_weekend'] = (df['day_of_week'] >= 5).astype(int)
-        
-        # Start/end of week
-        df['start_of_week'] = (df['day_of_week'] == 0).astype(int)
-        df['end_of_week'] = (df['day_of_week'] == 4).astype(int)
-        
-        # Start/end of month
-        df['start_of_month'] = (df['day_of_month'] <= 5).astype(int)
-        df['end_of_month'] = (df['day_of_month'] >= 25).astype(int)
-        
-        # Market open/close hours
-        df['market_open'] = (df['hour'] == 0).astype(int)  # Daily open
-        df['market_close'] = (df['hour'] == 23).astype(int)  # Daily close
-        
-        # High activity periods
-        df['high_activity'] = (
-            df['overlap_london_ny'] | 
-            ((df['hour'] >= 8) & (df['hour'] <= 10)) |  # London open
-            ((df['hour'] >= 13) & (df['hour'] <= 15))   # NY open
-        ).astype(int)
+            df = df.assign(timestamp=pd.to_datetime(df['timestamp']))
         
-        # Low activity periods
-        df['low_activity'] = (
-            ((df['hour'] >= 22) | (df['hour'] <= 1)) |  # Asian night
-            df['is_weekend']
-        ).astype(int)
-        
-        return df
+        return super().calculate_columns(df, columns, precomputed)
+    
+    def define(self) -> List[Feature]:
+        """Time feature definitions"""
+        return [
+            # Extract time components
+            Feature('hour', lambda df: df['timestamp'].dt.hour),
+            Feature('day_of_week', lambda df: df['timestamp'].dt.dayofweek),  # 0=Monday, 6=Sunday
+            Feature('day_of_month', lambda df: df['timestamp'].dt.day),
+            Feature('month', lambda df: df['timestamp'].dt.month),
+            Feature('quarter', lambda df: df['timestamp'].dt.quarter),
+            
+            # Cyclical encoding for hour (24-hour cycle)
+            Feature('hour_sin', lambda df: np.sin(2 * np.pi * df['hour'] / 24), ('hour',)),
+            Feature('hour_cos', lambda df: np.cos(2 * np.pi * df['hour'] / 24), ('hour',)),
+            
+            # Cyclical encoding for day of week (7-day cycle)
+            Feature('day_sin', lambda df: np.sin(2 * np.pi * df['day_of_week'] / 7), ('day_of_week',)),
+            Feature('day_cos', lambda df: np.cos(2 * np.pi * df['day_of_week'] / 7), ('day_of_week',)),
+            
+            # Cyclical encoding for month (12-month cycle)
+            Feature('month_sin', lambda df: np.sin(2 * np.pi * df['month'] / 12), ('month',)),
+            Feature('month_cos', lambda df: np.cos(2 * np.pi * df['month'] / 12), ('month',)),
+            
+            # Trading sessions
+            Feature('session_asia', lambda df: self._in_session(df['hour'], *self.sessions['ASIA']), ('hour',)),
+            Feature('session_london', lambda df: self._in_session(df['hour'], *self.sessions['LONDON']),
+                    ('hour',)),
+            Feature('session_ny', lambda df: self._in_session(df['hour'], *self.sessions['NY']), ('hour',)),
+            
+            # Session overlaps
+            Feature('overlap_london_ny', lambda df: (df['session_london'] & df['session_ny']).astype(int),
+                    ('session_london', 'session_ny')),
+            Feature('overlap_asia_london', lambda df: (df['session_asia'] & df['session_london']).astype(int),
+                    ('session_asia', 'session_london')),
+            
+            # Weekend flag
+            Feature('is_weekend', lambda df: (df['day_of_week'] >= 5).astype(int), ('day_of_week',)),
+            
+            # Start/end of week
+            Feature('start_of_week', lambda df: (df['day_of_week'] == 0).astype(int), ('day_of_week',)),
+            Feature('end_of_week', lambda df: (df['day_of_week'] == 4).astype(int), ('day_of_week',)),
+            
+            # Start/end of month
+            Feature('start_of_month', lambda df: (df['day_of_month'] <= 5).astype(int), ('day_of_month',)),
+            Feature('end_of_month', lambda df: (df['day_of_month'] >= 25).astype(int), ('day_of_month',)),
+            
+            # Market open/close hours
+            Feature('market_open', lambda df: (df['hour'] == 0).astype(int), ('hour',)),  # Daily open
+            Feature('market_close', lambda df: (df['hour'] == 23).astype(int), ('hour',)),  # Daily close
+            
+            # High activity periods
+            Feature('high_activity', lambda df: (
+                df['overlap_london_ny'] | 
+                ((df['hour'] >= 8) & (df['hour'] <= 10)) |  # London open
+                ((df['hour'] >= 13) & (df['hour'] <= 15))   # NY open
+            ).astype(int), ('overlap_london_ny', 'hour')),
+            
+            # Low activity periods
+            Feature('low_activity', lambda df: (
+                ((df['hour'] >= 22) | (df['hour'] <= 1)) |  # Asian night
+                df['is_weekend']
+            ).astype(int), ('hour', 'is_weekend'))
+        ]
     
     def _in_session(self, hour: pd.Series, start: int, end: int) -> pd.Series:
         """Check if hour is within session"""
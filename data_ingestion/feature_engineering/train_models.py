@@ -6,29 +6,45 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 import logging
-import joblib
 import json
+import sys
 from datetime import datetime
 
-# Set matplotlib backend before importing pyplot
-import matplotlib
-matplotlib.use('Agg')  # Non-interactive backend
-import matplotlib.pyplot as plt
-import seaborn as sns
+import pyarrow as pa
+import pyarrow.parquet as pq
 
-# ML libraries
-from sklearn.metrics import (
-    accuracy_score, precision_score, recall_score, f1_score,
-    classification_report, confusion_matrix, roc_auc_score, roc_curve
-)
-from sklearn.linear_model import LogisticRegression
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-import xgboost as xgb
-import lightgbm as lgb
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from storage import column_view, table_to_frame, table_to_matrix
+
+# Plotting and ML libraries (matplotlib, seaborn, sklearn, lightgbm, joblib)
+# are imported inside the methods that use them to keep import time low.
 
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 logger = logging.getLogger(__name__)
 
+# model type -> (label column, saved model name)
+MODEL_TYPES = {
+    'direction': ('label_direction', 'direction_model'),
+    'volatility': ('label_volatility', 'volatility_model'),
+    'no_trade': ('label_no_trade', 'notrade_model')
+}
+
+
+def _row_selector(rows):
+    """Slice for contiguous row indices (so data is viewed, not copied)"""
+    rows = np.asarray(rows)
+    if len(rows) and rows[-1] - rows[0] == len(rows) - 1 and (np.diff(rows) == 1).all():
+        return slice(int(rows[0]), int(rows[-1]) + 1)
+    return rows
+
+
+def _get_pyplot():
+    """Import pyplot with the non-interactive backend"""
+    import matplotlib
+    matplotlib.use('Agg')  # Non-interactive backend
+    import matplotlib.pyplot as plt
+    return plt
+
 
 class ModelTrainer:
     """Train and evaluate trading models with walk-forward validation"""
@@ -43,11 +59,19 @@ class ModelTrainer:
         (self.models_dir / 'metrics').mkdir(exist_ok=True)
         
         self.df = None
+        self.X = None
         self.feature_cols = None
         self.results = {}
     
     def load_data(self):
-        """Load training dataset"""
+        """
+        Load training dataset
+        
+        The Arrow table is read memory-mapped and the feature columns are
+        copied once, straight into a float64 matrix (self.X); no full
+        DataFrame is built. self.df holds the timestamp, symbol, timeframe and
+        label columns. features() and labels() return split data as views.
+        """
         logger.info("="*80)
         logger.info("LOADING TRAINING DATASET")
         logger.info("="*80)
@@ -56,25 +80,62 @@ class ModelTrainer:
             raise FileNotFoundError(f"Dataset not found: {self.data_path}")
         
         logger.info(f"\nLoading: {self.data_path}")
-        self.df = pd.read_parquet(self.data_path)
+        table = pq.read_table(self.data_path, memory_map=True)
+        
+        # Stored pandas index (the DataFrame path dropped it via reset_index)
+        index_cols = [col for col in (table.schema.pandas_metadata or {}).get('index_columns', [])
+                      if isinstance(col, str)]
+        table = table.drop_columns(index_cols)
         
         # Ensure timestamp is datetime
-        if not pd.api.types.is_datetime64_any_dtype(self.df['timestamp']):
-            self.df['timestamp'] = pd.to_datetime(self.df['timestamp'])
+        if not pa.types.is_timestamp(table.schema.field('timestamp').type):
+            timestamps = pd.to_datetime(table.column('timestamp').to_pandas())
+            table = table.set_column(table.schema.get_field_index('timestamp'), 'timestamp',
+                                     pa.Array.from_pandas(timestamps))
         
-        # Sort by timestamp
-        self.df = self.df.sort_values('timestamp').reset_index(drop=True)
+        # Sort by timestamp (same order as DataFrame.sort_values)
+        order = np.argsort(column_view(table, 'timestamp'), kind='quicksort')
+        if not np.array_equal(order, np.arange(len(order))):
+            table = table.take(order)
         
         # Identify feature columns
-        self.feature_cols = [col for col in self.df.columns 
+        self.feature_cols = [col for col in table.column_names 
                             if not col.startswith('label_') 
                             and col not in ['timestamp', 'symbol', 'timeframe']]
         
+        self.X = table_to_matrix(table, self.feature_cols)
+        self.df = table_to_frame(table.select([col for col in table.column_names
+                                               if col not in self.feature_cols]))
+        self.df.index = pd.RangeIndex(len(self.df))
+        
         logger.info(f"✓ Loaded: {len(self.df):,} rows")
-        logger.info(f"  Features: {len(self.feature_cols)}")
+        logger.info(f"  Features: {len(self.feature_cols)} ({self.X.nbytes / 1024**2:.0f} MB matrix)")
         logger.info(f"  Date range: {self.df['timestamp'].min()} to {self.df['timestamp'].max()}")
         logger.info(f"  Labels: label_direction, label_volatility, label_no_trade")
     
+    def features(self, rows, columns=None) -> pd.DataFrame:
+        """
+        Feature rows as a DataFrame over self.X
+        
+        Args:
+            rows: Row indices (contiguous indices give a view, not a copy)
+            columns: Feature subset (default: all features)
+            
+        Returns:
+            DataFrame indexed like self.df
+        """
+        rows = _row_selector(rows)
+        if columns is None or list(columns) == self.feature_cols:
+            values, columns = self.X[rows], self.feature_cols
+        else:
+            positions = [self.feature_cols.index(col) for col in columns]
+            values = self.X[rows][:, positions]
+        return pd.DataFrame(values, columns=columns, index=self.df.index[rows], copy=False)
+    
+    def labels(self, rows, label: str) -> pd.Series:
+        """Label column for the given rows"""
+        return self.df[label].iloc[_row_selector(rows)]
+    
     def create_time_splits(self):
         """
         Create time-based train/test splits for walk-forward validation
@@ -132,6 +193,50 @@ class ModelTrainer:
         
         return split_data
     
+    def build_model(self, model_type: str):
+        """
+        Unfitted estimator for a model type
+        
+        Args:
+            model_type: 'direction', 'volatility' or 'no_trade'
+        """
+        if model_type == 'direction':
+            import lightgbm as lgb
+            return lgb.LGBMClassifier(
+                n_estimators=200,
+                max_depth=8,
+                learning_rate=0.05,
+                num_leaves=31,
+                min_child_samples=100,
+                subsample=0.8,
+                colsample_bytree=0.8,
+                random_state=42,
+                verbose=-1
+            )
+        
+        if model_type == 'volatility':
+            from sklearn.ensemble import RandomForestClassifier
+            return RandomForestClassifier(
+                n_estimators=200,
+                max_depth=10,
+                min_samples_split=100,
+                min_samples_leaf=50,
+                max_features='sqrt',
+                random_state=42,
+                n_jobs=-1
+            )
+        
+        if model_type == 'no_trade':
+            from sklearn.linear_model import LogisticRegression
+            return LogisticRegression(
+                C=1.0,
+                max_iter=1000,
+                random_state=42,
+                n_jobs=-1
+            )
+        
+        raise ValueError(f"Unknown model type: {model_type}")
+    
     def train_direction_model(self, X_train, y_train, X_test, y_test, split_name):
         """
         MODEL 1: Direction Model (Gradient Boosting)
@@ -145,17 +250,7 @@ class ModelTrainer:
         
         # Train LightGBM model
         logger.info("\nTraining LightGBM...")
-        model = lgb.LGBMClassifier(
-            n_estimators=200,
-            max_depth=8,
-            learning_rate=0.05,
-            num_leaves=31,
-            min_child_samples=100,
-            subsample=0.8,
-            colsample_bytree=0.8,
-            random_state=42,
-            verbose=-1
-        )
+        model = self.build_model('direction')
         
         model.fit(X_train, y_train)
         
@@ -202,15 +297,7 @@ class ModelTrainer:
         
         # Train Random Forest
         logger.info("\nTraining Random Forest...")
-        model = RandomForestClassifier(
-            n_estimators=200,
-            max_depth=10,
-            min_samples_split=100,
-            min_samples_leaf=50,
-            max_features='sqrt',
-            random_state=42,
-            n_jobs=-1
-        )
+        model = self.build_model('volatility')
         
         model.fit(X_train, y_train)
         
@@ -250,12 +337,7 @@ class ModelTrainer:
         
         # Train Logistic Regression
         logger.info("\nTraining Logistic Regression...")
-        model = LogisticRegression(
-            C=1.0,
-            max_iter=1000,
-            random_state=42,
-            n_jobs=-1
-        )
+        model = self.build_model('no_trade')
         
         model.fit(X_train, y_train)
         
@@ -284,6 +366,11 @@ class ModelTrainer:
     
     def _calculate_metrics(self, y_true, y_pred, y_pred_proba, model_name):
         """Calculate comprehensive metrics"""
+        from sklearn.metrics import (
+            accuracy_score, precision_score, recall_score, f1_score,
+            classification_report, roc_auc_score
+        )
+        
         metrics = {
             'accuracy': accuracy_score(y_true, y_pred),
             'precision': precision_score(y_true, y_pred, average='weighted', zero_division=0),
@@ -313,6 +400,7 @@ class ModelTrainer:
     def _plot_feature_importance(self, model, feature_names, title, filename):
         """Plot feature importance"""
         if hasattr(model, 'feature_importances_'):
+            plt = _get_pyplot()
             importance = model.feature_importances_
             
             # Get top 20 features
@@ -332,6 +420,7 @@ class ModelTrainer:
     def _plot_logistic_coefficients(self, model, feature_names, title, filename):
         """Plot logistic regression coefficients"""
         if hasattr(model, 'coef_'):
+            plt = _get_pyplot()
             coef = model.coef_[0]
             
             # Get top 20 by absolute value
@@ -352,6 +441,10 @@ class ModelTrainer:
     
     def _plot_confusion_matrix(self, y_true, y_pred, title, filename):
         """Plot confusion matrix"""
+        import seaborn as sns
+        from sklearn.metrics import confusion_matrix
+        plt = _get_pyplot()
+        
         cm = confusion_matrix(y_true, y_pred)
         
         plt.figure(figsize=(8, 6))
@@ -367,6 +460,9 @@ class ModelTrainer:
     
     def _plot_roc_curve(self, y_true, y_pred_proba, title, filename):
         """Plot ROC curve"""
+        from sklearn.metrics import roc_auc_score, roc_curve
+        plt = _get_pyplot()
+        
         fpr, tpr, _ = roc_curve(y_true, y_pred_proba)
         auc = roc_auc_score(y_true, y_pred_proba)
         
@@ -386,6 +482,8 @@ class ModelTrainer:
     
     def save_model(self, model, model_name, split_name, metrics):
         """Save trained model and metrics"""
+        import joblib
+        
         # Save model
         model_filename = f"{model_name}_{split_name.replace(' ', '_')}.pkl"
         model_path = self.models_dir / model_filename
@@ -421,12 +519,12 @@ class ModelTrainer:
             logger.info("="*80)
             
             # Prepare data
-            X_train = self.df.iloc[train_idx][self.feature_cols]
-            X_test = self.df.iloc[test_idx][self.feature_cols]
+            X_train = self.features(train_idx)
+            X_test = self.features(test_idx)
             
             # Model 1: Direction
-            y_train_dir = self.df.iloc[train_idx]['label_direction']
-            y_test_dir = self.df.iloc[test_idx]['label_direction']
+            y_train_dir = self.labels(train_idx, 'label_direction')
+            y_test_dir = self.labels(test_idx, 'label_direction')
             
             model_dir, metrics_dir = self.train_direction_model(
                 X_train, y_train_dir, X_test, y_test_dir, split_name
@@ -434,8 +532,8 @@ class ModelTrainer:
             self.save_model(model_dir, 'direction_model', split_name, metrics_dir)
             
             # Model 2: Volatility
-            y_train_vol = self.df.iloc[train_idx]['label_volatility']
-            y_test_vol = self.df.iloc[test_idx]['label_volatility']
+            y_train_vol = self.labels(train_idx, 'label_volatility')
+            y_test_vol = self.labels(test_idx, 'label_volatility')
             
             model_vol, metrics_vol = self.train_volatility_model(
                 X_train, y_train_vol, X_test, y_test_vol, split_name
@@ -443,8 +541,8 @@ class ModelTrainer:
             self.save_model(model_vol, 'volatility_model', split_name, metrics_vol)
             
             # Model 3: No-Trade
-            y_train_nt = self.df.iloc[train_idx]['label_no_trade']
-            y_test_nt = self.df.iloc[test_idx]['label_no_trade']
+            y_train_nt = self.labels(train_idx, 'label_no_trade')
+            y_test_nt = self.labels(test_idx, 'label_no_trade')
             
             model_nt, metrics_nt = self.train_notrade_model(
                 X_train, y_train_nt, X_test, y_test_nt, split_name
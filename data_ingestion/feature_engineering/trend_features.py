@@ -5,87 +5,84 @@ import pandas as pd
 import numpy as np
 from typing import List
 
+from feature_spec import Feature, FeatureGroup
+from smoothing import EMAState
 
-class TrendFeatures:
+
+class TrendFeatures(FeatureGroup):
     """Calculate trend-based features"""
     
     def __init__(self, ema_periods: List[int] = [20, 50, 200]):
         self.ema_periods = ema_periods
     
-    def calculate(self, df: pd.DataFrame) -> pd.DataFrame:
-        """
-        Calculate all trend features
-        
-        Args:
-            df: DataFrame with OHLCV data
-            
-        Returns:
-            DataFrame with trend features added
-        """
-        df = df.copy()
+    def define(self) -> List[Feature]:
+        """Trend feature definitions"""
+        features = []
         
         # Calculate EMAs
         for period in self.ema_periods:
-            df[f'ema_{period}'] = df['close'].ewm(span=period, adjust=False).mean()
+            features.append(Feature(f'ema_{period}', self._ema(period)))
         
         # EMA slopes (rate of change)
         for period in self.ema_periods:
-            df[f'ema_{period}_slope'] = df[f'ema_{period}'].pct_change(5)
+            features.append(Feature(f'ema_{period}_slope', self._ema_slope(period), (f'ema_{period}',)))
         
         # EMA distances (price relative to EMA)
         for period in self.ema_periods:
-            df[f'ema_{period}_distance'] = (df['close'] - df[f'ema_{period}']) / df[f'ema_{period}']
-        
-        # EMA crossovers
-        df['ema_20_50_cross'] = (df['ema_20'] > df['ema_50']).astype(int)
-        df['ema_50_200_cross'] = (df['ema_50'] > df['ema_200']).astype(int)
-        
-        # Price position relative to EMAs
-        df['price_above_ema_20'] = (df['close'] > df['ema_20']).astype(int)
-        df['price_above_ema_50'] = (df['close'] > df['ema_50']).astype(int)
-        df['price_above_ema_200'] = (df['close'] > df['ema_200']).astype(int)
+            features.append(Feature(f'ema_{period}_distance', self._ema_distance(period), (f'ema_{period}',)))
         
-        # Trend strength (all EMAs aligned)
-        df['ema_alignment'] = (
-            (df['ema_20'] > df['ema_50']) & 
-            (df['ema_50'] > df['ema_200'])
-        ).astype(int)
-        
-        # Trend direction score (-1 to 1)
-        df['trend_score'] = (
-            df['price_above_ema_20'] + 
-            df['price_above_ema_50'] + 
-            df['price_above_ema_200'] +
-            df['ema_20_50_cross'] +
-            df['ema_50_200_cross']
-        ) / 5 - 0.5
+        features += [
+            # EMA crossovers
+            Feature('ema_20_50_cross', lambda df: (df['ema_20'] > df['ema_50']).astype(int),
+                    ('ema_20', 'ema_50')),
+            Feature('ema_50_200_cross', lambda df: (df['ema_50'] > df['ema_200']).astype(int),
+                    ('ema_50', 'ema_200')),
+            
+            # Price position relative to EMAs
+            Feature('price_above_ema_20', lambda df: (df['close'] > df['ema_20']).astype(int), ('ema_20',)),
+            Feature('price_above_ema_50', lambda df: (df['close'] > df['ema_50']).astype(int), ('ema_50',)),
+            Feature('price_above_ema_200', lambda df: (df['close'] > df['ema_200']).astype(int), ('ema_200',)),
+            
+            # Trend strength (all EMAs aligned)
+            Feature('ema_alignment', lambda df: (
+                (df['ema_20'] > df['ema_50']) & 
+                (df['ema_50'] > df['ema_200'])
+            ).astype(int), ('ema_20', 'ema_50', 'ema_200')),
+            
+            # Trend direction score (-1 to 1)
+            Feature('trend_score', lambda df: (
+                df['price_above_ema_20'] + 
+                df['price_above_ema_50'] + 
+                df['price_above_ema_200'] +
+                df['ema_20_50_cross'] +
+                df['ema_50_200_cross']
+            ) / 5 - 0.5, ('price_above_ema_20', 'price_above_ema_50', 'price_above_ema_200',
+                          'ema_20_50_cross', 'ema_50_200_cross'))
+        ]
         
-        return df
+        return features
+    
+    def _ema(self, period: int):
+        """EMA of close"""
+        return lambda df: df['close'].ewm(span=period, adjust=False).mean()
     
-    def calculate_htf_trend(self, df: pd.DataFrame, htf_df: pd.DataFrame) -> pd.DataFrame:
+    def ema_state(self, prices: pd.Series, period: int) -> EMAState:
         """
-        Add higher timeframe trend direction
+        EMA state after the last price, for O(1) incremental updates
         
         Args:
-            df: Lower timeframe DataFrame
-            htf_df: Higher timeframe DataFrame with trend features
-            
+            prices: Close prices (history)
+            period: EMA period
+        
         Returns:
-            DataFrame with HTF trend added
+            EMAState
         """
-        df = df.copy()
-        
-        # Merge HTF trend score
-        if 'trend_score' in htf_df.columns:
-            htf_trend = htf_df[['timestamp', 'trend_score']].copy()
-            htf_trend.columns = ['timestamp', 'htf_trend_score']
-            
-            # Forward fill HTF values to match LTF timestamps
-            df = pd.merge_asof(
-                df.sort_values('timestamp'),
-                htf_trend.sort_values('timestamp'),
-                on='timestamp',
-                direction='backward'
-            )
-        
-        return df
+        return EMAState(period, float(prices.ewm(span=period, adjust=False).mean().iloc[-1]))
+    
+    def _ema_slope(self, period: int):
+        """EMA rate of change over 5 candles"""
+        return lambda df: df[f'ema_{period}'].pct_change(5)
+    
+    def _ema_distance(self, period: int):
+        """Price distance from EMA"""
+        return lambda df: (df['close'] - df[f'ema_{period}']) / df[f'ema_{period}']
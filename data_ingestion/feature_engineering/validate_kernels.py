@@ -0,0 +1,179 @@
+"""
+Check path-dependent feature kernels against the pandas reference versions
+
+Runs every kernel on both backends (numba if installed, numpy) and compares
+the output with the original pandas implementations, then reports timings.
+The first numba call of each kernel includes the JIT (or loading it from the
+on-disk cache); later calls are reported separately.
+
+Usage:
+    python validate_kernels.py
+    python validate_kernels.py --rows 20000 --data ../data/BTCUSD_1h.parquet
+"""
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import kernels
+
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATA = Path(__file__).resolve().parent.parent / 'data' / 'EURUSD_1h.parquet'
+
+SWING_WINDOW = 5
+LOOKBACK = 20
+THRESHOLD = 0.001
+LOOKFORWARD = 10
+PROFIT = 0.015
+LOSS = 0.010
+
+
+# ---------------------------------------------------------------------------
+# Pandas reference implementations (previous feature code)
+# ---------------------------------------------------------------------------
+
+def reference_consecutive(mask: pd.Series) -> np.ndarray:
+    run = mask.astype(int)
+    return (run * (run.groupby((run != run.shift()).cumsum()).cumcount() + 1)).to_numpy()
+
+
+def reference_swing(values: pd.Series, window: int, highs: bool) -> np.ndarray:
+    swing = pd.Series(0, index=values.index)
+    for i in range(window, len(values) - window):
+        segment = values.iloc[i-window:i+window+1]
+        if values.iloc[i] == (segment.max() if highs else segment.min()):
+            swing.iloc[i] = 1
+    return swing.to_numpy()
+
+
+def reference_ffill_last(values: pd.Series, mask: pd.Series) -> np.ndarray:
+    return values[mask].reindex(values.index).ffill().to_numpy()
+
+
+def reference_equal_levels(values: pd.Series, lookback: int, threshold: float,
+                           highs: bool) -> np.ndarray:
+    equal = pd.Series(0, index=values.index)
+    for i in range(lookback, len(values)):
+        recent = values.iloc[i-lookback:i]
+        extreme = recent.max() if highs else recent.min()
+        count = ((recent >= extreme * (1 - threshold)) & (recent <= extreme * (1 + threshold))).sum()
+        if count >= 2:
+            equal.iloc[i] = 1
+    return equal.to_numpy()
+
+
+def reference_triple_barrier(returns: pd.Series, lookforward: int, profit: float,
+                             loss: float) -> np.ndarray:
+    labels = pd.Series(-1, index=returns.index)
+    for i in range(len(returns) - lookforward):
+        cumulative = 0
+        for ret in returns.iloc[i:i+lookforward+1].values[1:]:
+            cumulative += ret
+            if cumulative >= profit:
+                labels.iloc[i] = 1
+                break
+            if cumulative <= -loss:
+                labels.iloc[i] = 0
+                break
+    return labels.to_numpy()
+
+
+def build_cases(df: pd.DataFrame):
+    """(name, reference fn, kernel fn) per kernel and direction"""
+    high, low, close, open_ = df['high'], df['low'], df['close'], df['open']
+    swing_high = pd.Series(reference_swing(high, SWING_WINDOW, True), index=df.index) == 1
+    returns = close.pct_change(5).fillna(0)
+
+    return [
+        ('consecutive_bullish',
+         lambda: reference_consecutive(close > open_),
+         lambda: kernels.run_length((close > open_).to_numpy())),
+        ('swing_high',
+         lambda: reference_swing(high, SWING_WINDOW, True),
+         lambda: kernels.swing_points(high.to_numpy(), SWING_WINDOW, highs=True)),
+        ('swing_low',
+         lambda: reference_swing(low, SWING_WINDOW, False),
+         lambda: kernels.swing_points(low.to_numpy(), SWING_WINDOW, highs=False)),
+        ('last_swing_high',
+         lambda: reference_ffill_last(high, swing_high),
+         lambda: kernels.ffill_last(high.to_numpy(), swing_high.to_numpy())),
+        ('equal_highs',
+         lambda: reference_equal_levels(high, LOOKBACK, THRESHOLD, True),
+         lambda: kernels.equal_levels(high.to_numpy(), LOOKBACK, THRESHOLD, highs=True)),
+        ('equal_lows',
+         lambda: reference_equal_levels(low, LOOKBACK, THRESHOLD, False),
+         lambda: kernels.equal_levels(low.to_numpy(), LOOKBACK, THRESHOLD, highs=False)),
+        ('direction_label',
+         lambda: reference_triple_barrier(returns, LOOKFORWARD, PROFIT, LOSS),
+         lambda: kernels.triple_barrier(returns.to_numpy(), LOOKFORWARD, PROFIT, LOSS)),
+    ]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def validate(df: pd.DataFrame) -> bool:
+    """Compare all kernels on all available backends; returns True if all match"""
+    backends = ['numpy']
+    try:
+        import numba  # noqa: F401
+        backends.insert(0, 'numba')
+    except ImportError:
+        logger.info("numba not installed - checking the numpy backend only")
+
+    ok = True
+    for name, reference_fn, kernel_fn in build_cases(df):
+        expected, reference_time = timed(reference_fn)
+        line = f"{name:<20} pandas {reference_time*1000:9.1f}ms"
+
+        for backend in backends:
+            kernels.set_backend(backend)
+            result, first_time = timed(kernel_fn)
+            _, warm_time = timed(kernel_fn)
+            match = np.array_equal(np.asarray(expected, dtype=np.float64),
+                                   np.asarray(result, dtype=np.float64), equal_nan=True)
+            ok &= match
+            mark = '✓' if match else '✗'
+            line += f" | {mark} {backend} {warm_time*1000:7.2f}ms"
+            if backend == 'numba':
+                line += f" (first {first_time*1000:.0f}ms)"
+        logger.info(line)
+
+    kernels.set_backend('auto')
+    return ok
+
+
+def main():
+    """Validate kernels on stored OHLCV data"""
+    parser = argparse.ArgumentParser(description='Validate path-dependent feature kernels')
+    parser.add_argument('--data', default=str(DEFAULT_DATA), help='OHLCV parquet file')
+    parser.add_argument('--rows', type=int, default=5000, help='Use the last N rows (0 = all)')
+    args = parser.parse_args()
+
+    df = pd.read_parquet(args.data, columns=['open', 'high', 'low', 'close'])
+    if args.rows:
+        df = df.tail(args.rows)
+    df = df.reset_index(drop=True)
+
+    logger.info("="*80)
+    logger.info(f"KERNEL VALIDATION ({len(df):,} rows)")
+    logger.info("="*80)
+
+    ok = validate(df)
+
+    logger.info("="*80)
+    logger.info("✓ All kernels match the pandas reference" if ok else "✗ Kernel mismatch")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,117 +1,468 @@
 """
 Validate training dataset before model training
+
+The dataset is streamed in Parquet record batches: every statistic (null,
+NaN and infinite counts, ranges, label and symbol counts, feature mean/std)
+is accumulated per batch, so memory is bounded by the batch (and row group)
+size rather than the dataset, and datasets larger than RAM can be checked.
+
+Columns are checked against a schema: dtype, allowed range or values, and
+nullability. Required columns and dtypes are checked from the Parquet
+footer before any data is read. By default validation stops at the first
+hard violation (missing column, wrong dtype, null/NaN/inf, value outside
+its range or allowed set); --full scans everything and reports all of them.
+
+Schema overrides are JSON:
+    {"columns": {"rsi": {"dtype": "float", "min": -5, "max": 5}},
+     "features": {"dtype": "float", "min": -50, "max": 50},
+     "min_features": 100}
+
+Usage:
+    python validate_training_data.py
+    python validate_training_data.py --data ../data/training_dataset.parquet --full
+    python validate_training_data.py --schema training_schema.json --batch-rows 50000
 """
-import pandas as pd
-import numpy as np
-from pathlib import Path
+import argparse
+import json
 import logging
+import time
+from collections import Counter
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from config import VALIDATION_BATCH_ROWS, VALIDATION_FEATURE_MAX_ABS, VALIDATION_MIN_FEATURES
 
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 logger = logging.getLogger(__name__)
 
+META_COLUMNS = ['timestamp', 'symbol', 'timeframe']
+LABEL_COLUMNS = ['label_direction', 'label_volatility', 'label_no_trade']
+
+
+@dataclass(frozen=True)
+class ColumnRule:
+    """Expected dtype and values of one column"""
+    dtype: str  # 'timestamp', 'string', 'int' or 'float' (float also accepts ints)
+    min: Optional[float] = None
+    max: Optional[float] = None
+    values: Optional[Tuple] = None
+    nullable: bool = False
+
+    def accepts(self, arrow_type: pa.DataType) -> bool:
+        """Whether a column of this Arrow type can satisfy the rule"""
+        if pa.types.is_dictionary(arrow_type):
+            arrow_type = arrow_type.value_type
+        if self.dtype == 'timestamp':
+            return pa.types.is_timestamp(arrow_type)
+        if self.dtype == 'string':
+            return pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type)
+        if self.dtype == 'int':
+            return pa.types.is_integer(arrow_type)
+        if self.dtype == 'float':
+            return pa.types.is_floating(arrow_type) or pa.types.is_integer(arrow_type)
+        raise ValueError(f"Unknown dtype in schema: {self.dtype}")
+
+
+@dataclass
+class TrainingSchema:
+    """Rules for the required columns plus one rule for every feature column"""
+    columns: Dict[str, ColumnRule]
+    features: ColumnRule
+    min_features: int = VALIDATION_MIN_FEATURES
+
+    def rule(self, name: str) -> ColumnRule:
+        return self.columns.get(name, self.features)
+
+    @classmethod
+    def default(cls) -> 'TrainingSchema':
+        """Schema of create_labels.py output (normalized features, 0/1 labels)"""
+        columns = {
+            'timestamp': ColumnRule('timestamp'),
+            'symbol': ColumnRule('string'),
+            'timeframe': ColumnRule('string'),
+        }
+        # Direction has no -1 after balancing
+        for label in LABEL_COLUMNS:
+            columns[label] = ColumnRule('int', values=(0, 1))
+        features = ColumnRule('float', -VALIDATION_FEATURE_MAX_ABS, VALIDATION_FEATURE_MAX_ABS)
+        return cls(columns, features)
+
+    @classmethod
+    def from_json(cls, path: str) -> 'TrainingSchema':
+        """
+        Default schema with overrides from a JSON file
+
+        Args:
+            path: JSON with optional 'columns', 'features' and 'min_features'
+
+        Returns:
+            TrainingSchema
+        """
+        data = json.loads(Path(path).read_text())
+        schema = cls.default()
+
+        def parse(rule: dict, base: ColumnRule) -> ColumnRule:
+            if 'values' in rule:
+                rule = dict(rule, values=tuple(rule['values']))
+            return replace(base, **rule)
+
+        for name, rule in data.get('columns', {}).items():
+            base = schema.columns.get(name, schema.features)
+            schema.columns[name] = parse(rule, base)
+        if 'features' in data:
+            schema.features = parse(data['features'], schema.features)
+        schema.min_features = data.get('min_features', schema.min_features)
+        return schema
+
+
+class ValidationError(ValueError):
+    """Hard violation found while scanning"""
+
+    def __init__(self, column: str, message: str, row: Optional[int] = None):
+        self.column = column
+        self.row = row
+        where = f" (first at row {row:,})" if row is not None else ""
+        super().__init__(f"{column}: {message}{where}")
+
+
+@dataclass
+class ColumnStats:
+    """Streaming statistics of one column"""
+    nulls: int = 0
+    nans: int = 0
+    infs: int = 0
+    out_of_range: int = 0
+    count: int = 0  # Finite values in mean/m2
+    mean: float = 0.0
+    m2: float = 0.0
+    min: Optional[float] = None
+    max: Optional[float] = None
+    values: Counter = field(default_factory=Counter)
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation (ddof=1, as pandas)"""
+        return float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else float('nan')
+
+    def add_moments(self, values: np.ndarray):
+        """Merge a batch into count/mean/m2 (Chan et al. parallel update)"""
+        n = len(values)
+        if n == 0:
+            return
+        batch_mean = float(values.mean())
+        batch_m2 = float(((values - batch_mean) ** 2).sum())
+        delta = batch_mean - self.mean
+        total = self.count + n
+        self.mean += delta * n / total
+        self.m2 += batch_m2 + delta * delta * self.count * n / total
+        self.count = total
+
+    def add_range(self, low, high):
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+
+
+class StreamingValidator:
+    """Check a training dataset batch by batch against a schema"""
+
+    def __init__(self, schema: Optional[TrainingSchema] = None,
+                 batch_rows: int = VALIDATION_BATCH_ROWS, fail_fast: bool = True):
+        """
+        Initialize validator
+
+        Args:
+            schema: Column rules (default: TrainingSchema.default())
+            batch_rows: Rows per streamed batch
+            fail_fast: Stop at the first hard violation
+        """
+        self.schema = schema or TrainingSchema.default()
+        self.batch_rows = batch_rows
+        self.fail_fast = fail_fast
+        self.stats: Dict[str, ColumnStats] = {}
+        self.violations: List[ValidationError] = []
+        self.rows = 0
+        self.batches = 0
+
+    def violation(self, column: str, message: str, row: Optional[int] = None):
+        """Record a hard violation (raised when failing fast)"""
+        error = ValidationError(column, message, row)
+        if self.fail_fast:
+            raise error
+        self.violations.append(error)
+
+    def check_schema(self, arrow_schema: pa.Schema) -> List[str]:
+        """
+        Required columns and dtypes, from the file footer
+
+        Args:
+            arrow_schema: Dataset schema
+
+        Returns:
+            Feature column names
+        """
+        missing = [name for name in self.schema.columns if name not in arrow_schema.names]
+        if missing:
+            self.violation(', '.join(missing), "missing required columns")
+
+        for arrow_field in arrow_schema:
+            rule = self.schema.rule(arrow_field.name)
+            if not rule.accepts(arrow_field.type):
+                self.violation(arrow_field.name, f"dtype {arrow_field.type}, expected {rule.dtype}")
+
+        return [name for name in arrow_schema.names if name not in self.schema.columns]
+
+    def update(self, batch: pa.RecordBatch):
+        """Accumulate statistics of one batch and check its values"""
+        for name, column in zip(batch.schema.names, batch.columns):
+            rule = self.schema.rule(name)
+            stats = self.stats.setdefault(name, ColumnStats())
+
+            if column.null_count:
+                stats.nulls += column.null_count
+                if not rule.nullable:
+                    first = pc.index(pc.is_null(column), True).as_py()
+                    self.violation(name, f"{column.null_count:,} null values", self.rows + first)
+
+            if rule.dtype in ('int', 'float') and rule.accepts(column.type):
+                self._update_numeric(name, column, rule, stats)
+            elif rule.values is not None or rule.dtype == 'string':
+                self._update_values(name, column, rule, stats)
+
+        self.rows += batch.num_rows
+        self.batches += 1
+
+    def _update_numeric(self, name: str, column: pa.Array, rule: ColumnRule, stats: ColumnStats):
+        # Positions stay those of the batch (nulls become NaN) so violations
+        # report real row numbers; `keep` marks the values that count
+        values = column.to_numpy(zero_copy_only=False)
+        keep = column.is_valid().to_numpy(zero_copy_only=False) if column.null_count else None
+
+        if values.dtype.kind == 'f':
+            nan = np.isnan(values) if keep is None else np.isnan(values) & keep
+            inf = np.isinf(values)
+            if nan.any():
+                stats.nans += int(nan.sum())
+                self.violation(name, "NaN values", self.rows + int(np.argmax(nan)))
+            if inf.any():
+                stats.infs += int(inf.sum())
+                self.violation(name, "infinite values", self.rows + int(np.argmax(inf)))
+            if keep is not None or nan.any() or inf.any():
+                keep = ~(nan | inf) if keep is None else keep & ~(nan | inf)
+
+        valid = values if keep is None else values[keep]
+        if len(valid) == 0:
+            return
+        stats.add_range(valid.min().item(), valid.max().item())
+        stats.add_moments(valid.astype(np.float64, copy=False))
+
+        if rule.values is not None:
+            unique, counts = np.unique(valid, return_counts=True)
+            stats.values.update(dict(zip(unique.tolist(), counts.tolist())))
+            found = sorted(set(unique.tolist()) - set(rule.values))
+            if found:
+                bad = ~np.isin(values, rule.values)
+                if keep is not None:
+                    bad &= keep
+                self.violation(name, f"values {found} not in {list(rule.values)}",
+                               self.rows + int(np.argmax(bad)))
+
+        if rule.min is not None or rule.max is not None:
+            low = -np.inf if rule.min is None else rule.min
+            high = np.inf if rule.max is None else rule.max
+            if valid.min() < low or valid.max() > high:
+                bad = (values < low) | (values > high)
+                if keep is not None:
+                    bad &= keep
+                stats.out_of_range += int(bad.sum())
+                self.violation(name, f"{int(bad.sum()):,} values outside [{low}, {high}]",
+                               self.rows + int(np.argmax(bad)))
+
+    def _update_values(self, name: str, column: pa.Array, rule: ColumnRule, stats: ColumnStats):
+        counts = pc.value_counts(column.drop_null())
+        batch_counts = dict(zip(counts.field('values').to_pylist(),
+                                counts.field('counts').to_pylist()))
+        stats.values.update(batch_counts)
+        if rule.values is not None:
+            found = sorted(set(batch_counts) - set(rule.values))
+            if found:
+                self.violation(name, f"values {found} not in {list(rule.values)}")
+
+    def scan(self, path: Path) -> List[str]:
+        """
+        Stream a Parquet file through the checks
+
+        Args:
+            path: Parquet file
+
+        Returns:
+            Feature column names
+
+        Raises:
+            ValidationError: First hard violation (fail_fast only)
+        """
+        parquet_file = pq.ParquetFile(path, memory_map=True)
+        features = self.check_schema(parquet_file.schema_arrow)
+        for batch in parquet_file.iter_batches(batch_size=self.batch_rows):
+            self.update(batch)
+        return features
+
+
+def _log_counts(counts: Counter, total: int, indent: str = "  "):
+    for value, count in sorted(counts.items(), key=lambda item: (-item[1], str(item[0]))):
+        logger.info(f"{indent}{value}: {count:,} ({count/total*100:.1f}%)")
+
+
+def validate_training_data(path: Optional[str] = None, schema: Optional[TrainingSchema] = None,
+                           batch_rows: int = VALIDATION_BATCH_ROWS,
+                           fail_fast: bool = True) -> bool:
+    """
+    Comprehensive validation of training dataset
+
+    Args:
+        path: Parquet file (default: data/training_dataset.parquet)
+        schema: Column rules (default: TrainingSchema.default())
+        batch_rows: Rows per streamed batch
+        fail_fast: Stop at the first hard violation
+
+    Returns:
+        True if every check passed
+    """
 
-def validate_training_data():
-    """Comprehensive validation of training dataset"""
-    
     logger.info("="*80)
     logger.info("TRAINING DATASET VALIDATION")
     logger.info("="*80)
-    
-    # Load data
-    data_dir = Path(__file__).parent.parent / 'data'
-    training_file = data_dir / 'training_dataset.parquet'
-    
+
+    training_file = Path(path) if path else Path(__file__).parent.parent / 'data' / 'training_dataset.parquet'
+
     if not training_file.exists():
         logger.error(f"Training dataset not found: {training_file}")
         return False
-    
-    logger.info(f"\nLoading: {training_file}")
-    df = pd.read_parquet(training_file)
-    logger.info(f"✓ Loaded: {len(df):,} rows, {len(df.columns)} columns")
-    
+
+    metadata = pq.read_metadata(training_file)
+    logger.info(f"\nStreaming: {training_file}")
+    logger.info(f"  {metadata.num_rows:,} rows, {metadata.num_columns} columns, "
+                f"{metadata.num_row_groups} row groups, {batch_rows:,} rows per batch")
+
+    validator = StreamingValidator(schema, batch_rows, fail_fast)
+    schema = validator.schema
+    start = time.perf_counter()
+
+    try:
+        feature_cols = validator.scan(training_file)
+    except ValidationError as e:
+        logger.error(f"\n✗ Hard violation: {e}")
+        logger.error(f"Stopped after {validator.rows:,} of {metadata.num_rows:,} rows "
+                     f"(run with --full to report every violation)")
+        logger.info(f"{'='*80}")
+        return False
+
+    elapsed = time.perf_counter() - start
+    logger.info(f"✓ Scanned {validator.rows:,} rows in {validator.batches} batches ({elapsed:.2f}s)")
+
+    stats = validator.stats
+    violations = validator.violations
+    rows = validator.rows
+
+    def failed(kind: str) -> List[ValidationError]:
+        return [v for v in violations if kind in str(v)]
+
     # Validation checks
     checks_passed = 0
     checks_total = 0
-    
+
     # Check 1: Required columns
     checks_total += 1
     logger.info(f"\n[{checks_total}] Checking required columns...")
-    required_cols = ['timestamp', 'symbol', 'timeframe', 
-                    'label_direction', 'label_volatility', 'label_no_trade']
-    missing_cols = [col for col in required_cols if col not in df.columns]
-    
-    if not missing_cols:
+    missing = failed("missing required columns")
+
+    if not missing:
         logger.info("  ✓ All required columns present")
         checks_passed += 1
     else:
-        logger.error(f"  ✗ Missing columns: {missing_cols}")
-    
-    # Check 2: No null values
+        logger.error(f"  ✗ {missing[0]}")
+
+    # Check 2: Data types
+    checks_total += 1
+    logger.info(f"\n[{checks_total}] Checking data types...")
+    dtype_errors = failed("dtype ")
+
+    if not dtype_errors:
+        logger.info("  ✓ Column data types match the schema (labels int, features numeric)")
+        checks_passed += 1
+    else:
+        for error in dtype_errors:
+            logger.error(f"  ✗ {error}")
+
+    # Check 3: No null values
     checks_total += 1
     logger.info(f"\n[{checks_total}] Checking for null values...")
-    null_counts = df.isnull().sum()
-    total_nulls = null_counts.sum()
-    
-    if total_nulls == 0:
+    null_counts = {name: s.nulls + s.nans for name, s in stats.items() if s.nulls + s.nans}
+
+    if not null_counts:
         logger.info("  ✓ No null values found")
         checks_passed += 1
     else:
-        logger.error(f"  ✗ Found {total_nulls} null values")
-        logger.error(f"    Columns with nulls: {null_counts[null_counts > 0].to_dict()}")
-    
-    # Check 3: No infinite values
+        logger.error(f"  ✗ Found {sum(null_counts.values())} null values")
+        logger.error(f"    Columns with nulls: {null_counts}")
+
+    # Check 4: No infinite values
     checks_total += 1
     logger.info(f"\n[{checks_total}] Checking for infinite values...")
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
-    inf_counts = np.isinf(df[numeric_cols]).sum()
-    total_infs = inf_counts.sum()
-    
+    total_infs = sum(s.infs for s in stats.values())
+
     if total_infs == 0:
         logger.info("  ✓ No infinite values found")
         checks_passed += 1
     else:
         logger.error(f"  ✗ Found {total_infs} infinite values")
-    
-    # Check 4: Label values are valid
+        logger.error(f"    Columns with infinities: {({n: s.infs for n, s in stats.items() if s.infs})}")
+
+    # Check 5: Value ranges
+    checks_total += 1
+    logger.info(f"\n[{checks_total}] Checking value ranges...")
+    range_errors = failed("values outside")
+
+    if not range_errors:
+        logger.info(f"  ✓ All columns within schema ranges (features within "
+                    f"[{schema.features.min}, {schema.features.max}])")
+        checks_passed += 1
+    else:
+        logger.error(f"  ✗ {len(range_errors)} columns out of range")
+        for error in range_errors[:10]:
+            logger.error(f"    {error}")
+
+    # Check 6: Label values are valid
     checks_total += 1
     logger.info(f"\n[{checks_total}] Checking label values...")
-    
+
     valid_labels = True
-    
-    # Direction: should be 0 or 1 (no -1 after balancing)
-    direction_values = df['label_direction'].unique()
-    if set(direction_values).issubset({0, 1}):
-        logger.info(f"  ✓ Direction labels valid: {sorted(direction_values)}")
-    else:
-        logger.error(f"  ✗ Direction labels invalid: {sorted(direction_values)}")
-        valid_labels = False
-    
-    # Volatility: should be 0 or 1
-    vol_values = df['label_volatility'].unique()
-    if set(vol_values).issubset({0, 1}):
-        logger.info(f"  ✓ Volatility labels valid: {sorted(vol_values)}")
-    else:
-        logger.error(f"  ✗ Volatility labels invalid: {sorted(vol_values)}")
-        valid_labels = False
-    
-    # No-trade: should be 0 or 1
-    notrade_values = df['label_no_trade'].unique()
-    if set(notrade_values).issubset({0, 1}):
-        logger.info(f"  ✓ No-trade labels valid: {sorted(notrade_values)}")
-    else:
-        logger.error(f"  ✗ No-trade labels invalid: {sorted(notrade_values)}")
-        valid_labels = False
-    
+
+    for label in LABEL_COLUMNS:
+        values = sorted(stats[label].values) if label in stats else []
+        allowed = schema.rule(label).values
+        if allowed is None or set(values).issubset(allowed):
+            logger.info(f"  ✓ {label} valid: {values}")
+        else:
+            logger.error(f"  ✗ {label} invalid: {values}")
+            valid_labels = False
+
     if valid_labels:
         checks_passed += 1
-    
-    # Check 5: Class balance
+
+    # Check 7: Class balance
     checks_total += 1
     logger.info(f"\n[{checks_total}] Checking class balance...")
-    
-    direction_counts = df['label_direction'].value_counts()
-    balance_ratio = direction_counts.min() / direction_counts.max()
-    
+
+    direction_counts = stats['label_direction'].values if 'label_direction' in stats else Counter()
+    balance_ratio = (min(direction_counts.values()) / max(direction_counts.values())
+                     if direction_counts else 0.0)
+
     if balance_ratio >= 0.9:  # Within 10% of perfect balance
         logger.info(f"  ✓ Direction labels balanced: {balance_ratio:.2%}")
         logger.info(f"    Class 0: {direction_counts.get(0, 0):,}")
@@ -119,89 +470,61 @@ def validate_training_data():
         checks_passed += 1
     else:
         logger.warning(f"  ⚠ Direction labels imbalanced: {balance_ratio:.2%}")
-    
-    # Check 6: Feature count
+
+    # Check 8: Feature count
     checks_total += 1
     logger.info(f"\n[{checks_total}] Checking feature count...")
-    
-    feature_cols = [col for col in df.columns 
-                   if not col.startswith('label_') 
-                   and col not in ['timestamp', 'symbol', 'timeframe']]
-    
-    if len(feature_cols) >= 100:
+
+    if len(feature_cols) >= schema.min_features:
         logger.info(f"  ✓ Sufficient features: {len(feature_cols)}")
         checks_passed += 1
     else:
         logger.warning(f"  ⚠ Low feature count: {len(feature_cols)}")
-    
-    # Check 7: Data types
-    checks_total += 1
-    logger.info(f"\n[{checks_total}] Checking data types...")
-    
-    # Labels should be int
-    label_dtypes_ok = all(
-        df[col].dtype in [np.int32, np.int64] 
-        for col in ['label_direction', 'label_volatility', 'label_no_trade']
-    )
-    
-    if label_dtypes_ok:
-        logger.info("  ✓ Label data types correct (int)")
-        checks_passed += 1
-    else:
-        logger.error("  ✗ Label data types incorrect")
-    
-    # Check 8: Timestamp ordering
-    checks_total += 1
-    logger.info(f"\n[{checks_total}] Checking timestamp ordering...")
-    
-    # After shuffling, timestamps won't be ordered, which is fine
-    logger.info("  ✓ Timestamps present (shuffled for training)")
-    checks_passed += 1
-    
+
     # Summary statistics
     logger.info(f"\n{'='*80}")
     logger.info("DATASET STATISTICS")
     logger.info(f"{'='*80}")
-    
+
     logger.info(f"\nShape:")
-    logger.info(f"  Rows: {len(df):,}")
-    logger.info(f"  Columns: {len(df.columns)}")
+    logger.info(f"  Rows: {rows:,}")
+    logger.info(f"  Columns: {metadata.num_columns}")
     logger.info(f"  Features: {len(feature_cols)}")
-    logger.info(f"  Labels: 3")
-    logger.info(f"  Metadata: 3 (timestamp, symbol, timeframe)")
-    
-    logger.info(f"\nSymbols:")
-    for symbol, count in df['symbol'].value_counts().items():
-        logger.info(f"  {symbol}: {count:,} ({count/len(df)*100:.1f}%)")
-    
-    logger.info(f"\nTimeframes:")
-    for tf, count in df['timeframe'].value_counts().items():
-        logger.info(f"  {tf}: {count:,} ({count/len(df)*100:.1f}%)")
-    
-    logger.info(f"\nLabel Distributions:")
-    
-    for label_col in ['label_direction', 'label_volatility', 'label_no_trade']:
-        logger.info(f"\n  {label_col}:")
-        counts = df[label_col].value_counts().sort_index()
-        for val, count in counts.items():
-            logger.info(f"    {val}: {count:,} ({count/len(df)*100:.1f}%)")
-    
-    logger.info(f"\nFeature Statistics:")
-    logger.info(f"  Mean: {df[feature_cols].mean().mean():.4f}")
-    logger.info(f"  Std: {df[feature_cols].std().mean():.4f}")
-    logger.info(f"  Min: {df[feature_cols].min().min():.4f}")
-    logger.info(f"  Max: {df[feature_cols].max().max():.4f}")
-    
-    # Memory usage
-    memory_mb = df.memory_usage(deep=True).sum() / (1024 * 1024)
-    logger.info(f"\nMemory Usage: {memory_mb:.2f} MB")
-    
+    logger.info(f"  Labels: {len(LABEL_COLUMNS)}")
+    logger.info(f"  Metadata: {len(META_COLUMNS)} ({', '.join(META_COLUMNS)})")
+
+    if rows:
+        for title, column in [("Symbols", 'symbol'), ("Timeframes", 'timeframe')]:
+            logger.info(f"\n{title}:")
+            _log_counts(stats[column].values if column in stats else Counter(), rows)
+
+        logger.info(f"\nLabel Distributions:")
+
+        for label in LABEL_COLUMNS:
+            logger.info(f"\n  {label}:")
+            counts = stats[label].values if label in stats else Counter()
+            for val, count in sorted(counts.items()):
+                logger.info(f"    {val}: {count:,} ({count/rows*100:.1f}%)")
+
+    feature_stats = [stats[c] for c in feature_cols if c in stats and stats[c].count]
+    if feature_stats:
+        logger.info(f"\nFeature Statistics:")
+        logger.info(f"  Mean: {np.mean([s.mean for s in feature_stats]):.4f}")
+        logger.info(f"  Std: {np.mean([s.std for s in feature_stats]):.4f}")
+        logger.info(f"  Min: {min(s.min for s in feature_stats):.4f}")
+        logger.info(f"  Max: {max(s.max for s in feature_stats):.4f}")
+
+    # Size on disk vs decoded (the scan holds one batch of this at a time)
+    uncompressed = sum(metadata.row_group(i).total_byte_size for i in range(metadata.num_row_groups))
+    logger.info(f"\nFile Size: {training_file.stat().st_size / (1024 * 1024):.2f} MB "
+                f"(uncompressed {uncompressed / (1024 * 1024):.2f} MB)")
+
     # Final result
     logger.info(f"\n{'='*80}")
     logger.info("VALIDATION RESULTS")
     logger.info(f"{'='*80}")
     logger.info(f"\nChecks Passed: {checks_passed}/{checks_total}")
-    
+
     if checks_passed == checks_total:
         logger.info("\n✓ ALL CHECKS PASSED!")
         logger.info("Dataset is ready for model training!")
@@ -214,5 +537,20 @@ def validate_training_data():
         return False
 
 
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='Validate the training dataset (streaming)')
+    parser.add_argument('--data', help='Parquet file (default: data/training_dataset.parquet)')
+    parser.add_argument('--schema', help='JSON schema overrides')
+    parser.add_argument('--batch-rows', type=int, default=VALIDATION_BATCH_ROWS)
+    parser.add_argument('--full', action='store_true',
+                        help='Scan everything and report all violations instead of stopping at the first')
+    args = parser.parse_args()
+
+    schema = TrainingSchema.from_json(args.schema) if args.schema else None
+    ok = validate_training_data(args.data, schema, args.batch_rows, fail_fast=not args.full)
+    raise SystemExit(0 if ok else 1)
+
+
 if __name__ == '__main__':
-    validate_training_data()
+    main()
@@ -3,78 +3,92 @@ Volatility feature engineering
 """
 import pandas as pd
 import numpy as np
+from typing import List
 
+from feature_spec import Feature, FeatureGroup
+from smoothing import smooth, smoothing_alpha, ATRState
 
-class VolatilityFeatures:
+
+class VolatilityFeatures(FeatureGroup):
     """Calculate volatility-based features"""
     
-    def __init__(self, atr_period: int = 14, std_period: int = 20):
+    def __init__(self, atr_period: int = 14, std_period: int = 20,
+                 atr_smoothing: str = 'sma'):  # 'sma', 'wilder' or 'ema' (see smoothing.py)
         self.atr_period = atr_period
         self.std_period = std_period
+        self.atr_smoothing = atr_smoothing
     
-    def calculate(self, df: pd.DataFrame) -> pd.DataFrame:
-        """
-        Calculate all volatility features
-        
-        Args:
-            df: DataFrame with OHLCV data
+    def define(self) -> List[Feature]:
+        """Volatility feature definitions"""
+        return [
+            # ATR (Average True Range)
+            Feature('atr', lambda df: self._calculate_atr(df, self.atr_period)),
             
-        Returns:
-            DataFrame with volatility features added
-        """
-        df = df.copy()
-        
-        # ATR (Average True Range)
-        df['atr'] = self._calculate_atr(df, self.atr_period)
-        
-        # ATR as percentage of price
-        df['atr_pct'] = df['atr'] / df['close']
-        
-        # ATR slope (volatility trend)
-        df['atr_slope'] = df['atr'].pct_change(5)
-        
-        # Candle range
-        df['candle_range'] = df['high'] - df['low']
-        df['candle_range_pct'] = df['candle_range'] / df['close']
-        
-        # Rolling standard deviation
-        df['std_dev'] = df['close'].rolling(window=self.std_period).std()
-        df['std_dev_pct'] = df['std_dev'] / df['close']
-        
-        # Bollinger Bands
-        bb = self._calculate_bollinger_bands(df['close'], self.std_period)
-        df['bb_upper'] = bb['upper']
-        df['bb_middle'] = bb['middle']
-        df['bb_lower'] = bb['lower']
-        df['bb_width'] = (bb['upper'] - bb['lower']) / bb['middle']
-        df['bb_position'] = (df['close'] - bb['lower']) / (bb['upper'] - bb['lower'])
-        
-        # Price distance from Bollinger Bands
-        df['bb_upper_distance'] = (bb['upper'] - df['close']) / df['close']
-        df['bb_lower_distance'] = (df['close'] - bb['lower']) / df['close']
-        
-        # Volatility regime (high/low)
-        df['volatility_regime'] = (df['atr_pct'] > df['atr_pct'].rolling(50).mean()).astype(int)
-        
-        # True Range
-        df['true_range'] = self._calculate_true_range(df)
-        
-        # Historical volatility (annualized)
-        df['hist_volatility'] = df['close'].pct_change().rolling(20).std() * np.sqrt(252)
-        
-        # Parkinson volatility (high-low range based)
-        df['parkinson_volatility'] = np.sqrt(
-            (1 / (4 * np.log(2))) * 
-            np.log(df['high'] / df['low']) ** 2
-        ).rolling(20).mean()
-        
-        return df
+            # ATR as percentage of price
+            Feature('atr_pct', lambda df: df['atr'] / df['close'], ('atr',)),
+            
+            # ATR slope (volatility trend)
+            Feature('atr_slope', lambda df: df['atr'].pct_change(5), ('atr',)),
+            
+            # Candle range
+            Feature('candle_range', lambda df: df['high'] - df['low']),
+            Feature('candle_range_pct', lambda df: df['candle_range'] / df['close'], ('candle_range',)),
+            
+            # Rolling standard deviation
+            Feature('std_dev', lambda df: df['close'].rolling(window=self.std_period).std()),
+            Feature('std_dev_pct', lambda df: df['std_dev'] / df['close'], ('std_dev',)),
+            
+            # Bollinger Bands (the band std is std_dev: same prices and period)
+            Feature('bb_upper', lambda df: self._bollinger_middle(df['close']) + (df['std_dev'] * 2.0),
+                    ('std_dev',)),
+            Feature('bb_middle', lambda df: self._bollinger_middle(df['close'])),
+            Feature('bb_lower', lambda df: df['bb_middle'] - (df['std_dev'] * 2.0),
+                    ('bb_middle', 'std_dev')),
+            Feature('bb_width', lambda df: (df['bb_upper'] - df['bb_lower']) / df['bb_middle'],
+                    ('bb_upper', 'bb_lower', 'bb_middle')),
+            Feature('bb_position', lambda df: (df['close'] - df['bb_lower']) / (df['bb_upper'] - df['bb_lower']),
+                    ('bb_upper', 'bb_lower')),
+            
+            # Price distance from Bollinger Bands
+            Feature('bb_upper_distance', lambda df: (df['bb_upper'] - df['close']) / df['close'], ('bb_upper',)),
+            Feature('bb_lower_distance', lambda df: (df['close'] - df['bb_lower']) / df['close'], ('bb_lower',)),
+            
+            # Volatility regime (high/low)
+            Feature('volatility_regime',
+                    lambda df: (df['atr_pct'] > df['atr_pct'].rolling(50).mean()).astype(int), ('atr_pct',)),
+            
+            # True Range
+            Feature('true_range', lambda df: self._calculate_true_range(df)),
+            
+            # Historical volatility (annualized)
+            Feature('hist_volatility', lambda df: df['close'].pct_change().rolling(20).std() * np.sqrt(252)),
+            
+            # Parkinson volatility (high-low range based)
+            Feature('parkinson_volatility', lambda df: np.sqrt(
+                (1 / (4 * np.log(2))) * 
+                np.log(df['high'] / df['low']) ** 2
+            ).rolling(20).mean())
+        ]
     
     def _calculate_atr(self, df: pd.DataFrame, period: int) -> pd.Series:
         """Calculate Average True Range"""
         tr = self._calculate_true_range(df)
-        atr = tr.rolling(window=period).mean()
-        return atr
+        return smooth(tr, period, self.atr_smoothing)
+    
+    def atr_state(self, df: pd.DataFrame) -> ATRState:
+        """
+        ATR state after the last candle, for O(1) incremental updates
+        
+        Args:
+            df: OHLC history
+        
+        Returns:
+            ATRState (requires 'wilder' or 'ema' smoothing)
+        """
+        smoothing_alpha(self.atr_period, self.atr_smoothing)
+        atr = self._calculate_atr(df, self.atr_period)
+        return ATRState(self.atr_period, self.atr_smoothing, float(atr.iloc[-1]),
+                        float(df['close'].iloc[-1]))
     
     def _calculate_true_range(self, df: pd.DataFrame) -> pd.Series:
         """Calculate True Range"""
@@ -85,17 +99,6 @@ class VolatilityFeatures:
         tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
         return tr
     
-    def _calculate_bollinger_bands(self, prices: pd.Series, period: int, 
-                                   num_std: float = 2.0) -> dict:
-        """Calculate Bollinger Bands"""
-        middle = prices.rolling(window=period).mean()
-        std = prices.rolling(window=period).std()
-        
-        upper = middle + (std * num_std)
-        lower = middle - (std * num_std)
-        
-        return {
-            'upper': upper,
-            'middle': middle,
-            'lower': lower
-        }
+    def _bollinger_middle(self, prices: pd.Series) -> pd.Series:
+        """Calculate Bollinger Bands middle band"""
+        return prices.rolling(window=self.std_period).mean()
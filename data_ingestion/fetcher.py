@@ -2,140 +2,227 @@
 Data fetcher module - handles downloading historical data from multiple sources
 """
 import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime
 import logging
-from typing import Optional, Dict, List
-import time
+from typing import Optional, Dict, List, Tuple
+
+from config import DATA_SOURCE, BACKUP_SOURCE, FETCH_MAX_WORKERS, FETCH_CACHE, SYMBOL_CALENDARS
+from market_calendar import get_calendar
+from sources import DataSource, OHLCV_COLUMNS, create_source
+from response_cache import ResponseCache
 
 logger = logging.getLogger(__name__)
 
+# Window grid origin; windows are aligned to it so boundaries are identical
+# across runs and responses can be reused from the cache
+WINDOW_ORIGIN = datetime(1970, 1, 1)
+
+
+@dataclass
+class FetchWindow:
+    """One request window"""
+    start: datetime
+    end: datetime
+
+
+def plan_windows(source: DataSource, start_date: datetime, end_date: datetime,
+                 interval: str, now: Optional[datetime] = None) -> List[FetchWindow]:
+    """
+    Split a range into request windows the source can serve
+
+    The start is clipped to the source's history limit and the range is cut
+    on a fixed grid of the source's max request span. Grid cells are
+    requested in full even if the requested range only overlaps them, so the
+    same windows (and cache keys) recur across runs; results are trimmed
+    after stitching.
+
+    Args:
+        source: Data source
+        start_date: Requested start
+        end_date: Requested end
+        interval: Pipeline timeframe
+        now: Current time (default: now, naive UTC)
+
+    Returns:
+        Windows in time order
+    """
+    now = now or pd.Timestamp.now('UTC').tz_localize(None)
+    history_start = source.history_start(interval, now)
+    if history_start is not None and start_date < history_start:
+        start_date = history_start
+    if start_date >= end_date:
+        return []
+
+    span = source.request_span(interval)
+    if span is None:
+        return [FetchWindow(start_date, end_date)]
+
+    windows = []
+    cell_start = WINDOW_ORIGIN + ((start_date - WINDOW_ORIGIN) // span) * span
+    while cell_start < end_date:
+        cell_end = cell_start + span
+        if history_start is not None and cell_start < history_start:
+            windows.append(FetchWindow(history_start, cell_end))
+        else:
+            windows.append(FetchWindow(cell_start, cell_end))
+        cell_start = cell_end
+    return windows
+
+
+def stitch_windows(pieces: List[pd.DataFrame], start_date: datetime,
+                   end_date: datetime) -> pd.DataFrame:
+    """
+    Concatenate window results, drop overlapping candles and trim to range
+
+    Returns:
+        OHLCV DataFrame sorted by timestamp
+    """
+    pieces = [p for p in pieces if p is not None and len(p) > 0]
+    if not pieces:
+        return pd.DataFrame(columns=OHLCV_COLUMNS)
+
+    df = pd.concat(pieces, ignore_index=True)
+    df = df.sort_values('timestamp', kind='stable')
+    df = df.drop_duplicates(subset=['timestamp'], keep='last')
+    df = df[(df['timestamp'] >= pd.Timestamp(start_date)) & (df['timestamp'] < pd.Timestamp(end_date))]
+    return df.reset_index(drop=True)
+
 
 class DataFetcher:
-    """Fetches historical trading data from various sources"""
-    
-    def __init__(self, source: str = 'yfinance'):
-        self.source = source
-        self.rate_limit_delay = 1  # seconds between requests
-        
-    def fetch_data(self, symbol: str, start_date: datetime, end_date: datetime, 
+    """Fetches historical trading data, failing over between sources"""
+
+    def __init__(self, source: str = DATA_SOURCE, backup_sources: Optional[List[str]] = None,
+                 source_options: Optional[Dict[str, Dict]] = None,
+                 max_workers: int = FETCH_MAX_WORKERS, cache: Optional[ResponseCache] = None,
+                 use_cache: bool = FETCH_CACHE):
+        """
+        Args:
+            source: Primary source name (see sources.SOURCES)
+            backup_sources: Sources tried in order when the primary has no data
+                (default: [config.BACKUP_SOURCE])
+            source_options: Constructor kwargs per source name
+            max_workers: Concurrent window requests per range
+            cache: Response cache (default: ResponseCache() when use_cache)
+            use_cache: Cache source responses on disk
+        """
+        if backup_sources is None:
+            backup_sources = [BACKUP_SOURCE] if BACKUP_SOURCE else []
+        source_options = source_options or {}
+
+        names = [source] + [s for s in backup_sources if s != source]
+        self.sources: List[DataSource] = [create_source(name, **source_options.get(name, {}))
+                                          for name in names]
+        self.source = self.sources[0].name
+        self.max_workers = max(1, max_workers)
+        self.cache = cache or (ResponseCache() if use_cache else None)
+        self.last_source: Optional[str] = None
+        self.last_fetch_stats: Dict = {}
+
+    def fetch_data(self, symbol: str, start_date: datetime, end_date: datetime,
                    interval: str) -> Optional[pd.DataFrame]:
         """
         Fetch historical data for a symbol
-        
+
+        Sources are tried in order; the first one that returns data wins and
+        is recorded in `last_source`. Each source's range is split into
+        windows it can serve (see plan_windows), fetched concurrently and
+        stitched.
+
         Args:
             symbol: Trading pair symbol
             start_date: Start date for data
             end_date: End date for data
             interval: Timeframe interval (1m, 5m, 15m, 1h, 4h)
-            
+
         Returns:
             DataFrame with OHLCV data or None if failed
         """
-        try:
-            if self.source == 'yfinance':
-                return self._fetch_yfinance(symbol, start_date, end_date, interval)
+        self.last_source = None
+        self.last_fetch_stats = {}
+
+        for i, source in enumerate(self.sources):
+            if not source.supports(symbol, interval):
+                logger.info(f"{source.name} does not support {symbol} {interval}")
+                continue
+            if i > 0:
+                logger.warning(f"Failing over to {source.name} for {symbol} {interval}")
+
+            df, stats = self._fetch_windows(source, symbol, start_date, end_date, interval)
+            if len(df) > 0:
+                self.last_source = source.name
+                self.last_fetch_stats = stats
+                logger.info(f"Successfully fetched {len(df)} candles for {symbol} {interval} "
+                            f"from {source.name} ({stats['windows']} windows, "
+                            f"{stats['cached_windows']} cached)")
+                if stats['failed_windows']:
+                    logger.warning(f"{stats['failed_windows']} of {stats['windows']} windows failed "
+                                   f"for {symbol} {interval}; rerun to fetch the missing ranges")
+                return df
+
+            if stats['cached_windows']:
+                logger.warning(f"No data for {symbol} {interval} from {source.name} "
+                               f"({stats['cached_windows']} windows cached as closed market)")
             else:
-                logger.error(f"Unsupported data source: {self.source}")
-                return None
-        except Exception as e:
-            logger.error(f"Error fetching data for {symbol} {interval}: {str(e)}")
-            return None
-    
-    def _fetch_yfinance(self, symbol: str, start_date: datetime, 
-                       end_date: datetime, interval: str) -> Optional[pd.DataFrame]:
-        """Fetch data from Yahoo Finance"""
-        try:
-            import yfinance as yf
-            import ssl
-            import certifi
-            
-            # Fix SSL issue for Python 3.13
-            try:
-                ssl._create_default_https_context = ssl._create_unverified_context
-            except:
-                pass
-            
-            # Map symbol format for yfinance
-            yf_symbol = self._map_symbol_to_yfinance(symbol)
-            
-            # Map interval format
-            yf_interval = self._map_interval_to_yfinance(interval)
-            
-            logger.info(f"Fetching {yf_symbol} data for {interval} from {start_date} to {end_date}")
-            
-            # Fetch data with retry logic
-            max_retries = 3
-            for attempt in range(max_retries):
+                logger.warning(f"No data returned for {symbol} {interval} from {source.name}")
+
+        return None
+
+    def _fetch_windows(self, source: DataSource, symbol: str, start_date: datetime,
+                       end_date: datetime, interval: str) -> Tuple[pd.DataFrame, Dict]:
+        """Fetch all windows of a range from one source and stitch them"""
+        windows = plan_windows(source, start_date, end_date, interval)
+        stats = {'source': source.name, 'windows': len(windows),
+                 'cached_windows': 0, 'failed_windows': 0}
+        if not windows:
+            return stitch_windows([], start_date, end_date), stats
+
+        source_interval = source.source_interval(interval)
+
+        cache = self.cache if source.cacheable else None
+        key = (source.name, symbol, source_interval)
+
+        calendar = get_calendar(symbol, SYMBOL_CALENDARS)
+
+        def fetch_window(window: FetchWindow) -> Tuple[Optional[pd.DataFrame], bool]:
+            # Sources return None for errors they swallow (rate limit notes,
+            # missing packages, empty responses) as well as for closed
+            # markets, so an empty result is only trusted - and cached - when
+            # the calendar says the market was closed for the whole window
+            closed = calendar.closed_between(window.start, window.end)
+            if cache is not None:
+                cached = cache.get(*key, window.start, window.end)
+                if cached is not None and (len(cached) > 0 or closed):
+                    return cached, True
+
+            df = source.fetch(symbol, window.start, window.end, interval)
+            if cache is not None:
+                if df is not None:
+                    cache.put(*key, window.start, window.end, df,
+                              ttl_seconds=cache.ttl_for(window.end))
+                elif closed:
+                    empty = pd.DataFrame({c: pd.Series(dtype='datetime64[ns]' if c == 'timestamp'
+                                                       else 'float64') for c in OHLCV_COLUMNS})
+                    cache.put(*key, window.start, window.end, empty,
+                              ttl_seconds=cache.ttl_for(window.end))
+            return df, False
+
+        pieces = []
+        results = []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(windows))) as executor:
+            futures = {executor.submit(fetch_window, w): w for w in windows}
+            for future in as_completed(futures):
+                window = futures[future]
                 try:
-                    ticker = yf.Ticker(yf_symbol)
-                    df = ticker.history(start=start_date, end=end_date, interval=yf_interval)
-                    
-                    if not df.empty:
-                        break
+                    results.append(future.result())
                 except Exception as e:
-                    if attempt < max_retries - 1:
-                        logger.warning(f"Attempt {attempt + 1} failed, retrying...")
-                        time.sleep(2)
-                    else:
-                        raise e
-            
-            if df.empty:
-                logger.warning(f"No data returned for {symbol} {interval}")
-                return None
-            
-            # Standardize column names
-            df = df.rename(columns={
-                'Open': 'open',
-                'High': 'high',
-                'Low': 'low',
-                'Close': 'close',
-                'Volume': 'volume'
-            })
-            
-            # Reset index to get timestamp as column
-            df = df.reset_index()
-            df = df.rename(columns={'Date': 'timestamp', 'Datetime': 'timestamp'})
-            
-            # Keep only required columns
-            df = df[['timestamp', 'open', 'high', 'low', 'close', 'volume']]
-            
-            # Calculate spread (high-low as percentage of close)
-            df['spread'] = ((df['high'] - df['low']) / df['close'] * 100).round(4)
-            
-            logger.info(f"Successfully fetched {len(df)} candles for {symbol} {interval}")
-            
-            time.sleep(self.rate_limit_delay)  # Rate limiting
-            
-            return df
-            
-        except ImportError:
-            logger.error("yfinance not installed. Install with: pip install yfinance")
-            return None
-        except Exception as e:
-            logger.error(f"Error in yfinance fetch: {str(e)}")
-            return None
-    
-    def _map_symbol_to_yfinance(self, symbol: str) -> str:
-        """Map trading symbol to yfinance format"""
-        symbol_map = {
-            'EURUSD': 'EURUSD=X',
-            'GBPUSD': 'GBPUSD=X',
-            'USDJPY': 'USDJPY=X',
-            'BTCUSD': 'BTC-USD',
-            'ETHUSD': 'ETH-USD',
-            'XAUUSD': 'GC=F',  # Gold futures
-            'CRUDE': 'CL=F'     # Crude oil futures
-        }
-        return symbol_map.get(symbol, symbol)
-    
-    def _map_interval_to_yfinance(self, interval: str) -> str:
-        """Map interval to yfinance format"""
-        interval_map = {
-            '1m': '1m',
-            '5m': '5m',
-            '15m': '15m',
-            '1h': '1h',
-            '4h': '1h'  # yfinance doesn't have 4h, we'll resample
-        }
-        return interval_map.get(interval, '1h')
+                    stats['failed_windows'] += 1
+                    logger.error(f"Error fetching {symbol} {interval} {window.start} - "
+                                 f"{window.end} from {source.name}: {str(e)}")
+
+        for df, cached in results:
+            stats['cached_windows'] += int(cached)
+            pieces.append(df)
+
+        return stitch_windows(pieces, start_date, end_date), stats
@@ -1,105 +1,269 @@
 """
 Generate sample historical trading data for testing
+
+The generator is fully vectorized (numpy Generator, one seed per symbol) and
+produces data in chunks, so very large datasets can be streamed straight into
+partitioned parquet without holding them in memory.
 """
+import argparse
+import zlib
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Iterator, List, Optional
 import logging
 
-from config import SYMBOLS, TIMEFRAMES, OUTPUT_DIR, OUTPUT_FORMAT
+from config import SYMBOLS, TIMEFRAMES, OUTPUT_DIR, OUTPUT_FORMAT, SYMBOL_CALENDARS
+from market_calendar import MarketCalendar, get_calendar
 from storage import DataStorage
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Base prices for different symbols
+BASE_PRICES = {
+    'EURUSD': 1.1000,
+    'GBPUSD': 1.3000,
+    'USDJPY': 110.00,
+    'BTCUSD': 40000.0,
+    'ETHUSD': 2500.0
+}
+
+# Per-candle volatility of a 1h candle; other timeframes scale with sqrt(time)
+BASE_VOLATILITY = 0.02
+
+# Volatility regimes: calm, normal, volatile (multipliers and stationary weights)
+REGIME_MULTIPLIERS = np.array([0.5, 1.0, 2.5])
+REGIME_PROBABILITIES = np.array([0.3, 0.55, 0.15])
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'spread']
+
+
+def symbol_seed(symbol: str, seed: int = 42) -> int:
+    """Stable per-symbol seed (hash() is randomized between interpreter runs)"""
+    return (zlib.crc32(symbol.encode()) + seed) % (2**32)
+
+
+class SyntheticOHLCVGenerator:
+    """
+    Vectorized OHLCV generator with carry-over state between chunks
 
-def generate_realistic_ohlcv(base_price: float, num_candles: int, 
-                             volatility: float = 0.02) -> pd.DataFrame:
+    Close prices follow a geometric random walk with regime-switching
+    volatility and a pull back towards the base price (so very long series
+    stay in a realistic range). Each candle opens at the previous
+    close. When an interval is given, candles get timestamps, random gaps
+    are dropped and candles in the calendar's closed windows are removed.
     """
-    Generate realistic OHLCV data using random walk
+
+    # Max candles per internal block (bounds a^-k to keep the solution stable)
+    BLOCK_SIZE = 10_000
+
+    def __init__(self, base_price: float, volatility: float = 0.02, seed: int = 42,
+                 regime_switch_prob: float = 0.002, mean_reversion: Optional[float] = None,
+                 interval_minutes: Optional[int] = None, start: Optional[datetime] = None,
+                 gap_prob: float = 0.0, calendar: Optional[MarketCalendar] = None):
+        """
+        Args:
+            base_price: Starting price
+            volatility: Per-candle return volatility in the normal regime
+            seed: Seed for the numpy Generator
+            regime_switch_prob: Probability per candle of drawing a new regime
+            mean_reversion: Per-candle pull of log price towards the base price
+                (default: 5 * volatility**2, i.e. log-price std of about 0.3)
+            interval_minutes: Candle interval; required for timestamps
+            start: Timestamp of the first candle slot
+            gap_prob: Probability that a candle is missing (feed outage)
+            calendar: Market calendar; candles in its closed windows are dropped
+        """
+        self.rng = np.random.default_rng(seed)
+        self.base_price = base_price
+        self.volatility = volatility
+        self.regime_switch_prob = regime_switch_prob
+        self.mean_reversion = 5 * volatility ** 2 if mean_reversion is None else mean_reversion
+        self.block_size = self.BLOCK_SIZE
+        if self.mean_reversion > 0:
+            self.block_size = int(np.clip(20 / self.mean_reversion, 1, self.BLOCK_SIZE))
+        self.interval_minutes = interval_minutes
+        self.gap_prob = gap_prob
+        self.calendar = calendar
+
+        self.price = base_price
+        self.regime = int(self.rng.choice(len(REGIME_MULTIPLIERS), p=REGIME_PROBABILITIES))
+        self.next_slot = np.datetime64(pd.Timestamp(start or datetime(2020, 1, 1)), 'ns')
+
+    def _regimes(self, n: int) -> np.ndarray:
+        """Regime index per candle (Markov switching, continued from the last chunk)"""
+        switches = self.rng.random(n) < self.regime_switch_prob
+        segment = np.cumsum(switches)
+        drawn = self.rng.choice(len(REGIME_MULTIPLIERS), size=segment[-1] + 1,
+                                p=REGIME_PROBABILITIES)
+        drawn[0] = self.regime
+        regimes = drawn[segment]
+        self.regime = int(regimes[-1])
+        return regimes
+
+    def _close_prices(self, volatility: np.ndarray) -> np.ndarray:
+        """
+        Close prices as an AR(1) process on log(price / base_price)
+
+        x_t = a * x_{t-1} + e_t with a = 1 - mean_reversion, solved in closed
+        form per block: x_t = a^t * (x_0 + sum_{k<=t} a^-k * e_k).
+        """
+        n = len(volatility)
+        shocks = self.rng.standard_normal(n) * volatility
+        log_deviation = np.empty(n)
+        x0 = np.log(self.price / self.base_price)
+
+        decay = np.log1p(-self.mean_reversion) if self.mean_reversion > 0 else 0.0
+        for start in range(0, n, self.block_size):
+            stop = min(start + self.block_size, n)
+            k = np.arange(1, stop - start + 1)
+            path = np.exp(decay * k) * (x0 + np.cumsum(shocks[start:stop] * np.exp(-decay * k)))
+            log_deviation[start:stop] = path
+            x0 = path[-1]
+
+        self.price = self.base_price * np.exp(x0)
+        return self.base_price * np.exp(log_deviation)
+
+    def generate(self, n: int) -> pd.DataFrame:
+        """
+        Generate the next n candles (no timestamps, no gaps)
+
+        Returns:
+            DataFrame with open, high, low, close, volume, spread
+        """
+        rng = self.rng
+        previous_close = self.price
+        volatility = self.volatility * REGIME_MULTIPLIERS[self._regimes(n)]
+
+        close = self._close_prices(volatility)
+        open_price = np.empty(n)
+        open_price[0] = previous_close
+        open_price[1:] = close[:-1]
+
+        # Wicks extend beyond the body
+        high = np.maximum(open_price, close) * (1 + np.abs(rng.normal(0, volatility / 2)))
+        low = np.minimum(open_price, close) * (1 - np.abs(rng.normal(0, volatility / 2)))
+
+        # Higher volume on larger price moves
+        price_change = np.abs(close - open_price) / open_price
+        volume = rng.uniform(1_000_000, 5_000_000, n) * (1 + price_change * 10)
+
+        # Round the same way as stored data, keeping OHLC relationships valid
+        open_price = np.round(open_price, 5)
+        close = np.round(close, 5)
+        high = np.maximum(np.round(high, 5), np.maximum(open_price, close))
+        low = np.minimum(np.round(low, 5), np.minimum(open_price, close))
+
+        return pd.DataFrame({
+            'open': open_price,
+            'high': high,
+            'low': low,
+            'close': close,
+            'volume': volume.astype(np.int64),
+            'spread': np.round((high - low) / close * 100, 4)
+        })
+
+    def next_chunk(self, n: int) -> pd.DataFrame:
+        """
+        Generate the next n candle slots with timestamps
+
+        Missing candles (gaps, market closures) are dropped, so the result
+        can have fewer than n rows.
+
+        Returns:
+            DataFrame with timestamp and OHLCV columns
+        """
+        if self.interval_minutes is None:
+            raise ValueError("interval_minutes is required for timestamped chunks")
+
+        step = np.timedelta64(self.interval_minutes, 'm').astype('timedelta64[ns]')
+        timestamps = self.next_slot + np.arange(n) * step
+        self.next_slot = timestamps[-1] + step
+
+        df = self.generate(n)
+        df.insert(0, 'timestamp', timestamps)
+
+        keep = np.ones(n, dtype=bool)
+        if self.gap_prob > 0:
+            keep &= self.rng.random(n) >= self.gap_prob
+        if self.calendar is not None:
+            keep &= self.calendar.is_open(timestamps)
+
+        return df[keep].reset_index(drop=True)
+
+    def stream(self, rows: int, chunk_rows: int = 1_000_000) -> Iterator[pd.DataFrame]:
+        """
+        Yield timestamped chunks until `rows` rows have been produced
+
+        Args:
+            rows: Total rows to produce (after gaps and closures)
+            chunk_rows: Candle slots generated per chunk
+        """
+        produced = 0
+        while produced < rows:
+            chunk = self.next_chunk(chunk_rows)
+            chunk = chunk.iloc[:rows - produced]
+            produced += len(chunk)
+            if len(chunk):
+                yield chunk
+
+
+def generate_realistic_ohlcv(base_price: float, num_candles: int,
+                             volatility: float = 0.02, seed: int = 42) -> pd.DataFrame:
+    """
+    Generate realistic OHLCV data using a regime-switching random walk
     
     Args:
         base_price: Starting price
         num_candles: Number of candles to generate
         volatility: Price volatility (default 2%)
+        seed: Random seed (use symbol_seed() for per-symbol data)
         
     Returns:
         DataFrame with OHLCV data
     """
-    np.random.seed(42)
-    
-    # Generate price movements using geometric Brownian motion
-    returns = np.random.normal(0, volatility, num_candles)
-    price_series = base_price * np.exp(np.cumsum(returns))
-    
-    data = []
-    for i, close_price in enumerate(price_series):
-        # Generate realistic OHLC from close price
-        high_offset = abs(np.random.normal(0, volatility/2))
-        low_offset = abs(np.random.normal(0, volatility/2))
-        open_offset = np.random.normal(0, volatility/3)
-        
-        high = close_price * (1 + high_offset)
-        low = close_price * (1 - low_offset)
-        open_price = close_price * (1 + open_offset)
-        
-        # Ensure OHLC relationships are valid
-        high = max(high, open_price, close_price)
-        low = min(low, open_price, close_price)
-        
-        # Generate volume (higher volume on larger price moves)
-        price_change = abs(close_price - open_price) / open_price
-        base_volume = np.random.uniform(1000000, 5000000)
-        volume = base_volume * (1 + price_change * 10)
-        
-        # Calculate spread
-        spread = ((high - low) / close_price * 100)
-        
-        data.append({
-            'open': round(open_price, 5),
-            'high': round(high, 5),
-            'low': round(low, 5),
-            'close': round(close_price, 5),
-            'volume': int(volume),
-            'spread': round(spread, 4)
-        })
-    
-    return pd.DataFrame(data)
+    return SyntheticOHLCVGenerator(base_price, volatility=volatility, seed=seed).generate(num_candles)
 
 
 def generate_sample_data_for_symbol(symbol: str, timeframe: str, 
-                                   interval_minutes: int, years: int = 5):
-    """Generate sample data for a symbol and timeframe"""
-    
-    # Base prices for different symbols
-    base_prices = {
-        'EURUSD': 1.1000,
-        'GBPUSD': 1.3000,
-        'USDJPY': 110.00,
-        'BTCUSD': 40000.0,
-        'ETHUSD': 2500.0
-    }
+                                   interval_minutes: int, years: int = 5,
+                                   seed: int = 42, gap_prob: float = 0.0005) -> pd.DataFrame:
+    """
+    Generate sample data for a symbol and timeframe
     
-    base_price = base_prices.get(symbol, 100.0)
+    Args:
+        symbol: Trading symbol (selects base price, seed and market calendar)
+        timeframe: Timeframe string
+        interval_minutes: Interval in minutes
+        years: Years of history ending now
+        seed: Base seed, combined with the symbol
+        gap_prob: Probability that a candle is missing
+        
+    Returns:
+        DataFrame with timestamp, symbol, timeframe and OHLCV columns
+    """
+    base_price = BASE_PRICES.get(symbol, 100.0)
     
-    # Calculate number of candles
-    total_minutes = years * 365 * 24 * 60
-    num_candles = int(total_minutes / interval_minutes)
+    # Calculate number of candle slots, aligned to the interval
+    num_candles = int(years * 365 * 24 * 60 / interval_minutes)
+    end_date = pd.Timestamp.now('UTC').tz_localize(None).floor(f'{interval_minutes}min')
+    start_date = end_date - timedelta(minutes=interval_minutes * (num_candles - 1))
     
     logger.info(f"Generating {num_candles} candles for {symbol} {timeframe}")
     
-    # Generate OHLCV data
-    df = generate_realistic_ohlcv(base_price, num_candles)
-    
-    # Generate timestamps
-    end_date = datetime.utcnow()
-    start_date = end_date - timedelta(days=years*365)
-    timestamps = pd.date_range(start=start_date, end=end_date, 
-                               periods=num_candles, tz='UTC')
-    timestamps = timestamps.tz_localize(None)  # Remove timezone
+    generator = SyntheticOHLCVGenerator(
+        base_price,
+        volatility=BASE_VOLATILITY * np.sqrt(interval_minutes / 60),
+        seed=symbol_seed(symbol, seed),
+        interval_minutes=interval_minutes,
+        start=start_date,
+        gap_prob=gap_prob,
+        calendar=get_calendar(symbol, SYMBOL_CALENDARS)
+    )
+    df = generator.next_chunk(num_candles)
     
-    df['timestamp'] = timestamps
     df['symbol'] = symbol
     df['timeframe'] = timeframe
     
@@ -110,18 +274,96 @@ def generate_sample_data_for_symbol(symbol: str, timeframe: str,
     return df
 
 
+def write_partitioned_dataset(output_dir: str, symbols: List[str], timeframe: str,
+                              interval_minutes: int, rows_per_symbol: int,
+                              chunk_rows: int = 1_000_000, seed: int = 42,
+                              start: Optional[datetime] = None,
+                              gap_prob: float = 0.0005) -> int:
+    """
+    Stream generated candles into a hive-partitioned parquet dataset
+    
+    Layout: {output_dir}/symbol={symbol}/timeframe={timeframe}/part-00000.parquet
+    Only one chunk per symbol is held in memory at a time.
+    
+    Args:
+        output_dir: Dataset root directory
+        symbols: Symbols to generate
+        timeframe: Timeframe string
+        interval_minutes: Interval in minutes
+        rows_per_symbol: Rows written per symbol
+        chunk_rows: Candle slots per chunk (one parquet file each)
+        seed: Base seed, combined with each symbol
+        start: First candle slot (default: 2000-01-01)
+        gap_prob: Probability that a candle is missing
+        
+    Returns:
+        Total rows written
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    total = 0
+    for symbol in symbols:
+        generator = SyntheticOHLCVGenerator(
+            BASE_PRICES.get(symbol, 100.0),
+            volatility=BASE_VOLATILITY * np.sqrt(interval_minutes / 60),
+            seed=symbol_seed(symbol, seed),
+            interval_minutes=interval_minutes,
+            start=start or datetime(2000, 1, 1),
+            gap_prob=gap_prob,
+            calendar=get_calendar(symbol, SYMBOL_CALENDARS)
+        )
+        
+        partition = Path(output_dir) / f'symbol={symbol}' / f'timeframe={timeframe}'
+        partition.mkdir(parents=True, exist_ok=True)
+        
+        written = 0
+        for part, chunk in enumerate(generator.stream(rows_per_symbol, chunk_rows)):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            pq.write_table(table, partition / f'part-{part:05d}.parquet', compression='snappy')
+            written += len(chunk)
+        
+        logger.info(f"✓ {symbol} {timeframe}: {written:,} rows -> {partition}")
+        total += written
+    
+    return total
+
+
 def main():
     """Generate sample data for all symbols and timeframes"""
+    parser = argparse.ArgumentParser(description='Generate synthetic OHLCV data')
+    parser.add_argument('--years', type=int, default=5, help='Years of history per file')
+    parser.add_argument('--seed', type=int, default=42, help='Base seed (combined per symbol)')
+    parser.add_argument('--rows', type=int, default=None,
+                        help='Large-scale mode: rows per symbol written to a partitioned dataset')
+    parser.add_argument('--timeframe', default='1m', help='Large-scale mode: timeframe')
+    parser.add_argument('--symbols', nargs='+', default=SYMBOLS)
+    parser.add_argument('--dataset-dir', default=f'{OUTPUT_DIR}/synthetic',
+                        help='Large-scale mode: dataset root')
+    parser.add_argument('--chunk-rows', type=int, default=1_000_000,
+                        help='Large-scale mode: candles per chunk/file')
+    args = parser.parse_args()
+    
+    if args.rows:
+        logger.info("="*80)
+        logger.info(f"GENERATING PARTITIONED DATASET ({args.rows:,} rows per symbol)")
+        logger.info("="*80)
+        total = write_partitioned_dataset(args.dataset_dir, args.symbols, args.timeframe,
+                                          TIMEFRAMES[args.timeframe], args.rows,
+                                          chunk_rows=args.chunk_rows, seed=args.seed)
+        logger.info(f"\nTotal: {total:,} rows in {args.dataset_dir}")
+        return
+    
     logger.info("="*80)
     logger.info("GENERATING SAMPLE TRADING DATA")
     logger.info("="*80)
     
     storage = DataStorage(output_dir=OUTPUT_DIR, output_format=OUTPUT_FORMAT)
     
-    total_tasks = len(SYMBOLS) * len(TIMEFRAMES)
+    total_tasks = len(args.symbols) * len(TIMEFRAMES)
     completed = 0
     
-    for symbol in SYMBOLS:
+    for symbol in args.symbols:
         for timeframe, interval_minutes in TIMEFRAMES.items():
             completed += 1
             logger.info(f"\n[{completed}/{total_tasks}] Generating {symbol} {timeframe}")
@@ -129,7 +371,8 @@ def main():
             try:
                 # Generate data
                 df = generate_sample_data_for_symbol(symbol, timeframe, 
-                                                    interval_minutes, years=5)
+                                                    interval_minutes, years=args.years,
+                                                    seed=args.seed)
                 
                 # Save data
                 filepath = storage.save_data(df, symbol, timeframe)
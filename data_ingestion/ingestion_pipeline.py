@@ -1,6 +1,7 @@
 """
 Main data ingestion pipeline
 """
+import argparse
 import pandas as pd
 import logging
 from datetime import datetime
@@ -10,21 +11,40 @@ from pathlib import Path
 
 from config import (
     SYMBOLS, TIMEFRAMES, START_DATE, END_DATE,
-    OUTPUT_DIR, LOG_DIR, OUTPUT_FORMAT, DATA_SOURCE,
-    MAX_MISSING_CANDLES_PERCENT
+    OUTPUT_DIR, LOG_DIR, OUTPUT_FORMAT, DATA_SOURCE, FETCH_CACHE,
+    MAX_MISSING_CANDLES_PERCENT, FLAG_FILLED_CANDLES, SYMBOL_CALENDARS,
+    INSTRUMENT, INSTRUMENT_PROFILE, INSTRUMENT_TRACE_MEMORY
 )
 from fetcher import DataFetcher
 from processor import DataProcessor
+from market_calendar import get_calendar
 from storage import DataStorage
+from instrumentation import PipelineInstrumentation
 
 
 class IngestionPipeline:
     """Main pipeline for data ingestion"""
     
-    def __init__(self):
-        self.fetcher = DataFetcher(source=DATA_SOURCE)
-        self.processor = DataProcessor(max_missing_percent=MAX_MISSING_CANDLES_PERCENT)
+    def __init__(self, instrument: bool = INSTRUMENT, profile: bool = INSTRUMENT_PROFILE,
+                 trace_memory: bool = INSTRUMENT_TRACE_MEMORY, source: str = DATA_SOURCE,
+                 backup_sources: List[str] = None, use_cache: bool = FETCH_CACHE):
+        """
+        Args:
+            source: Primary data source (yfinance, alpha_vantage, local)
+            backup_sources: Sources to fail over to (default: config.BACKUP_SOURCE)
+            use_cache: Reuse cached source responses (see response_cache.py)
+            instrument: Record per-stage timing, throughput and memory
+            profile: Capture cProfile hotspots per stage (requires instrument)
+            trace_memory: Capture tracemalloc peaks per stage (requires instrument)
+        """
+        self.fetcher = DataFetcher(source=source, backup_sources=backup_sources, use_cache=use_cache)
+        self.processor = DataProcessor(max_missing_percent=MAX_MISSING_CANDLES_PERCENT,
+                                       flag_filled=FLAG_FILLED_CANDLES,
+                                       symbol_calendars=SYMBOL_CALENDARS)
         self.storage = DataStorage(output_dir=OUTPUT_DIR, output_format=OUTPUT_FORMAT)
+        self.instrumentation = PipelineInstrumentation(
+            enabled=instrument, profile=profile, trace_memory=trace_memory
+        )
         self.stats = []
         self._setup_logging()
     
@@ -93,7 +113,11 @@ class IngestionPipeline:
         
         # 1. Fetch data
         self.logger.info(f"Fetching data for {symbol} {timeframe}...")
-        df = self.fetcher.fetch_data(symbol, START_DATE, END_DATE, timeframe)
+        with self.instrumentation.stage('fetch', symbol=symbol, timeframe=timeframe) as record:
+            df = self.fetcher.fetch_data(symbol, START_DATE, END_DATE, timeframe)
+            if record is not None:
+                record.rows = 0 if df is None else len(df)
+                record.labels['source'] = str(self.fetcher.last_source)
         
         if df is None or len(df) == 0:
             self.logger.warning(f"No data fetched for {symbol} {timeframe}")
@@ -109,13 +133,17 @@ class IngestionPipeline:
         # 2. Handle 4h resampling if needed
         if timeframe == '4h':
             self.logger.info("Resampling 1h data to 4h...")
-            df = self.processor.resample_to_4h(df)
+            with self.instrumentation.stage('resample', rows=len(df),
+                                            symbol=symbol, timeframe=timeframe):
+                df = self.processor.resample_to_4h(df, get_calendar(symbol, SYMBOL_CALENDARS))
         
         # 3. Process data
         self.logger.info(f"Processing data...")
-        df_processed, stats = self.processor.process_data(
-            df, symbol, timeframe, interval_minutes
-        )
+        with self.instrumentation.stage('process', rows=len(df),
+                                        symbol=symbol, timeframe=timeframe):
+            df_processed, stats = self.processor.process_data(
+                df, symbol, timeframe, interval_minutes
+            )
         
         if len(df_processed) == 0:
             self.logger.warning(f"No data after processing for {symbol} {timeframe}")
@@ -125,13 +153,17 @@ class IngestionPipeline:
         
         # 4. Save data
         self.logger.info(f"Saving data...")
-        filepath = self.storage.save_data(df_processed, symbol, timeframe)
+        with self.instrumentation.stage('save', rows=len(df_processed),
+                                        symbol=symbol, timeframe=timeframe):
+            filepath = self.storage.save_data(df_processed, symbol, timeframe)
         
         # 5. Preview data
         self._preview_data(df_processed, symbol, timeframe)
         
         # 6. Record stats
         stats['status'] = 'SUCCESS'
+        stats['source'] = self.fetcher.last_source
+        stats['fetch'] = self.fetcher.last_fetch_stats
         stats['filepath'] = filepath
         self.stats.append(stats)
     
@@ -188,6 +220,12 @@ class IngestionPipeline:
         
         self.logger.info(f"\nSummary saved to: {summary_file}")
         
+        # Stage timings
+        self.instrumentation.log_summary(self.logger)
+        report_file = self.instrumentation.save(LOG_DIR, prefix='ingestion_stages')
+        if report_file:
+            self.logger.info(f"Stage report saved to: {report_file}")
+        
         # List saved files
         saved_files = self.storage.get_saved_files()
         self.logger.info(f"\nSaved Files ({len(saved_files)}):")
@@ -201,7 +239,29 @@ class IngestionPipeline:
 
 def main():
     """Main entry point"""
-    pipeline = IngestionPipeline()
+    parser = argparse.ArgumentParser(description='Data ingestion pipeline')
+    parser.add_argument('--instrument', action='store_true', default=INSTRUMENT,
+                        help='Report per-stage timing, throughput and memory')
+    parser.add_argument('--profile', action='store_true', default=INSTRUMENT_PROFILE,
+                        help='Capture cProfile hotspots per stage')
+    parser.add_argument('--trace-memory', action='store_true', default=INSTRUMENT_TRACE_MEMORY,
+                        help='Capture tracemalloc peaks per stage')
+    parser.add_argument('--source', default=DATA_SOURCE,
+                        help='Primary data source (yfinance, alpha_vantage, local)')
+    parser.add_argument('--backup-sources', nargs='*', default=None,
+                        help='Sources to fail over to (default: config BACKUP_SOURCE)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always fetch from the source instead of the response cache')
+    args = parser.parse_args()
+    
+    pipeline = IngestionPipeline(
+        instrument=args.instrument or args.profile or args.trace_memory,
+        profile=args.profile,
+        trace_memory=args.trace_memory,
+        source=args.source,
+        backup_sources=args.backup_sources,
+        use_cache=FETCH_CACHE and not args.no_cache
+    )
     pipeline.run()
 
 
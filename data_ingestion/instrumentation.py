@@ -0,0 +1,223 @@
+"""
+Lightweight per-stage instrumentation for the pipelines
+
+Wrap a stage in `with instrumentation.stage('process', rows=len(df)):` to
+record its wall time, row throughput and RSS delta, plus optional cProfile
+hotspots and tracemalloc peak. Disabled instrumentation costs one
+attribute check per stage.
+"""
+import cProfile
+import io
+import json
+import logging
+import pstats
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def current_rss_mb() -> float:
+    """Current resident set size in MB (peak RSS where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize() / 1024 / 1024
+    except (OSError, ValueError, IndexError):
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss / 1024 / 1024 if sys.platform == 'darwin' else rss / 1024
+
+
+@dataclass
+class StageRecord:
+    """Measurements for one execution of a stage"""
+    name: str
+    labels: Dict[str, str] = field(default_factory=dict)
+    rows: Optional[int] = None
+    wall_seconds: float = 0.0
+    rows_per_sec: Optional[float] = None
+    rss_before_mb: float = 0.0
+    rss_after_mb: float = 0.0
+    rss_delta_mb: float = 0.0
+    peak_traced_mb: Optional[float] = None
+    hotspots: List[Dict] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+class PipelineInstrumentation:
+    """Collects StageRecords and builds a structured report"""
+
+    def __init__(self, enabled: bool = False, profile: bool = False,
+                 trace_memory: bool = False, profile_top: int = 15):
+        """
+        Args:
+            enabled: Record stages at all
+            profile: Capture cProfile hotspots per stage
+            trace_memory: Capture tracemalloc peak per stage (slows allocation-heavy code)
+            profile_top: Number of functions kept per profiled stage
+        """
+        self.enabled = enabled
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.profile_top = profile_top
+        self.records: List[StageRecord] = []
+        self.started_at = datetime.now()
+
+    @contextmanager
+    def stage(self, name: str, rows: Optional[int] = None, **labels):
+        """
+        Measure a stage
+
+        Args:
+            name: Stage name (records with the same name are aggregated)
+            rows: Rows handled by the stage; can also be set on the yielded
+                record when only known afterwards (`record.rows = len(df)`)
+            **labels: Context such as symbol and timeframe
+
+        Yields:
+            StageRecord (or None when disabled)
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        record = StageRecord(name=name, labels={k: str(v) for k, v in labels.items()}, rows=rows)
+
+        # Nested stages must not restart a running tracer/profiler
+        own_tracemalloc = self.trace_memory and not tracemalloc.is_tracing()
+        if own_tracemalloc:
+            tracemalloc.start()
+        elif self.trace_memory:
+            tracemalloc.reset_peak()
+
+        profiler = None
+        if self.profile:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiler is active (nested stage)
+                profiler = None
+
+        record.rss_before_mb = current_rss_mb()
+        started = time.perf_counter()
+        try:
+            yield record
+        except Exception as e:
+            record.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record.wall_seconds = time.perf_counter() - started
+
+            if profiler is not None:
+                profiler.disable()
+                record.hotspots = self._hotspots(profiler)
+
+            if self.trace_memory:
+                _, peak = tracemalloc.get_traced_memory()
+                record.peak_traced_mb = round(peak / 1024 / 1024, 2)
+                if own_tracemalloc:
+                    tracemalloc.stop()
+
+            record.rss_after_mb = current_rss_mb()
+            record.rss_delta_mb = round(record.rss_after_mb - record.rss_before_mb, 2)
+            record.rss_before_mb = round(record.rss_before_mb, 2)
+            record.rss_after_mb = round(record.rss_after_mb, 2)
+            if record.rows is not None and record.wall_seconds > 0:
+                record.rows_per_sec = round(record.rows / record.wall_seconds, 1)
+            record.wall_seconds = round(record.wall_seconds, 4)
+
+            self.records.append(record)
+
+    def _hotspots(self, profiler: cProfile.Profile) -> List[Dict]:
+        """Top functions by cumulative time"""
+        stats = pstats.Stats(profiler, stream=io.StringIO())
+        stats.sort_stats('cumulative')
+
+        hotspots = []
+        for func in stats.fcn_list[:self.profile_top]:
+            calls, _, total, cumulative, _ = stats.stats[func]
+            filename, line, name = func
+            hotspots.append({
+                'function': f"{Path(filename).name}:{line}({name})",
+                'calls': calls,
+                'total_seconds': round(total, 4),
+                'cumulative_seconds': round(cumulative, 4)
+            })
+        return hotspots
+
+    def summary(self) -> Dict[str, Dict]:
+        """Aggregate records per stage name"""
+        summary = {}
+        for record in self.records:
+            stage = summary.setdefault(record.name, {
+                'calls': 0, 'wall_seconds': 0.0, 'rows': 0,
+                'rss_delta_mb': 0.0, 'peak_traced_mb': None
+            })
+            stage['calls'] += 1
+            stage['wall_seconds'] += record.wall_seconds
+            stage['rows'] += record.rows or 0
+            stage['rss_delta_mb'] += record.rss_delta_mb
+            if record.peak_traced_mb is not None:
+                stage['peak_traced_mb'] = max(stage['peak_traced_mb'] or 0.0, record.peak_traced_mb)
+
+        for stage in summary.values():
+            stage['wall_seconds'] = round(stage['wall_seconds'], 4)
+            stage['rss_delta_mb'] = round(stage['rss_delta_mb'], 2)
+            stage['rows_per_sec'] = (round(stage['rows'] / stage['wall_seconds'], 1)
+                                     if stage['rows'] and stage['wall_seconds'] > 0 else None)
+        return summary
+
+    def report(self) -> Dict:
+        """Structured report with per-stage totals and every record"""
+        return {
+            'started_at': self.started_at.isoformat(),
+            'finished_at': datetime.now().isoformat(),
+            'profile': self.profile,
+            'trace_memory': self.trace_memory,
+            'stages': self.summary(),
+            'records': [asdict(r) for r in self.records]
+        }
+
+    def log_summary(self, log: Optional[logging.Logger] = None):
+        """Log per-stage totals, slowest first"""
+        if not self.enabled or not self.records:
+            return
+        log = log or logger
+
+        log.info("\n" + "="*80)
+        log.info("STAGE TIMINGS")
+        log.info("="*80)
+        log.info(f"{'Stage':<28} {'Calls':>6} {'Wall (s)':>10} {'Rows/s':>12} {'RSS Δ (MB)':>11}")
+        log.info("-" * 80)
+
+        stages = sorted(self.summary().items(), key=lambda x: x[1]['wall_seconds'], reverse=True)
+        for name, stage in stages:
+            rate = f"{stage['rows_per_sec']:,.0f}" if stage['rows_per_sec'] else '-'
+            log.info(f"{name:<28} {stage['calls']:>6} {stage['wall_seconds']:>10.3f} "
+                     f"{rate:>12} {stage['rss_delta_mb']:>+11.1f}")
+
+    def save(self, output_dir: str, prefix: str = 'instrumentation') -> Optional[Path]:
+        """
+        Save the report as JSON
+
+        Returns:
+            Path to the report, or None when disabled
+        """
+        if not self.enabled:
+            return None
+
+        output_path = Path(output_dir)
+        output_path.mkdir(parents=True, exist_ok=True)
+        output_file = output_path / f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(output_file, 'w') as f:
+            json.dump(self.report(), f, indent=2, default=str)
+
+        return output_file
@@ -0,0 +1,969 @@
+"""
+Event-driven live trading loop
+
+Consumes candles from a pluggable async feed, keeps a rolling feature window
+per symbol, scores symbols concurrently with TradingDecisionEngine and emits
+signals to a sink. Per-candle end-to-end latency is measured from the moment
+a candle arrives to the moment its signal has been emitted.
+
+Feeds:
+    ParquetReplayFeed - replays stored data/{symbol}_{timeframe}.parquet (no network)
+    DerivCandleFeed   - Deriv websocket candle stream (same API as lib/deriv-websocket.ts)
+    TickCandleFeed    - candles aggregated from any async tick stream (e.g. deriv_tick_stream)
+"""
+import argparse
+import asyncio
+import heapq
+import json
+import logging
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    SYMBOLS, TIMEFRAMES, OUTPUT_DIR, LIVE_WINDOW_CANDLES, LIVE_WARMUP_CANDLES,
+    LIVE_HISTORY_CANDLES, DERIV_APP_ID, DERIV_WS_URL, DERIV_SYMBOL_MAP
+)
+from tick_aggregator import Tick, TickAggregator, CandleStorageWriter
+
+BASE_DIR = Path(__file__).resolve().parent
+FEATURE_DIR = BASE_DIR / 'feature_engineering'
+sys.path.append(str(FEATURE_DIR))
+sys.path.append(str(BASE_DIR / 'models'))
+
+from feature_spec import join_features
+from decision_engine import TradingDecisionEngine, TradingSignal
+
+logger = logging.getLogger(__name__)
+
+CANDLE_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume', 'spread']
+META_COLUMNS = ['timestamp', 'symbol', 'timeframe']
+RAW_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+
+def load_feature_pipeline():
+    """
+    Import feature_engineering/feature_pipeline.py
+
+    data_ingestion/ and feature_engineering/ both have a config.py; while the
+    pipeline is imported, `config` must resolve to the feature engineering one.
+
+    Returns:
+        The feature_pipeline module
+    """
+    if 'feature_pipeline' in sys.modules:
+        return sys.modules['feature_pipeline']
+
+    app_config = sys.modules.pop('config', None)
+    sys.path.insert(0, str(FEATURE_DIR))
+    try:
+        import feature_pipeline
+    finally:
+        sys.path.remove(str(FEATURE_DIR))
+        sys.modules.pop('config', None)
+        if app_config is not None:
+            sys.modules['config'] = app_config
+    return feature_pipeline
+
+
+@dataclass
+class Candle:
+    """A closed candle delivered by a feed"""
+    symbol: str
+    timeframe: str
+    timestamp: datetime
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float = 0.0
+    spread: float = 0.0
+    received_at: float = field(default_factory=time.perf_counter)
+
+
+@dataclass
+class SignalEvent:
+    """A signal produced for a candle"""
+    symbol: str
+    timeframe: str
+    candle_timestamp: datetime
+    signal: TradingSignal
+    latency_ms: float = 0.0
+
+
+class CandleFeed:
+    """Base class for async candle feeds"""
+
+    timeframe: Optional[str] = None
+
+    def stream(self) -> AsyncIterator[Candle]:
+        """Yield closed candles in arrival order"""
+        raise NotImplementedError
+
+    def history(self, symbol: str) -> Optional[pd.DataFrame]:
+        """Optional warmup history for a symbol (OHLCV DataFrame)"""
+        return None
+
+
+class ParquetReplayFeed(CandleFeed):
+    """
+    Replay stored candles from data/{symbol}_{timeframe}.parquet
+
+    Candles from all symbols are merged in timestamp order so the runner
+    sees the same interleaving a live feed would produce. Candles are paced
+    by their timestamps: speed=1.0 replays in real time, speed=60 replays an
+    hour of market time per minute, and speed=None replays as fast as possible.
+    """
+
+    def __init__(self, symbols: List[str], timeframe: str, data_dir: str = OUTPUT_DIR,
+                 limit: Optional[int] = None, speed: Optional[float] = None):
+        """
+        Args:
+            symbols: Symbols to replay
+            timeframe: Timeframe string (e.g., 1h)
+            data_dir: Directory with parquet files
+            limit: Max candles per symbol (from the start of each file)
+            speed: Replay speed multiplier (None = as fast as possible)
+        """
+        if speed is not None and speed <= 0:
+            raise ValueError(f"speed must be positive, got {speed}")
+
+        self.symbols = symbols
+        self.timeframe = timeframe
+        self.data_dir = Path(data_dir)
+        self.limit = limit
+        self.speed = speed
+        self.frames = {}
+
+        for symbol in symbols:
+            path = self.data_dir / f"{symbol}_{timeframe}.parquet"
+            if not path.exists():
+                logger.warning(f"No data for {symbol} {timeframe}: {path}")
+                continue
+            df = pd.read_parquet(path, columns=CANDLE_COLUMNS)
+            df = df.sort_values('timestamp').reset_index(drop=True)
+            self.frames[symbol] = df.iloc[:limit] if limit else df
+
+    def _iter_rows(self, symbol: str):
+        """Yield (timestamp, symbol, row tuple) for one symbol"""
+        df = self.frames[symbol]
+        for row in df.itertuples(index=False, name=None):
+            yield row[0], symbol, row
+
+    async def stream(self) -> AsyncIterator[Candle]:
+        merged = heapq.merge(*(self._iter_rows(s) for s in self.frames),
+                             key=lambda x: x[0])
+
+        loop = asyncio.get_running_loop()
+        first_timestamp = None
+        started = loop.time()
+
+        for timestamp, symbol, row in merged:
+            delay = 0
+            if self.speed is not None:
+                if first_timestamp is None:
+                    first_timestamp = timestamp
+                market_seconds = (timestamp - first_timestamp).total_seconds()
+                delay = max(0.0, started + market_seconds / self.speed - loop.time())
+
+            # Always yield so other tasks run between candles
+            await asyncio.sleep(delay)
+            yield Candle(symbol, self.timeframe, *row)
+
+
+class DerivCandleFeed(CandleFeed):
+    """
+    Deriv websocket candle feed
+
+    Subscribes with `ticks_history` / `style: candles` (the same API the
+    frontend uses) and emits a candle when the next candle's open_time arrives.
+    Requires the optional `websockets` package.
+    """
+
+    def __init__(self, symbols: List[str], timeframe: str, app_id: str = DERIV_APP_ID,
+                 history_count: int = LIVE_HISTORY_CANDLES):
+        self.symbols = symbols
+        self.timeframe = timeframe
+        self.granularity = TIMEFRAMES[timeframe] * 60
+        self.url = f"{DERIV_WS_URL}?app_id={app_id}"
+        self.history_count = history_count
+        self._history = {}
+
+    def history(self, symbol: str) -> Optional[pd.DataFrame]:
+        return self._history.get(symbol)
+
+    def _to_deriv(self, symbol: str) -> str:
+        return DERIV_SYMBOL_MAP.get(symbol, symbol)
+
+    async def stream(self) -> AsyncIterator[Candle]:
+        try:
+            import websockets
+        except ImportError:
+            raise ImportError("websockets not installed. Install with: pip install websockets")
+
+        reverse_map = {self._to_deriv(s): s for s in self.symbols}
+        forming = {}
+
+        async with websockets.connect(self.url) as ws:
+            for symbol in self.symbols:
+                await ws.send(json.dumps({
+                    'ticks_history': self._to_deriv(symbol),
+                    'adjust_start_time': 1,
+                    'count': self.history_count,
+                    'end': 'latest',
+                    'granularity': self.granularity,
+                    'style': 'candles',
+                    'subscribe': 1
+                }))
+
+            async for raw in ws:
+                message = json.loads(raw)
+
+                if 'error' in message:
+                    logger.error(f"Deriv error: {message['error'].get('message')}")
+                    continue
+
+                if message.get('msg_type') == 'candles':
+                    symbol = reverse_map.get(message['echo_req']['ticks_history'])
+                    candles = pd.DataFrame(message.get('candles', []))
+                    if symbol and len(candles):
+                        # Last candle is still forming
+                        self._history[symbol] = self._candles_to_frame(candles.iloc[:-1])
+                    continue
+
+                if message.get('msg_type') != 'ohlc':
+                    continue
+
+                ohlc = message['ohlc']
+                symbol = reverse_map.get(ohlc['symbol'])
+                if symbol is None:
+                    continue
+
+                previous = forming.get(symbol)
+                if previous is not None and ohlc['open_time'] != previous['open_time']:
+                    yield self._ohlc_to_candle(symbol, previous)
+                forming[symbol] = ohlc
+
+    def _candles_to_frame(self, candles: pd.DataFrame) -> pd.DataFrame:
+        df = pd.DataFrame({
+            'timestamp': pd.to_datetime(candles['epoch'], unit='s'),
+            'open': candles['open'].astype(float),
+            'high': candles['high'].astype(float),
+            'low': candles['low'].astype(float),
+            'close': candles['close'].astype(float),
+            'volume': 0.0
+        })
+        df['spread'] = ((df['high'] - df['low']) / df['close'] * 100).round(4)
+        return df
+
+    def _ohlc_to_candle(self, symbol: str, ohlc: Dict) -> Candle:
+        high, low, close = float(ohlc['high']), float(ohlc['low']), float(ohlc['close'])
+        return Candle(
+            symbol=symbol,
+            timeframe=self.timeframe,
+            timestamp=pd.to_datetime(int(ohlc['open_time']), unit='s'),
+            open=float(ohlc['open']),
+            high=high,
+            low=low,
+            close=close,
+            volume=0.0,
+            spread=round((high - low) / close * 100, 4)
+        )
+
+
+class TickCandleFeed(CandleFeed):
+    """
+    Candles built from a tick stream
+
+    Ticks are aggregated into every configured timeframe at once; candles of
+    `timeframe` are yielded to the runner and, with `on_candle` (e.g. a
+    CandleStorageWriter), all finished candles are also persisted.
+    """
+
+    def __init__(self, ticks: AsyncIterator[Tick], timeframe: str,
+                 aggregator: Optional[TickAggregator] = None,
+                 on_candle: Optional[Callable[[Dict], None]] = None):
+        """
+        Args:
+            ticks: Async iterator of ticks
+            timeframe: Timeframe passed to the runner (must be aggregated)
+            aggregator: Tick aggregator (default: all config.TIMEFRAMES)
+            on_candle: Called with every finished candle row of every timeframe
+        """
+        self.ticks = ticks
+        self.timeframe = timeframe
+        self.aggregator = aggregator or TickAggregator()
+        if timeframe not in self.aggregator.timeframes:
+            raise ValueError(f"Timeframe {timeframe} is not aggregated")
+        self.on_candle = on_candle
+
+    def _candles(self, rows: List[Dict]):
+        for row in rows:
+            if self.on_candle is not None:
+                self.on_candle(row)
+            if row['timeframe'] == self.timeframe:
+                yield Candle(**row)
+
+    async def stream(self) -> AsyncIterator[Candle]:
+        async for tick in self.ticks:
+            rows = self.aggregator.add_tick(tick.symbol, tick.timestamp, tick.price, tick.volume)
+            for candle in self._candles(rows):
+                yield candle
+
+        for candle in self._candles(self.aggregator.flush()):
+            yield candle
+
+
+async def deriv_tick_stream(symbols: List[str], app_id: str = DERIV_APP_ID) -> AsyncIterator[Tick]:
+    """
+    Deriv websocket tick stream (`ticks` subscription); price is the quote
+
+    Requires the optional `websockets` package.
+    """
+    try:
+        import websockets
+    except ImportError:
+        raise ImportError("websockets not installed. Install with: pip install websockets")
+
+    reverse_map = {DERIV_SYMBOL_MAP.get(s, s): s for s in symbols}
+
+    async with websockets.connect(f"{DERIV_WS_URL}?app_id={app_id}") as ws:
+        for deriv_symbol in reverse_map:
+            await ws.send(json.dumps({'ticks': deriv_symbol, 'subscribe': 1}))
+
+        async for raw in ws:
+            message = json.loads(raw)
+
+            if 'error' in message:
+                logger.error(f"Deriv error: {message['error'].get('message')}")
+                continue
+            if message.get('msg_type') != 'tick':
+                continue
+
+            tick = message['tick']
+            symbol = reverse_map.get(tick['symbol'])
+            if symbol is not None:
+                yield Tick(symbol, int(tick['epoch']), float(tick['quote']))
+
+
+class LiveFeatureEngine:
+    """
+    Rolling per-symbol feature state for live inference
+
+    Recursive indicators (the EMAs, MACD, and RSI/ATR with 'wilder' or 'ema'
+    smoothing) depend on every earlier candle.
+    They run as O(1) per-symbol state, seeded once from batch values. Every
+    other feature has a fixed lookback (50 + 14 candles at most) and is
+    recomputed over the bounded window only. Per-candle cost therefore does
+    not grow with history, and the recursive values match a full-history
+    batch run. One exception is the distance to the last swing point: it
+    reaches back to that swing, so the window must contain it (see
+    LIVE_WINDOW_CANDLES).
+    With `columns` set (e.g. the model's feature names) only those features
+    and their dependencies are computed. Calculators and settings are those
+    of FeatureEngineeringPipeline.
+
+    Higher timeframe columns (htf_{timeframe}_{column}) come from a nested
+    engine per HTF fed with HTF candles aggregated from the incoming ones.
+    An HTF candle is passed on once it has closed, and its last complete
+    feature row is joined with MultiTimeframeAligner, as in
+    FeatureEngineeringPipeline.add_htf_features.
+    """
+
+    def __init__(self, window: int = LIVE_WINDOW_CANDLES, warmup: int = LIVE_WARMUP_CANDLES,
+                 columns: Optional[List[str]] = None, join_htf: bool = True):
+        """
+        Args:
+            window: Candles kept per symbol
+            warmup: Candles before the first feature row
+            columns: Features to compute (None = all)
+            join_htf: Join htf_* columns (False for the nested HTF engines)
+        """
+        self.window = window
+        self.warmup = warmup
+        self.join_htf = join_htf
+        self.buffers: Dict[str, deque] = {}
+        self.seen: Dict[str, int] = {}
+
+        # Recursive indicator state per symbol and its values for the window rows
+        self.state_columns: List[str] = []
+        self.states: Dict[str, Dict] = {}
+        self.state_values: Dict[str, deque] = {}
+
+        # Same calculators and settings as the batch pipeline
+        self.pipeline = load_feature_pipeline().FeatureEngineeringPipeline()
+        self.mtf_aligner = self.pipeline.mtf_aligner
+        self.calculators = [calculator for _, calculator in self.pipeline.feature_groups()]
+
+        # HTF state: forming candle and candle count per (symbol, htf), last
+        # complete HTF row prepared for the join
+        self.htf_engines: Dict[str, 'LiveFeatureEngine'] = {}
+        self.forming: Dict[tuple, tuple] = {}
+        self.htf_frames: Dict[tuple, object] = {}
+
+        self.columns = None
+        self.select_features(columns)
+
+    def select_features(self, columns: Optional[List[str]]):
+        """Compute only `columns` and their dependencies (None = all)"""
+        self.pipeline.select_features(columns)
+        self.columns = self.pipeline.requested_columns
+        self.active_calculators = [c for c in self.calculators
+                                   if self.columns is None or c.required(self.columns)]
+
+        needed = set().union(*(c.required(self.columns) for c in self.active_calculators))
+        recursive = [f'ema_{period}' for period in self.pipeline.trend_features.ema_periods]
+        recursive += ['macd', 'macd_signal']
+        if self.pipeline.momentum_features.rsi_smoothing != 'sma':
+            recursive.append('rsi')
+        if self.pipeline.volatility_features.atr_smoothing != 'sma':
+            recursive.append('atr')
+        self.state_columns = [c for c in recursive if c in needed]
+        self.states.clear()
+        self.state_values.clear()
+
+        htf_columns = self.mtf_aligner.columns if self.join_htf else []
+        self.htf_engines = {
+            htf: LiveFeatureEngine(self.window, self.warmup, join_htf=False,
+                                   columns=None if self.columns is None else htf_columns)
+            for htf in self.mtf_aligner.htf_timeframes
+        } if htf_columns else {}
+        self.forming.clear()
+        self.htf_frames.clear()
+
+    def check_timeframe(self, timeframe: str):
+        """
+        Raise ValueError if the HTF columns cannot be built from `timeframe` candles
+
+        HTF candles are aggregated from the incoming candles, so every HTF
+        must be a multiple of the timeframe.
+        """
+        minutes = self.mtf_aligner.timeframe_minutes
+        for htf in self.htf_engines:
+            if timeframe not in minutes or minutes[htf] % minutes[timeframe]:
+                raise ValueError(f"htf_{htf}_* features need {htf} candles; they cannot be "
+                                 f"built from {timeframe} candles")
+
+    def seed(self, symbol: str, timeframe: str, history: pd.DataFrame):
+        """Prefill a symbol's window, indicator state and HTF state from historical candles"""
+        buffer = self.buffers.setdefault(symbol, deque(maxlen=self.window))
+        for row in history[CANDLE_COLUMNS].tail(self.window).itertuples(index=False, name=None):
+            buffer.append(row)
+        self.seen[symbol] = len(history)
+
+        if self.state_columns and len(history) >= min(self.warmup, self.window):
+            self._start_states(symbol, history[CANDLE_COLUMNS].reset_index(drop=True))
+
+        if not self.htf_engines or history.empty:
+            return
+
+        self.check_timeframe(timeframe)
+        last_close = history['timestamp'].iloc[-1] + self._interval(timeframe)
+        for htf, engine in self.htf_engines.items():
+            htf_minutes = self.mtf_aligner.timeframe_minutes[htf]
+            candles = load_feature_pipeline().resample_ohlcv(history[CANDLE_COLUMNS], htf_minutes,
+                                                             self.pipeline.resample_offset(symbol))
+            if candles['timestamp'].iloc[-1] + self._interval(htf) > last_close:
+                # Still forming: keep aggregating it from the live candles
+                forming = candles.iloc[-1]
+                count = int((history['timestamp'] >= forming['timestamp']).sum())
+                self.forming[(symbol, htf)] = (Candle(symbol, htf, *forming[CANDLE_COLUMNS]), count)
+                candles = candles.iloc[:-1]
+
+            engine.seed(symbol, htf, candles)
+            self._set_htf_row(symbol, htf, engine.latest(symbol))
+
+    def update(self, candle: Candle) -> Optional[pd.Series]:
+        """
+        Add a candle and return the latest feature row
+
+        Returns:
+            Feature Series for the candle, or None while warming up
+        """
+        symbol = candle.symbol
+        buffer = self.buffers.setdefault(symbol, deque(maxlen=self.window))
+        buffer.append((candle.timestamp, candle.open, candle.high, candle.low,
+                       candle.close, candle.volume, candle.spread))
+        self.seen[symbol] = self.seen.get(symbol, 0) + 1
+
+        if self.htf_engines:
+            self._update_htf(candle)
+
+        if self.state_columns:
+            if symbol in self.states:
+                self.state_values[symbol].append(self._advance_states(symbol, candle))
+            elif len(buffer) >= min(self.warmup, self.window):
+                # The buffer still holds every candle seen: seed the state from it
+                self._start_states(symbol, self._window(symbol))
+
+        return self.latest(symbol, candle)
+
+    def latest(self, symbol: str, candle: Optional[Candle] = None) -> Optional[pd.Series]:
+        """
+        Features for a symbol's last candle
+
+        Args:
+            symbol: Symbol
+            candle: The last candle (needed to join HTF columns)
+
+        Returns:
+            Feature Series, or None while warming up or incomplete
+        """
+        if self.seen.get(symbol, 0) < self.warmup:
+            return None
+
+        features = self.calculate_last(self._window(symbol))
+        if features is None or not self.htf_engines:
+            return features
+        return self._join_htf(candle, features)
+
+    def calculate(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Run all feature calculators over a candle window (state columns are reused)"""
+        df = join_features(df, [calculator.calculate_columns(df, self.columns, self.state_columns)
+                                for calculator in self.active_calculators])
+        return df.replace([np.inf, -np.inf], np.nan)
+
+    def calculate_last(self, df: pd.DataFrame) -> Optional[pd.Series]:
+        """Features for the last candle of a window (None if incomplete)"""
+        last = self.calculate(df).iloc[-1]
+        if last.drop(labels=['timestamp']).isna().any():
+            return None
+        return last
+
+    def _window(self, symbol: str) -> pd.DataFrame:
+        """A symbol's candle window, with the state columns once they run"""
+        df = pd.DataFrame.from_records(list(self.buffers[symbol]), columns=CANDLE_COLUMNS)
+        if symbol in self.states:
+            states = pd.DataFrame.from_records(list(self.state_values[symbol]), columns=self.state_columns)
+            df = pd.concat([df, states], axis=1)
+        return df
+
+    def _start_states(self, symbol: str, history: pd.DataFrame):
+        """
+        Seed a symbol's recursive indicator state from its full history
+
+        The state columns are computed in batch once; the window keeps their
+        values for its rows and the state continues from the last candle.
+        """
+        trend = self.pipeline.trend_features
+        momentum = self.pipeline.momentum_features
+        volatility = self.pipeline.volatility_features
+        close = history['close']
+
+        states = {}
+        for period in trend.ema_periods:
+            if f'ema_{period}' in self.state_columns:
+                states[f'ema_{period}'] = trend.ema_state(close, period)
+        if 'macd' in self.state_columns or 'macd_signal' in self.state_columns:
+            states['macd'] = momentum.macd_state(close)
+        if 'rsi' in self.state_columns:
+            states['rsi'] = momentum.rsi_state(close)
+        if 'atr' in self.state_columns:
+            states['atr'] = volatility.atr_state(history)
+
+        values = join_features(history[[]], [calculator.calculate_columns(history, self.state_columns)
+                                             for calculator in (trend, momentum, volatility)])
+        rows = values[self.state_columns].tail(self.window).itertuples(index=False, name=None)
+
+        self.states[symbol] = states
+        self.state_values[symbol] = deque(rows, maxlen=self.window)
+
+    def _advance_states(self, symbol: str, candle: Candle) -> tuple:
+        """Advance a symbol's recursive indicators by one candle (O(1))"""
+        values = {}
+        for name, state in self.states[symbol].items():
+            if name == 'macd':
+                values['macd'] = state.update(candle.close)
+                values['macd_signal'] = state.signal.value
+            elif name == 'atr':
+                values['atr'] = state.update(candle.high, candle.low, candle.close)
+            else:
+                values[name] = state.update(candle.close)
+        return tuple(values[column] for column in self.state_columns)
+
+    def _interval(self, timeframe: str) -> pd.Timedelta:
+        return pd.Timedelta(minutes=self.mtf_aligner.timeframe_minutes[timeframe])
+
+    def _update_htf(self, candle: Candle):
+        """Aggregate a candle into its HTF candles and pass on the closed ones"""
+        close_time = candle.timestamp + self._interval(candle.timeframe)
+
+        for htf, engine in self.htf_engines.items():
+            htf_interval = self._interval(htf)
+            # Aligned to the session open, as resample_ohlcv in batch
+            offset = pd.Timedelta(self.pipeline.resample_offset(candle.symbol))
+            bucket = (pd.Timestamp(candle.timestamp) - offset).floor(htf_interval) + offset
+
+            forming, count = self.forming.pop((candle.symbol, htf), (None, 0))
+            if forming is not None and forming.timestamp != bucket:
+                # The candle of that bucket closed during a gap in the feed
+                self._set_htf_row(candle.symbol, htf, engine.update(forming))
+                forming = None
+
+            if forming is None:
+                forming, count = Candle(candle.symbol, htf, bucket, candle.open, candle.high, candle.low,
+                                        candle.close, candle.volume, candle.spread), 1
+            else:
+                forming.high = max(forming.high, candle.high)
+                forming.low = min(forming.low, candle.low)
+                forming.close = candle.close
+                forming.volume += candle.volume
+                forming.spread = (forming.spread * count + candle.spread) / (count + 1)
+                count += 1
+
+            if close_time >= bucket + htf_interval:
+                self._set_htf_row(candle.symbol, htf, engine.update(forming))
+            else:
+                self.forming[(candle.symbol, htf)] = (forming, count)
+
+    def _set_htf_row(self, symbol: str, htf: str, row: Optional[pd.Series]):
+        """Keep the last complete HTF feature row, prepared for the join"""
+        if row is not None:
+            frame = row.to_frame().T.infer_objects()
+            self.htf_frames[(symbol, htf)] = self.mtf_aligner.prepare(frame, htf)
+
+    def _join_htf(self, candle: Candle, features: pd.Series) -> Optional[pd.Series]:
+        """Join the closed HTF rows into a feature row (None until every HTF is ready)"""
+        frames = {htf: self.htf_frames.get((candle.symbol, htf)) for htf in self.htf_engines}
+        if any(frame is None for frame in frames.values()):
+            return None
+
+        joined = self.mtf_aligner.join(features.to_frame().T.infer_objects(),
+                                       candle.timeframe, frames).iloc[0]
+        if joined[self.mtf_aligner.output_columns()].isna().any():
+            return None
+        return joined
+
+
+class SignalSink:
+    """Base class for signal sinks"""
+
+    async def emit(self, event: SignalEvent):
+        raise NotImplementedError
+
+
+class LoggingSink(SignalSink):
+    """Log every tradeable signal"""
+
+    def __init__(self, log_no_trade: bool = False):
+        self.log_no_trade = log_no_trade
+
+    async def emit(self, event: SignalEvent):
+        if event.signal.signal == 'NO_TRADE' and not self.log_no_trade:
+            return
+        logger.info(f"{event.candle_timestamp} {event.symbol:<8} {event.signal.signal:<9} "
+                    f"Q={event.signal.quality} conf={event.signal.confidence:.2%} "
+                    f"({event.latency_ms:.1f} ms)")
+
+
+class CollectingSink(SignalSink):
+    """Keep all events in memory (replay and testing)"""
+
+    def __init__(self):
+        self.events: List[SignalEvent] = []
+
+    async def emit(self, event: SignalEvent):
+        self.events.append(event)
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame([{
+            'timestamp': e.candle_timestamp,
+            'symbol': e.symbol,
+            'timeframe': e.timeframe,
+            'signal': e.signal.signal,
+            'signal_quality': e.signal.quality,
+            'signal_confidence': e.signal.confidence,
+            'pred_direction': e.signal.direction_prob,
+            'pred_volatility': e.signal.volatility_prob,
+            'pred_notrade': e.signal.notrade_prob,
+            'latency_ms': e.latency_ms
+        } for e in self.events])
+
+
+class JsonlSink(SignalSink):
+    """Append signals to a JSON-lines file"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    async def emit(self, event: SignalEvent):
+        record = {
+            'timestamp': str(event.candle_timestamp),
+            'symbol': event.symbol,
+            'timeframe': event.timeframe,
+            'signal': event.signal.signal,
+            'quality': event.signal.quality,
+            'confidence': float(event.signal.confidence),
+            'latency_ms': round(event.latency_ms, 3)
+        }
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+
+
+class LatencyTracker:
+    """
+    Per-symbol latency samples
+
+    End-to-end latency runs from candle arrival to signal emission and
+    includes time spent queued; processing time covers features, inference
+    and the sink only.
+    """
+
+    def __init__(self, max_samples: int = 100_000):
+        self.samples: Dict[str, deque] = {}
+        self.processing: Dict[str, deque] = {}
+        self.max_samples = max_samples
+
+    def record(self, symbol: str, latency_ms: float, processing_ms: float):
+        self.samples.setdefault(symbol, deque(maxlen=self.max_samples)).append(latency_ms)
+        self.processing.setdefault(symbol, deque(maxlen=self.max_samples)).append(processing_ms)
+
+    def summary(self) -> Dict[str, Dict]:
+        """p50/p95/p99/max latency (ms) per symbol"""
+        report = {}
+        for symbol, samples in self.samples.items():
+            values = np.fromiter(samples, dtype=np.float64)
+            processing = np.fromiter(self.processing[symbol], dtype=np.float64)
+            report[symbol] = {
+                'candles': int(len(values)),
+                'p50_ms': float(np.percentile(values, 50)),
+                'p95_ms': float(np.percentile(values, 95)),
+                'p99_ms': float(np.percentile(values, 99)),
+                'max_ms': float(values.max()),
+                'processing_p50_ms': float(np.percentile(processing, 50)),
+                'processing_p99_ms': float(np.percentile(processing, 99))
+            }
+        return report
+
+
+class LiveTradingRunner:
+    """
+    Asyncio live loop: feed -> per-symbol queue -> features -> engine -> sink
+
+    Each symbol has its own queue and worker task so candles for one symbol
+    are processed in order while different symbols are scored concurrently
+    (feature computation and inference run in a thread pool).
+    """
+
+    def __init__(self, feed: CandleFeed, engine: TradingDecisionEngine, sink: SignalSink, scaler,
+                 feature_engine: Optional[LiveFeatureEngine] = None,
+                 feature_columns: Optional[List[str]] = None,
+                 max_workers: int = 4, queue_size: int = 1000):
+        """
+        Args:
+            feed: Candle feed
+            engine: Decision engine with loaded models
+            sink: Where signals are emitted
+            scaler: Scaler saved by feature_pipeline.py (models are trained on
+                normalized features)
+            feature_engine: Live feature state (default: LiveFeatureEngine computing
+                only the model's feature columns)
+            feature_columns: Model input columns (default: engine.feature_names)
+            max_workers: Threads used for feature computation and inference
+            queue_size: Max pending candles per symbol
+
+        Raises:
+            ValueError: No scaler, the scaler does not cover the model's columns, or
+                the model's HTF columns cannot be built from the feed's timeframe
+        """
+        if scaler is None:
+            raise ValueError("Models are trained on normalized features; pass the scaler "
+                             "saved by feature_pipeline.py")
+        self.feed = feed
+        self.engine = engine
+        self.sink = sink
+        self.feature_columns = feature_columns or engine.feature_names
+        if self.feature_columns is not None:
+            unscaled = [c for c in self.feature_columns if c not in set(scaler.feature_names_in_)]
+            if unscaled:
+                raise ValueError(f"Scaler was not fitted on model columns {unscaled}; "
+                                 f"re-run feature_pipeline.py for these models")
+        self.feature_engine = feature_engine or LiveFeatureEngine(columns=self.feature_columns)
+        if feed.timeframe is not None:
+            self.feature_engine.check_timeframe(feed.timeframe)
+        self.scaler = scaler
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.queue_size = queue_size
+        self.latency = LatencyTracker()
+        self.queues: Dict[str, asyncio.Queue] = {}
+        self.workers: Dict[str, asyncio.Task] = {}
+        self.candles_processed = 0
+        self.signals_emitted = 0
+        self.symbol_candles: Dict[str, int] = {}
+        self.symbol_busy_seconds: Dict[str, float] = {}
+
+    def _model_input(self, features: pd.Series) -> pd.Series:
+        """Select and scale model input columns (as in training)"""
+        if self.feature_columns is None:
+            columns = [c for c in features.index if c not in META_COLUMNS + RAW_COLUMNS]
+            self.feature_columns = columns
+        row = features[self.feature_columns].astype(float).to_frame().T
+        return load_feature_pipeline().scale_columns(self.scaler, row).iloc[0]
+
+    def _score(self, candle: Candle) -> Optional[TradingSignal]:
+        """Update features and score one candle (runs in the thread pool)"""
+        features = self.feature_engine.update(candle)
+        if features is None:
+            return None
+        return self.engine.get_live_signal(self._model_input(features), timestamp=candle.timestamp)
+
+    async def _symbol_worker(self, symbol: str, queue: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        while True:
+            candle = await queue.get()
+            if candle is None:
+                queue.task_done()
+                return
+
+            try:
+                dequeued_at = time.perf_counter()
+                signal = await loop.run_in_executor(self.executor, self._score, candle)
+                self.candles_processed += 1
+                self.symbol_candles[symbol] = self.symbol_candles.get(symbol, 0) + 1
+                self.symbol_busy_seconds[symbol] = (self.symbol_busy_seconds.get(symbol, 0.0)
+                                                    + time.perf_counter() - dequeued_at)
+
+                if signal is not None:
+                    latency_ms = (time.perf_counter() - candle.received_at) * 1000
+                    await self.sink.emit(SignalEvent(symbol, candle.timeframe, candle.timestamp,
+                                                     signal, latency_ms))
+                    done = time.perf_counter()
+                    self.latency.record(symbol, (done - candle.received_at) * 1000,
+                                        (done - dequeued_at) * 1000)
+                    self.signals_emitted += 1
+            except Exception as e:
+                logger.error(f"Failed to score {symbol} {candle.timestamp}: {str(e)}")
+            finally:
+                queue.task_done()
+
+    def _queue_for(self, symbol: str) -> asyncio.Queue:
+        if symbol not in self.queues:
+            history = self.feed.history(symbol)
+            if history is not None:
+                self.feature_engine.seed(symbol, self.feed.timeframe, history)
+
+            queue = asyncio.Queue(maxsize=self.queue_size)
+            self.queues[symbol] = queue
+            self.workers[symbol] = asyncio.create_task(self._symbol_worker(symbol, queue))
+        return self.queues[symbol]
+
+    async def run(self) -> Dict:
+        """
+        Consume the feed until it ends
+
+        Returns:
+            Run statistics including per-symbol latency
+        """
+        started = time.perf_counter()
+
+        async for candle in self.feed.stream():
+            await self._queue_for(candle.symbol).put(candle)
+
+        # Drain and stop workers
+        for queue in self.queues.values():
+            await queue.put(None)
+        await asyncio.gather(*self.workers.values())
+        self.executor.shutdown(wait=True)
+
+        elapsed = time.perf_counter() - started
+        return {
+            'candles_processed': self.candles_processed,
+            'signals_emitted': self.signals_emitted,
+            'elapsed_seconds': round(elapsed, 3),
+            'throughput': self.throughput(elapsed),
+            'latency': self.latency.summary()
+        }
+
+    def throughput(self, elapsed: float) -> Dict[str, Dict]:
+        """
+        Candles/sec per symbol
+
+        'candles_per_sec' is measured against wall time of the whole run (bounded
+        by the feed speed); 'max_candles_per_sec' against the time the symbol's
+        worker was busy, i.e. what the live path could sustain.
+        """
+        report = {}
+        for symbol, candles in self.symbol_candles.items():
+            busy = self.symbol_busy_seconds.get(symbol, 0.0)
+            report[symbol] = {
+                'candles': candles,
+                'candles_per_sec': round(candles / elapsed, 2) if elapsed > 0 else 0.0,
+                'max_candles_per_sec': round(candles / busy, 2) if busy > 0 else 0.0
+            }
+        return report
+
+
+def main():
+    """Run the live loop against a replay or Deriv feed"""
+    parser = argparse.ArgumentParser(description='Event-driven live trading loop')
+    parser.add_argument('--feed', choices=['replay', 'deriv', 'deriv-ticks'], default='replay')
+    parser.add_argument('--symbols', nargs='+', default=SYMBOLS)
+    parser.add_argument('--timeframe', default='1h')
+    parser.add_argument('--split', default='Split_2', help='Model split to load')
+    parser.add_argument('--scaler', default=None,
+                        help='Feature scaler saved by feature_pipeline.py (default: data/feature_scaler.pkl)')
+    parser.add_argument('--limit', type=int, default=None, help='Replay: max candles per symbol')
+    parser.add_argument('--speed', type=float, default=None,
+                        help='Replay: speed multiplier (1 = real time, default: as fast as possible)')
+    parser.add_argument('--output', default=None, help='JSON-lines file for signals')
+    parser.add_argument('--store-candles', action='store_true',
+                        help='deriv-ticks: save aggregated candles of all timeframes to data/')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    # Refuse to start without the training normalization
+    feature_pipeline = load_feature_pipeline()
+    scaler = feature_pipeline.load_scaler(args.scaler or BASE_DIR / feature_pipeline.SCALER_FILE)
+
+    models_dir = BASE_DIR / 'models'
+    engine = TradingDecisionEngine(
+        direction_model_path=str(models_dir / f'direction_model_{args.split}.pkl'),
+        volatility_model_path=str(models_dir / f'volatility_model_{args.split}.pkl'),
+        notrade_model_path=str(models_dir / f'notrade_model_{args.split}.pkl')
+    )
+
+    writer = None
+    if args.feed == 'replay':
+        feed = ParquetReplayFeed(args.symbols, args.timeframe, limit=args.limit, speed=args.speed)
+    elif args.feed == 'deriv':
+        feed = DerivCandleFeed(args.symbols, args.timeframe)
+    else:
+        writer = CandleStorageWriter() if args.store_candles else None
+        feed = TickCandleFeed(deriv_tick_stream(args.symbols), args.timeframe, on_candle=writer)
+
+    sink = JsonlSink(args.output) if args.output else LoggingSink()
+    runner = LiveTradingRunner(feed, engine, sink, scaler)
+
+    try:
+        stats = asyncio.run(runner.run())
+    finally:
+        if writer is not None:
+            writer.close()
+
+    logger.info("\n" + "="*80)
+    logger.info("LIVE RUN SUMMARY")
+    logger.info("="*80)
+    logger.info(f"Candles processed: {stats['candles_processed']:,}")
+    logger.info(f"Signals emitted:   {stats['signals_emitted']:,}")
+    logger.info(f"Elapsed:           {stats['elapsed_seconds']:.1f}s")
+    for symbol, rate in stats['throughput'].items():
+        logger.info(f"  {symbol:<8} {rate['candles']:,} candles, {rate['candles_per_sec']:.1f} candles/sec "
+                    f"(max {rate['max_candles_per_sec']:.1f})")
+    for symbol, lat in stats['latency'].items():
+        logger.info(f"  {symbol:<8} p50={lat['p50_ms']:.1f}ms p95={lat['p95_ms']:.1f}ms "
+                    f"p99={lat['p99_ms']:.1f}ms max={lat['max_ms']:.1f}ms "
+                    f"(processing p50={lat['processing_p50_ms']:.1f}ms)")
+
+
+if __name__ == '__main__':
+    main()
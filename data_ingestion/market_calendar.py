@@ -0,0 +1,136 @@
+"""
+Trading calendars for gap filling and resampling
+
+A calendar describes the weekly windows in which a market is closed, so the
+gap filler only fills real session gaps (not weekends or daily breaks) and the
+resampler aligns bars to the session open. Times are UTC; DST shifts of the
+underlying exchange hours are not modelled.
+
+Calendars:
+    continuous - open 24/7 (crypto)
+    fx         - closed Friday 22:00 to Sunday 22:00 UTC
+    futures    - CME Globex (GC=F, CL=F): open Sunday 23:00 to Friday 22:00 UTC
+                 with a daily 22:00-23:00 UTC maintenance break
+"""
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+MINUTES_PER_DAY = 1440
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+MONDAY, TUESDAY, WEDNESDAY, THURSDAY, FRIDAY, SATURDAY, SUNDAY = range(7)
+
+
+def minute_of_week(day: int, hour: int, minute: int = 0) -> int:
+    """Minutes since Monday 00:00 UTC"""
+    return day * MINUTES_PER_DAY + hour * 60 + minute
+
+
+class MarketCalendar:
+    """Weekly session calendar defined by closed windows"""
+
+    def __init__(self, name: str, closed_windows: Optional[List[Tuple[int, int]]] = None,
+                 session_open: int = 0):
+        """
+        Args:
+            name: Calendar name
+            closed_windows: (start, end) minute-of-week ranges in which the
+                market is closed; end is exclusive
+            session_open: Minute of the day (UTC) the trading day starts;
+                used to align resampled bars
+        """
+        self.name = name
+        self.closed_windows = closed_windows or []
+        self.session_open = session_open
+
+    def is_open(self, timestamps) -> np.ndarray:
+        """
+        Vectorized open check for candle start times
+
+        Args:
+            timestamps: Array-like of datetime64 values (naive UTC)
+
+        Returns:
+            Boolean array, True where the market is open
+        """
+        minutes = np.asarray(timestamps, dtype='datetime64[m]').astype(np.int64)
+        if not self.closed_windows:
+            return np.ones(len(minutes), dtype=bool)
+
+        # 1970-01-01 was a Thursday: shift so that minute 0 is Monday 00:00
+        week_minute = (minutes + 3 * MINUTES_PER_DAY) % MINUTES_PER_WEEK
+
+        closed = np.zeros(len(minutes), dtype=bool)
+        for start, end in self.closed_windows:
+            closed |= (week_minute >= start) & (week_minute < end)
+        return ~closed
+
+    def closed_between(self, start, end) -> bool:
+        """
+        Whether the market is closed for the whole range
+
+        Args:
+            start: Range start (naive UTC)
+            end: Range end (exclusive)
+
+        Returns:
+            True if no minute in [start, end) is open
+        """
+        if not self.closed_windows:
+            return False
+        minutes = np.arange(np.datetime64(start, 'm'), np.datetime64(end, 'm'))
+        return not self.is_open(minutes).any()
+
+    @property
+    def resample_offset(self) -> str:
+        """pandas resample offset aligning bars to the session open"""
+        return f'{self.session_open}min'
+
+    def __repr__(self) -> str:
+        return f"MarketCalendar({self.name!r})"
+
+
+CONTINUOUS = MarketCalendar('continuous')
+
+FX = MarketCalendar(
+    'fx',
+    closed_windows=[(minute_of_week(FRIDAY, 22), minute_of_week(SUNDAY, 22))],
+    session_open=22 * 60
+)
+
+FUTURES = MarketCalendar(
+    'futures',
+    closed_windows=[
+        # Daily maintenance break Monday-Thursday
+        *[(minute_of_week(day, 22), minute_of_week(day, 23))
+          for day in (MONDAY, TUESDAY, WEDNESDAY, THURSDAY)],
+        # Weekend
+        (minute_of_week(FRIDAY, 22), minute_of_week(SUNDAY, 23))
+    ],
+    session_open=23 * 60
+)
+
+CALENDARS: Dict[str, MarketCalendar] = {
+    'continuous': CONTINUOUS,
+    'crypto': CONTINUOUS,
+    'fx': FX,
+    'futures': FUTURES
+}
+
+
+def get_calendar(symbol: str, symbol_calendars: Optional[Dict[str, str]] = None) -> MarketCalendar:
+    """
+    Calendar for a symbol
+
+    Args:
+        symbol: Trading symbol
+        symbol_calendars: {symbol: calendar name}; unknown symbols are continuous
+
+    Returns:
+        MarketCalendar
+    """
+    name = (symbol_calendars or {}).get(symbol, 'continuous')
+    if name not in CALENDARS:
+        raise ValueError(f"Unknown calendar '{name}' for {symbol}")
+    return CALENDARS[name]
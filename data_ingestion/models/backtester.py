@@ -0,0 +1,485 @@
+"""
+Vectorized Backtester
+Turns TradingDecisionEngine signals plus raw OHLC into trades, equity curves
+and trade statistics using array operations
+
+Each backtest covers one continuous series; frames with several symbols or
+timeframes go through run_groups (one backtest per series). Signals without
+OHLC columns are joined to the stored candles by symbol, timeframe and
+timestamp (join_candles).
+"""
+import argparse
+import json
+import sys
+import pandas as pd
+import numpy as np
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+from dataclasses import dataclass
+import logging
+
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+logger = logging.getLogger(__name__)
+
+EXIT_TARGET = 'TARGET'
+EXIT_STOP = 'STOP'
+EXIT_TIMEOUT = 'TIMEOUT'
+
+OHLC_COLUMNS = ['open', 'high', 'low', 'close']
+SERIES_KEYS = ['symbol', 'timeframe']
+
+
+@dataclass
+class BacktestResult:
+    """Backtest output"""
+    trades: pd.DataFrame  # One row per executed trade
+    equity_curve: pd.Series  # Equity per bar (realized PnL)
+    stats: Dict  # Summary statistics
+
+    def __str__(self):
+        lines = [f"\n{'='*80}", "BACKTEST RESULTS", f"{'='*80}"]
+        for key, value in self.stats.items():
+            if isinstance(value, float):
+                lines.append(f"{key:<22} {value:.4f}")
+            else:
+                lines.append(f"{key:<22} {value}")
+        lines.append('='*80)
+        return '\n'.join(lines)
+
+
+class Backtester:
+    """
+    Vectorized backtester for BUY/SELL/NO_TRADE signals
+
+    Trades are entered on the bar after the signal (or the signal bar's close)
+    and exit on the first bar that touches the profit target or stop loss,
+    or at the close of the last bar in the holding window. The defaults match
+    SmartLabeler (1.5% target, 1.0% stop, 10 candle lookforward) so backtest
+    outcomes line up with the labels the models were trained on.
+    """
+
+    def __init__(self,
+                 profit_pct: float = 0.015,
+                 loss_pct: float = 0.010,
+                 max_holding_candles: int = 10,
+                 fee_rate: float = 0.0005,
+                 position_fraction: float = 1.0,
+                 risk_per_trade: Optional[float] = None,
+                 max_leverage: float = 1.0,
+                 initial_capital: float = 10000.0,
+                 entry_on: str = 'next_open',
+                 allow_overlap: bool = False,
+                 chunk_size: int = 1_000_000):
+        """
+        Initialize backtester
+
+        Args:
+            profit_pct: Profit target (as decimal, e.g., 0.015 = 1.5%)
+            loss_pct: Stop loss (as decimal)
+            max_holding_candles: Max candles a trade is held (time stop)
+            fee_rate: Fee per side (as decimal of notional)
+            position_fraction: Fraction of equity allocated per trade
+            risk_per_trade: If set, size so that hitting the stop loses this
+                fraction of equity (overrides position_fraction)
+            max_leverage: Cap on allocation when sizing by risk
+            initial_capital: Starting equity
+            entry_on: 'next_open' (no look-ahead) or 'close' (signal bar close;
+                the holding window starts at the next bar)
+            allow_overlap: Allow a new trade while another is still open
+            chunk_size: Max trades simulated per vectorized block
+        """
+        if entry_on not in ('next_open', 'close'):
+            raise ValueError(f"Unknown entry_on: {entry_on}")
+
+        self.profit_pct = profit_pct
+        self.loss_pct = loss_pct
+        self.max_holding = max_holding_candles
+        self.fee_rate = fee_rate
+        self.position_fraction = position_fraction
+        self.risk_per_trade = risk_per_trade
+        self.max_leverage = max_leverage
+        self.initial_capital = initial_capital
+        self.entry_on = entry_on
+        self.allow_overlap = allow_overlap
+        self.chunk_size = chunk_size
+
+    @classmethod
+    def from_labeler(cls, labeler, **kwargs) -> 'Backtester':
+        """
+        Create a backtester using a SmartLabeler's profit/loss thresholds
+
+        Args:
+            labeler: SmartLabeler instance
+            **kwargs: Other Backtester arguments
+
+        Returns:
+            Backtester instance
+        """
+        return cls(
+            profit_pct=labeler.profit_pips,
+            loss_pct=labeler.loss_pips,
+            max_holding_candles=labeler.lookforward,
+            **kwargs
+        )
+
+    def run(self, ohlc: pd.DataFrame,
+            signals: Union[pd.Series, np.ndarray, str] = 'signal') -> BacktestResult:
+        """
+        Run the backtest
+
+        Args:
+            ohlc: DataFrame with open, high, low, close (and optionally timestamp)
+                  of a single symbol/timeframe, in time order
+            signals: Signal values aligned with ohlc rows ('BUY', 'SELL',
+                     'NO_TRADE' or 1/-1/0), or the name of a column in ohlc
+
+        Returns:
+            BacktestResult
+
+        Raises:
+            ValueError: ohlc mixes symbols or timeframes (use run_groups)
+        """
+        mixed = [key for key in SERIES_KEYS if key in ohlc.columns and ohlc[key].nunique() > 1]
+        if mixed:
+            raise ValueError(f"OHLC mixes several {' and '.join(mixed)} values; trades would "
+                             f"run across series. Use run_groups() for one backtest per series")
+
+        if isinstance(signals, str):
+            signals = ohlc[signals]
+
+        direction = self._signal_direction(np.asarray(signals))
+        if len(direction) != len(ohlc):
+            raise ValueError(f"Signals ({len(direction)}) and OHLC ({len(ohlc)}) lengths differ")
+
+        open_ = ohlc['open'].to_numpy(dtype=np.float64)
+        high = ohlc['high'].to_numpy(dtype=np.float64)
+        low = ohlc['low'].to_numpy(dtype=np.float64)
+        close = ohlc['close'].to_numpy(dtype=np.float64)
+        n = len(close)
+
+        # Candidate entries
+        signal_idx = np.flatnonzero(direction != 0)
+        if self.entry_on == 'next_open':
+            entry_idx = signal_idx + 1
+            keep = entry_idx < n
+            signal_idx, entry_idx = signal_idx[keep], entry_idx[keep]
+            entry_price = open_[entry_idx]
+        else:
+            # The signal bar's range happened before its close: need a later bar
+            keep = signal_idx + 1 < n
+            signal_idx = signal_idx[keep]
+            entry_idx = signal_idx
+            entry_price = close[entry_idx]
+        trade_dir = direction[signal_idx]
+
+        # Simulate exits in blocks to bound memory (trades x holding window)
+        exit_idx = np.empty(len(entry_idx), dtype=np.int64)
+        exit_price = np.empty(len(entry_idx), dtype=np.float64)
+        exit_code = np.empty(len(entry_idx), dtype=np.int8)
+
+        for start in range(0, len(entry_idx), self.chunk_size):
+            block = slice(start, start + self.chunk_size)
+            exit_idx[block], exit_price[block], exit_code[block] = self._simulate_exits(
+                open_, high, low, close,
+                entry_idx[block], entry_price[block], trade_dir[block]
+            )
+
+        # One position at a time unless overlap is allowed
+        if not self.allow_overlap:
+            selected = self._select_non_overlapping(entry_idx, exit_idx)
+            signal_idx, entry_idx, entry_price, trade_dir = (
+                signal_idx[selected], entry_idx[selected], entry_price[selected], trade_dir[selected]
+            )
+            exit_idx, exit_price, exit_code = exit_idx[selected], exit_price[selected], exit_code[selected]
+
+        # Returns and position sizing
+        gross_return = trade_dir * (exit_price - entry_price) / entry_price
+        net_return = gross_return - 2 * self.fee_rate
+        allocation = self._allocation()
+        pnl_fraction = allocation * net_return
+
+        # Equity after each trade (compounded, ordered by exit)
+        order = np.argsort(exit_idx, kind='stable')
+        equity_after = self.initial_capital * np.cumprod(1 + pnl_fraction[order])
+
+        # Per-bar equity curve: step function at exit bars
+        exits_done = np.searchsorted(exit_idx[order], np.arange(n), side='right')
+        equity_steps = np.concatenate([[self.initial_capital], equity_after])
+        equity = equity_steps[exits_done]
+
+        pnl = np.empty(len(order))
+        pnl[order] = np.diff(equity_steps)
+
+        index = ohlc['timestamp'] if 'timestamp' in ohlc.columns else ohlc.index
+        equity_curve = pd.Series(equity, index=pd.Index(index), name='equity')
+
+        trades = pd.DataFrame({
+            'signal_idx': signal_idx,
+            'entry_idx': entry_idx,
+            'exit_idx': exit_idx,
+            'direction': np.where(trade_dir == 1, 'LONG', 'SHORT'),
+            'entry_price': entry_price,
+            'exit_price': exit_price,
+            'exit_reason': np.array([EXIT_TARGET, EXIT_STOP, EXIT_TIMEOUT])[exit_code],
+            'holding_candles': exit_idx - entry_idx + 1 - self._window_start(),
+            'gross_return': gross_return,
+            'net_return': net_return,
+            'pnl': pnl
+        })
+
+        if 'timestamp' in ohlc.columns:
+            timestamps = ohlc['timestamp'].to_numpy()
+            trades.insert(0, 'entry_time', timestamps[entry_idx])
+            trades.insert(1, 'exit_time', timestamps[exit_idx])
+
+        stats = self._calculate_stats(trades, equity_curve, ohlc)
+
+        return BacktestResult(trades=trades, equity_curve=equity_curve, stats=stats)
+
+    def run_groups(self, ohlc: pd.DataFrame,
+                   signal_col: str = 'signal') -> Dict[Tuple, BacktestResult]:
+        """
+        Run one backtest per symbol/timeframe series
+
+        Args:
+            ohlc: DataFrame with OHLC, signal and symbol/timeframe columns
+            signal_col: Signal column name
+
+        Returns:
+            {(symbol, timeframe): BacktestResult}
+        """
+        keys = [key for key in SERIES_KEYS if key in ohlc.columns]
+        if not keys:
+            return {(): self.run(ohlc, signal_col)}
+
+        results = {}
+        for key, series in ohlc.groupby(keys, sort=True):
+            if 'timestamp' in series.columns:
+                series = series.sort_values('timestamp', kind='stable')
+            key = key if isinstance(key, tuple) else (key,)
+            results[key] = self.run(series.reset_index(drop=True), signal_col)
+        return results
+
+    def _signal_direction(self, signals: np.ndarray) -> np.ndarray:
+        """Map signal values to +1 (long), -1 (short), 0 (flat)"""
+        if signals.dtype.kind in 'iuf':
+            return np.sign(np.nan_to_num(signals)).astype(np.int8)
+
+        direction = np.zeros(len(signals), dtype=np.int8)
+        direction[signals == 'BUY'] = 1
+        direction[signals == 'SELL'] = -1
+        return direction
+
+    def _simulate_exits(self, open_: np.ndarray, high: np.ndarray, low: np.ndarray,
+                        close: np.ndarray, entry_idx: np.ndarray, entry_price: np.ndarray,
+                        direction: np.ndarray):
+        """
+        Find the exit bar, price and reason for a block of trades
+
+        Builds a (trades x holding window) matrix of forward highs/lows and
+        locates the first target/stop touch per row with argmax. When both are
+        touched in the same bar the stop is assumed to fill first. The window
+        starts at the entry bar for next-open entries and at the bar after it
+        for close entries (the signal bar's high/low precede its close).
+
+        Returns:
+            Tuple of (exit_idx, exit_price, exit_code)
+        """
+        n = len(close)
+        start = self._window_start()
+        offsets = np.arange(start, start + self.max_holding)
+        idx = entry_idx[:, None] + offsets[None, :]
+        valid = idx < n
+        idx = np.minimum(idx, n - 1)
+
+        is_long = (direction == 1)[:, None]
+        target = np.where(is_long[:, 0],
+                          entry_price * (1 + self.profit_pct),
+                          entry_price * (1 - self.profit_pct))[:, None]
+        stop = np.where(is_long[:, 0],
+                        entry_price * (1 - self.loss_pct),
+                        entry_price * (1 + self.loss_pct))[:, None]
+
+        fwd_high = high[idx]
+        fwd_low = low[idx]
+        hit_target = np.where(is_long, fwd_high >= target, fwd_low <= target) & valid
+        hit_stop = np.where(is_long, fwd_low <= stop, fwd_high >= stop) & valid
+
+        no_hit = self.max_holding
+        first_target = np.where(hit_target.any(axis=1), hit_target.argmax(axis=1), no_hit)
+        first_stop = np.where(hit_stop.any(axis=1), hit_stop.argmax(axis=1), no_hit)
+        last_valid = valid.sum(axis=1) - 1  # Window position of the last bar in the data
+
+        stopped = (first_stop <= first_target) & (first_stop < no_hit)
+        targeted = (first_target < first_stop)
+
+        exit_position = np.where(stopped, first_stop, np.where(targeted, first_target, last_valid))
+        exit_offset = offsets[exit_position]
+        exit_idx = entry_idx + exit_offset
+        exit_code = np.where(stopped, 1, np.where(targeted, 0, 2)).astype(np.int8)
+
+        # Fill at the level, or at the open if the bar gapped through it
+        exit_open = open_[exit_idx]
+        long_1d = is_long[:, 0]
+        stop_fill = np.where(long_1d, np.minimum(stop[:, 0], exit_open), np.maximum(stop[:, 0], exit_open))
+        target_fill = np.where(long_1d, np.maximum(target[:, 0], exit_open), np.minimum(target[:, 0], exit_open))
+
+        # A next-open entry bar's open is the entry price itself
+        first_bar = exit_offset == 0
+        stop_fill = np.where(first_bar, stop[:, 0], stop_fill)
+        target_fill = np.where(first_bar, target[:, 0], target_fill)
+
+        exit_price = np.where(stopped, stop_fill, np.where(targeted, target_fill, close[exit_idx]))
+
+        return exit_idx, exit_price, exit_code
+
+    def _window_start(self) -> int:
+        """Offset of the first bar that can hit the target or stop"""
+        return 1 if self.entry_on == 'close' else 0
+
+    def _select_non_overlapping(self, entry_idx: np.ndarray, exit_idx: np.ndarray) -> np.ndarray:
+        """Greedily keep trades that start after the previous trade exited"""
+        selected = np.zeros(len(entry_idx), dtype=bool)
+        next_free = -1
+
+        # Loop is over candidate trades only, not bars
+        for k, (entry, exit_) in enumerate(zip(entry_idx.tolist(), exit_idx.tolist())):
+            if entry > next_free:
+                selected[k] = True
+                next_free = exit_
+
+        return selected
+
+    def _allocation(self) -> float:
+        """Fraction of equity allocated per trade"""
+        if self.risk_per_trade is not None:
+            return min(self.risk_per_trade / self.loss_pct, self.max_leverage)
+        return self.position_fraction
+
+    def _calculate_stats(self, trades: pd.DataFrame, equity_curve: pd.Series,
+                         ohlc: pd.DataFrame) -> Dict:
+        """Calculate trade statistics"""
+        equity = equity_curve.to_numpy()
+        peak = np.maximum.accumulate(equity)
+        drawdown = equity / peak - 1
+
+        returns = trades['net_return'].to_numpy()
+        wins = returns > 0
+        gross_profit = returns[wins].sum()
+        gross_loss = -returns[~wins].sum()
+
+        stats = {
+            'total_trades': int(len(trades)),
+            'long_trades': int((trades['direction'] == 'LONG').sum()),
+            'short_trades': int((trades['direction'] == 'SHORT').sum()),
+            'win_rate': float(wins.mean()) if len(returns) else 0.0,
+            'avg_return': float(returns.mean()) if len(returns) else 0.0,
+            'profit_factor': float(gross_profit / gross_loss) if gross_loss > 0 else float('inf'),
+            'total_return': float(equity[-1] / self.initial_capital - 1) if len(equity) else 0.0,
+            'final_equity': float(equity[-1]) if len(equity) else self.initial_capital,
+            'max_drawdown': float(drawdown.min()) if len(drawdown) else 0.0,
+            'avg_holding_candles': float(trades['holding_candles'].mean()) if len(trades) else 0.0,
+            'exits_target': int((trades['exit_reason'] == EXIT_TARGET).sum()),
+            'exits_stop': int((trades['exit_reason'] == EXIT_STOP).sum()),
+            'exits_timeout': int((trades['exit_reason'] == EXIT_TIMEOUT).sum()),
+            'sharpe_ratio': None
+        }
+
+        # Annualized Sharpe on per-bar equity returns
+        if 'timestamp' in ohlc.columns and len(equity) > 2:
+            bar_seconds = pd.Series(ohlc['timestamp']).diff().dt.total_seconds().median()
+            bar_returns = np.diff(equity) / equity[:-1]
+            std = bar_returns.std()
+            if bar_seconds and std > 0:
+                bars_per_year = 365 * 24 * 3600 / bar_seconds
+                stats['sharpe_ratio'] = float(bar_returns.mean() / std * np.sqrt(bars_per_year))
+
+        return stats
+
+
+def join_candles(signals: pd.DataFrame, data_dir: str, signal_col: str = 'signal',
+                 timeframe: Optional[str] = None) -> pd.DataFrame:
+    """
+    Attach stored candles to signals by symbol, timeframe and timestamp
+
+    Each series is backtested on every stored candle between its first and
+    last signal (signals are often a sample, not consecutive bars); candles
+    without a signal are NO_TRADE.
+
+    Args:
+        signals: DataFrame with timestamp, symbol, signal (and timeframe)
+        data_dir: Directory of {symbol}_{timeframe} candle files
+        signal_col: Signal column name
+        timeframe: Timeframe for signals without a timeframe column
+
+    Returns:
+        Candles with symbol, timeframe and the signal column
+    """
+    sys.path.append(str(Path(__file__).resolve().parent.parent))
+    from storage import DataStorage
+
+    missing = [c for c in ['timestamp', 'symbol'] if c not in signals.columns]
+    if missing:
+        raise ValueError(f"Signals have no OHLC and no {missing} to join candles by; "
+                         f"regenerate them with decision_engine.py")
+    if 'timeframe' not in signals.columns:
+        if timeframe is None:
+            raise ValueError("Signals have no timeframe column; pass --timeframe")
+        signals = signals.assign(timeframe=timeframe)
+
+    storage = DataStorage(data_dir)
+    series = []
+    for (symbol, tf), group in signals.groupby(SERIES_KEYS, sort=True):
+        candles = storage.load_data(symbol, tf, columns=['timestamp'] + OHLC_COLUMNS)
+        start, end = group['timestamp'].min(), group['timestamp'].max()
+        candles = candles[(candles['timestamp'] >= start) & (candles['timestamp'] <= end)]
+        candles = candles.merge(group[['timestamp', signal_col]].drop_duplicates('timestamp', keep='last'),
+                                on='timestamp', how='left')
+        unmatched = len(group) - int(candles[signal_col].notna().sum())
+        if unmatched:
+            logger.warning(f"  ⚠ {symbol} {tf}: {unmatched} signals have no stored candle")
+        candles[signal_col] = candles[signal_col].fillna('NO_TRADE')
+        candles.insert(1, 'symbol', symbol)
+        candles.insert(2, 'timeframe', tf)
+        series.append(candles)
+    return pd.concat(series, ignore_index=True)
+
+
+def main():
+    """Backtest signals per symbol/timeframe (OHLC from the file or the stored candles)"""
+    parser = argparse.ArgumentParser(description='Vectorized backtest of decision engine signals')
+    parser.add_argument('input', help='Parquet file with a signal column, and either OHLC columns '
+                                      'or timestamp/symbol(/timeframe) to join stored candles')
+    parser.add_argument('--signal-col', default='signal', help='Signal column name')
+    parser.add_argument('--data-dir', default=str(Path(__file__).resolve().parent.parent / 'data'),
+                        help='Stored candles for signals without OHLC')
+    parser.add_argument('--timeframe', default=None, help='Timeframe of signals without a timeframe column')
+    parser.add_argument('--fee', type=float, default=0.0005, help='Fee per side')
+    parser.add_argument('--risk', type=float, default=None, help='Risk per trade (fraction of equity)')
+    parser.add_argument('--output', default=None, help='Output JSON for stats')
+    args = parser.parse_args()
+
+    df = pd.read_parquet(args.input)
+    logger.info(f"✓ Loaded {len(df):,} rows from {args.input}")
+
+    if not set(OHLC_COLUMNS).issubset(df.columns):
+        df = join_candles(df, args.data_dir, args.signal_col, args.timeframe)
+        logger.info(f"✓ Joined signals to {len(df):,} stored candles")
+
+    backtester = Backtester(fee_rate=args.fee, risk_per_trade=args.risk)
+    results = backtester.run_groups(df, args.signal_col)
+
+    stats = {}
+    for key, result in results.items():
+        name = ' '.join(key) or 'all'
+        logger.info(f"\n{name}{result}")
+        stats[name] = result.stats
+
+    output_file = Path(args.output) if args.output else Path(args.input).with_suffix('.backtest.json')
+    with open(output_file, 'w') as f:
+        json.dump(stats, f, indent=2, default=str)
+    logger.info(f"\n✓ Stats saved to: {output_file}")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,7 +2,6 @@
 Trading Decision Engine
 Combines all trained models to generate BUY/SELL/NO_TRADE signals
 """
-import joblib
 import pandas as pd
 import numpy as np
 from pathlib import Path
@@ -44,6 +43,87 @@ class TradingSignal:
         )
 
 
+SIGNAL_RULES = ('notrade', 'direction', 'volatility')  # Checked in this order
+
+
+def rule_mask(rule: str, probabilities, threshold: float) -> np.ndarray:
+    """
+    Rows passing one signal rule
+    
+    Args:
+        rule: 'notrade' (no-trade probability at most the threshold),
+              'direction' or 'volatility' (probability at least the threshold;
+              'direction' with the high threshold marks quality A trades)
+        probabilities: Probabilities of the rule's model (scalar or array)
+        threshold: Rule threshold
+        
+    Returns:
+        Boolean array
+    """
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    if rule == 'notrade':
+        return probabilities <= threshold
+    if rule in ('direction', 'volatility'):
+        return probabilities >= threshold
+    raise ValueError(f"Unknown signal rule: {rule}")
+
+
+def is_long(direction_prob) -> np.ndarray:
+    """Direction > 0.5 means profit more likely (LONG), otherwise SHORT"""
+    return np.asarray(direction_prob, dtype=np.float64) > 0.5
+
+
+def classify_signals(direction_prob: np.ndarray,
+                     volatility_prob: np.ndarray,
+                     notrade_prob: np.ndarray,
+                     notrade_threshold: float = 0.6,
+                     direction_min_threshold: float = 0.55,
+                     direction_high_threshold: float = 0.65,
+                     volatility_min_threshold: float = 0.5) -> Dict[str, np.ndarray]:
+    """
+    Signal rules of the decision engine over probability arrays
+    
+    The one definition of the rules (no-trade filter, direction confidence,
+    volatility check), used by TradingDecisionEngine for single and batch
+    signals; threshold_sweep.py evaluates the same rule_mask()s.
+    
+    Args:
+        direction_prob: Direction model probabilities
+        volatility_prob: Volatility expansion probabilities
+        notrade_prob: No-trade filter probabilities
+        notrade_threshold: Max acceptable no-trade probability
+        direction_min_threshold: Min direction probability to trade
+        direction_high_threshold: Threshold for quality A trades
+        volatility_min_threshold: Min volatility probability
+        
+    Returns:
+        Dictionary with 'signal', 'quality', 'confidence' and 'blocked_by'
+        (first failed rule of SIGNAL_RULES, '' for trades) arrays
+    """
+    direction_prob = np.asarray(direction_prob, dtype=np.float64)
+    passed = {
+        'notrade': rule_mask('notrade', notrade_prob, notrade_threshold),
+        'direction': rule_mask('direction', direction_prob, direction_min_threshold),
+        'volatility': rule_mask('volatility', volatility_prob, volatility_min_threshold)
+    }
+    tradeable = passed['notrade'] & passed['direction'] & passed['volatility']
+    is_buy = is_long(direction_prob)
+    
+    blocked_by = np.full(direction_prob.shape, '', dtype=object)
+    for rule in reversed(SIGNAL_RULES):
+        blocked_by[~passed[rule]] = rule
+    
+    signal = np.where(tradeable, np.where(is_buy, 'BUY', 'SELL'), 'NO_TRADE').astype(object)
+    quality = np.where(
+        tradeable,
+        np.where(rule_mask('direction', direction_prob, direction_high_threshold), 'A', 'B'),
+        'NONE'
+    ).astype(object)
+    confidence = np.where(tradeable, np.where(is_buy, direction_prob, 1 - direction_prob), 0.0)
+    
+    return {'signal': signal, 'quality': quality, 'confidence': confidence, 'blocked_by': blocked_by}
+
+
 class TradingDecisionEngine:
     """
     Decision engine that combines all models to generate trading signals
@@ -74,6 +154,8 @@ class TradingDecisionEngine:
         self.direction_high_threshold = direction_high_threshold
         self.volatility_min_threshold = volatility_min_threshold
         
+        import joblib
+        
         # Load models
         logger.info("="*80)
         logger.info("LOADING TRADING MODELS")
@@ -135,92 +217,66 @@ class TradingDecisionEngine:
         if timestamp is None:
             timestamp = datetime.now()
         
-        # STEP 1: No-Trade Filter (FIRST)
-        if notrade_prob > self.notrade_threshold:
-            return TradingSignal(
-                signal='NO_TRADE',
-                confidence=0.0,
-                quality='NONE',
-                direction_prob=direction_prob,
-                volatility_prob=volatility_prob,
-                notrade_prob=notrade_prob,
-                reason=f"No-trade filter triggered ({notrade_prob:.2%} > {self.notrade_threshold:.2%}). "
-                       f"Poor trading conditions detected (low volatility, high spread, or unfavorable session).",
-                timestamp=timestamp
-            )
-        
-        # STEP 2: Direction Confidence
-        if direction_prob < self.direction_min_threshold:
-            return TradingSignal(
-                signal='NO_TRADE',
-                confidence=0.0,
-                quality='NONE',
-                direction_prob=direction_prob,
-                volatility_prob=volatility_prob,
-                notrade_prob=notrade_prob,
-                reason=f"Direction confidence too low ({direction_prob:.2%} < {self.direction_min_threshold:.2%}). "
-                       f"No clear directional bias detected.",
-                timestamp=timestamp
-            )
-        
-        # Determine trade quality
-        if direction_prob >= self.direction_high_threshold:
-            trade_quality = 'A'
-        else:
-            trade_quality = 'B'
-        
-        # STEP 3: Volatility Check
-        if volatility_prob < self.volatility_min_threshold:
-            return TradingSignal(
-                signal='NO_TRADE',
-                confidence=0.0,
-                quality='NONE',
-                direction_prob=direction_prob,
-                volatility_prob=volatility_prob,
-                notrade_prob=notrade_prob,
-                reason=f"Volatility too low ({volatility_prob:.2%} < {self.volatility_min_threshold:.2%}). "
-                       f"Insufficient price movement expected.",
-                timestamp=timestamp
-            )
-        
-        # STEP 4: Final Signal
-        # Direction > 0.5 means profit more likely (LONG)
-        # Direction < 0.5 means loss more likely (SHORT)
-        if direction_prob > 0.5:
-            signal = 'BUY'
-            confidence = direction_prob
-            reason = (
-                f"LONG signal: Direction model predicts profit with {direction_prob:.2%} confidence. "
-                f"Volatility expansion expected ({volatility_prob:.2%}). "
-                f"Quality {trade_quality} trade."
-            )
-        else:
-            signal = 'SELL'
-            confidence = 1 - direction_prob  # Invert for short confidence
-            reason = (
-                f"SHORT signal: Direction model predicts loss with {confidence:.2%} confidence. "
-                f"Volatility expansion expected ({volatility_prob:.2%}). "
-                f"Quality {trade_quality} trade."
-            )
+        result = self.classify(np.array([direction_prob]), np.array([volatility_prob]),
+                               np.array([notrade_prob]))
+        signal, quality, confidence, blocked_by = (result[key][0] for key in
+                                                   ('signal', 'quality', 'confidence', 'blocked_by'))
         
         return TradingSignal(
             signal=signal,
-            confidence=confidence,
-            quality=trade_quality,
+            confidence=float(confidence),
+            quality=quality,
             direction_prob=direction_prob,
             volatility_prob=volatility_prob,
             notrade_prob=notrade_prob,
-            reason=reason,
+            reason=self._reason(signal, quality, blocked_by, direction_prob, volatility_prob, notrade_prob),
             timestamp=timestamp
         )
     
+    def classify(self, direction_prob: np.ndarray, volatility_prob: np.ndarray,
+                 notrade_prob: np.ndarray) -> Dict[str, np.ndarray]:
+        """classify_signals with this engine's thresholds"""
+        return classify_signals(direction_prob, volatility_prob, notrade_prob,
+                                notrade_threshold=self.notrade_threshold,
+                                direction_min_threshold=self.direction_min_threshold,
+                                direction_high_threshold=self.direction_high_threshold,
+                                volatility_min_threshold=self.volatility_min_threshold)
+    
+    def _reason(self, signal: str, quality: str, blocked_by: str, direction_prob: float,
+                volatility_prob: float, notrade_prob: float) -> str:
+        """Explanation of a signal"""
+        # STEP 1: No-Trade Filter (FIRST)
+        if blocked_by == 'notrade':
+            return (f"No-trade filter triggered ({notrade_prob:.2%} > {self.notrade_threshold:.2%}). "
+                    f"Poor trading conditions detected (low volatility, high spread, or unfavorable session).")
+        
+        # STEP 2: Direction Confidence
+        if blocked_by == 'direction':
+            return (f"Direction confidence too low ({direction_prob:.2%} < {self.direction_min_threshold:.2%}). "
+                    f"No clear directional bias detected.")
+        
+        # STEP 3: Volatility Check
+        if blocked_by == 'volatility':
+            return (f"Volatility too low ({volatility_prob:.2%} < {self.volatility_min_threshold:.2%}). "
+                    f"Insufficient price movement expected.")
+        
+        # STEP 4: Final Signal
+        if signal == 'BUY':
+            return (f"LONG signal: Direction model predicts profit with {direction_prob:.2%} confidence. "
+                    f"Volatility expansion expected ({volatility_prob:.2%}). "
+                    f"Quality {quality} trade.")
+        return (f"SHORT signal: Direction model predicts loss with {1 - direction_prob:.2%} confidence. "
+                f"Volatility expansion expected ({volatility_prob:.2%}). "
+                f"Quality {quality} trade.")
+    
     def process_features(self, features: pd.DataFrame, timestamps: Optional[pd.Series] = None) -> pd.DataFrame:
         """
         Process features and generate signals for all rows
         
         Args:
             features: DataFrame with feature columns (no timestamp)
-            timestamps: Optional Series with timestamps
+            timestamps: Optional Series with timestamps (accepted for callers;
+                signals do not depend on time)
             
         Returns:
             DataFrame with added signal columns
@@ -239,23 +295,17 @@ class TradingDecisionEngine:
         df['pred_volatility'] = predictions['volatility']
         df['pred_notrade'] = predictions['notrade']
         
-        # Generate signals for each row
-        signals = []
-        for idx, row in df.iterrows():
-            timestamp = timestamps.iloc[idx] if timestamps is not None else datetime.now()
-            signal = self.generate_signal(
-                direction_prob=row['pred_direction'],
-                volatility_prob=row['pred_volatility'],
-                notrade_prob=row['pred_notrade'],
-                timestamp=timestamp
-            )
-            signals.append(signal)
+        # Generate signals for all rows at once (same rules as generate_signal)
+        result = self.classify(predictions['direction'], predictions['volatility'], predictions['notrade'])
         
         # Add signal columns
-        df['signal'] = [s.signal for s in signals]
-        df['signal_quality'] = [s.quality for s in signals]
-        df['signal_confidence'] = [s.confidence for s in signals]
-        df['signal_reason'] = [s.reason for s in signals]
+        df['signal'] = result['signal']
+        df['signal_quality'] = result['quality']
+        df['signal_confidence'] = result['confidence']
+        df['signal_reason'] = [
+            self._reason(*row) for row in zip(result['signal'], result['quality'], result['blocked_by'],
+                                              df['pred_direction'], df['pred_volatility'], df['pred_notrade'])
+        ]
         
         # Summary
         logger.info("\n" + "="*80)
@@ -275,12 +325,20 @@ class TradingDecisionEngine:
         
         return df
     
-    def get_live_signal(self, features: pd.Series) -> TradingSignal:
+    @property
+    def feature_names(self) -> Optional[list]:
+        """Feature columns the models were trained on (if recorded by the model)"""
+        names = getattr(self.direction_model, 'feature_names_in_', None)
+        return list(names) if names is not None else None
+    
+    def get_live_signal(self, features: pd.Series,
+                        timestamp: Optional[datetime] = None) -> TradingSignal:
         """
         Get signal for a single live data point
         
         Args:
             features: Series with feature values
+            timestamp: Candle timestamp (default: now)
             
         Returns:
             TradingSignal object
@@ -295,7 +353,8 @@ class TradingDecisionEngine:
         signal = self.generate_signal(
             direction_prob=predictions['direction'][0],
             volatility_prob=predictions['volatility'][0],
-            notrade_prob=predictions['notrade'][0]
+            notrade_prob=predictions['notrade'][0],
+            timestamp=timestamp
         )
         
         return signal
@@ -338,8 +397,9 @@ def demo_decision_engine():
     
     logger.info(f"✓ Loaded {len(df_sample):,} samples for testing")
     
-    # Process features
-    df_signals = engine.process_features(df_sample[feature_cols])
+    # Process features (keep the keys so signals can be joined to candles)
+    meta_cols = [col for col in ['timestamp', 'symbol', 'timeframe'] if col in df_sample.columns]
+    df_signals = df_sample[meta_cols].join(engine.process_features(df_sample[feature_cols]))
     
     # Show example signals
     logger.info("\n" + "="*80)
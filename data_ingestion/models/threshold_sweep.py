@@ -0,0 +1,290 @@
+"""
+Parallel threshold sweep for the Trading Decision Engine
+Computes model probabilities once, caches them, then evaluates a grid of
+threshold combinations against outcomes with vectorized masks
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import pandas as pd
+import numpy as np
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+import logging
+
+from decision_engine import TradingDecisionEngine, is_long, rule_mask
+
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+logger = logging.getLogger(__name__)
+
+THRESHOLD_NAMES = [
+    'notrade_threshold',
+    'direction_min_threshold',
+    'direction_high_threshold',
+    'volatility_min_threshold'
+]
+
+DEFAULT_GRID = {
+    'notrade_threshold': np.round(np.arange(0.30, 0.901, 0.05), 2).tolist(),
+    'direction_min_threshold': np.round(np.arange(0.40, 0.751, 0.01), 2).tolist(),
+    'direction_high_threshold': np.round(np.arange(0.55, 0.851, 0.05), 2).tolist(),
+    'volatility_min_threshold': np.round(np.arange(0.30, 0.701, 0.05), 2).tolist()
+}
+
+# Worker state (set once per process by _init_worker)
+_WORKER = {}
+
+
+def load_or_compute_probabilities(engine: TradingDecisionEngine,
+                                  features: pd.DataFrame,
+                                  cache_file: Path,
+                                  cache_key: str) -> Dict[str, np.ndarray]:
+    """
+    Load model probabilities from cache, or run inference once and cache them
+
+    Args:
+        engine: Decision engine with loaded models
+        features: Feature DataFrame
+        cache_file: Path to .npz cache file
+        cache_key: Key identifying models + dataset; cache is ignored if it differs
+
+    Returns:
+        Dictionary with 'direction', 'volatility', 'notrade' probability arrays
+    """
+    if cache_file.exists():
+        cached = np.load(cache_file, allow_pickle=False)
+        if str(cached['cache_key']) == cache_key and len(cached['direction']) == len(features):
+            logger.info(f"✓ Loaded cached probabilities: {cache_file.name}")
+            return {k: cached[k] for k in ('direction', 'volatility', 'notrade')}
+
+    logger.info(f"Running inference on {len(features):,} rows (cached afterwards)...")
+    predictions = engine.predict_probabilities(features)
+
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(cache_file, cache_key=cache_key, **predictions)
+    logger.info(f"✓ Probabilities cached: {cache_file}")
+
+    return predictions
+
+
+def make_cache_key(*paths: Path) -> str:
+    """Build a cache key from file paths, sizes and modification times"""
+    digest = hashlib.sha1()
+    for path in paths:
+        stat = Path(path).stat()
+        digest.update(f"{Path(path).resolve()}|{stat.st_size}|{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+def build_grid(grid: Dict[str, List[float]]) -> np.ndarray:
+    """
+    Expand a parameter grid into an array of combinations
+
+    Combinations where direction_high_threshold < direction_min_threshold are
+    dropped because quality A would be unreachable.
+
+    Returns:
+        Array of shape (n_combinations, 4) in THRESHOLD_NAMES order
+    """
+    combos = np.array(list(itertools.product(*(grid[name] for name in THRESHOLD_NAMES))),
+                      dtype=np.float64)
+    valid = combos[:, 2] >= combos[:, 1]
+    return combos[valid]
+
+
+def _init_worker(direction: np.ndarray, volatility: np.ndarray,
+                 notrade: np.ndarray, outcomes: np.ndarray):
+    """Store shared arrays in the worker process"""
+    _WORKER['direction'] = direction
+    _WORKER['volatility'] = volatility
+    _WORKER['notrade'] = notrade
+    _WORKER['is_buy'] = is_long(direction)
+    # A BUY wins when profit came first (1), a SELL wins when loss came first (0)
+    _WORKER['win'] = np.where(_WORKER['is_buy'], outcomes == 1, outcomes == 0)
+    _WORKER['masks'] = {}
+
+
+def _cached_mask(kind: str, value: float) -> np.ndarray:
+    """decision_engine.rule_mask for a single rule, cached per unique value"""
+    key = (kind, value)
+    masks = _WORKER['masks']
+    if key not in masks:
+        masks[key] = rule_mask(kind, _WORKER[kind], value)
+    return masks[key]
+
+
+def _evaluate_chunk(combos: np.ndarray) -> np.ndarray:
+    """
+    Evaluate a block of threshold combinations
+
+    Returns:
+        Array of shape (n, 6): trades, buys, wins, quality_a, quality_a_wins, sells
+    """
+    is_buy = _WORKER['is_buy']
+    win = _WORKER['win']
+    out = np.zeros((len(combos), 6), dtype=np.int64)
+
+    for i, (notrade_t, dir_min, dir_high, vol_min) in enumerate(combos):
+        trade = (
+            _cached_mask('notrade', notrade_t) &
+            _cached_mask('direction', dir_min) &
+            _cached_mask('volatility', vol_min)
+        )
+        quality_a = trade & _cached_mask('direction', dir_high)
+
+        trades = np.count_nonzero(trade)
+        buys = np.count_nonzero(trade & is_buy)
+        out[i] = (
+            trades,
+            buys,
+            np.count_nonzero(trade & win),
+            np.count_nonzero(quality_a),
+            np.count_nonzero(quality_a & win),
+            trades - buys
+        )
+
+    return out
+
+
+def sweep_thresholds(probabilities: Dict[str, np.ndarray],
+                     outcomes: np.ndarray,
+                     grid: Optional[Dict[str, List[float]]] = None,
+                     workers: Optional[int] = None,
+                     chunk_size: int = 256) -> pd.DataFrame:
+    """
+    Evaluate every threshold combination against outcomes
+
+    Args:
+        probabilities: Cached model probabilities
+        outcomes: label_direction values (1=profit first, 0=loss first, -1=no clear move)
+        grid: Parameter grid (default: DEFAULT_GRID)
+        workers: Number of worker processes (default: CPU count)
+        chunk_size: Combinations per task
+
+    Returns:
+        DataFrame with one row per combination and its trade statistics
+    """
+    grid = grid or DEFAULT_GRID
+    combos = build_grid(grid)
+    workers = workers or os.cpu_count() or 1
+
+    logger.info(f"Evaluating {len(combos):,} combinations on {len(outcomes):,} rows "
+                f"with {workers} workers...")
+
+    init_args = (
+        np.asarray(probabilities['direction'], dtype=np.float64),
+        np.asarray(probabilities['volatility'], dtype=np.float64),
+        np.asarray(probabilities['notrade'], dtype=np.float64),
+        np.asarray(outcomes)
+    )
+    chunks = [combos[i:i + chunk_size] for i in range(0, len(combos), chunk_size)]
+
+    if workers == 1:
+        _init_worker(*init_args)
+        counts = [_evaluate_chunk(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=init_args) as executor:
+            counts = list(executor.map(_evaluate_chunk, chunks))
+
+    counts = np.vstack(counts) if counts else np.zeros((0, 6), dtype=np.int64)
+
+    results = pd.DataFrame(combos, columns=THRESHOLD_NAMES)
+    results['trades'] = counts[:, 0]
+    results['buys'] = counts[:, 1]
+    results['sells'] = counts[:, 5]
+    results['wins'] = counts[:, 2]
+    results['quality_a'] = counts[:, 3]
+    results['trade_rate'] = results['trades'] / max(len(outcomes), 1)
+    results['win_rate'] = np.where(results['trades'] > 0,
+                                   results['wins'] / results['trades'].clip(lower=1), 0.0)
+    results['quality_a_win_rate'] = np.where(results['quality_a'] > 0,
+                                             counts[:, 4] / np.maximum(counts[:, 3], 1), 0.0)
+
+    return results
+
+
+def pareto_frontier(results: pd.DataFrame, min_trades: int = 30) -> pd.DataFrame:
+    """
+    Pareto frontier of trade count against win rate
+
+    A combination is on the frontier if no other combination has both at
+    least as many trades and a strictly higher win rate.
+
+    Args:
+        results: Output of sweep_thresholds
+        min_trades: Ignore combinations with fewer trades
+
+    Returns:
+        Frontier rows sorted by trade count (descending)
+    """
+    candidates = results[results['trades'] >= min_trades]
+    candidates = candidates.sort_values(['trades', 'win_rate'], ascending=[False, False])
+
+    # Best win rate seen among combos with more (or equal) trades
+    best_so_far = candidates['win_rate'].cummax().shift(1, fill_value=-np.inf)
+    frontier = candidates[candidates['win_rate'] > best_so_far]
+
+    # Keep one combination per (trades, win_rate) point
+    return frontier.drop_duplicates(subset=['trades', 'win_rate']).reset_index(drop=True)
+
+
+def main():
+    """Run a threshold sweep on the training dataset"""
+    models_dir = Path(__file__).parent
+    data_dir = models_dir.parent / 'data'
+
+    parser = argparse.ArgumentParser(description='Parallel threshold sweep for the decision engine')
+    parser.add_argument('--split', default='Split_2', help='Model split to load')
+    parser.add_argument('--data', default=str(data_dir / 'training_dataset.parquet'),
+                        help='Parquet with features and label_direction')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes')
+    parser.add_argument('--min-trades', type=int, default=30, help='Min trades for the frontier')
+    args = parser.parse_args()
+
+    logger.info("="*80)
+    logger.info("THRESHOLD SWEEP")
+    logger.info("="*80)
+
+    model_paths = {
+        'direction_model_path': models_dir / f'direction_model_{args.split}.pkl',
+        'volatility_model_path': models_dir / f'volatility_model_{args.split}.pkl',
+        'notrade_model_path': models_dir / f'notrade_model_{args.split}.pkl'
+    }
+    data_path = Path(args.data)
+
+    df = pd.read_parquet(data_path)
+    feature_cols = [col for col in df.columns
+                    if not col.startswith('label_')
+                    and col not in ['timestamp', 'symbol', 'timeframe']]
+    logger.info(f"✓ Loaded {len(df):,} rows, {len(feature_cols)} features")
+
+    cache_key = make_cache_key(data_path, *model_paths.values())
+    cache_file = models_dir / 'cache' / f'probabilities_{args.split}.npz'
+
+    engine = TradingDecisionEngine(**{k: str(v) for k, v in model_paths.items()})
+    probabilities = load_or_compute_probabilities(engine, df[feature_cols], cache_file, cache_key)
+
+    results = sweep_thresholds(probabilities, df['label_direction'].to_numpy(),
+                               workers=args.workers)
+    frontier = pareto_frontier(results, min_trades=args.min_trades)
+
+    # Save
+    output_dir = models_dir / 'metrics'
+    output_dir.mkdir(exist_ok=True)
+    results.to_parquet(output_dir / f'threshold_sweep_{args.split}.parquet', index=False)
+    with open(output_dir / f'threshold_frontier_{args.split}.json', 'w') as f:
+        json.dump(frontier.to_dict(orient='records'), f, indent=2)
+
+    logger.info("\n" + "="*80)
+    logger.info("PARETO FRONTIER (trades vs win rate)")
+    logger.info("="*80)
+    logger.info(frontier[THRESHOLD_NAMES + ['trades', 'win_rate', 'quality_a']].to_string(index=False))
+    logger.info(f"\n✓ Sweep saved to: {output_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Regression checks for the backtester's entry and exit fills
+
+Runs Backtester on small hand-built candle series whose outcome is known and
+requires the simulated trades to match:
+    - A close entry never exits on its own signal bar (that bar's high/low
+      happened before the entry).
+    - A next-open entry can exit on the entry bar, filled at the level.
+    - A close entry on the last bar has no bar to exit on and is skipped.
+
+Usage:
+    python validate_backtester.py
+"""
+import logging
+import sys
+
+import pandas as pd
+
+from backtester import Backtester, EXIT_STOP, EXIT_TARGET
+
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+logger = logging.getLogger(__name__)
+
+
+def candles(rows: list) -> pd.DataFrame:
+    """OHLC frame from (open, high, low, close, signal) rows"""
+    return pd.DataFrame(rows, columns=['open', 'high', 'low', 'close', 'signal'])
+
+
+def check_close_entry_skips_signal_bar() -> bool:
+    """A long whose signal bar dipped below the stop must not be stopped on it"""
+    df = candles([
+        (100.0, 100.5, 95.0, 100.0, 'BUY'),   # Low before the close entry at 100
+        (100.0, 101.6, 99.5, 101.5, 'NO_TRADE'),
+        (101.5, 101.8, 101.0, 101.2, 'NO_TRADE'),
+    ])
+    trade = Backtester(entry_on='close', fee_rate=0.0).run(df).trades.iloc[0]
+
+    return (trade['entry_idx'] == 0 and trade['exit_idx'] == 1
+            and trade['exit_reason'] == EXIT_TARGET
+            and abs(trade['exit_price'] - 101.5) < 1e-9
+            and trade['holding_candles'] == 1)
+
+
+def check_next_open_exits_on_entry_bar() -> bool:
+    """A next-open long stopped within its entry bar fills at the stop"""
+    df = candles([
+        (100.0, 100.5, 99.5, 100.0, 'BUY'),
+        (100.0, 100.2, 98.0, 98.5, 'NO_TRADE'),
+        (98.5, 99.0, 98.0, 98.8, 'NO_TRADE'),
+    ])
+    trade = Backtester(entry_on='next_open', fee_rate=0.0).run(df).trades.iloc[0]
+
+    return (trade['entry_idx'] == 1 and trade['exit_idx'] == 1
+            and trade['exit_reason'] == EXIT_STOP
+            and abs(trade['exit_price'] - 99.0) < 1e-9
+            and trade['holding_candles'] == 1)
+
+
+def check_close_entry_on_last_bar() -> bool:
+    """A close entry on the last bar has nothing to exit on"""
+    df = candles([
+        (100.0, 100.5, 99.5, 100.0, 'NO_TRADE'),
+        (100.0, 100.5, 95.0, 100.0, 'BUY'),
+    ])
+    return Backtester(entry_on='close').run(df).trades.empty
+
+
+CHECKS = [
+    check_close_entry_skips_signal_bar,
+    check_next_open_exits_on_entry_bar,
+    check_close_entry_on_last_bar,
+]
+
+
+def main():
+    """Run the backtester regression checks"""
+    failed = 0
+    for check in CHECKS:
+        ok = check()
+        failed += not ok
+        logger.info(f"{'✓' if ok else '✗'} {check.__doc__}")
+
+    logger.info("\n" + "="*80)
+    logger.info(f"✓ All {len(CHECKS)} backtester checks passed" if not failed
+                else f"✗ {failed}/{len(CHECKS)} backtester checks failed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
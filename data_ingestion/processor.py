@@ -4,17 +4,73 @@ Data processor module - handles cleaning, validation, and transformation
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from pathlib import Path
 import logging
-from typing import Tuple, Dict
+from typing import Tuple, Dict, Iterable, Iterator, Optional
+
+from market_calendar import MarketCalendar, get_calendar
 
 logger = logging.getLogger(__name__)
 
+OUTPUT_COLUMNS = ['timestamp', 'symbol', 'timeframe', 'open', 'high',
+                  'low', 'close', 'volume', 'spread']
+
+# Validation rules in evaluation order; a rejected row is attributed to the
+# first rule it fails
+VALIDATION_RULES = ['null_price', 'high_below_low', 'close_out_of_range',
+                    'open_out_of_range', 'non_positive_price']
+
+
+def validate_ohlc(open_: np.ndarray, high: np.ndarray, low: np.ndarray,
+                  close: np.ndarray) -> Tuple[np.ndarray, Dict[str, int]]:
+    """
+    Validate OHLC arrays in one fused pass
+    
+    Works on the raw arrays, so no intermediate DataFrames are built.
+    
+    Args:
+        open_, high, low, close: Price arrays of equal length
+        
+    Returns:
+        Tuple of (boolean mask of valid rows, {rule: rejected rows})
+    """
+    open_, high, low, close = (np.asarray(a, dtype=np.float64) for a in (open_, high, low, close))
+    
+    null = np.isnan(open_) | np.isnan(high) | np.isnan(low) | np.isnan(close)
+    with np.errstate(invalid='ignore'):
+        checks = [
+            null,
+            high < low,
+            (close > high) | (close < low),
+            (open_ > high) | (open_ < low),
+            (open_ <= 0) | (high <= 0) | (low <= 0) | (close <= 0)
+        ]
+    
+    # Rule index per row (0 = valid); assigned in reverse so the first failing rule wins
+    reason = np.zeros(len(close), dtype=np.int8)
+    for code in range(len(checks), 0, -1):
+        reason[checks[code - 1]] = code
+    
+    counts = np.bincount(reason, minlength=len(checks) + 1)
+    return reason == 0, {rule: int(counts[i + 1]) for i, rule in enumerate(VALIDATION_RULES)}
+
 
 class DataProcessor:
     """Processes and validates trading data"""
     
-    def __init__(self, max_missing_percent: float = 1.0):
+    def __init__(self, max_missing_percent: float = 1.0, flag_filled: bool = False,
+                 symbol_calendars: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            max_missing_percent: Max share of filled candles rated EXCELLENT
+            flag_filled: Add a boolean 'filled' column marking forward-filled candles
+            symbol_calendars: {symbol: calendar name} (see market_calendar);
+                symbols without an entry are treated as trading 24/7
+        """
         self.max_missing_percent = max_missing_percent
+        self.flag_filled = flag_filled
+        self.symbol_calendars = symbol_calendars or {}
+        self.output_columns = OUTPUT_COLUMNS + (['filled'] if flag_filled else [])
     
     def process_data(self, df: pd.DataFrame, symbol: str, timeframe: str, 
                     interval_minutes: int) -> Tuple[pd.DataFrame, Dict]:
@@ -36,20 +92,25 @@ class DataProcessor:
             'raw_rows': len(df),
             'duplicates_removed': 0,
             'missing_candles_filled': 0,
+            'calendar': '',
             'invalid_rows_removed': 0,
+            'invalid_reasons': dict.fromkeys(VALIDATION_RULES, 0),
             'final_rows': 0,
             'date_range': '',
             'data_quality': 'UNKNOWN'
         }
         
+        calendar = get_calendar(symbol, self.symbol_calendars)
+        stats['calendar'] = calendar.name
+        
         try:
             # 1. Remove duplicates
             df_clean = self._remove_duplicates(df)
             stats['duplicates_removed'] = len(df) - len(df_clean)
             
             # 2. Validate and clean data
-            df_clean = self._validate_data(df_clean)
-            stats['invalid_rows_removed'] = len(df) - stats['duplicates_removed'] - len(df_clean)
+            df_clean, stats['invalid_reasons'] = self._validate_data(df_clean)
+            stats['invalid_rows_removed'] = sum(stats['invalid_reasons'].values())
             
             # 3. Sort by timestamp
             df_clean = df_clean.sort_values('timestamp').reset_index(drop=True)
@@ -57,8 +118,8 @@ class DataProcessor:
             # 4. Convert timestamp to UTC
             df_clean = self._ensure_utc_timestamp(df_clean)
             
-            # 5. Fill missing candles
-            df_clean, filled_count = self._fill_missing_candles(df_clean, interval_minutes)
+            # 5. Fill missing candles within trading sessions
+            df_clean, filled_count = self._fill_missing_candles(df_clean, interval_minutes, calendar)
             stats['missing_candles_filled'] = filled_count
             
             # 6. Add metadata columns
@@ -66,24 +127,13 @@ class DataProcessor:
             df_clean['timeframe'] = timeframe
             
             # 7. Reorder columns
-            df_clean = df_clean[['timestamp', 'symbol', 'timeframe', 'open', 'high', 
-                                'low', 'close', 'volume', 'spread']]
+            df_clean = df_clean[self.output_columns]
             
             # 8. Calculate statistics
             stats['final_rows'] = len(df_clean)
             if len(df_clean) > 0:
                 stats['date_range'] = f"{df_clean['timestamp'].min()} to {df_clean['timestamp'].max()}"
-                
-                # Calculate data quality
-                missing_percent = (stats['missing_candles_filled'] / stats['final_rows']) * 100
-                if missing_percent < self.max_missing_percent:
-                    stats['data_quality'] = 'EXCELLENT'
-                elif missing_percent < 5:
-                    stats['data_quality'] = 'GOOD'
-                elif missing_percent < 10:
-                    stats['data_quality'] = 'FAIR'
-                else:
-                    stats['data_quality'] = 'POOR'
+                stats['data_quality'] = self._rate_quality(stats)
             
             logger.info(f"Processed {symbol} {timeframe}: {stats['final_rows']} rows, "
                        f"Quality: {stats['data_quality']}")
@@ -94,29 +144,150 @@ class DataProcessor:
             logger.error(f"Error processing data: {str(e)}")
             return pd.DataFrame(), stats
     
+    def process_stream(self, chunks: Iterable[pd.DataFrame], symbol: str, timeframe: str,
+                       interval_minutes: int, output_path: str) -> Dict:
+        """
+        Process a series chunk by chunk and write it incrementally
+        
+        Chunks must arrive in time order (each chunk may be unsorted
+        internally). State carried between chunks:
+          - last timestamp written: rows at or before it are duplicates
+          - last valid candle: forward-fills gaps that span a chunk boundary
+        
+        Each processed chunk is appended to the parquet file as a row group,
+        so memory is bounded by the chunk size rather than the series length.
+        
+        Args:
+            chunks: Iterable of raw DataFrames in time order
+            symbol: Trading symbol
+            timeframe: Timeframe string (1m, 5m, etc)
+            interval_minutes: Interval in minutes
+            output_path: Parquet file to write
+            
+        Returns:
+            Statistics dict (same keys as process_data, plus 'chunks')
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        stats = {
+            'symbol': symbol,
+            'timeframe': timeframe,
+            'raw_rows': 0,
+            'duplicates_removed': 0,
+            'missing_candles_filled': 0,
+            'calendar': '',
+            'invalid_rows_removed': 0,
+            'invalid_reasons': dict.fromkeys(VALIDATION_RULES, 0),
+            'final_rows': 0,
+            'chunks': 0,
+            'date_range': '',
+            'data_quality': 'UNKNOWN'
+        }
+        
+        calendar = get_calendar(symbol, self.symbol_calendars)
+        stats['calendar'] = calendar.name
+        
+        last_candle = None  # single-row DataFrame
+        first_timestamp = None
+        writer = None
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        
+        try:
+            for chunk in chunks:
+                stats['chunks'] += 1
+                stats['raw_rows'] += len(chunk)
+                if len(chunk) == 0:
+                    continue
+                
+                # 1. Timestamps, order and duplicates (within and across chunks)
+                df = self._ensure_utc_timestamp(chunk.copy())
+                df = df.sort_values('timestamp', kind='stable')
+                deduped = self._remove_duplicates(df)
+                if last_candle is not None:
+                    deduped = deduped[deduped['timestamp'] > last_candle['timestamp'].iloc[0]]
+                stats['duplicates_removed'] += len(df) - len(deduped)
+                
+                # 2. Validate
+                valid, reasons = self._validate_data(deduped)
+                for rule, count in reasons.items():
+                    stats['invalid_reasons'][rule] += count
+                stats['invalid_rows_removed'] += sum(reasons.values())
+                if len(valid) == 0:
+                    continue
+                
+                # 3. Fill gaps, including the one since the previous chunk
+                columns = ['timestamp', 'open', 'high', 'low', 'close', 'volume', 'spread']
+                valid = valid[columns]
+                if last_candle is not None:
+                    valid = pd.concat([last_candle, valid], ignore_index=True)
+                filled, filled_count = self._fill_missing_candles(valid.reset_index(drop=True),
+                                                                  interval_minutes, calendar)
+                if last_candle is not None:
+                    filled = filled.iloc[1:]
+                stats['missing_candles_filled'] += int(filled_count)
+                
+                # 4. Write as a row group
+                filled = filled.assign(symbol=symbol, timeframe=timeframe)[self.output_columns]
+                filled = filled.astype({'open': 'float64', 'high': 'float64', 'low': 'float64',
+                                        'close': 'float64', 'volume': 'float64',
+                                        'spread': 'float64'})
+                table = pa.Table.from_pandas(filled, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output_path, table.schema, compression='snappy')
+                writer.write_table(table.cast(writer.schema))
+                
+                stats['final_rows'] += len(filled)
+                if first_timestamp is None:
+                    first_timestamp = filled['timestamp'].iloc[0]
+                last_candle = filled[columns].iloc[[-1]].reset_index(drop=True)
+        finally:
+            if writer is not None:
+                writer.close()
+        
+        if stats['final_rows'] > 0:
+            stats['date_range'] = f"{first_timestamp} to {last_candle['timestamp'].iloc[0]}"
+            stats['data_quality'] = self._rate_quality(stats)
+        
+        logger.info(f"Processed {symbol} {timeframe} in {stats['chunks']} chunks: "
+                   f"{stats['final_rows']} rows, Quality: {stats['data_quality']}")
+        
+        return stats
+    
+    def _rate_quality(self, stats: Dict) -> str:
+        """Rate data quality from the share of forward-filled candles"""
+        missing_percent = (stats['missing_candles_filled'] / stats['final_rows']) * 100
+        if missing_percent < self.max_missing_percent:
+            return 'EXCELLENT'
+        elif missing_percent < 5:
+            return 'GOOD'
+        elif missing_percent < 10:
+            return 'FAIR'
+        return 'POOR'
+    
     def _remove_duplicates(self, df: pd.DataFrame) -> pd.DataFrame:
         """Remove duplicate timestamps"""
         return df.drop_duplicates(subset=['timestamp'], keep='first')
     
-    def _validate_data(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Validate OHLCV data integrity"""
-        # Remove rows with null values in critical columns
-        df = df.dropna(subset=['open', 'high', 'low', 'close'])
+    def _validate_data(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, int]]:
+        """
+        Validate OHLCV data integrity
         
-        # Remove rows where high < low (invalid)
-        df = df[df['high'] >= df['low']]
+        Rejects rows with null prices, high < low, open/close outside the
+        high-low range or non-positive prices, using a single mask.
         
-        # Remove rows where close/open outside high/low range
-        df = df[(df['close'] <= df['high']) & (df['close'] >= df['low'])]
-        df = df[(df['open'] <= df['high']) & (df['open'] >= df['low'])]
+        Returns:
+            Tuple of (valid rows, {rule: rejected rows})
+        """
+        mask, reasons = validate_ohlc(df['open'].to_numpy(), df['high'].to_numpy(),
+                                      df['low'].to_numpy(), df['close'].to_numpy())
         
-        # Remove rows with zero or negative prices
-        df = df[(df['open'] > 0) & (df['high'] > 0) & (df['low'] > 0) & (df['close'] > 0)]
+        df = df[mask] if not mask.all() else df.copy()
         
         # Fill missing volume with 0
         df['volume'] = df['volume'].fillna(0)
         
-        return df
+        return df, reasons
     
     def _ensure_utc_timestamp(self, df: pd.DataFrame) -> pd.DataFrame:
         """Ensure timestamp is in UTC"""
@@ -134,54 +305,89 @@ class DataProcessor:
         
         return df
     
-    def _fill_missing_candles(self, df: pd.DataFrame, 
-                             interval_minutes: int) -> Tuple[pd.DataFrame, int]:
-        """Fill missing candles with forward-filled data"""
+    def _fill_missing_candles(self, df: pd.DataFrame, interval_minutes: int,
+                             calendar: Optional[MarketCalendar] = None) -> Tuple[pd.DataFrame, int]:
+        """
+        Fill missing candles with forward-filled data
+        
+        Expected slots are computed arithmetically from integer epoch
+        timestamps: each row is placed at slot (t - t0) // interval and every
+        empty slot takes the values of the last real candle before it, in one
+        vectorized gather. Filled candles get zero volume. Rows that are not on
+        the interval grid starting at the first timestamp are dropped.
+        
+        With a calendar, empty slots in closed sessions (weekends, daily
+        breaks) are left out instead of filled; real candles are always kept.
+        
+        Args:
+            df: DataFrame sorted by timestamp without duplicate timestamps
+            interval_minutes: Interval in minutes
+            calendar: Trading calendar (default: 24/7)
+            
+        Returns:
+            Tuple of (DataFrame on the complete grid, number of filled candles)
+        """
         if len(df) < 2:
+            if self.flag_filled:
+                df = df.assign(filled=False)
             return df, 0
         
-        # Create complete time range
-        start_time = df['timestamp'].min()
-        end_time = df['timestamp'].max()
+        step = interval_minutes * 60 * 1_000_000_000
+        epoch_ns = df['timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        offset = epoch_ns - epoch_ns[0]
         
-        # Generate expected timestamps
-        expected_timestamps = pd.date_range(
-            start=start_time,
-            end=end_time,
-            freq=f'{interval_minutes}min'
-        )
+        # Drop rows off the grid
+        on_grid = offset % step == 0
+        if not on_grid.all():
+            df = df[on_grid]
+            offset = offset[on_grid]
         
-        # Create complete dataframe
-        complete_df = pd.DataFrame({'timestamp': expected_timestamps})
+        slots = offset // step
+        n_slots = int(slots[-1]) + 1
         
-        # Merge with actual data
-        merged_df = complete_df.merge(df, on='timestamp', how='left')
+        # Source row per slot: the row itself, or the last row before the gap
+        source = np.zeros(n_slots, dtype=np.int64)
+        present = np.zeros(n_slots, dtype=bool)
+        source[slots] = np.arange(len(slots))
+        present[slots] = True
+        source = np.maximum.accumulate(np.where(present, source, 0))
+        grid = (epoch_ns[0] + np.arange(n_slots, dtype=np.int64) * step).astype('datetime64[ns]')
         
-        # Count missing candles before filling
-        missing_count = merged_df['close'].isna().sum()
+        # Only fill slots in which the market is open
+        if calendar is not None and calendar.closed_windows:
+            keep = present | calendar.is_open(grid)
+            source, present, grid = source[keep], present[keep], grid[keep]
         
-        # Forward fill missing values
-        merged_df['open'] = merged_df['open'].fillna(method='ffill')
-        merged_df['high'] = merged_df['high'].fillna(method='ffill')
-        merged_df['low'] = merged_df['low'].fillna(method='ffill')
-        merged_df['close'] = merged_df['close'].fillna(method='ffill')
-        merged_df['volume'] = merged_df['volume'].fillna(0)
-        merged_df['spread'] = merged_df['spread'].fillna(method='ffill')
+        filled_df = df.iloc[source].reset_index(drop=True)
+        filled_df['timestamp'] = grid
         
-        # Drop any remaining NaN rows (at the beginning)
-        merged_df = merged_df.dropna(subset=['close'])
+        missing = ~present
+        missing_count = int(missing.sum())
+        if missing_count:
+            filled_df['volume'] = np.where(missing, 0, filled_df['volume'].to_numpy(dtype=np.float64))
+        if self.flag_filled:
+            filled_df['filled'] = missing
         
-        return merged_df, missing_count
+        return filled_df, missing_count
     
-    def resample_to_4h(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Resample 1h data to 4h timeframe"""
+    def resample_to_4h(self, df: pd.DataFrame,
+                       calendar: Optional[MarketCalendar] = None) -> pd.DataFrame:
+        """
+        Resample 1h data to 4h timeframe
+        
+        Args:
+            df: 1h DataFrame
+            calendar: Trading calendar; bars are aligned to its session open
+                (e.g. 22:00 UTC for FX) so no bar straddles the weekly close
+        """
         if len(df) == 0:
             return df
         
         df = df.set_index('timestamp')
+        offset = calendar.resample_offset if calendar is not None else None
         
         # Resample to 4h
-        resampled = df.resample('4h').agg({
+        resampled = df.resample('4h', offset=offset).agg({
             'open': 'first',
             'high': 'max',
             'low': 'min',
@@ -193,3 +399,30 @@ class DataProcessor:
         resampled = resampled.dropna().reset_index()
         
         return resampled
+
+
+def iter_parquet_chunks(path: str, chunk_rows: int = 1_000_000,
+                        columns: Optional[list] = None) -> Iterator[pd.DataFrame]:
+    """
+    Read a parquet file, or a directory of part files, in chunks
+    
+    Part files are read in sorted path order, which is time order for the
+    datasets written by generate_sample_data.write_partitioned_dataset.
+    
+    Args:
+        path: Parquet file or directory
+        chunk_rows: Max rows per chunk
+        columns: Columns to read (default: all)
+        
+    Yields:
+        DataFrames of at most chunk_rows rows
+    """
+    import pyarrow.parquet as pq
+    
+    path = Path(path)
+    files = sorted(path.rglob('*.parquet')) if path.is_dir() else [path]
+    
+    for file in files:
+        parquet_file = pq.ParquetFile(file)
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
@@ -0,0 +1,377 @@
+"""
+Data quality scanner over the whole data directory
+
+Every stored series is scanned in a process pool, one row group at a time,
+so memory per worker is bounded by the row group size and only the columns
+needed for the checks are read. State that spans row groups (last
+timestamp, last close, current stale run) is carried over, so results do
+not depend on how a file is split.
+
+Checks per series:
+    invalid candles   - processor.validate_ohlc rules (null, high < low, ...)
+    nulls             - null values in any column
+    duplicates        - timestamp equal to the previous one
+    out of order      - timestamp earlier than the previous one
+    gaps              - steps longer than QUALITY_GAP_FACTOR intervals that
+                        miss candles while the market is open (trading calendar)
+    stale runs        - at least QUALITY_STALE_RUN identical closes in a row
+    outlier returns   - |log return - median| above QUALITY_OUTLIER_MAD robust
+                        standard deviations (median/MAD per row group)
+
+Series with part files (DataStorage.append_part) are scanned as
+DataStorage.load_table reads them: sorted, with the last written row of a
+repeated timestamp. Rows replaced that way are valid overwrites; they are
+counted in overwritten_rows, not as duplicates or out-of-order rows. Such
+series are loaded whole rather than one row group at a time.
+
+Usage:
+    python quality_scanner.py
+    python quality_scanner.py --symbols EURUSD BTCUSD --workers 8
+    python quality_scanner.py --data-dir data/synthetic --output logs/quality_synthetic.json
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from config import (
+    OUTPUT_DIR, TIMEFRAMES, SYMBOL_CALENDARS, QUALITY_GAP_FACTOR, QUALITY_STALE_RUN,
+    QUALITY_OUTLIER_MAD, QUALITY_REPORT
+)
+from market_calendar import get_calendar
+from processor import validate_ohlc, VALIDATION_RULES
+from query import list_series
+from storage import DataStorage, PARQUET_ROW_GROUP_ROWS
+
+logger = logging.getLogger(__name__)
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+ISSUE_FIELDS = ['invalid_candles', 'nulls', 'duplicates', 'out_of_order', 'gaps',
+                'stale_runs', 'outlier_returns']
+UNIT_MINUTES = {'m': 1, 'h': 60, 'd': 1440, 'w': 10080}
+
+
+@dataclass
+class SeriesQuality:
+    """Quality counters of one symbol/timeframe series"""
+    symbol: str
+    timeframe: str
+    files: int = 0
+    rows: int = 0
+    row_groups: int = 0
+    overwritten_rows: int = 0  # Stored rows replaced by a later part file (not an issue)
+    first_timestamp: Optional[str] = None
+    last_timestamp: Optional[str] = None
+    invalid_candles: int = 0
+    invalid_by_rule: Dict[str, int] = field(default_factory=dict)
+    nulls: int = 0
+    duplicates: int = 0
+    out_of_order: int = 0
+    gaps: int = 0
+    missing_candles: int = 0
+    largest_gap_candles: int = 0
+    stale_runs: int = 0
+    longest_stale_run: int = 0
+    outlier_returns: int = 0
+    max_abs_return: float = 0.0
+    scan_seconds: float = 0.0
+    error: Optional[str] = None
+
+
+def interval_minutes(timeframe: str) -> Optional[int]:
+    """Candle interval in minutes ('1h' -> 60)"""
+    if timeframe in TIMEFRAMES:
+        return TIMEFRAMES[timeframe]
+    match = re.match(r'^(\d+)([mhdw])$', timeframe)
+    return int(match[1]) * UNIT_MINUTES[match[2]] if match else None
+
+
+def _with_previous(values: np.ndarray, previous) -> Tuple[np.ndarray, np.ndarray]:
+    """(values, preceding values) pairs, starting from the value carried over"""
+    if previous is None:
+        return values[1:], values[:-1]
+    return values, np.concatenate([np.asarray([previous], dtype=values.dtype), values[:-1]])
+
+
+class SeriesScanner:
+    """Accumulate quality counters over consecutive row groups of a series"""
+
+    def __init__(self, symbol: str, timeframe: str, gap_factor: float = QUALITY_GAP_FACTOR,
+                 stale_run: int = QUALITY_STALE_RUN, outlier_mad: float = QUALITY_OUTLIER_MAD):
+        """
+        Args:
+            symbol: Trading symbol (selects the trading calendar)
+            timeframe: Timeframe string
+            gap_factor: Steps longer than this many intervals are gaps
+            stale_run: Min identical closes in a row reported as a stale run
+            outlier_mad: Outlier threshold in robust standard deviations
+        """
+        self.result = SeriesQuality(symbol, timeframe,
+                                    invalid_by_rule={rule: 0 for rule in VALIDATION_RULES})
+        minutes = interval_minutes(timeframe)
+        self.step = minutes * 60 * 1_000_000_000 if minutes else None
+        self.calendar = get_calendar(symbol, SYMBOL_CALENDARS)
+        self.gap_factor = gap_factor
+        self.stale_run = stale_run
+        self.outlier_mad = outlier_mad
+
+        self.last_ts: Optional[int] = None
+        self.last_close: Optional[float] = None
+        self.run = 1  # Identical closes ending at the last candle
+
+    def update(self, batch: pd.DataFrame, nulls: int):
+        """
+        Add the next rows of the series
+
+        Args:
+            batch: Rows with timestamp and OHLC columns
+            nulls: Null values in the batch (all scanned columns)
+        """
+        result = self.result
+        n = len(batch)
+        if n == 0:
+            return
+        result.rows += n
+        result.row_groups += 1
+        result.nulls += nulls
+
+        # Invalid candles
+        valid, counts = validate_ohlc(*(batch[c].to_numpy() for c in PRICE_COLUMNS))
+        result.invalid_candles += int(n - valid.sum())
+        for rule, count in counts.items():
+            result.invalid_by_rule[rule] += count
+
+        # Timestamps (continuing from the previous batch)
+        ts = batch['timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        if result.first_timestamp is None:
+            result.first_timestamp = str(pd.Timestamp(ts[0]))
+        result.last_timestamp = str(pd.Timestamp(ts[-1]))
+        current_ts, prev_ts = _with_previous(ts, self.last_ts)
+        diffs = current_ts - prev_ts
+        result.duplicates += int((diffs == 0).sum())
+        result.out_of_order += int((diffs < 0).sum())
+        if self.step:
+            self._count_gaps(prev_ts, diffs)
+        self.last_ts = int(ts[-1])
+
+        # Stale closes and returns
+        close = batch['close'].to_numpy(dtype=np.float64)
+        current, prev_close = _with_previous(close, self.last_close)
+        self._count_stale(current == prev_close)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = np.log(current / prev_close)
+        self._count_outliers(returns[np.isfinite(returns)])
+        self.last_close = float(close[-1])
+
+    def _count_gaps(self, prev_ts: np.ndarray, diffs: np.ndarray):
+        """Missing candles in steps longer than gap_factor intervals (open market only)"""
+        gap_at = np.flatnonzero(diffs > self.gap_factor * self.step)
+        for i in gap_at:
+            slots = int(round(diffs[i] / self.step)) - 1
+            if slots <= 0:
+                continue
+            expected = prev_ts[i] + self.step * np.arange(1, slots + 1, dtype=np.int64)
+            missing = int(self.calendar.is_open(expected.astype('datetime64[ns]')).sum())
+            if missing:
+                self.result.gaps += 1
+                self.result.missing_candles += missing
+                self.result.largest_gap_candles = max(self.result.largest_gap_candles, missing)
+
+    def _count_stale(self, same: np.ndarray):
+        """Runs of identical closes (run length counts candles, carried across batches)"""
+        if not len(same):
+            return
+        # Run length (in candles) at every position, continuing the previous run
+        idx = np.arange(len(same))
+        last_break = np.maximum.accumulate(np.where(same, -1, idx))
+        runs = np.where(last_break >= 0, idx - last_break + 1, self.run + idx + 1)
+        # A run is reported once, when it reaches the threshold
+        self.result.stale_runs += int((runs == self.stale_run).sum())
+        self.result.longest_stale_run = max(self.result.longest_stale_run, int(runs.max()))
+        self.run = int(runs[-1])
+
+    def _count_outliers(self, returns: np.ndarray):
+        """Returns far from the batch median in robust standard deviations"""
+        if len(returns) < 10:
+            return
+        self.result.max_abs_return = max(self.result.max_abs_return, float(np.abs(returns).max()))
+        median = np.median(returns)
+        mad = np.median(np.abs(returns - median)) * 1.4826
+        if mad > 0:
+            self.result.outlier_returns += int((np.abs(returns - median) > self.outlier_mad * mad).sum())
+
+
+def scan_series(task: Tuple[str, str, str, List[str], int, Dict]) -> Dict:
+    """
+    Scan one series (runs in a worker process)
+
+    Args:
+        task: (symbol, timeframe, data_dir, files, batch_rows, scanner options)
+
+    Returns:
+        SeriesQuality as a dict
+    """
+    symbol, timeframe, data_dir, files, batch_rows, options = task
+    scanner = SeriesScanner(symbol, timeframe, **options)
+    scanner.result.files = len(files)
+    start = time.perf_counter()
+
+    try:
+        storage = DataStorage(output_dir=data_dir)
+        if storage.part_files(symbol, timeframe):
+            _scan_merged(scanner, storage, files, batch_rows)
+        else:
+            for path in files:
+                parquet = pq.ParquetFile(path)
+                for batch in parquet.iter_batches(batch_size=batch_rows,
+                                                  columns=_scan_columns(parquet.schema_arrow.names)):
+                    nulls = sum(column.null_count for column in batch.columns)
+                    scanner.update(batch.to_pandas(), nulls)
+    except Exception as e:
+        scanner.result.error = str(e)
+
+    scanner.result.scan_seconds = round(time.perf_counter() - start, 3)
+    return asdict(scanner.result)
+
+
+def _scan_columns(names: List[str]) -> List[str]:
+    """Columns the checks read, of those present"""
+    return [c for c in ['timestamp'] + PRICE_COLUMNS + ['volume'] if c in names]
+
+
+def _scan_merged(scanner: SeriesScanner, storage: DataStorage, files: List[str], batch_rows: int):
+    """Scan a series with part files as load_table merges it (last written row wins)"""
+    result = scanner.result
+    names = set().union(*(pq.read_schema(path).names for path in files))
+    table = storage.load_table(result.symbol, result.timeframe, _scan_columns(names))
+    result.overwritten_rows = sum(pq.ParquetFile(path).metadata.num_rows for path in files) - table.num_rows
+
+    for batch in table.to_batches(max_chunksize=batch_rows):
+        nulls = sum(column.null_count for column in batch.columns)
+        scanner.update(batch.to_pandas(), nulls)
+
+
+def scan_directory(data_dir: str = OUTPUT_DIR, symbols: Optional[List[str]] = None,
+                   timeframes: Optional[List[str]] = None, workers: Optional[int] = None,
+                   batch_rows: int = PARQUET_ROW_GROUP_ROWS, **options) -> pd.DataFrame:
+    """
+    Scan every stored series of a data directory
+
+    Args:
+        data_dir: Data directory (see query.list_series)
+        symbols: Symbols to scan (None = all)
+        timeframes: Timeframes to scan (None = all)
+        workers: Worker processes (default: CPU count; 1 = in-process)
+        batch_rows: Max rows per batch (row groups larger than this are split)
+        **options: SeriesScanner thresholds (gap_factor, stale_run, outlier_mad)
+
+    Returns:
+        DataFrame with one row per series
+    """
+    tasks = [(symbol, timeframe, str(data_dir), [str(f) for f in files], batch_rows, options)
+             for (symbol, timeframe), files in sorted(list_series(data_dir).items())
+             if (not symbols or symbol in symbols) and (not timeframes or timeframe in timeframes)]
+    workers = min(workers or os.cpu_count() or 1, max(len(tasks), 1))
+
+    logger.info(f"Scanning {len(tasks)} series with {workers} workers...")
+    if workers == 1:
+        results = [scan_series(task) for task in tasks]
+    else:
+        # Largest series first so the pool finishes evenly
+        tasks.sort(key=lambda t: -sum(os.path.getsize(f) for f in t[3]))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(scan_series, tasks))
+
+    report = pd.DataFrame(results)
+    if not report.empty:
+        report['issues'] = report[ISSUE_FIELDS].sum(axis=1)
+        report = report.sort_values(['symbol', 'timeframe']).reset_index(drop=True)
+    return report
+
+
+def save_report(report: pd.DataFrame, output: str, elapsed: float, data_dir: str):
+    """Write the report as JSON (with totals) and CSV"""
+    output_path = Path(output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    totals = {name: int(report[name].sum()) for name in ISSUE_FIELDS + ['rows', 'missing_candles', 'overwritten_rows']} \
+        if not report.empty else {}
+    summary = {
+        'created': datetime.now().isoformat(),
+        'data_dir': str(data_dir),
+        'series': len(report),
+        'seconds': round(elapsed, 2),
+        'totals': totals,
+        'series_with_issues': int((report['issues'] > 0).sum()) if not report.empty else 0,
+        'results': json.loads(report.to_json(orient='records'))
+    }
+    with open(output_path, 'w') as f:
+        json.dump(summary, f, indent=2)
+    report.drop(columns=['invalid_by_rule'], errors='ignore').to_csv(
+        output_path.with_suffix('.csv'), index=False)
+
+
+def print_report(report: pd.DataFrame):
+    """Print one line per series"""
+    print(f"\n{'Series':<16}{'Rows':>12}{'Invalid':>9}{'Dup':>6}{'Order':>7}"
+          f"{'Gaps':>6}{'Missing':>9}{'Stale':>7}{'Outlier':>9}  Status")
+    print("-"*90)
+    for row in report.itertuples():
+        status = f"✗ {row.error}" if row.error else ('✓' if row.issues == 0 else '✗')
+        print(f"{row.symbol + ' ' + row.timeframe:<16}{row.rows:>12,}{row.invalid_candles:>9,}"
+              f"{row.duplicates:>6,}{row.out_of_order:>7,}{row.gaps:>6,}{row.missing_candles:>9,}"
+              f"{row.stale_runs:>7,}{row.outlier_returns:>9,}  {status}")
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='Scan stored series for data quality issues')
+    parser.add_argument('--data-dir', default=OUTPUT_DIR)
+    parser.add_argument('--symbols', nargs='+')
+    parser.add_argument('--timeframes', nargs='+')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--output', default=QUALITY_REPORT, help='Report JSON (a CSV is written next to it)')
+    parser.add_argument('--gap-factor', type=float, default=QUALITY_GAP_FACTOR)
+    parser.add_argument('--stale-run', type=int, default=QUALITY_STALE_RUN)
+    parser.add_argument('--outlier-mad', type=float, default=QUALITY_OUTLIER_MAD)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    print("="*90)
+    print("DATA QUALITY SCAN")
+    print("="*90)
+
+    start = time.perf_counter()
+    report = scan_directory(args.data_dir, args.symbols, args.timeframes, args.workers,
+                            gap_factor=args.gap_factor, stale_run=args.stale_run,
+                            outlier_mad=args.outlier_mad)
+    elapsed = time.perf_counter() - start
+
+    if report.empty:
+        print("No series found")
+        return
+
+    print_report(report)
+    save_report(report, args.output, elapsed, args.data_dir)
+
+    print("="*90)
+    print(f"Scanned {len(report)} series ({report['rows'].sum():,} rows) in {elapsed:.2f}s")
+    print(f"Series with issues: {(report['issues'] > 0).sum()}/{len(report)}")
+    print(f"✓ Report saved to {args.output}")
+    print("="*90)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,437 @@
+"""
+Query stored candles and features
+
+query() reads only what a question needs: the files of the requested
+symbols/timeframes, the requested columns, and the row groups whose min/max
+statistics can match the time range and `where` filters (predicate pushdown
+through pyarrow.dataset). Results are Arrow tables or DataFrames.
+
+Sources:
+    data directory (default)  - {SYMBOL}_{TIMEFRAME}.parquet files and
+                                symbol=X/timeframe=Y partition directories
+                                (hive partitioning: symbol and timeframe come
+                                from the directory names)
+    path=FILE_OR_DIR          - any parquet file/directory with symbol and
+                                timeframe columns (e.g. data/features.parquet)
+
+With engine='duckdb' the same query runs in DuckDB (pip install duckdb) over
+the same files; sql() runs arbitrary SQL with the files registered as views.
+
+Series with part files (DataStorage.append_part) are read as DataStorage
+loads them: the last written row of a repeated timestamp wins, before the
+`where` filters apply. Only their time range is pushed into the scan.
+
+Filters use the pandas/pyarrow form [(column, op, value), ...] with ops
+==, !=, <, <=, >, >=, in, not in.
+
+Usage:
+    python query.py --symbols EURUSD --timeframes 1h --start 2025-06-01 --end 2025-07-01
+    python query.py --symbols BTCUSD ETHUSD --columns timestamp symbol close --where "close > 50000"
+    python query.py --path data/features.parquet --symbols EURUSD --columns timestamp rsi --head 20
+    python query.py --sql "SELECT symbol, count(*) FROM candles GROUP BY symbol"
+"""
+import argparse
+import logging
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from config import OUTPUT_DIR, QUERY_ENGINE
+from storage import DataStorage, table_to_frame
+
+logger = logging.getLogger(__name__)
+
+Filter = Tuple[str, str, object]
+
+FILE_PATTERN = re.compile(r'^(?P<symbol>[^_]+)_(?P<timeframe>\d+[mhdw])\.parquet$')
+SQL_OPS = {'==': '=', '!=': '<>', '<': '<', '<=': '<=', '>': '>', '>=': '>=',
+           'in': 'IN', 'not in': 'NOT IN'}
+
+
+def list_series(data_dir: str = OUTPUT_DIR) -> Dict[Tuple[str, str], List[Path]]:
+    """
+    Stored series in a data directory
+
+    Args:
+        data_dir: Data directory
+
+    Returns:
+        {(symbol, timeframe): parquet files}
+    """
+    data_path = Path(data_dir)
+    series = {}
+
+    for path in sorted(data_path.glob('*.parquet')):
+        match = FILE_PATTERN.match(path.name)
+        if match:
+            series.setdefault((match['symbol'], match['timeframe']), []).append(path)
+
+    for path in sorted(data_path.glob('**/symbol=*/timeframe=*')):
+        if path.is_dir():
+            key = (path.parent.name.split('=', 1)[1], path.name.split('=', 1)[1])
+            series.setdefault(key, []).extend(sorted(path.glob('**/*.parquet')))
+
+    return series
+
+
+def _as_column_time(value, field_type: pa.DataType) -> pd.Timestamp:
+    """Timestamp with the column's timezone (naive columns are UTC)"""
+    ts = pd.Timestamp(value)
+    if getattr(field_type, 'tz', None):
+        return ts.tz_localize('UTC') if ts.tz is None else ts.tz_convert('UTC')
+    if ts.tz is not None:
+        return ts.tz_convert('UTC').tz_localize(None)
+    return ts
+
+
+def _timestamp(value, field_type: pa.DataType) -> pa.Scalar:
+    """Timestamp scalar matching the column's unit and timezone"""
+    return pa.scalar(_as_column_time(value, field_type), type=field_type)
+
+
+def _time_filters(start, end) -> List[Filter]:
+    filters = []
+    if start is not None:
+        filters.append(('timestamp', '>=', start))
+    if end is not None:
+        filters.append(('timestamp', '<', end))
+    return filters
+
+
+def build_expression(filters: Sequence[Filter], schema: pa.Schema) -> Optional[ds.Expression]:
+    """
+    Arrow filter expression (timestamps converted to the column type)
+
+    Args:
+        filters: [(column, op, value), ...]
+        schema: Dataset schema
+
+    Returns:
+        Expression, or None without filters
+    """
+    converted = []
+    for column, op, value in filters:
+        field_type = schema.field(column).type
+        if pa.types.is_timestamp(field_type):
+            if op in ('in', 'not in'):
+                value = [_timestamp(v, field_type) for v in value]
+            else:
+                value = _timestamp(value, field_type)
+        converted.append((column, op, value))
+    return pq.filters_to_expression(converted) if converted else None
+
+
+def _partition_base(path: Path) -> Optional[Path]:
+    """Directory holding the symbol=X/... tree of a hive-partitioned file"""
+    for parent in path.parents:
+        if parent.name.startswith('symbol='):
+            return parent.parent
+    return None
+
+
+def _file_groups(files: List[Path]) -> List[Tuple[Optional[Path], List[Path]]]:
+    """
+    Split files into plain files and hive-partitioned trees
+
+    Partition files (symbol=X/timeframe=Y/part-*.parquet) do not store the
+    key columns; they come from the directory names.
+
+    Returns:
+        [(partition base directory or None, files), ...]
+    """
+    groups: Dict[Optional[Path], List[Path]] = {}
+    for file in files:
+        groups.setdefault(_partition_base(file), []).append(file)
+    return list(groups.items())
+
+
+def _sources(symbols, timeframes, data_dir, path) -> Tuple[List[Path], List[Filter], Dict]:
+    """
+    Files to scan, the symbol/timeframe filters they still need, and the
+    series with part files (merged last-row-wins instead of scanned as is)
+
+    Returns:
+        (files, filters, {(symbol, timeframe): files})
+    """
+    if path is not None:
+        path = Path(path)
+        files = sorted(path.glob('**/*.parquet')) if path.is_dir() else [path]
+        filters = []
+        if symbols:
+            filters.append(('symbol', 'in', list(symbols)))
+        if timeframes:
+            filters.append(('timeframe', 'in', list(timeframes)))
+        return files, filters, {}
+
+    files, merged = [], {}
+    for (symbol, timeframe), paths in list_series(data_dir).items():
+        if (symbols and symbol not in symbols) or (timeframes and timeframe not in timeframes):
+            continue
+        if any(_partition_base(file) for file in paths):
+            merged[(symbol, timeframe)] = paths
+        else:
+            files.extend(paths)
+    return files, [], merged
+
+
+def query(symbols: Optional[Sequence[str]] = None, timeframes: Optional[Sequence[str]] = None,
+          start=None, end=None, columns: Optional[Sequence[str]] = None,
+          where: Optional[Sequence[Filter]] = None, data_dir: str = OUTPUT_DIR,
+          path: Optional[str] = None, engine: str = QUERY_ENGINE,
+          as_table: bool = False) -> Union[pd.DataFrame, pa.Table]:
+    """
+    Read candles/features with column projection and predicate pushdown
+
+    Args:
+        symbols: Symbols to include (None = all)
+        timeframes: Timeframes to include (None = all)
+        start: Inclusive start timestamp
+        end: Exclusive end timestamp
+        columns: Columns to read (None = all)
+        where: Extra filters [(column, op, value), ...]
+        data_dir: Data directory with {SYMBOL}_{TIMEFRAME}.parquet files
+        path: Query this parquet file/directory instead (filters symbol and
+            timeframe columns)
+        engine: 'arrow' or 'duckdb'
+        as_table: Return an Arrow table instead of a DataFrame
+
+    Returns:
+        DataFrame (or Arrow table) sorted as stored, files in name order
+        (series with part files: by timestamp, after the other files)
+    """
+    files, filters, merged = _sources(symbols, timeframes, data_dir, path)
+    filters = filters + _time_filters(start, end) + list(where or [])
+    columns = list(columns) if columns else None
+
+    if not files and not merged:
+        logger.warning("No files match the query")
+        table = pa.table({name: [] for name in columns or []})
+    elif engine == 'arrow':
+        tables = []
+        for base, group in _file_groups(files):
+            dataset = ds.dataset([str(f) for f in group], format='parquet',
+                                 partitioning='hive' if base else None,
+                                 partition_base_dir=str(base) if base else None)
+            tables.append(dataset.to_table(columns=columns,
+                                           filter=build_expression(filters, dataset.schema)))
+        storage = DataStorage(output_dir=data_dir)
+        for (symbol, timeframe), _ in merged.items():
+            tables.append(_merged_table(storage, symbol, timeframe, columns, filters))
+        table = _concat(tables)
+    elif engine == 'duckdb':
+        tables = [_duckdb_query(group, columns, filters, hive=base is not None)
+                  for base, group in _file_groups(files)]
+        tables += [_duckdb_query(paths, columns, filters, merge=True) for paths in merged.values()]
+        table = _concat(tables)
+    else:
+        raise ValueError(f"Unknown query engine: {engine}")
+
+    return table if as_table else table_to_frame(table, writable=True)
+
+
+def _merged_table(storage: DataStorage, symbol: str, timeframe: str,
+                  columns: Optional[List[str]], filters: Sequence[Filter]) -> pa.Table:
+    """A series with part files as load_table merges it, then filtered"""
+    read_columns = None
+    if columns is not None:
+        read_columns = list(dict.fromkeys(['timestamp'] + columns + [c for c, _, _ in filters]))
+    table = storage.load_table(symbol, timeframe, read_columns)
+
+    expression = build_expression(filters, table.schema)
+    if expression is not None:
+        table = table.filter(expression)
+    return table.select(columns) if columns is not None else table
+
+
+def _file_list(files: List[Path]) -> str:
+    """SQL list literal of file paths"""
+    return '[' + ', '.join("'" + str(f).replace("'", "''") + "'" for f in files) + ']'
+
+
+def _merged_source(files: List[Path]) -> str:
+    """
+    DuckDB subquery of a series with part files, last written row per timestamp
+
+    The series file comes first, then the part files in write order (their
+    names sort by part index), as in DataStorage.load_table.
+    """
+    plain = [f for f in files if _partition_base(f) is None]
+    parts = [f for f in files if _partition_base(f) is not None]
+    reads = []
+    if plain:
+        reads.append(f"SELECT *, 0 AS _source FROM read_parquet({_file_list(plain)}, "
+                     f"union_by_name = true, filename = true)")
+    reads.append(f"SELECT *, 1 AS _source FROM read_parquet({_file_list(parts)}, "
+                 f"union_by_name = true, hive_partitioning = true, filename = true)")
+    return (f"(SELECT * EXCLUDE (_source, filename) FROM ({' UNION ALL BY NAME '.join(reads)}) "
+            f"QUALIFY row_number() OVER (PARTITION BY \"timestamp\" "
+            f"ORDER BY _source DESC, filename DESC) = 1)")
+
+
+def _concat(tables: List[pa.Table]) -> pa.Table:
+    """Concatenate group results in the stored column order (key columns after timestamp)"""
+    if len(tables) == 1 and not tables[0].num_columns:
+        return tables[0]
+    names = [n for n in ('timestamp', 'symbol', 'timeframe') if any(n in t.column_names for t in tables)]
+    for table in tables:
+        names += [n for n in table.column_names if n not in names]
+    tables = [t.select([n for n in names if n in t.column_names]) for t in tables]
+    if len(tables) == 1:
+        return tables[0]
+    return pa.concat_tables(tables, promote_options='permissive').select(names)
+
+
+def _duckdb():
+    try:
+        import duckdb
+    except ImportError:
+        raise ImportError("duckdb not installed. Install with: pip install duckdb")
+    return duckdb
+
+
+def _arrow(result) -> pa.Table:
+    """DuckDB result as an Arrow table (arrow() returns a reader in newer versions)"""
+    table = result.arrow()
+    return table.read_all() if isinstance(table, pa.RecordBatchReader) else table
+
+
+def _duckdb_query(files: List[Path], columns: Optional[List[str]],
+                  filters: Sequence[Filter], hive: bool = False, merge: bool = False) -> pa.Table:
+    """
+    Run a query() in DuckDB (it pushes projections and filters into the scan)
+
+    With merge=True the files are one series with part files, read last row
+    wins per timestamp before the filters apply (see _merged_source).
+    """
+    duckdb = _duckdb()
+    schema = pq.read_schema(files[0])
+    select = ', '.join(f'"{c}"' for c in columns) if columns else '*'
+    conditions, params = [], []
+    for column, op, value in filters:
+        if op not in SQL_OPS:
+            raise ValueError(f"Unsupported filter operator: {op}")
+        values = list(value) if op in ('in', 'not in') else [value]
+        # Partition keys are not in the file schema
+        field_type = schema.field(column).type if column in schema.names else pa.string()
+        if pa.types.is_timestamp(field_type):
+            values = [_as_column_time(v, field_type).to_pydatetime() for v in values]
+        placeholders = ', '.join('?' * len(values))
+        conditions.append(f'"{column}" {SQL_OPS[op]} ' +
+                          (f'({placeholders})' if op in ('in', 'not in') else placeholders))
+        params.extend(values)
+
+    if merge:
+        source, source_params = _merged_source(files), []
+    else:
+        source = f"read_parquet(?, union_by_name = true, hive_partitioning = {str(hive).lower()})"
+        source_params = [[str(f) for f in files]]
+
+    statement = f"SELECT {select} FROM {source}"
+    if conditions:
+        statement += " WHERE " + " AND ".join(conditions)
+    if merge:
+        statement += ' ORDER BY "timestamp"'
+
+    with duckdb.connect() as con:
+        return _arrow(con.execute(statement, source_params + params))
+
+
+def sql(statement: str, data_dir: str = OUTPUT_DIR, as_table: bool = False,
+        **views: str) -> Union[pd.DataFrame, pa.Table]:
+    """
+    Run SQL in DuckDB over the data directory
+
+    The view `candles` covers every stored series; extra views map a name
+    to a parquet path or glob (e.g. features='data/features.parquet').
+
+    Args:
+        statement: SQL statement
+        data_dir: Data directory
+        as_table: Return an Arrow table instead of a DataFrame
+        **views: Additional {view name: parquet path}
+
+    Returns:
+        DataFrame (or Arrow table)
+    """
+    duckdb = _duckdb()
+    files, _, merged = _sources(None, None, data_dir, None)
+
+    with duckdb.connect() as con:
+        if files or merged:
+            reads = []
+            for base, group in _file_groups(files):
+                reads.append(f"SELECT * FROM read_parquet({_file_list(group)}, union_by_name = true, "
+                             f"hive_partitioning = {str(base is not None).lower()})")
+            reads += [f"SELECT * FROM {_merged_source(paths)}" for paths in merged.values()]
+            con.execute("CREATE VIEW candles AS " + " UNION ALL BY NAME ".join(reads))
+        for name, view_path in views.items():
+            escaped = str(view_path).replace("'", "''")
+            con.execute(f'CREATE VIEW "{name}" AS SELECT * FROM read_parquet(\'{escaped}\')')
+        table = _arrow(con.execute(statement))
+
+    return table if as_table else table_to_frame(table, writable=True)
+
+
+def parse_where(text: str) -> Filter:
+    """
+    Parse a CLI filter such as "close > 1.1" or "symbol == EURUSD"
+
+    Args:
+        text: "column op value"
+
+    Returns:
+        (column, op, value)
+    """
+    match = re.match(r'^\s*(\w+)\s*(==|!=|<=|>=|<|>)\s*(.+?)\s*$', text)
+    if not match:
+        raise ValueError(f"Cannot parse filter: {text!r} (expected 'column op value')")
+    column, op, value = match.groups()
+    try:
+        value = float(value) if '.' in value or 'e' in value.lower() else int(value)
+    except ValueError:
+        value = value.strip('\'"')
+    return column, op, value
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='Query stored candles and features')
+    parser.add_argument('--symbols', nargs='+')
+    parser.add_argument('--timeframes', nargs='+')
+    parser.add_argument('--start', help='Inclusive start (e.g. 2025-06-01)')
+    parser.add_argument('--end', help='Exclusive end')
+    parser.add_argument('--columns', nargs='+')
+    parser.add_argument('--where', action='append', default=[],
+                        help='Filter "column op value" (repeatable)')
+    parser.add_argument('--data-dir', default=OUTPUT_DIR)
+    parser.add_argument('--path', help='Parquet file/directory to query instead of the data directory')
+    parser.add_argument('--engine', choices=['arrow', 'duckdb'], default=QUERY_ENGINE)
+    parser.add_argument('--sql', help='SQL over the view "candles" (requires duckdb)')
+    parser.add_argument('--head', type=int, default=10, help='Rows to print (0 = all)')
+    parser.add_argument('--output', help='Save the result to this parquet file')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if args.sql:
+        table = sql(args.sql, data_dir=args.data_dir, as_table=True)
+    else:
+        table = query(args.symbols, args.timeframes, args.start, args.end, args.columns,
+                      [parse_where(w) for w in args.where], data_dir=args.data_dir,
+                      path=args.path, engine=args.engine, as_table=True)
+
+    print(f"{table.num_rows:,} rows × {table.num_columns} columns")
+    if args.output:
+        pq.write_table(table, args.output)
+        print(f"✓ Saved to {args.output}")
+    df = table_to_frame(table)
+    print(df.to_string(index=False) if args.head == 0 else df.head(args.head).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
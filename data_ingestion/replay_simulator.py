@@ -0,0 +1,316 @@
+"""
+Historical replay simulator
+
+Streams stored data/{symbol}_{timeframe}.parquet candles through the live
+path (ParquetReplayFeed -> LiveTradingRunner -> TradingDecisionEngine) at a
+configurable speed, then checks the live signals against the batch path
+(FeatureEngineeringPipeline over the full history, including HTF joins ->
+persisted scaler -> TradingDecisionEngine.process_features) and reports
+throughput in candles/sec per symbol. A symbol passes when every signal
+matches and every probability is within the tolerance (--tolerance).
+
+Known sources of live/batch differences:
+    - Swing points (MarketStructureFeatures) need `window` candles on both
+      sides and order blocks (LiquidityFeatures) look one candle ahead, so
+      batch values use future candles that live can never see.
+    - Live features other than the EMAs/MACD (which run on incremental
+      state) are computed over a bounded window: a swing point older than
+      the window is lost for the swing distance features.
+
+Usage:
+    python replay_simulator.py --symbols BTCUSD ETHUSD --timeframe 1h --speed max
+"""
+import argparse
+import asyncio
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import SYMBOLS, LOG_DIR, LIVE_WINDOW_CANDLES, LIVE_WARMUP_CANDLES
+from live_runner import (
+    BASE_DIR, CollectingSink, LiveFeatureEngine,
+    LiveTradingRunner, ParquetReplayFeed, TradingDecisionEngine, load_feature_pipeline
+)
+
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+logger = logging.getLogger(__name__)
+
+PROBABILITY_COLUMNS = ['pred_direction', 'pred_volatility', 'pred_notrade']
+PARITY_TOLERANCE = 1e-6  # Max absolute live/batch probability difference
+
+
+class RecordingFeatureEngine(LiveFeatureEngine):
+    """LiveFeatureEngine that keeps every feature row it produces"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rows: Dict[str, List[pd.Series]] = {}
+
+    def update(self, candle) -> Optional[pd.Series]:
+        features = super().update(candle)
+        if features is not None:
+            self.rows.setdefault(candle.symbol, []).append(features)
+        return features
+
+    def to_frame(self, symbol: str) -> pd.DataFrame:
+        rows = self.rows.get(symbol, [])
+        return pd.DataFrame(rows).reset_index(drop=True) if rows else pd.DataFrame()
+
+
+def parse_speed(value: str) -> Optional[float]:
+    """Parse 'max', 'realtime' or a multiplier such as '60' / '60x'"""
+    value = value.strip().lower()
+    if value == 'max':
+        return None
+    if value in ('realtime', 'real-time'):
+        return 1.0
+    return float(value.rstrip('x'))
+
+
+def batch_signals(engine: TradingDecisionEngine, scaler, candles: pd.DataFrame,
+                  feature_columns: List[str], symbol: str,
+                  timeframe: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Batch path: the training feature pipeline over the full history, then
+    the persisted scaler and process_features
+
+    Args:
+        engine: Decision engine with loaded models
+        scaler: Scaler saved by feature_pipeline.py
+        candles: OHLCV DataFrame for one symbol
+        feature_columns: Model input columns (same order as the live path)
+        symbol: Trading symbol
+        timeframe: Timeframe of the candles
+
+    Returns:
+        (unscaled features DataFrame, signals DataFrame) for complete rows
+    """
+    feature_pipeline = load_feature_pipeline()
+    pipeline = feature_pipeline.FeatureEngineeringPipeline(columns=feature_columns)
+
+    features = pipeline.engineer_features(candles, symbol, timeframe)
+    joined = pipeline.add_htf_features({timeframe: features}, {timeframe: candles}, symbol)
+    if timeframe not in joined:
+        raise ValueError(f"Cannot build HTF features for {symbol} {timeframe} from its own candles")
+    features = joined[timeframe].reset_index(drop=True)
+
+    model_input = feature_pipeline.scale_columns(scaler, features[feature_columns])
+    signals = engine.process_features(model_input, timestamps=features['timestamp'])
+    signals['timestamp'] = features['timestamp']
+
+    return features, signals[['timestamp', 'signal', 'signal_quality'] + PROBABILITY_COLUMNS]
+
+
+def compare_signals(live: pd.DataFrame, batch: pd.DataFrame,
+                    tolerance: float = PARITY_TOLERANCE, max_examples: int = 10) -> Dict:
+    """
+    Compare live and batch signals on shared timestamps
+
+    Args:
+        live: Live signals (CollectingSink.to_frame() for one symbol)
+        batch: Batch signals from batch_signals()
+        tolerance: Max absolute probability difference counted as equal
+        max_examples: Number of mismatching rows to include
+
+    Returns:
+        Parity statistics; 'passed' requires every signal to match and every
+        probability to be within tolerance
+    """
+    merged = live.merge(batch, on='timestamp', suffixes=('_live', '_batch'))
+    if merged.empty:
+        return {'compared': 0, 'signal_match_rate': None, 'passed': False}
+
+    signal_match = merged['signal_live'] == merged['signal_batch']
+    prob_diff = np.column_stack([
+        (merged[f'{col}_live'] - merged[f'{col}_batch']).abs() for col in PROBABILITY_COLUMNS
+    ]).max(axis=1)
+
+    mismatches = merged.loc[~signal_match, ['timestamp', 'signal_live', 'signal_batch']]
+
+    return {
+        'compared': int(len(merged)),
+        'live_only': int(len(live) - len(merged)),
+        'signal_matches': int(signal_match.sum()),
+        'signal_match_rate': float(signal_match.mean()),
+        'probability_match_rate': float((prob_diff <= tolerance).mean()),
+        'max_probability_diff': float(prob_diff.max()),
+        'tolerance': tolerance,
+        'passed': bool(signal_match.all() and prob_diff.max() <= tolerance),
+        'mismatches': [
+            {'timestamp': str(r.timestamp), 'live': r.signal_live, 'batch': r.signal_batch}
+            for r in mismatches.head(max_examples).itertuples(index=False)
+        ]
+    }
+
+
+def compare_features(live: pd.DataFrame, batch: pd.DataFrame, feature_columns: List[str],
+                     tolerance: float = 1e-6, top: int = 10) -> Dict[str, float]:
+    """
+    Share of rows where each feature differs between live and batch
+
+    Returns:
+        {column: mismatch rate} for the worst `top` columns with any mismatch
+    """
+    merged = live[['timestamp'] + feature_columns].merge(
+        batch[['timestamp'] + feature_columns], on='timestamp', suffixes=('_live', '_batch'))
+    if merged.empty:
+        return {}
+
+    rates = {}
+    for col in feature_columns:
+        diff = (merged[f'{col}_live'].astype(float) - merged[f'{col}_batch'].astype(float)).abs()
+        rate = float((diff > tolerance).mean())
+        if rate > 0:
+            rates[col] = round(rate, 4)
+
+    return dict(sorted(rates.items(), key=lambda x: x[1], reverse=True)[:top])
+
+
+def run_replay(engine: TradingDecisionEngine, scaler, symbols: List[str], timeframe: str,
+               speed: Optional[float] = None, limit: Optional[int] = None,
+               window: int = LIVE_WINDOW_CANDLES, warmup: int = LIVE_WARMUP_CANDLES,
+               check_parity: bool = True, tolerance: float = PARITY_TOLERANCE) -> Dict:
+    """
+    Replay stored candles through the live path and check parity with batch
+
+    Args:
+        engine: Decision engine with loaded models
+        scaler: Scaler saved by feature_pipeline.py
+        symbols: Symbols to replay
+        timeframe: Timeframe string (e.g., 1h)
+        speed: Replay speed multiplier (None = as fast as possible)
+        limit: Max candles per symbol
+        window: Live feature window (candles)
+        warmup: Candles before the first live signal
+        check_parity: Compare live signals with the batch path
+        tolerance: Max absolute live/batch probability difference for a pass
+
+    Returns:
+        Report dictionary
+    """
+    feed = ParquetReplayFeed(symbols, timeframe, limit=limit, speed=speed)
+    feature_engine = RecordingFeatureEngine(window=window, warmup=warmup, columns=engine.feature_names)
+    sink = CollectingSink()
+    runner = LiveTradingRunner(feed, engine, sink, scaler, feature_engine=feature_engine)
+
+    logger.info(f"Replaying {', '.join(feed.frames)} {timeframe} "
+                f"at {'max' if speed is None else f'{speed:g}x'} speed...")
+    stats = asyncio.run(runner.run())
+
+    report = {
+        'timestamp': datetime.now().isoformat(),
+        'timeframe': timeframe,
+        'speed': 'max' if speed is None else speed,
+        'window': window,
+        'warmup': warmup,
+        'candles_processed': stats['candles_processed'],
+        'signals_emitted': stats['signals_emitted'],
+        'elapsed_seconds': stats['elapsed_seconds'],
+        'symbols': {}
+    }
+
+    live_signals = sink.to_frame()
+
+    for symbol in feed.frames:
+        symbol_report = {
+            'throughput': stats['throughput'].get(symbol, {}),
+            'latency': stats['latency'].get(symbol, {})
+        }
+
+        if check_parity and runner.feature_columns and not live_signals.empty:
+            live = live_signals[live_signals['symbol'] == symbol]
+            batch_features, batch = batch_signals(engine, scaler, feed.frames[symbol],
+                                                  runner.feature_columns, symbol, timeframe)
+            symbol_report['parity'] = compare_signals(live, batch, tolerance)
+            symbol_report['parity']['feature_mismatch_rates'] = compare_features(
+                feature_engine.to_frame(symbol), batch_features, runner.feature_columns)
+
+        report['symbols'][symbol] = symbol_report
+
+    return report
+
+
+def print_report(report: Dict):
+    """Print a replay report"""
+    logger.info("\n" + "="*80)
+    logger.info("REPLAY SUMMARY")
+    logger.info("="*80)
+    logger.info(f"Candles processed: {report['candles_processed']:,}")
+    logger.info(f"Signals emitted:   {report['signals_emitted']:,}")
+    logger.info(f"Elapsed:           {report['elapsed_seconds']:.1f}s")
+
+    for symbol, result in report['symbols'].items():
+        rate = result['throughput']
+        logger.info(f"\n{symbol}")
+        if rate:
+            logger.info(f"  Throughput: {rate['candles_per_sec']:.1f} candles/sec "
+                        f"(max {rate['max_candles_per_sec']:.1f})")
+
+        parity = result.get('parity')
+        if not parity or not parity['compared']:
+            continue
+
+        marker = '✓' if parity['passed'] else '✗'
+        logger.info(f"  {marker} Signals match batch: {parity['signal_matches']:,}/"
+                    f"{parity['compared']:,} ({parity['signal_match_rate']:.2%})")
+        logger.info(f"  Max probability diff: {parity['max_probability_diff']:.2e} "
+                    f"(tolerance {parity['tolerance']:.0e}, "
+                    f"{parity['probability_match_rate']:.2%} of rows within)")
+        for col, rate in parity['feature_mismatch_rates'].items():
+            logger.info(f"    {col:<32} differs on {rate:.1%} of rows")
+
+
+def main():
+    """Run the replay simulator"""
+    parser = argparse.ArgumentParser(description='Replay stored candles through the live path')
+    parser.add_argument('--symbols', nargs='+', default=SYMBOLS)
+    parser.add_argument('--timeframe', default='1h')
+    parser.add_argument('--split', default='Split_2', help='Model split to load')
+    parser.add_argument('--scaler', default=None,
+                        help='Feature scaler saved by feature_pipeline.py (default: data/feature_scaler.pkl)')
+    parser.add_argument('--speed', type=parse_speed, default=None,
+                        help="'max' (default), 'realtime' or a multiplier such as 60x")
+    parser.add_argument('--limit', type=int, default=None, help='Max candles per symbol')
+    parser.add_argument('--window', type=int, default=LIVE_WINDOW_CANDLES)
+    parser.add_argument('--warmup', type=int, default=LIVE_WARMUP_CANDLES)
+    parser.add_argument('--no-parity', action='store_true', help='Skip the batch comparison')
+    parser.add_argument('--tolerance', type=float, default=PARITY_TOLERANCE,
+                        help='Max live/batch probability difference for a pass')
+    args = parser.parse_args()
+
+    logger.info("="*80)
+    logger.info("REPLAY SIMULATOR")
+    logger.info("="*80)
+
+    feature_pipeline = load_feature_pipeline()
+    scaler = feature_pipeline.load_scaler(args.scaler or BASE_DIR / feature_pipeline.SCALER_FILE)
+
+    models_dir = BASE_DIR / 'models'
+    engine = TradingDecisionEngine(
+        direction_model_path=str(models_dir / f'direction_model_{args.split}.pkl'),
+        volatility_model_path=str(models_dir / f'volatility_model_{args.split}.pkl'),
+        notrade_model_path=str(models_dir / f'notrade_model_{args.split}.pkl')
+    )
+
+    report = run_replay(engine, scaler, args.symbols, args.timeframe, speed=args.speed,
+                        limit=args.limit, window=args.window, warmup=args.warmup,
+                        check_parity=not args.no_parity, tolerance=args.tolerance)
+    print_report(report)
+
+    # Save report
+    logs_dir = Path(LOG_DIR)
+    logs_dir.mkdir(exist_ok=True)
+    output_file = logs_dir / f"replay_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output_file, 'w') as f:
+        json.dump(report, f, indent=2, default=str)
+
+    logger.info(f"\n✓ Report saved to: {output_file}")
+
+
+if __name__ == '__main__':
+    main()
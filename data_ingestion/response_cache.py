@@ -0,0 +1,243 @@
+"""
+On-disk cache for data source responses
+
+Each response (one request window of one source/symbol/interval) is stored
+as a compressed Arrow IPC file. Windows that ended long enough ago are
+immutable and never expire; recent windows get a TTL so they are refetched
+once the provider has settled them. The cache is kept under a total size by
+evicting the least recently used files.
+
+Usage:
+    python response_cache.py --stats
+    python response_cache.py --prune
+    python response_cache.py --clear
+"""
+import argparse
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional
+
+import pandas as pd
+
+from config import (
+    FETCH_CACHE_DIR, FETCH_CACHE_MAX_MB, FETCH_CACHE_RECENT_TTL_SECONDS,
+    FETCH_CACHE_SETTLE_HOURS, FETCH_CACHE_COMPRESSION
+)
+
+logger = logging.getLogger(__name__)
+
+EXPIRES_KEY = b'expires_at'  # epoch seconds, absent = never
+
+
+class ResponseCache:
+    """Compressed Arrow cache keyed by (source, symbol, interval, window)"""
+
+    def __init__(self, cache_dir: str = FETCH_CACHE_DIR, max_mb: float = FETCH_CACHE_MAX_MB,
+                 recent_ttl_seconds: float = FETCH_CACHE_RECENT_TTL_SECONDS,
+                 settle_hours: float = FETCH_CACHE_SETTLE_HOURS,
+                 compression: str = FETCH_CACHE_COMPRESSION):
+        """
+        Args:
+            cache_dir: Cache directory
+            max_mb: Max total size; least recently used files are evicted beyond it
+            recent_ttl_seconds: TTL of windows ending less than settle_hours ago
+            settle_hours: Age after which a window's data is treated as final
+            compression: Arrow IPC compression codec (zstd or lz4)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.recent_ttl = recent_ttl_seconds
+        self.settle = timedelta(hours=settle_hours)
+        self.compression = compression
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'writes': 0, 'evicted': 0}
+
+    def _path(self, source: str, symbol: str, interval: str, start: datetime, end: datetime) -> Path:
+        name = f"{start:%Y%m%d%H%M}_{end:%Y%m%d%H%M}.arrow"
+        return self.cache_dir / source / f"{symbol}_{interval}" / name
+
+    def ttl_for(self, end: datetime, now: Optional[datetime] = None) -> Optional[float]:
+        """TTL in seconds for a window (None = never expires)"""
+        now = now or pd.Timestamp.now('UTC').tz_localize(None)
+        return None if end <= now - self.settle else self.recent_ttl
+
+    def get(self, source: str, symbol: str, interval: str, start: datetime,
+            end: datetime) -> Optional[pd.DataFrame]:
+        """
+        Cached response
+
+        Returns:
+            DataFrame (possibly empty), or None on a miss or expired entry
+        """
+        import pyarrow as pa
+
+        path = self._path(source, symbol, interval, start, end)
+        try:
+            with pa.OSFile(str(path), 'rb') as source_file:
+                table = pa.ipc.open_file(source_file).read_all()
+        except FileNotFoundError:
+            self._count('misses')
+            return None
+        except (OSError, pa.ArrowInvalid) as e:
+            logger.warning(f"Dropping unreadable cache file {path}: {str(e)}")
+            self._remove(path)
+            self._count('misses')
+            return None
+
+        expires = (table.schema.metadata or {}).get(EXPIRES_KEY)
+        if expires is not None and float(expires) <= time.time():
+            self._remove(path)
+            self._count('expired')
+            return None
+
+        # Mark as recently used for eviction
+        os.utime(path)
+        self._count('hits')
+        return table.to_pandas()
+
+    def put(self, source: str, symbol: str, interval: str, start: datetime, end: datetime,
+            df: pd.DataFrame, ttl_seconds: Optional[float] = None):
+        """
+        Store a response
+
+        Args:
+            df: Response data (empty frames are cached too)
+            ttl_seconds: Seconds until expiry (None = never)
+        """
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if ttl_seconds is not None:
+            table = table.replace_schema_metadata({
+                **(table.schema.metadata or {}),
+                EXPIRES_KEY: str(time.time() + ttl_seconds).encode()
+            })
+
+        path = self._path(source, symbol, interval, start, end)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write then rename so an interrupted run never leaves a partial file
+        tmp_path = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        options = pa.ipc.IpcWriteOptions(compression=self.compression)
+        with pa.OSFile(str(tmp_path), 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema, options=options) as writer:
+                writer.write_table(table)
+
+        with self._lock:
+            total = self._total()
+            if path.exists():
+                total -= path.stat().st_size
+            os.replace(tmp_path, path)
+            self._total_bytes = total + path.stat().st_size
+            self.stats['writes'] += 1
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _files(self):
+        return list(self.cache_dir.rglob('*.arrow')) if self.cache_dir.exists() else []
+
+    def _total(self) -> int:
+        """Total cache size in bytes (scanned once, then tracked)"""
+        if self._total_bytes is None:
+            self._total_bytes = sum(p.stat().st_size for p in self._files())
+        return self._total_bytes
+
+    def _remove(self, path: Path):
+        with self._lock:
+            try:
+                size = path.stat().st_size
+                path.unlink()
+            except FileNotFoundError:
+                return
+            if self._total_bytes is not None:
+                self._total_bytes -= size
+
+    def _evict(self):
+        """Delete least recently used files until under max size (lock held)"""
+        files = sorted(((p.stat().st_mtime, p.stat().st_size, p) for p in self._files()),
+                       key=lambda x: x[0])
+        for _, size, path in files:
+            if self._total_bytes <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            self._total_bytes -= size
+            self.stats['evicted'] += 1
+
+    def prune(self) -> int:
+        """Remove expired entries and enforce the size limit; returns files removed"""
+        import pyarrow as pa
+
+        removed = 0
+        now = time.time()
+        for path in self._files():
+            try:
+                with pa.OSFile(str(path), 'rb') as source_file:
+                    metadata = pa.ipc.open_file(source_file).schema.metadata or {}
+            except (OSError, pa.ArrowInvalid):
+                metadata = {EXPIRES_KEY: b'0'}
+            expires = metadata.get(EXPIRES_KEY)
+            if expires is not None and float(expires) <= now:
+                self._remove(path)
+                removed += 1
+
+        with self._lock:
+            evicted = self.stats['evicted']
+            self._total()
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+            removed += self.stats['evicted'] - evicted
+        return removed
+
+    def clear(self):
+        """Delete the whole cache"""
+        with self._lock:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+            self._total_bytes = 0
+
+    def info(self) -> Dict:
+        """Entry count and size on disk"""
+        files = self._files()
+        return {
+            'cache_dir': str(self.cache_dir),
+            'entries': len(files),
+            'size_mb': round(sum(p.stat().st_size for p in files) / 1024 / 1024, 2),
+            'max_mb': round(self.max_bytes / 1024 / 1024, 2)
+        }
+
+
+def main():
+    """Inspect or maintain the response cache"""
+    parser = argparse.ArgumentParser(description='Data source response cache')
+    parser.add_argument('--cache-dir', default=FETCH_CACHE_DIR)
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--stats', action='store_true', help='Show entries and size (default)')
+    group.add_argument('--prune', action='store_true', help='Remove expired entries, enforce max size')
+    group.add_argument('--clear', action='store_true', help='Delete the cache')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    cache = ResponseCache(cache_dir=args.cache_dir)
+
+    if args.prune:
+        logger.info(f"✓ Removed {cache.prune()} cache files")
+    elif args.clear:
+        cache.clear()
+        logger.info(f"✓ Cleared {args.cache_dir}")
+
+    info = cache.info()
+    logger.info(f"{info['entries']:,} entries, {info['size_mb']} MB of {info['max_mb']} MB "
+                f"in {info['cache_dir']}")
+
+
+if __name__ == '__main__':
+    main()
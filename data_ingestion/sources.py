@@ -0,0 +1,369 @@
+"""
+Data source adapters
+
+Every source implements DataSource.fetch for one request window and declares
+what it can serve, so callers can plan requests without trial and error:
+    interval_map       - fetch interval per pipeline timeframe (4h is fetched as 1h)
+    max_history_days   - how far back each fetch interval is available
+    max_request_days   - longest range a single request may cover
+    limits             - request rate limits
+    cacheable          - whether responses go through the fetcher's response cache
+
+Sources register themselves by name:
+
+    @register_source('my_source')
+    class MySource(DataSource): ...
+
+    source = create_source('my_source')
+"""
+import json
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional, Type
+
+import pandas as pd
+
+from config import LOCAL_SOURCE_DIR, ALPHA_VANTAGE_API_KEY, YFINANCE_SYMBOL_MAP
+
+logger = logging.getLogger(__name__)
+
+OHLCV_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume', 'spread']
+
+
+@dataclass
+class SourceLimits:
+    """Request rate limits of a source (None = unlimited)"""
+    min_interval_seconds: float = 0.0
+    requests_per_minute: Optional[int] = None
+    requests_per_day: Optional[int] = None
+
+
+class RateLimiter:
+    """Blocking, thread-safe limiter enforcing SourceLimits"""
+
+    def __init__(self, limits: SourceLimits):
+        self.limits = limits
+        self._lock = threading.Lock()
+        self._last = float('-inf')
+        self._minute = deque()
+        self._day = deque()
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until the next request is allowed"""
+        for window, limit, span in ((self._minute, self.limits.requests_per_minute, 60),
+                                    (self._day, self.limits.requests_per_day, 86400)):
+            while window and window[0] <= now - span:
+                window.popleft()
+        waits = [self._last + self.limits.min_interval_seconds - now]
+        if self.limits.requests_per_minute and len(self._minute) >= self.limits.requests_per_minute:
+            waits.append(self._minute[0] + 60 - now)
+        if self.limits.requests_per_day and len(self._day) >= self.limits.requests_per_day:
+            waits.append(self._day[0] + 86400 - now)
+        return max(0.0, *waits)
+
+    def acquire(self):
+        """Block until a request may be sent and record it"""
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                wait = self.wait_time(now)
+                if wait <= 0:
+                    break
+                time.sleep(wait)
+            self._last = now
+            self._minute.append(now)
+            self._day.append(now)
+
+
+def standardize_ohlcv(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Select OHLCV columns, coerce to float, convert timestamps to naive UTC
+    and (re)compute spread (% of close)
+    """
+    df = df[['timestamp', 'open', 'high', 'low', 'close', 'volume']].copy()
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    if df['timestamp'].dt.tz is not None:
+        df['timestamp'] = df['timestamp'].dt.tz_convert('UTC').dt.tz_localize(None)
+    for column in ['open', 'high', 'low', 'close', 'volume']:
+        df[column] = pd.to_numeric(df[column], errors='coerce').astype(float)
+    df['volume'] = df['volume'].fillna(0)
+    df['spread'] = ((df['high'] - df['low']) / df['close'] * 100).round(4)
+    return df
+
+
+class DataSource:
+    """Base class for data source adapters"""
+
+    name = 'base'
+    interval_map: Dict[str, str] = {'1m': '1m', '5m': '5m', '15m': '15m', '1h': '1h', '4h': '1h'}
+    max_history_days: Dict[str, Optional[int]] = {}
+    max_request_days: Dict[str, Optional[int]] = {}
+    default_limits = SourceLimits()
+    cacheable = True
+
+    def __init__(self, limits: Optional[SourceLimits] = None):
+        """
+        Args:
+            limits: Override the source's default rate limits
+        """
+        self.limits = limits or self.default_limits
+        self.rate_limiter = RateLimiter(self.limits)
+
+    def source_interval(self, interval: str) -> str:
+        """Interval requested from the source for a pipeline timeframe"""
+        return self.interval_map.get(interval, interval)
+
+    def supports(self, symbol: str, interval: str) -> bool:
+        """Whether the source can serve a symbol/timeframe"""
+        return interval in self.interval_map
+
+    def history_start(self, interval: str, end_date: datetime) -> Optional[datetime]:
+        """Earliest start date available for a timeframe (None = unlimited)"""
+        days = self.max_history_days.get(self.source_interval(interval))
+        if days is None:
+            return None
+        return end_date - timedelta(days=days)
+
+    def request_span(self, interval: str) -> Optional[timedelta]:
+        """Longest range one request may cover (None = unlimited)"""
+        days = self.max_request_days.get(self.source_interval(interval))
+        return timedelta(days=days) if days is not None else None
+
+    def fetch(self, symbol: str, start_date: datetime, end_date: datetime,
+              interval: str) -> Optional[pd.DataFrame]:
+        """
+        Fetch one request window
+
+        The start is clipped to the source's history limit; the range is
+        expected to fit in request_span (split longer ranges beforehand).
+
+        Args:
+            symbol: Trading symbol (pipeline naming, e.g. EURUSD)
+            start_date: Start of the window
+            end_date: End of the window
+            interval: Pipeline timeframe (1m, 5m, 15m, 1h, 4h)
+
+        Returns:
+            Standardized OHLCV DataFrame or None if nothing was returned
+        """
+        history_start = self.history_start(interval, pd.Timestamp.now('UTC').tz_localize(None))
+        if history_start is not None and start_date < history_start:
+            logger.info(f"{self.name}: {interval} history is limited to "
+                        f"{self.max_history_days[self.source_interval(interval)]} days, "
+                        f"starting at {history_start:%Y-%m-%d}")
+            start_date = history_start
+        if start_date >= end_date:
+            return None
+
+        self.rate_limiter.acquire()
+        df = self._fetch(symbol, start_date, end_date, self.source_interval(interval))
+        if df is None or df.empty:
+            return None
+        return standardize_ohlcv(df)
+
+    def _fetch(self, symbol: str, start_date: datetime, end_date: datetime,
+               source_interval: str) -> Optional[pd.DataFrame]:
+        """Source-specific request; returns timestamp + OHLCV columns"""
+        raise NotImplementedError
+
+
+SOURCES: Dict[str, Type[DataSource]] = {}
+
+
+def register_source(name: str):
+    """Class decorator registering a DataSource under a name"""
+    def decorator(cls: Type[DataSource]) -> Type[DataSource]:
+        cls.name = name
+        SOURCES[name] = cls
+        return cls
+    return decorator
+
+
+def create_source(name: str, **kwargs) -> DataSource:
+    """Instantiate a registered source"""
+    if name not in SOURCES:
+        raise ValueError(f"Unknown data source '{name}'. Available: {sorted(SOURCES)}")
+    return SOURCES[name](**kwargs)
+
+
+@register_source('yfinance')
+class YFinanceSource(DataSource):
+    """Yahoo Finance via the yfinance package"""
+
+    # Yahoo only serves recent intraday data and caps the span per request
+    max_history_days = {'1m': 29, '5m': 59, '15m': 59, '1h': 729}
+    max_request_days = {'1m': 7, '5m': 59, '15m': 59, '1h': 729}
+    default_limits = SourceLimits(min_interval_seconds=1.0, requests_per_minute=30)
+
+    def __init__(self, limits: Optional[SourceLimits] = None,
+                 symbol_map: Optional[Dict[str, str]] = None, max_retries: int = 3):
+        """
+        Args:
+            limits: Override the default rate limits
+            symbol_map: Pipeline symbol -> Yahoo ticker (default: config.YFINANCE_SYMBOL_MAP)
+            max_retries: Attempts per request
+        """
+        super().__init__(limits)
+        self.symbol_map = symbol_map or YFINANCE_SYMBOL_MAP
+        self.max_retries = max_retries
+
+    def _fetch(self, symbol: str, start_date: datetime, end_date: datetime,
+               source_interval: str) -> Optional[pd.DataFrame]:
+        try:
+            import yfinance as yf
+            import ssl
+
+            # Fix SSL issue for Python 3.13
+            try:
+                ssl._create_default_https_context = ssl._create_unverified_context
+            except Exception:
+                pass
+        except ImportError:
+            logger.error("yfinance not installed. Install with: pip install yfinance")
+            return None
+
+        yf_symbol = self.symbol_map.get(symbol, symbol)
+        logger.info(f"Fetching {yf_symbol} data for {source_interval} from {start_date} to {end_date}")
+
+        df = pd.DataFrame()
+        for attempt in range(self.max_retries):
+            try:
+                df = yf.Ticker(yf_symbol).history(start=start_date, end=end_date,
+                                                  interval=source_interval)
+                # Yahoo intermittently answers with an empty frame; ask again
+                if not df.empty:
+                    break
+            except Exception as e:
+                if attempt < self.max_retries - 1:
+                    logger.warning(f"Attempt {attempt + 1} failed, retrying...")
+                    time.sleep(2)
+                else:
+                    raise e
+
+        if df.empty:
+            logger.warning(f"No data returned for {symbol} {source_interval}")
+            return None
+
+        df = df.rename(columns={'Open': 'open', 'High': 'high', 'Low': 'low',
+                                'Close': 'close', 'Volume': 'volume'})
+        df = df.reset_index()
+        return df.rename(columns={'Date': 'timestamp', 'Datetime': 'timestamp'})
+
+
+@register_source('alpha_vantage')
+class AlphaVantageSource(DataSource):
+    """
+    Alpha Vantage FX_INTRADAY / CRYPTO_INTRADAY
+
+    Requires an API key (ALPHA_VANTAGE_API_KEY). Intraday endpoints return
+    the most recent month with outputsize=full.
+    """
+
+    URL = 'https://www.alphavantage.co/query'
+    CRYPTO = {'BTC', 'ETH'}
+
+    interval_map = {'1m': '1min', '5m': '5min', '15m': '15min', '1h': '60min', '4h': '60min'}
+    max_history_days = {'1min': 30, '5min': 30, '15min': 30, '60min': 30}
+    max_request_days = {'1min': 30, '5min': 30, '15min': 30, '60min': 30}
+    # Free tier
+    default_limits = SourceLimits(min_interval_seconds=12.0, requests_per_minute=5,
+                                  requests_per_day=25)
+
+    def __init__(self, limits: Optional[SourceLimits] = None, api_key: str = ALPHA_VANTAGE_API_KEY):
+        """
+        Args:
+            limits: Override the default (free tier) rate limits
+            api_key: Alpha Vantage API key
+        """
+        super().__init__(limits)
+        self.api_key = api_key
+
+    def supports(self, symbol: str, interval: str) -> bool:
+        return (bool(self.api_key) and interval in self.interval_map
+                and len(symbol) == 6 and symbol.isalpha())
+
+    def _fetch(self, symbol: str, start_date: datetime, end_date: datetime,
+               source_interval: str) -> Optional[pd.DataFrame]:
+        from urllib.parse import urlencode
+        from urllib.request import urlopen
+
+        base, quote = symbol[:3], symbol[3:]
+        if base in self.CRYPTO:
+            params = {'function': 'CRYPTO_INTRADAY', 'symbol': base, 'market': quote}
+        else:
+            params = {'function': 'FX_INTRADAY', 'from_symbol': base, 'to_symbol': quote}
+        params.update({'interval': source_interval, 'outputsize': 'full', 'apikey': self.api_key})
+
+        logger.info(f"Fetching {symbol} from Alpha Vantage ({params['function']}, {source_interval})")
+        with urlopen(f"{self.URL}?{urlencode(params)}", timeout=30) as response:
+            payload = json.load(response)
+
+        series_key = next((k for k in payload if k.startswith('Time Series')), None)
+        if series_key is None:
+            message = payload.get('Note') or payload.get('Information') or payload.get('Error Message')
+            logger.warning(f"Alpha Vantage returned no data for {symbol}: {message}")
+            return None
+
+        df = pd.DataFrame.from_dict(payload[series_key], orient='index')
+        df.columns = [c.split('. ', 1)[-1] for c in df.columns]
+        if 'volume' not in df.columns:
+            df['volume'] = 0.0
+        df.index = pd.to_datetime(df.index)
+        df = df.rename_axis('timestamp').reset_index().sort_values('timestamp')
+        return df[(df['timestamp'] >= start_date) & (df['timestamp'] < end_date)]
+
+
+@register_source('local')
+class LocalFileSource(DataSource):
+    """
+    Local CSV/parquet files, for offline runs and tests
+
+    Looks for, in order:
+        {data_dir}/{symbol}_{interval}.parquet
+        {data_dir}/{symbol}_{interval}.csv
+        {data_dir}/symbol={symbol}/timeframe={interval}/  (partitioned dataset)
+    """
+
+    # Already on local disk
+    cacheable = False
+
+    def __init__(self, limits: Optional[SourceLimits] = None, data_dir: str = LOCAL_SOURCE_DIR):
+        """
+        Args:
+            limits: Rate limits (default: none)
+            data_dir: Directory with the files
+        """
+        super().__init__(limits)
+        self.data_dir = Path(data_dir)
+
+    def _path(self, symbol: str, source_interval: str) -> Optional[Path]:
+        candidates = [
+            self.data_dir / f"{symbol}_{source_interval}.parquet",
+            self.data_dir / f"{symbol}_{source_interval}.csv",
+            self.data_dir / f"symbol={symbol}" / f"timeframe={source_interval}"
+        ]
+        return next((p for p in candidates if p.exists()), None)
+
+    def supports(self, symbol: str, interval: str) -> bool:
+        return (interval in self.interval_map
+                and self._path(symbol, self.source_interval(interval)) is not None)
+
+    def _fetch(self, symbol: str, start_date: datetime, end_date: datetime,
+               source_interval: str) -> Optional[pd.DataFrame]:
+        path = self._path(symbol, source_interval)
+        if path is None:
+            return None
+
+        start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        if path.suffix == '.csv':
+            df = pd.read_csv(path, parse_dates=['timestamp'])
+            return df[(df['timestamp'] >= start) & (df['timestamp'] < end)]
+
+        columns = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+        filters = [('timestamp', '>=', start), ('timestamp', '<', end)]
+        return pd.read_parquet(path, columns=columns, filters=filters)
@@ -1,21 +1,102 @@
 """
 Storage module - handles saving data in various formats
+
+Parquet files are read into Arrow tables (memory-mapped). Numeric columns
+can be used as numpy views of the Arrow buffers (column_view) or packed into
+one feature matrix (table_to_matrix) without going through pandas;
+table_to_frame converts to pandas only when a DataFrame is needed.
 """
 import pandas as pd
+import numpy as np
 import os
 import logging
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 logger = logging.getLogger(__name__)
 
+PARQUET_ROW_GROUP_ROWS = 100_000  # Rows per row group in saved parquet files
+
+
+def table_to_frame(table: pa.Table, writable: bool = False) -> pd.DataFrame:
+    """
+    Convert an Arrow table to pandas without doubling memory
+    
+    Columns are not consolidated into 2D blocks, so numeric columns without
+    nulls stay views of the Arrow buffers; the table must not be used
+    afterwards (its buffers are released as they are converted). Those
+    columns are read-only: in-place writes (df.iloc[i, j] = x,
+    inplace=True methods) raise. Pass writable=True for a frame that owns
+    its data, as pd.read_parquet returns.
+    
+    Args:
+        table: Arrow table
+        writable: Copy into writable pandas blocks
+        
+    Returns:
+        DataFrame
+    """
+    if writable:
+        return table.to_pandas()
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def column_view(table: pa.Table, name: str) -> np.ndarray:
+    """
+    Column as a numpy array
+    
+    Zero-copy (read-only view of the Arrow buffer) for single-chunk numeric
+    columns without nulls; otherwise converted (nulls become NaN).
+    
+    Args:
+        table: Arrow table
+        name: Column name
+        
+    Returns:
+        numpy array
+    """
+    column = table.column(name)
+    if column.num_chunks == 1:
+        return column.chunk(0).to_numpy(zero_copy_only=False)
+    return column.to_numpy()
+
+
+def table_to_matrix(table: pa.Table, columns: List[str], dtype=np.float64) -> np.ndarray:
+    """
+    Pack columns into one (rows, columns) Fortran-ordered matrix
+    
+    Each column is copied once, straight from its Arrow buffers into the
+    matrix (no intermediate DataFrame); nulls become NaN. Column j is the
+    contiguous slice matrix[:, j].
+    
+    Args:
+        table: Arrow table
+        columns: Columns to pack
+        dtype: Matrix dtype
+        
+    Returns:
+        numpy array of shape (table.num_rows, len(columns))
+    """
+    matrix = np.empty((table.num_rows, len(columns)), dtype=dtype, order='F')
+    for j, name in enumerate(columns):
+        start = 0
+        for chunk in table.column(name).chunks:
+            matrix[start:start + len(chunk), j] = chunk.to_numpy(zero_copy_only=False)
+            start += len(chunk)
+    return matrix
+
 
 class DataStorage:
     """Handles data storage operations"""
     
-    def __init__(self, output_dir: str = 'data', output_format: str = 'parquet'):
+    def __init__(self, output_dir: str = 'data', output_format: str = 'parquet',
+                 row_group_rows: int = PARQUET_ROW_GROUP_ROWS):
         self.output_dir = output_dir
         self.output_format = output_format
+        self.row_group_rows = row_group_rows
         self._ensure_directory()
     
     def _ensure_directory(self):
@@ -39,7 +120,9 @@ class DataStorage:
         
         try:
             if self.output_format == 'parquet':
-                df.to_parquet(filepath, index=False, compression='snappy')
+                # Bounded row groups let readers skip data by timestamp (see query.py)
+                df.to_parquet(filepath, index=False, compression='snappy',
+                              row_group_size=self.row_group_rows)
             elif self.output_format == 'csv':
                 df.to_csv(filepath, index=False)
             else:
@@ -52,22 +135,151 @@ class DataStorage:
             logger.error(f"Error saving data to {filepath}: {str(e)}")
             raise
     
-    def load_data(self, symbol: str, timeframe: str) -> pd.DataFrame:
-        """Load data from file"""
+    def append_data(self, df: pd.DataFrame, symbol: str, timeframe: str) -> str:
+        """
+        Append rows to a symbol/timeframe file, creating it if needed
+        
+        Rows with a timestamp already in the file replace the stored row.
+        
+        Args:
+            df: DataFrame to append
+            symbol: Trading symbol
+            timeframe: Timeframe string
+            
+        Returns:
+            Path to saved file
+        """
+        filepath = os.path.join(self.output_dir, f"{symbol}_{timeframe}.{self.output_format}")
+        if os.path.exists(filepath):
+            existing = self.load_data(symbol, timeframe)
+            df = pd.concat([existing, df], ignore_index=True)
+            df = df.drop_duplicates(subset=['timestamp'], keep='last')
+            df = df.sort_values('timestamp').reset_index(drop=True)
+        
+        return self.save_data(df, symbol, timeframe)
+    
+    def partition_dir(self, symbol: str, timeframe: str) -> Path:
+        """Directory of a series' appended part files (symbol=X/timeframe=Y)"""
+        return Path(self.output_dir) / f'symbol={symbol}' / f'timeframe={timeframe}'
+    
+    def part_files(self, symbol: str, timeframe: str) -> List[Path]:
+        """Part files of a series in write order"""
+        return sorted(self.partition_dir(symbol, timeframe).glob('part-*.parquet'))
+    
+    def append_part(self, df: pd.DataFrame, symbol: str, timeframe: str) -> str:
+        """
+        Append rows as a new part file without rewriting stored data
+        
+        Each call costs only the rows written. Parts live in the series'
+        partition directory (hive layout, read by load_table and query.py);
+        rows with a timestamp already stored replace it when read, as with
+        append_data. compact() merges the parts into the series file.
+        
+        Args:
+            df: DataFrame to append
+            symbol: Trading symbol
+            timeframe: Timeframe string
+            
+        Returns:
+            Path to the part file
+        """
+        if self.output_format != 'parquet':
+            return self.append_data(df, symbol, timeframe)
+        
+        directory = self.partition_dir(symbol, timeframe)
+        directory.mkdir(parents=True, exist_ok=True)
+        parts = self.part_files(symbol, timeframe)
+        index = int(parts[-1].stem.split('-')[1]) + 1 if parts else 0
+        filepath = directory / f'part-{index:05d}.parquet'
+        
+        # The key columns come from the directory names
+        table = pa.Table.from_pandas(df.drop(columns=['symbol', 'timeframe'], errors='ignore'),
+                                     preserve_index=False)
+        tmp_path = filepath.with_suffix('.tmp')
+        pq.write_table(table, tmp_path, compression='snappy', row_group_size=self.row_group_rows)
+        os.replace(tmp_path, filepath)
+        return str(filepath)
+    
+    def compact(self, symbol: str, timeframe: str) -> Optional[str]:
+        """
+        Merge a series' part files into its {symbol}_{timeframe} file
+        
+        Returns:
+            Path to the series file, or None without parts
+        """
+        parts = self.part_files(symbol, timeframe)
+        if not parts:
+            return None
+        filepath = self.save_data(self.load_data(symbol, timeframe), symbol, timeframe)
+        for part in parts:
+            part.unlink()
+        logger.info(f"Compacted {len(parts)} parts into {filepath}")
+        return filepath
+    
+    def _load_parts(self, symbol: str, timeframe: str, parts: List[Path],
+                    columns: Optional[List[str]]) -> pa.Table:
+        """Part files with their key columns, in write order"""
+        tables = []
+        for part in parts:
+            table = pq.read_table(part, memory_map=True,
+                                  columns=[c for c in columns if c not in ('symbol', 'timeframe')]
+                                  if columns else None)
+            keys = {'symbol': symbol, 'timeframe': timeframe}
+            for position, name in enumerate(['symbol', 'timeframe'], start=1):
+                if columns is None or name in columns:
+                    table = table.add_column(min(position, table.num_columns), name,
+                                             pa.array([keys[name]] * table.num_rows, pa.string()))
+            tables.append(table)
+        return pa.concat_tables(tables, promote_options='permissive')
+    
+    def load_table(self, symbol: str, timeframe: str,
+                   columns: Optional[List[str]] = None) -> pa.Table:
+        """
+        Load a symbol/timeframe file as an Arrow table
+        
+        Parquet files are memory-mapped, so only the requested columns are
+        read and their buffers are backed by the file. Part files written by
+        append_part are included (sorted by timestamp, the last written row
+        wins for a repeated timestamp).
+        
+        Args:
+            symbol: Trading symbol
+            timeframe: Timeframe string
+            columns: Columns to read (None = all)
+            
+        Returns:
+            Arrow table
+        """
         filename = f"{symbol}_{timeframe}.{self.output_format}"
         filepath = os.path.join(self.output_dir, filename)
         
         try:
             if self.output_format == 'parquet':
-                return pd.read_parquet(filepath)
+                parts = self.part_files(symbol, timeframe)
+                if not parts:
+                    return pq.read_table(filepath, columns=columns, memory_map=True)
+                read_columns = columns
+                if columns is not None and 'timestamp' not in columns:
+                    read_columns = ['timestamp'] + list(columns)
+                tables = [pq.read_table(filepath, columns=read_columns, memory_map=True)
+                          ] if os.path.exists(filepath) else []
+                tables.append(self._load_parts(symbol, timeframe, parts, read_columns))
+                table = _latest_by_timestamp(pa.concat_tables(tables, promote_options='permissive'))
+                return table.select(columns) if columns is not None else table
             elif self.output_format == 'csv':
-                return pd.read_csv(filepath, parse_dates=['timestamp'])
+                df = pd.read_csv(filepath, parse_dates=['timestamp'], usecols=columns)
+                return pa.Table.from_pandas(df, preserve_index=False)
             else:
                 raise ValueError(f"Unsupported format: {self.output_format}")
         except Exception as e:
             logger.error(f"Error loading data from {filepath}: {str(e)}")
             raise
     
+    def load_data(self, symbol: str, timeframe: str,
+                  columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Load data from file as a writable DataFrame (see load_table for zero-copy reads)"""
+        return table_to_frame(self.load_table(symbol, timeframe, columns), writable=True)
+    
     def get_saved_files(self) -> List[str]:
         """Get list of all saved data files"""
         if not os.path.exists(self.output_dir):
@@ -78,23 +290,54 @@ class DataStorage:
         return sorted(files)
     
     def get_file_info(self, filepath: str) -> Dict:
-        """Get information about a saved file"""
+        """
+        Get information about a saved file
+        
+        Parquet files are described from the footer only (row count, columns
+        and the timestamp range from row group statistics); no data is read.
+        """
         try:
             stat = os.stat(filepath)
+            info = {
+                'filepath': filepath,
+                'size_mb': round(stat.st_size / (1024 * 1024), 2)
+            }
             
-            # Load and get row count
             if self.output_format == 'parquet':
-                df = pd.read_parquet(filepath)
+                metadata = pq.ParquetFile(filepath).metadata
+                info.update(rows=metadata.num_rows, columns=metadata.num_columns,
+                            row_groups=metadata.num_row_groups,
+                            date_range=_timestamp_range(metadata))
             else:
                 df = pd.read_csv(filepath)
+                info.update(rows=len(df), columns=len(df.columns),
+                            date_range=f"{df['timestamp'].min()} to {df['timestamp'].max()}"
+                            if 'timestamp' in df.columns else 'N/A')
             
-            return {
-                'filepath': filepath,
-                'size_mb': round(stat.st_size / (1024 * 1024), 2),
-                'rows': len(df),
-                'columns': len(df.columns),
-                'date_range': f"{df['timestamp'].min()} to {df['timestamp'].max()}" if 'timestamp' in df.columns else 'N/A'
-            }
+            return info
         except Exception as e:
             logger.error(f"Error getting file info: {str(e)}")
             return {}
+
+
+def _latest_by_timestamp(table: pa.Table) -> pa.Table:
+    """Sort by timestamp keeping the last row of each repeated timestamp"""
+    timestamps = column_view(table, 'timestamp')
+    order = np.argsort(timestamps, kind='stable')
+    ordered = timestamps[order]
+    keep = np.ones(len(order), dtype=bool)
+    keep[:-1] = ordered[1:] != ordered[:-1]
+    return table.take(pa.array(order[keep]))
+
+
+def _timestamp_range(metadata: pq.FileMetaData) -> str:
+    """Timestamp range from row group statistics ('N/A' if unavailable)"""
+    names = [metadata.schema.column(i).name for i in range(metadata.num_columns)]
+    if 'timestamp' not in names or metadata.num_row_groups == 0:
+        return 'N/A'
+    
+    column = names.index('timestamp')
+    stats = [metadata.row_group(i).column(column).statistics for i in range(metadata.num_row_groups)]
+    if any(s is None or not s.has_min_max for s in stats):
+        return 'N/A'
+    return f"{pd.Timestamp(min(s.min for s in stats))} to {pd.Timestamp(max(s.max for s in stats))}"
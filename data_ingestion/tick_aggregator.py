@@ -0,0 +1,395 @@
+"""
+Tick-to-candle aggregation
+
+Builds OHLCV+spread candles for every configured timeframe at once from a
+tick stream or a tick file. Each forming candle is a fixed set of scalars, so
+memory per open candle is constant regardless of how many ticks it receives.
+Candles are aligned to the symbol's session open (market_calendar), like
+DataProcessor.resample_to_4h: FX 4h candles start at 22/02/06 UTC.
+
+Out-of-order and late ticks are handled with a per-symbol watermark:
+    watermark = latest tick time seen - allowed_lateness
+
+A candle is finished once its end time is at or before the watermark. Ticks
+that arrive out of order but before their candle is finished are merged
+(open/close follow tick time, not arrival order); ticks for a candle that has
+already been emitted are dropped and counted.
+
+Finished candles are rows with the processor's output columns, ready for
+DataStorage (see CandleStorageWriter) or the live loop (see
+live_runner.TickCandleFeed).
+
+Usage:
+    python tick_aggregator.py --input ticks_EURUSD.parquet --symbol EURUSD
+"""
+import argparse
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    TIMEFRAMES, OUTPUT_DIR, OUTPUT_FORMAT, SYMBOL_CALENDARS,
+    TICK_ALLOWED_LATENESS_SECONDS, TICK_FLUSH_CANDLES
+)
+from market_calendar import get_calendar
+from processor import OUTPUT_COLUMNS
+from storage import DataStorage
+
+logger = logging.getLogger(__name__)
+
+NS_PER_SECOND = 1_000_000_000
+
+Timestamp = Union[int, float, datetime, pd.Timestamp, np.datetime64]
+
+
+def to_epoch_ns(timestamp: Timestamp) -> int:
+    """
+    Naive-UTC epoch nanoseconds
+
+    Args:
+        timestamp: datetime/Timestamp (naive = UTC), datetime64, or epoch
+            seconds (int or float)
+    """
+    if isinstance(timestamp, (int, np.integer)):
+        return int(timestamp) * NS_PER_SECOND
+    if isinstance(timestamp, (float, np.floating)):
+        return int(round(timestamp * NS_PER_SECOND))
+    ts = pd.Timestamp(timestamp)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert('UTC').tz_localize(None)
+    return ts.value
+
+
+@dataclass
+class Tick:
+    """A single trade or quote"""
+    symbol: str
+    timestamp: Timestamp
+    price: float
+    volume: float = 0.0
+
+
+@dataclass
+class FormingCandle:
+    """Running OHLCV state of one open candle"""
+    start_ns: int
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    first_ns: int
+    last_ns: int
+
+    def add(self, ts_ns: int, price: float, volume: float):
+        """Merge a tick (in any order)"""
+        if price > self.high:
+            self.high = price
+        if price < self.low:
+            self.low = price
+        if ts_ns < self.first_ns:
+            self.first_ns, self.open = ts_ns, price
+        if ts_ns >= self.last_ns:
+            self.last_ns, self.close = ts_ns, price
+        self.volume += volume
+
+    def to_row(self, symbol: str, timeframe: str) -> Dict:
+        """Finished candle as an output row"""
+        return {
+            'timestamp': pd.Timestamp(self.start_ns),
+            'symbol': symbol,
+            'timeframe': timeframe,
+            'open': self.open,
+            'high': self.high,
+            'low': self.low,
+            'close': self.close,
+            'volume': self.volume,
+            'spread': round((self.high - self.low) / self.close * 100, 4)
+        }
+
+
+class TickAggregator:
+    """Aggregates ticks into candles of several timeframes simultaneously"""
+
+    def __init__(self, timeframes: Optional[Dict[str, int]] = None,
+                 allowed_lateness: float = TICK_ALLOWED_LATENESS_SECONDS,
+                 on_candle: Optional[Callable[[Dict], None]] = None,
+                 symbol_calendars: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            timeframes: {timeframe: interval minutes} (default: config.TIMEFRAMES)
+            allowed_lateness: Seconds a tick may lag the latest tick of its
+                symbol and still be merged
+            on_candle: Called with every finished candle row
+            symbol_calendars: {symbol: calendar name} aligning candle starts to
+                the session open (default: config.SYMBOL_CALENDARS)
+        """
+        if allowed_lateness < 0:
+            raise ValueError(f"allowed_lateness must be >= 0, got {allowed_lateness}")
+
+        self.timeframes = timeframes or TIMEFRAMES
+        self.steps = {tf: minutes * 60 * NS_PER_SECOND for tf, minutes in self.timeframes.items()}
+        self.lateness_ns = int(allowed_lateness * NS_PER_SECOND)
+        self.on_candle = on_candle
+        self.symbol_calendars = SYMBOL_CALENDARS if symbol_calendars is None else symbol_calendars
+
+        # symbol -> timeframe -> candle start offset from the epoch grid
+        self.offsets: Dict[str, Dict[str, int]] = {}
+
+        # symbol -> timeframe -> {start_ns: FormingCandle}; at most
+        # ceil(lateness / interval) + 1 open candles per timeframe
+        self.forming: Dict[str, Dict[str, Dict[int, FormingCandle]]] = {}
+        # symbol -> timeframe -> end of the last emitted candle
+        self.emitted_until: Dict[str, Dict[str, int]] = {}
+        self.max_seen_ns: Dict[str, int] = {}
+
+        self.stats = {'ticks': 0, 'late_ticks_dropped': 0, 'invalid_ticks': 0, 'candles': 0}
+
+    def add_tick(self, symbol: str, timestamp: Timestamp, price: float,
+                 volume: float = 0.0) -> List[Dict]:
+        """
+        Add a tick
+
+        Args:
+            symbol: Trading symbol
+            timestamp: Tick time (see to_epoch_ns)
+            price: Trade price or mid quote
+            volume: Traded volume
+
+        Returns:
+            Candles finished by this tick (all timeframes, oldest first)
+        """
+        return self.add_tick_ns(symbol, to_epoch_ns(timestamp), price, volume)
+
+    def add_tick_ns(self, symbol: str, ts_ns: int, price: float,
+                    volume: float = 0.0) -> List[Dict]:
+        """add_tick with an epoch-nanosecond timestamp (fast path for files)"""
+        self.stats['ticks'] += 1
+        if not price > 0:
+            self.stats['invalid_ticks'] += 1
+            return []
+
+        forming = self.forming.get(symbol)
+        if forming is None:
+            forming = self.forming[symbol] = {tf: {} for tf in self.steps}
+            self.emitted_until[symbol] = dict.fromkeys(self.steps, -1 << 62)
+            session_open_ns = get_calendar(symbol, self.symbol_calendars).session_open * 60 * NS_PER_SECOND
+            self.offsets[symbol] = {tf: session_open_ns % step for tf, step in self.steps.items()}
+
+        # A tick whose candle was already emitted in any timeframe is dropped
+        # everywhere, so all timeframes are built from the same ticks
+        emitted_until = self.emitted_until[symbol]
+        if any(ts_ns < end for end in emitted_until.values()):
+            self.stats['late_ticks_dropped'] += 1
+            return []
+
+        offsets = self.offsets[symbol]
+        for tf, step in self.steps.items():
+            start = ts_ns - (ts_ns - offsets[tf]) % step
+            candle = forming[tf].get(start)
+            if candle is None:
+                forming[tf][start] = FormingCandle(start, price, price, price, price,
+                                                   volume, ts_ns, ts_ns)
+            else:
+                candle.add(ts_ns, price, volume)
+
+        if ts_ns > self.max_seen_ns.get(symbol, -1 << 62):
+            self.max_seen_ns[symbol] = ts_ns
+            return self._emit(symbol, ts_ns - self.lateness_ns)
+        return []
+
+    def advance(self, timestamp: Timestamp, symbol: Optional[str] = None) -> List[Dict]:
+        """
+        Move the clock forward without a tick (e.g. on a heartbeat), so
+        candles of quiet symbols still close
+
+        Args:
+            timestamp: Current time
+            symbol: Symbol to advance (default: all)
+
+        Returns:
+            Finished candles
+        """
+        ts_ns = to_epoch_ns(timestamp)
+        finished = []
+        for sym in ([symbol] if symbol else list(self.forming)):
+            if sym not in self.forming:
+                continue
+            if ts_ns > self.max_seen_ns.get(sym, -1 << 62):
+                self.max_seen_ns[sym] = ts_ns
+                finished.extend(self._emit(sym, ts_ns - self.lateness_ns))
+        return finished
+
+    def flush(self) -> List[Dict]:
+        """Finish every open candle (end of stream)"""
+        finished = []
+        for symbol in list(self.forming):
+            finished.extend(self._emit(symbol, None))
+        return finished
+
+    def _emit(self, symbol: str, watermark: Optional[int]) -> List[Dict]:
+        """Finish candles of a symbol ending at or before the watermark (None = all)"""
+        finished = []
+        for tf, candles in self.forming[symbol].items():
+            if not candles:
+                continue
+            step = self.steps[tf]
+            ready = sorted(start for start in candles
+                           if watermark is None or start + step <= watermark)
+            for start in ready:
+                finished.append(candles.pop(start).to_row(symbol, tf))
+                self.emitted_until[symbol][tf] = start + step
+
+        if finished:
+            finished.sort(key=lambda row: (row['timestamp'], self.steps[row['timeframe']]))
+            self.stats['candles'] += len(finished)
+            if self.on_candle is not None:
+                for row in finished:
+                    self.on_candle(row)
+        return finished
+
+    def open_candles(self) -> int:
+        """Number of candles currently forming"""
+        return sum(len(c) for tfs in self.forming.values() for c in tfs.values())
+
+
+class CandleStorageWriter:
+    """
+    Buffers finished candles and appends them to DataStorage
+
+    Use as the aggregator's on_candle callback; candles are written per
+    symbol/timeframe every flush_candles candles and on close(). Each flush
+    is a new part file (DataStorage.append_part), so its cost does not grow
+    with the stored series; close(compact=True) merges the parts into the
+    series files.
+    """
+
+    def __init__(self, storage: Optional[DataStorage] = None, flush_candles: int = TICK_FLUSH_CANDLES):
+        """
+        Args:
+            storage: Target storage (default: DataStorage(OUTPUT_DIR, OUTPUT_FORMAT))
+            flush_candles: Buffered candles per symbol/timeframe before writing
+        """
+        self.storage = storage or DataStorage(output_dir=OUTPUT_DIR, output_format=OUTPUT_FORMAT)
+        self.flush_candles = flush_candles
+        self.buffers: Dict[tuple, List[Dict]] = {}
+        self.written: Dict[tuple, int] = {}
+
+    def __call__(self, row: Dict):
+        key = (row['symbol'], row['timeframe'])
+        buffer = self.buffers.setdefault(key, [])
+        buffer.append(row)
+        if len(buffer) >= self.flush_candles:
+            self._flush(key)
+
+    def _flush(self, key: tuple):
+        rows = self.buffers.pop(key, None)
+        if not rows:
+            return
+        df = pd.DataFrame.from_records(rows, columns=OUTPUT_COLUMNS)
+        self.storage.append_part(df, *key)
+        self.written[key] = self.written.get(key, 0) + len(rows)
+
+    def close(self, compact: bool = False):
+        """
+        Write all buffered candles
+
+        Args:
+            compact: Merge each written series' parts into its series file
+        """
+        for key in list(self.buffers):
+            self._flush(key)
+        if compact:
+            for key in self.written:
+                self.storage.compact(*key)
+
+
+def read_tick_file(path: str, chunk_rows: int = 1_000_000) -> Iterator[pd.DataFrame]:
+    """
+    Read a tick file (parquet or csv) in chunks
+
+    Expected columns: timestamp, and price or bid/ask (mid is used);
+    volume is optional.
+
+    Yields:
+        DataFrames with timestamp (datetime64[ns], naive UTC), price and volume
+    """
+    path = Path(path)
+    if path.suffix == '.parquet':
+        import pyarrow.parquet as pq
+        chunks = (b.to_pandas() for b in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows))
+    else:
+        chunks = pd.read_csv(path, chunksize=chunk_rows)
+
+    for chunk in chunks:
+        timestamps = pd.to_datetime(chunk['timestamp'], utc=True).dt.tz_localize(None)
+        if 'price' in chunk.columns:
+            price = chunk['price'].astype(float)
+        else:
+            price = (chunk['bid'].astype(float) + chunk['ask'].astype(float)) / 2
+        volume = chunk['volume'].astype(float).fillna(0) if 'volume' in chunk.columns else 0.0
+        yield pd.DataFrame({'timestamp': timestamps, 'price': price, 'volume': volume})
+
+
+def aggregate_tick_file(path: str, symbol: str, aggregator: TickAggregator,
+                        chunk_rows: int = 1_000_000) -> Dict:
+    """
+    Feed a tick file through an aggregator and flush it at the end
+
+    Ticks are processed in file order, so out-of-order rows are subject to
+    the same watermark as a live stream.
+
+    Returns:
+        Aggregator statistics
+    """
+    for chunk in read_tick_file(path, chunk_rows):
+        timestamps = chunk['timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        for ts_ns, price, volume in zip(timestamps.tolist(), chunk['price'].tolist(),
+                                        chunk['volume'].tolist()):
+            aggregator.add_tick_ns(symbol, ts_ns, price, volume)
+    aggregator.flush()
+    return dict(aggregator.stats)
+
+
+def main():
+    """Aggregate a tick file into candles for all timeframes"""
+    parser = argparse.ArgumentParser(description='Aggregate ticks into multi-timeframe candles')
+    parser.add_argument('--input', required=True, help='Tick file (parquet or csv)')
+    parser.add_argument('--symbol', required=True)
+    parser.add_argument('--timeframes', nargs='+', default=list(TIMEFRAMES),
+                        help='Timeframes to build (default: all configured)')
+    parser.add_argument('--lateness', type=float, default=TICK_ALLOWED_LATENESS_SECONDS,
+                        help='Allowed tick lateness in seconds')
+    parser.add_argument('--output-dir', default=OUTPUT_DIR)
+    parser.add_argument('--compact', action='store_true',
+                        help='Merge the appended part files into {symbol}_{timeframe} files at the end')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    writer = CandleStorageWriter(DataStorage(output_dir=args.output_dir, output_format=OUTPUT_FORMAT))
+    aggregator = TickAggregator({tf: TIMEFRAMES[tf] for tf in args.timeframes},
+                                allowed_lateness=args.lateness, on_candle=writer)
+
+    started = datetime.now()
+    stats = aggregate_tick_file(args.input, args.symbol, aggregator)
+    writer.close(compact=args.compact)
+    elapsed = (datetime.now() - started).total_seconds()
+
+    logger.info("\n" + "="*80)
+    logger.info("TICK AGGREGATION SUMMARY")
+    logger.info("="*80)
+    logger.info(f"Ticks:              {stats['ticks']:,} ({stats['ticks'] / max(elapsed, 1e-9):,.0f}/sec)")
+    logger.info(f"Late ticks dropped: {stats['late_ticks_dropped']:,}")
+    logger.info(f"Invalid ticks:      {stats['invalid_ticks']:,}")
+    for (symbol, timeframe), rows in sorted(writer.written.items(), key=lambda x: TIMEFRAMES[x[0][1]]):
+        logger.info(f"  ✓ {symbol} {timeframe}: {rows:,} candles")
+
+
+if __name__ == '__main__':
+    main()
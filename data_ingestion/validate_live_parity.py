@@ -0,0 +1,132 @@
+"""
+Check that a model trained with HTF columns is served identically live
+
+Trains small direction/volatility/no-trade models on FeatureEngineeringPipeline
+features that include the htf_* columns, normalized with the pipeline's
+scaler as in training, then replays the same candles through the live path
+(replay_simulator.run_replay) and requires every live signal to match the
+batch pipeline with every probability within the parity tolerance.
+
+Features that look ahead in batch (swing points, order blocks) are not used:
+live can never reproduce them.
+
+Usage:
+    python validate_live_parity.py
+    python validate_live_parity.py --symbols BTCUSD --timeframe 1h --limit 2000
+"""
+import argparse
+import logging
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+import pandas as pd
+
+from config import LIVE_WINDOW_CANDLES
+from live_runner import ParquetReplayFeed, TradingDecisionEngine, load_feature_pipeline
+from replay_simulator import PARITY_TOLERANCE, print_report, run_replay
+
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+logger = logging.getLogger(__name__)
+
+# Single-timeframe features without lookahead; every HTF column is added
+BASE_FEATURES = ['rsi', 'macd_histogram', 'atr_pct', 'bb_position',
+                 'ema_50_distance', 'trend_score', 'stoch_k', 'roc']
+
+
+def training_set(candles: Dict[str, pd.DataFrame], timeframe: str,
+                 feature_columns: List[str]) -> tuple:
+    """
+    Batch features with HTF columns, normalized as in training, plus labels
+
+    Args:
+        candles: {symbol: OHLCV DataFrame}
+        timeframe: Timeframe of the candles
+        feature_columns: Model input columns
+
+    Returns:
+        (normalized feature DataFrame, {model: labels}, fitted scaler)
+    """
+    pipeline = load_feature_pipeline().FeatureEngineeringPipeline(columns=feature_columns)
+
+    frames = []
+    for symbol, df in candles.items():
+        features = pipeline.engineer_features(df, symbol, timeframe)
+        features = pipeline.add_htf_features({timeframe: features}, {timeframe: df}, symbol)[timeframe]
+        next_return = features['close'].pct_change().shift(-1)
+        frames.append(features.assign(next_return=next_return).iloc[:-1])
+    combined = pd.concat(frames, ignore_index=True)
+
+    # Simple next-candle targets: the check is about serving, not accuracy
+    labels = {
+        'direction': (combined['next_return'] > 0).astype(int),
+        'volatility': (combined['next_return'].abs() > combined['next_return'].abs().median()).astype(int),
+        'notrade': (combined['next_return'].abs() < combined['next_return'].abs().quantile(0.25)).astype(int)
+    }
+
+    normalized = pipeline.normalize_features(combined.drop(columns=['next_return']), fit=True)
+    return normalized[feature_columns], labels, pipeline.scaler
+
+
+def validate(symbols: List[str], timeframe: str, limit: int, window: int, warmup: int,
+             tolerance: float) -> bool:
+    """Train with HTF columns, replay live and compare; returns True if parity holds"""
+    import joblib
+    from sklearn.linear_model import LogisticRegression
+
+    feed = ParquetReplayFeed(symbols, timeframe, limit=limit)
+    if not feed.frames:
+        logger.error(f"✗ No {timeframe} data for {', '.join(symbols)}")
+        return False
+
+    htf_columns = load_feature_pipeline().FeatureEngineeringPipeline().mtf_aligner.output_columns()
+    feature_columns = BASE_FEATURES + htf_columns
+    logger.info(f"Training on {len(feature_columns)} features ({len(htf_columns)} HTF)...")
+    X, labels, scaler = training_set(feed.frames, timeframe, feature_columns)
+
+    with tempfile.TemporaryDirectory() as models_dir:
+        paths = {}
+        for name, y in labels.items():
+            paths[name] = str(Path(models_dir) / f'{name}_model_check.pkl')
+            joblib.dump(LogisticRegression(max_iter=1000).fit(X, y), paths[name])
+
+        engine = TradingDecisionEngine(paths['direction'], paths['volatility'], paths['notrade'])
+        report = run_replay(engine, scaler, list(feed.frames), timeframe, limit=limit,
+                            window=window, warmup=warmup, tolerance=tolerance)
+
+    print_report(report)
+
+    ok = True
+    for symbol, result in report['symbols'].items():
+        parity = result.get('parity', {})
+        if not parity.get('compared'):
+            logger.error(f"✗ {symbol}: no live signals to compare (raise --limit or lower --warmup)")
+            ok = False
+        elif not parity['passed']:
+            ok = False
+    return ok
+
+
+def main():
+    """Run the HTF live parity check"""
+    parser = argparse.ArgumentParser(description='Train with HTF columns and check live/batch parity')
+    parser.add_argument('--symbols', nargs='+', default=['BTCUSD', 'ETHUSD'])
+    parser.add_argument('--timeframe', default='1h')
+    parser.add_argument('--limit', type=int, default=1200, help='Candles per symbol')
+    parser.add_argument('--window', type=int, default=LIVE_WINDOW_CANDLES)
+    parser.add_argument('--warmup', type=int, default=100,
+                        help='Live warmup (candles of the timeframe and of each HTF)')
+    parser.add_argument('--tolerance', type=float, default=PARITY_TOLERANCE)
+    args = parser.parse_args()
+
+    ok = validate(args.symbols, args.timeframe, args.limit, args.window, args.warmup, args.tolerance)
+
+    logger.info("\n" + "="*80)
+    logger.info("✓ Live signals match the batch pipeline with HTF features" if ok
+                else "✗ Live/batch parity failed")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,6 +2,7 @@
 System validation script - verify data ingestion system is working correctly
 """
 import pandas as pd
+import pyarrow.parquet as pq
 from pathlib import Path
 import sys
 import os
@@ -124,10 +125,10 @@ def validate_system():
     
     for file in sorted(data_files):
         try:
-            df_temp = pd.read_parquet(file)
+            rows = pq.ParquetFile(file).metadata.num_rows  # footer only
             size_mb = file.stat().st_size / (1024 * 1024)
-            print(f"{file.name:<30} {len(df_temp):>15,} {size_mb:>11.2f}")
-            total_rows += len(df_temp)
+            print(f"{file.name:<30} {rows:>15,} {size_mb:>11.2f}")
+            total_rows += rows
             total_size += size_mb
         except:
             pass
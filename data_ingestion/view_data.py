@@ -6,18 +6,23 @@ import sys
 from pathlib import Path
 
 from storage import DataStorage
+from query import query
 from config import OUTPUT_DIR, OUTPUT_FORMAT
 
 
-def view_file(symbol: str, timeframe: str):
-    """View a specific data file"""
+def view_file(symbol: str, timeframe: str, start: str = None, end: str = None):
+    """View a specific data file (optionally only rows in [start, end))"""
     storage = DataStorage(output_dir=OUTPUT_DIR, output_format=OUTPUT_FORMAT)
     
     try:
-        df = storage.load_data(symbol, timeframe)
+        if start or end:
+            # Only the row groups overlapping the range are read
+            df = query([symbol], [timeframe], start=start, end=end)
+        else:
+            df = storage.load_data(symbol, timeframe)
         
         print("="*80)
-        print(f"DATA PREVIEW: {symbol} {timeframe}")
+        print(f"DATA PREVIEW: {symbol} {timeframe}" + (f" [{start or '...'} → {end or '...'})" if start or end else ''))
         print("="*80)
         print(f"\nTotal Rows: {len(df):,}")
         print(f"Date Range: {df['timestamp'].min()} to {df['timestamp'].max()}")
@@ -97,17 +102,17 @@ def list_all_files():
         print(f"{file:<30} {info.get('rows', 0):>15,} {info.get('size_mb', 0):>9.2f}MB {info.get('date_range', 'N/A'):<40}")
     
     print("="*80)
-    print("\nUsage: python view_data.py <symbol> <timeframe>")
-    print("Example: python view_data.py BTCUSD 1h")
+    print("\nUsage: python view_data.py <symbol> <timeframe> [start] [end]")
+    print("Example: python view_data.py BTCUSD 1h 2025-06-01 2025-07-01")
     print("="*80)
 
 
 def main():
     """Main entry point"""
-    if len(sys.argv) == 3:
+    if 3 <= len(sys.argv) <= 5:
         symbol = sys.argv[1].upper()
         timeframe = sys.argv[2].lower()
-        view_file(symbol, timeframe)
+        view_file(symbol, timeframe, *sys.argv[3:])
     else:
         list_all_files()
 